@@ -132,7 +132,7 @@ import socket
 
 from requests.exceptions import ConnectionError, HTTPError, Timeout
 from requests.auth import AuthBase
-from .compat import USING_PYTHON2, expanduser
+from .compat import USING_PYTHON2, expanduser, lazy_module_attributes
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -598,6 +598,13 @@ def _initialize(suppress_warning=False):
     if os.path.exists(_UPGRADE_NOTIFY) and os.path.getmtime(_UPGRADE_NOTIFY) > time.time() - 86400: # 24 hours
         _UPGRADE_NOTIFY = False
 
+    # Discard the settings of any previous call, which may have been made
+    # with a different environment
+    global SECURITY_CONTEXT, AUTH_HELPER, JOB_ID, WORKSPACE_ID, PROJECT_CONTEXT_ID
+    SECURITY_CONTEXT, AUTH_HELPER = None, None
+    JOB_ID, WORKSPACE_ID, PROJECT_CONTEXT_ID = None, None, None
+    set_api_server_info(host=DEFAULT_APISERVER_HOST, port=DEFAULT_APISERVER_PORT, protocol=DEFAULT_APISERVER_PROTOCOL)
+
     env_vars = get_env(suppress_warning)
     for var in env_vars:
         if env_vars[var] is not None:
@@ -623,6 +630,13 @@ def _initialize(suppress_warning=False):
 
 _initialize()
 
-from .bindings import *
-from .dxlog import DXLogHandler
-from .utils.exec_utils import run, entry_point
+# The bindings (everything in dxpy.bindings is also available from
+# dxpy), the log handler and the app helpers are only imported when they
+# are first used, which makes "import dxpy" much faster for programs
+# that only use some of them (e.g. only dxpy.api).
+lazy_module_attributes(__name__,
+                       attributes={'DXLogHandler': 'dxpy.dxlog',
+                                   'run': 'dxpy.utils.exec_utils',
+                                   'entry_point': 'dxpy.utils.exec_utils'},
+                       submodules=['api', 'bindings', 'cli', 'dxlog'],
+                       reexported_modules=['dxpy.bindings'])
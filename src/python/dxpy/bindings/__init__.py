@@ -25,6 +25,7 @@ from __future__ import (print_function, unicode_literals)
 import time, copy, re
 
 import dxpy.api
+from ..compat import lazy_module_attributes
 from ..exceptions import (DXError, DXAPIError, DXFileError, DXGTableError, DXSearchError, DXAppletError,
                           DXJobFailureError, AppError, AppInternalError, DXCLIError)
 
@@ -268,6 +269,7 @@ class DXDataObject(DXObject):
         data container is used).
 
         '''
+        from .dxdataobject_functions import is_dxlink, get_dxlink_ids
         if is_dxlink(dxid):
             dxid, project_from_link = get_dxlink_ids(dxid)
             if project is None:
@@ -295,12 +297,14 @@ class DXDataObject(DXObject):
 
         return self._proj
 
-    def describe(self, incl_properties=False, incl_details=False, **kwargs):
+    def describe(self, incl_properties=False, incl_details=False, fields=None, **kwargs):
         """
         :param incl_properties: If true, includes the properties of the object in the output
         :type incl_properties: boolean
         :param incl_details: If true, includes the details of the object in the output
         :type incl_details: boolean
+        :param fields: Hash where the keys are field names that should be returned, and values should be set to True (default is that all fields are returned); cannot be provided with *incl_properties* or *incl_details* (request the fields "properties" and "details" instead)
+        :type fields: dict
         :returns: Description of the remote object
         :rtype: dict
 
@@ -327,7 +331,12 @@ class DXDataObject(DXObject):
                 _class=self._class)
             )
 
-        describe_input = dict(properties=incl_properties, details=incl_details)
+        if fields is not None:
+            if incl_properties or incl_details:
+                raise DXError('DXDataObject.describe: cannot provide fields with incl_properties or incl_details')
+            describe_input = dict(fields=fields)
+        else:
+            describe_input = dict(properties=incl_properties, details=incl_details)
         if self._proj is not None:
             describe_input["project"] = self._proj
 
@@ -616,18 +625,28 @@ class DXDataObject(DXObject):
             time.sleep(2)
             elapsed += 2
 
-from .dxfile import DXFile, DXFILE_HTTP_THREADS, DEFAULT_BUFFER_SIZE
-from .dxfile_functions import open_dxfile, new_dxfile, download_dxfile, upload_local_file, upload_string
-from .dxgtable import DXGTable, NULL, DXGTABLE_HTTP_THREADS
-from .dxgtable_functions import open_dxgtable, new_dxgtable
-from .dxrecord import DXRecord, new_dxrecord
-from .dxproject import DXContainer, DXProject
-from .dxjob import DXJob, new_dxjob
-from .dxanalysis import DXAnalysis
-from .dxapplet import DXExecutable, DXApplet
-from .dxapp import DXApp
-from .dxworkflow import DXWorkflow, new_dxworkflow
-from .auth import user_info, whoami
-from .dxdataobject_functions import dxlink, is_dxlink, get_dxlink_ids, get_handler, describe, get_details, remove
-from .search import (find_data_objects, find_executions, find_jobs, find_analyses, find_projects, find_apps,
-                     find_one_data_object, find_one_project, find_one_app)
+# The handlers and functions defined in the submodules are only imported
+# when they are first used
+_submodule_attributes = {
+    'dxfile': ['DXFile', 'DXFILE_HTTP_THREADS', 'DEFAULT_BUFFER_SIZE'],
+    'dxfile_functions': ['open_dxfile', 'new_dxfile', 'download_dxfile', 'upload_local_file', 'upload_string'],
+    'dxgtable': ['DXGTable', 'NULL', 'DXGTABLE_HTTP_THREADS'],
+    'dxgtable_functions': ['open_dxgtable', 'new_dxgtable'],
+    'dxrecord': ['DXRecord', 'new_dxrecord'],
+    'dxproject': ['DXContainer', 'DXProject'],
+    'dxjob': ['DXJob', 'new_dxjob'],
+    'dxanalysis': ['DXAnalysis'],
+    'dxapplet': ['DXExecutable', 'DXApplet'],
+    'dxapp': ['DXApp'],
+    'dxworkflow': ['DXWorkflow', 'new_dxworkflow'],
+    'auth': ['user_info', 'whoami'],
+    'dxdataobject_functions': ['dxlink', 'is_dxlink', 'get_dxlink_ids', 'get_handler', 'describe', 'get_details',
+                               'remove'],
+    'search': ['find_data_objects', 'find_executions', 'find_jobs', 'find_analyses', 'find_projects', 'find_apps',
+               'find_one_data_object', 'find_one_project', 'find_one_app']
+}
+
+lazy_module_attributes(__name__,
+                       attributes={name: __name__ + '.' + submodule
+                                   for submodule, names in _submodule_attributes.items() for name in names},
+                       submodules=_submodule_attributes.keys())
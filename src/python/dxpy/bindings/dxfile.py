@@ -117,6 +117,7 @@ class DXFile(DXDataObject):
         self._write_bufsize = write_buffer_size
 
         self._download_url, self._download_url_headers, self._download_url_expires = None, None, None
+        self._download_url_args = None
         self._request_iterator, self._response_iterator = None, None
         self._http_threadpool_futures = set()
 
@@ -224,6 +225,8 @@ class DXFile(DXDataObject):
         self._file_length = None
         self._cur_part = 1
         self._num_uploaded_parts = 0
+        self._download_url, self._download_url_headers, self._download_url_expires = None, None, None
+        self._download_url_args = None
 
     def seek(self, offset, from_what=os.SEEK_SET):
         '''
@@ -519,12 +522,15 @@ class DXFile(DXDataObject):
             args["filename"] = filename
         if project is not None:
             args["project"] = project
-        if self._download_url is None or self._download_url_expires > time.time():
+        # The URL is only reused for the same arguments (e.g. a
+        # preauthenticated URL does not come with headers)
+        if self._download_url is None or self._download_url_args != args or self._download_url_expires < time.time():
             # logging.debug("Download URL unset or expired, requesting a new one")
             resp = dxpy.api.file_download(self._dxid, args, **kwargs)
             self._download_url = resp["url"]
             self._download_url_headers = resp.get("headers", {})
             self._download_url_expires = time.time() + duration - 60 # Try to account for drift
+            self._download_url_args = args
         return self._download_url, self._download_url_headers
 
     def _generate_read_requests(self, start_pos=0, end_pos=None, **kwargs):
@@ -94,10 +94,33 @@ class DXGTable(DXDataObject):
     _http_threadpool = None
     _http_threadpool_size = DXGTABLE_HTTP_THREADS
 
+    _row_cache = None
+
     @classmethod
     def set_http_threadpool_size(cls, num_threads):
         cls._http_threadpool_size = num_threads
 
+    @classmethod
+    def set_row_cache(cls, row_cache):
+        '''
+        :param row_cache: Cache to use for the rows of closed GTables, or None to disable caching
+        :type row_cache: :class:`~dxpy.utils.row_cache.GTableRowCache`
+
+        Sets the cache shared by all DXGTable handlers in this process.
+        When a cache is set, pages of rows read from closed GTables with
+        :meth:`get_rows` (and hence :meth:`iterate_rows` and
+        :meth:`iterate_query_rows`) are served from the cache when the
+        same table, columns, row range and query have been requested
+        before.
+
+        Example::
+
+            from dxpy.utils.row_cache import GTableRowCache
+            dxpy.DXGTable.set_row_cache(GTableRowCache(max_bytes=1024*1024*512, cache_dir="/tmp/gtable_rows"))
+
+        '''
+        cls._row_cache = row_cache
+
     @classmethod
     def _ensure_http_threadpool(cls):
         if cls._http_threadpool is None:
@@ -285,7 +308,32 @@ class DXGTable(DXDataObject):
         if limit is not None:
             get_rows_params["limit"] = limit
 
-        return dxpy.api.gtable_get(self._dxid, get_rows_params, always_retry=True, **kwargs)
+        row_cache = DXGTable._row_cache
+        if row_cache is None or not self._is_closed(row_cache, **kwargs):
+            return dxpy.api.gtable_get(self._dxid, get_rows_params, always_retry=True, **kwargs)
+
+        cache_key = row_cache.make_key(self._dxid, columns=columns, starting=starting, limit=limit, query=query)
+        resp = row_cache.get(cache_key)
+        if resp is None:
+            resp = dxpy.api.gtable_get(self._dxid, get_rows_params, always_retry=True, **kwargs)
+            row_cache.put(cache_key, resp)
+        return resp
+
+    def _is_closed(self, row_cache, **kwargs):
+        # Only closed GTables are immutable, so only their rows may be
+        # cached. Once a table is known to be closed, it is recorded in
+        # the cache so other handlers need not describe it again. A
+        # table found to be open is not described again by this handler
+        # (which would double the API calls made to read it), so its
+        # rows are only cached once it is described again.
+        if row_cache.is_known_closed(self._dxid):
+            return True
+        if 'state' not in self._desc:
+            self.describe(**kwargs)
+        if self._desc.get('state') == 'closed':
+            row_cache.mark_closed(self._dxid)
+            return True
+        return False
 
     def get_columns(self, **kwargs):
         '''
@@ -393,9 +441,144 @@ class DXGTable(DXDataObject):
                     returned += 1
                     yield row
 
+    def get_genomic_range_row_bounds(self, chr, lo, hi, index="gri", **kwargs):
+        """
+        :param chr: Name of chromosome of the region
+        :type chr: string
+        :param lo: Low boundary of the region
+        :type lo: integer
+        :param hi: High boundary of the region
+        :type hi: integer
+        :param index: Name of the genomic range index to use
+        :type index: string
+        :returns: (start, end) row IDs, or None if no rows overlap the region
+        :rtype: tuple of integers, or None
+
+        Finds the range of row IDs to read in order to scan the rows of a
+        closed GTable that fall in a genomic region. *start* is the ID
+        of the first row overlapping [*lo*, *hi*) on *chr*, according to
+        the genomic range index. The rows of a GTable with a genomic
+        range index are sorted by the index, so rows of *chr* with low
+        boundaries up to *hi* follow it; *end* is an upper bound on the
+        ID of the first row past them (on another chromosome, or with a
+        low boundary greater than *hi*) that is at most one read buffer
+        beyond that row.
+
+        *end* is found by probing single rows with exponentially
+        increasing strides and then bisecting, which takes a logarithmic
+        number of small requests instead of reading (and, with
+        :meth:`iterate_rows`, prefetching) pages past the region.
+
+        """
+        query = self.genomic_range_query(chr, lo, hi, index=index)
+        first_row = self.get_rows(query=query, columns=['__id__'], limit=1, **kwargs)['data']
+        if len(first_row) == 0:
+            return None
+        start = first_row[0][0]
+
+        desc = self._desc if 'length' in self._desc and self._desc.get('state') == 'closed' else self.describe(**kwargs)
+        index_desc = [i for i in desc.get('indices', []) if i['name'] == index]
+        if len(index_desc) == 0:
+            raise DXError("GTable %s has no index named %r" % (self._dxid, index))
+        length = desc['length']
+        probe_columns = [index_desc[0]['chr'], index_desc[0]['lo']]
+
+        def is_past_region(row_id):
+            row_chr, row_lo = self.get_rows(columns=probe_columns, starting=row_id, limit=1, **kwargs)['data'][0]
+            return row_chr != chr or row_lo > hi
+
+        # Invariant: row "inside" is not past the region, and "end" is
+        # either past it or the end of the table
+        inside, stride = start, self._read_row_buffer_size
+        end = min(inside + stride, length)
+        while end < length and not is_past_region(end):
+            inside, stride = end, stride * 2
+            end = min(inside + stride, length)
+        while end - inside > self._read_row_buffer_size:
+            middle = (inside + end) // 2
+            if is_past_region(middle):
+                end = middle
+            else:
+                inside = middle
+        return start, end
+
+    def iterate_genomic_range_rows(self, chr, lo, hi, columns=None, want_dict=False, index="gri", **kwargs):
+        """
+        :param chr: Name of chromosome of the region
+        :type chr: string
+        :param lo: Low boundary of the region
+        :type lo: integer
+        :param hi: High boundary of the region
+        :type hi: integer
+        :param columns: List of column names to be included in the output. If not specified, each result contains the row ID followed by all column values. You can explicitly obtain the row ID by requesting the column ``__id__``.
+        :type columns: list of strings
+        :param want_dict: If True, return a mapping of column names to values, instead of an array of values
+        :type want_dict: boolean
+        :param index: Name of the genomic range index to use
+        :type index: string
+        :rtype: generator
+
+        Returns a generator that yields, in row ID order, the rows from
+        the first row overlapping [*lo*, *hi*) on *chr* up to the last
+        row of *chr* whose low boundary is at most *hi*. Uses
+        :meth:`get_genomic_range_row_bounds` so that no pages beyond
+        the region are requested.
+
+        Example::
+
+            for row in dxgtable.iterate_genomic_range_rows("chr20", 1000000, 2000000, want_dict=True):
+                print row["lo"]
+
+        """
+        bounds = self.get_genomic_range_row_bounds(chr, lo, hi, index=index, **kwargs)
+        if bounds is None:
+            return
+        index_desc = [i for i in self._desc['indices'] if i['name'] == index][0]
+        if columns is None:
+            fetch_columns = None
+            col_names = ['__id__'] + self.get_col_names(**kwargs)
+        else:
+            fetch_columns = columns + [name for name in (index_desc['chr'], index_desc['lo']) if name not in columns]
+            col_names = fetch_columns
+        chr_pos, lo_pos = col_names.index(index_desc['chr']), col_names.index(index_desc['lo'])
+        num_output_cols = len(col_names) if columns is None else len(columns)
+
+        for row in self.iterate_rows(start=bounds[0], end=bounds[1], columns=fetch_columns, **kwargs):
+            if row[chr_pos] != chr or row[lo_pos] > hi:
+                return
+            if len(row) > num_output_cols:
+                row = row[:num_output_cols]
+            yield dict(zip(col_names, row)) if want_dict else row
+
     def __iter__(self):
         return self.iterate_rows()
 
+    def snapshot(self, path, **kwargs):
+        '''
+        :param path: Local filename to write the snapshot to
+        :type path: string
+        :raises: :exc:`~dxpy.exceptions.DXGTableError` if the GTable is not closed
+        :returns: The description of the GTable stored in the snapshot
+        :rtype: dict
+
+        Downloads all rows of this (closed) GTable into a compact local
+        columnar file. The snapshot can be opened with
+        :class:`~dxpy.utils.gtable_snapshot.LocalGTable`, which supports
+        the same row reading methods as this class, so that repeated
+        scans of the table run at local disk speed.
+
+        Example::
+
+            dxgtable = open_dxgtable("gtable-xxxx")
+            dxgtable.snapshot("variants.snapshot")
+            with LocalGTable("variants.snapshot") as local_table:
+                for row in local_table.iterate_rows(want_dict=True):
+                    print row["chr"]
+
+        '''
+        from ..utils.gtable_snapshot import write_snapshot
+        return write_snapshot(self, path, **kwargs)
+
     # TODO: make this consume recarrays
     def add_rows(self, data, part=None, validate=True, **kwargs):
         '''
@@ -115,7 +115,9 @@ class DXContainer(DXObject):
         is also included in an additional field "describe" for each
         object. If *describe* is True, ``/describe`` is called with the
         default arguments. *describe* may also be a hash, indicating the
-        input hash to be supplied to each ``/describe`` call.
+        input hash to be supplied to each ``/describe`` call, e.g.
+        ``{"fields": {"name": True, "class": True}}`` to only return the
+        fields that are needed.
 
         """
         api_method = dxpy.api.container_list_folder
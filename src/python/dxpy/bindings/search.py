@@ -24,22 +24,136 @@ provides search functionality over all data objects in the system. The
 
 from __future__ import (print_function, unicode_literals)
 
+import collections, json, time, threading
+
 import dxpy
 from . import DXApplet, DXApp, DXWorkflow, DXProject, DXJob, DXAnalysis
 from ..exceptions import DXError, DXSearchError
 
+# Maximum number of pages of results that each search fetches ahead of
+# its caller, in the background (0 to fetch each page only when the
+# caller reaches it)
+PREFETCH_PAGES = 1
+
+# The size of each page after the first one is chosen so that the page
+# takes about TARGET_PAGE_SECONDS to fetch and holds about
+# TARGET_PAGE_BYTES of results, growing at most twofold from one page to
+# the next, up to the maximum page size of the API server
+TARGET_PAGE_SECONDS = 2.0
+TARGET_PAGE_BYTES = 8 * 1024 * 1024
+MAX_PAGE_SIZE = 1000
+
+def _estimate_size(results):
+    # Serializes a few results only, as serializing all of them would
+    # take about as long as parsing the response did
+    if len(results) == 0:
+        return 0
+    sample = [results[0], results[len(results) // 2], results[-1]]
+    return len(json.dumps(sample)) * len(results) // len(sample)
+
+def _next_page_size(page_size, num_results, elapsed, num_bytes):
+    next_page_size = page_size * 2
+    if num_results > 0:
+        if elapsed > 0:
+            next_page_size = min(next_page_size, int(num_results * TARGET_PAGE_SECONDS / elapsed))
+        if num_bytes > 0:
+            next_page_size = min(next_page_size, int(num_results * TARGET_PAGE_BYTES / num_bytes))
+    return max(1, min(next_page_size, MAX_PAGE_SIZE))
+
+def _fetch_page(api_method, query, **kwargs):
+    start = time.time()
+    resp = api_method(query, **kwargs)
+    return resp, time.time() - start
+
+class _SearchPages(object):
+    ''' Iterator over the responses of *api_method* to *query* for each page of results, until all results, or
+    *limit* of them, are fetched. While the caller consumes a page, up to *max_prefetched_pages* of the next ones are
+    fetched in the background (and kept in a buffer until the caller reaches them).
+    '''
+    def __init__(self, api_method, query, limit, first_page_size, max_prefetched_pages, kwargs):
+        self._api_method, self._kwargs = api_method, kwargs
+        self._limit = limit
+        self._max_prefetched_pages = max_prefetched_pages
+        page_size = query.get("limit", first_page_size)
+        self._next_query = dict(query, limit=page_size if limit is None else min(page_size, limit))
+        self._num_results = 0
+        self._pages = collections.deque()
+        self._lock = threading.Lock()
+        self._prefetcher = None
+
+    def _add_page(self, resp, elapsed):
+        # Called with self._lock held
+        self._pages.append(resp)
+        self._num_results += len(resp["results"])
+        if resp["next"] is None or (self._limit is not None and self._num_results >= self._limit):
+            self._next_query = None
+            return
+        page_size = _next_page_size(self._next_query["limit"], len(resp["results"]), elapsed,
+                                    _estimate_size(resp["results"]))
+        if self._limit is not None:
+            page_size = min(page_size, self._limit - self._num_results)
+        self._next_query = dict(self._next_query, starting=resp["next"], limit=page_size)
+
+    def _prefetch(self, future):
+        # Runs in a background thread until the buffer is full or there
+        # are no more pages, so that a caller that stops iterating early
+        # leaves at most max_prefetched_pages pages behind
+        try:
+            while True:
+                with self._lock:
+                    query = self._next_query
+                    if query is None or len(self._pages) >= self._max_prefetched_pages:
+                        break
+                resp, elapsed = _fetch_page(self._api_method, query, **self._kwargs)
+                with self._lock:
+                    self._add_page(resp, elapsed)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+    def _start_prefetching(self):
+        if self._max_prefetched_pages > 0 and self._next_query is not None and \
+           (self._prefetcher is None or self._prefetcher.done()):
+            import concurrent.futures
+            self._prefetcher = concurrent.futures.Future()
+            # A daemon thread rather than a thread pool, which would
+            # make the interpreter wait for the last prefetch at exit
+            thread = threading.Thread(target=self._prefetch, args=(self._prefetcher,))
+            thread.daemon = True
+            thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            if len(self._pages) == 0:
+                prefetcher = self._prefetcher
+            else:
+                prefetcher = None
+        if prefetcher is not None:
+            # Raises the error of the prefetcher, if any
+            prefetcher.result()
+        with self._lock:
+            if len(self._pages) == 0:
+                if self._next_query is None:
+                    raise StopIteration()
+                resp, elapsed = _fetch_page(self._api_method, self._next_query, **self._kwargs)
+                self._add_page(resp, elapsed)
+            page = self._pages.popleft()
+            self._start_prefetching()
+        return page
+
+    next = __next__
+
 def _find(api_method, query, limit, return_handler, first_page_size, **kwargs):
     ''' Takes an API method handler (dxpy.api.find...) and calls it with *query*, then wraps a generator around its
     output. Used by the methods below.
     '''
     num_results = 0
 
-    if "limit" not in query:
-        query["limit"] = first_page_size
-
-    while True:
-        resp = api_method(query, **kwargs)
-
+    for resp in _SearchPages(api_method, query, limit, first_page_size, PREFETCH_PAGES, kwargs):
         by_parent = resp.get('byParent')
         descriptions = resp.get('describe')
         def format_result(result):
@@ -52,17 +166,10 @@ def _find(api_method, query, limit, return_handler, first_page_size, **kwargs):
 
         for i in resp["results"]:
             if num_results == limit:
-                raise StopIteration()
+                return
             num_results += 1
             yield format_result(i)
 
-        # set up next query
-        if resp["next"] is not None:
-            query["starting"] = resp["next"]
-            query["limit"] = min(query["limit"]*2, 1000)
-        else:
-            raise StopIteration()
-
 def find_data_objects(classname=None, state=None, visibility=None,
                       name=None, name_mode='exact', properties=None,
                       typename=None, tag=None, tags=None,
@@ -107,8 +214,8 @@ def find_data_objects(classname=None, state=None, visibility=None,
     :type created_after: int or string
     :param created_before: Timestamp before which each result was last created (see note below for interpretation)
     :type created_before: int or string
-    :param describe: Whether to also return the output of calling describe() on the object
-    :type describe: boolean
+    :param describe: Whether to also return the output of calling describe() on the object. Besides supplying True (full description) or False, you can also supply the input to describe, e.g. {"fields": {"name": True, "folder": True}} to only return some fields of the description (which makes the responses for large searches much smaller).
+    :type describe: boolean or dict
     :param level: The minimum permissions level for which results should be returned (one of "VIEW", "UPLOAD", "CONTRIBUTE", or "ADMINISTER")
     :type level: string
     :param limit: The maximum number of results to be returned (if not specified, the number of results is unlimited)
@@ -243,7 +350,7 @@ def find_executions(classname=None, launched_by=None, executable=None, project=N
     :type created_after: int or string
     :param created_before: Timestamp before which each result was last created (see note accompanying :meth:`find_data_objects()` for interpretation)
     :type created_before: int or string
-    :param describe: Whether to also return the output of calling describe() on the execution. Besides supplying True (full description) or False (no details), you can also supply the dict {"io": False} to suppress detailed information about the execution's inputs and outputs.
+    :param describe: Whether to also return the output of calling describe() on the execution. Besides supplying True (full description) or False (no details), you can also supply the dict {"io": False} to suppress detailed information about the execution's inputs and outputs, or {"fields": {"state": True, ...}} to only return some fields.
     :type describe: boolean or dict
     :param name: Name of the job or analysis to search by (also see *name_mode*)
     :type name: string
@@ -37,6 +37,38 @@ def try_call(func, *args, **kwargs):
     except:
         try_call_err_exit()
 
+# Largest number of IDs sent in one call by commands that act on many
+# objects (e.g. removeObjects, move, clone), and number of such calls
+# made at a time
+MAX_IDS_PER_API_CALL = 1000
+MAX_CONCURRENT_API_CALLS = 8
+
+def split_into_batches(ids, batch_size=MAX_IDS_PER_API_CALL):
+    return [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+
+def run_concurrently(calls, max_workers=MAX_CONCURRENT_API_CALLS):
+    '''
+    :param calls: Functions (taking no arguments) to call
+    :type calls: iterable of callables
+    :param max_workers: Maximum number of functions running at a time
+    :type max_workers: int
+    :returns: Iterator over (result, exception) pairs, one for each function in order, where exception is that raised by the function (and result is None), or None
+
+    Runs the given functions (usually API calls) in a thread pool, so
+    that the errors of some of them can be reported without
+    interrupting the others.
+    '''
+    from ..utils import get_futures_threadpool, response_iterator
+
+    def call(func):
+        try:
+            return func(), None
+        except Exception as e:
+            return None, e
+
+    thread_pool = get_futures_threadpool(max_workers=max_workers)
+    return response_iterator(((call, [func], {}) for func in calls), thread_pool, max_active_tasks=max_workers)
+
 def prompt_for_yn(prompt_str, default=None):
     if default == True:
         prompt = prompt_str + ' [Y/n]: '
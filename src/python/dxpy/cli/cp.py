@@ -23,13 +23,15 @@ command-line client.
 
 from __future__ import (print_function, unicode_literals)
 
+import collections, functools
+
 import dxpy
 import requests
 import dxpy.utils.printing as printing
-from ..utils.resolver import (resolve_existing_path, resolve_path, is_analysis_id, is_hashid,
+from ..utils.resolver import (resolve_existing_path, resolve_existing_paths, resolve_path, is_analysis_id, is_hashid,
                               get_last_pos_of_char, get_first_pos_of_char)
 from ..exceptions import (err_exit, DXCLIError, InvalidState)
-from . import (try_call, try_call_err_exit)
+from . import (try_call, try_call_err_exit, split_into_batches, run_concurrently)
 from dxpy.utils.printing import (fill)
 
 
@@ -92,18 +94,21 @@ def cp_to_noexistent_destination(args, dest_path, dx_dest, dest_proj):
             err_exit()
     else:
         try:
-            exists = dxpy.api.project_clone(src_proj,
-                                            {"objects": [result['id'] for result in src_results],
-                                             "project": dest_proj,
-                                             "destination": dest_folder})['exists']
+            exists = []
+            for objects in split_into_batches([result['id'] for result in src_results]):
+                exists += dxpy.api.project_clone(src_proj,
+                                                 {"objects": objects,
+                                                  "project": dest_proj,
+                                                  "destination": dest_folder})['exists']
             if len(exists) > 0:
                 print(fill('The following objects already existed in the destination ' +
                            'container and were not copied:') + '\n ' + '\n '.join(exists))
-            for result in src_results:
-                if result['id'] not in exists:
-                    dxpy.DXHTTPRequest('/' + result['id'] + '/rename',
-                                       {"project": dest_proj,
-                                        "name": dest_name})
+            calls = [functools.partial(dxpy.DXHTTPRequest, '/' + result['id'] + '/rename',
+                                       {"project": dest_proj, "name": dest_name})
+                     for result in src_results if result['id'] not in exists]
+            for _result, error in run_concurrently(calls):
+                if error is not None:
+                    raise error
             return
         except:
             err_exit()
@@ -125,12 +130,10 @@ def cp(args):
     # The destination exists, we need to copy all of the sources to it.
     if len(args.sources) == 0:
         raise DXCLIError('No sources provided to copy to another project')
-    src_objects = []
-    src_folders = []
-    for source in args.sources:
-        src_proj, src_folderpath, src_results = try_call(resolve_existing_path,
-                                                         source,
-                                                         allow_mult=True, all_mult=args.all)
+    # Objects and folders to copy from each source project
+    sources = collections.OrderedDict()
+    for source, resolve in resolve_existing_paths(args.sources, allow_mult=True, all_mult=args.all):
+        src_proj, src_folderpath, src_results = try_call(resolve)
         if src_proj == dest_proj:
             if is_hashid(source):
                 # This is the only case in which the source project is
@@ -146,16 +149,28 @@ def cp(args):
             raise DXCLIError(fill('Error: A source project must be specified or a current ' +
                                   'project set in order to clone objects between projects'))
 
+        src_objects, src_folders = sources.setdefault(src_proj, ([], []))
         if src_results is None:
             src_folders.append(src_folderpath)
         else:
             src_objects += [result['id'] for result in src_results]
+
+    # Clone the objects of each project in batches (with its folders in
+    # the first one), making several calls at a time
+    calls = []
+    for src_proj, (src_objects, src_folders) in sources.items():
+        for i, objects in enumerate(split_into_batches(src_objects) or [[]]):
+            calls.append(functools.partial(dxpy.DXHTTPRequest, '/' + src_proj + '/clone',
+                                           {"objects": objects,
+                                            "folders": src_folders if i == 0 else [],
+                                            "project": dest_proj,
+                                            "destination": dest_path}))
     try:
-        exists = dxpy.DXHTTPRequest('/' + src_proj + '/clone',
-                                    {"objects": src_objects,
-                                     "folders": src_folders,
-                                     "project": dest_proj,
-                                     "destination": dest_path})['exists']
+        exists = []
+        for result, error in run_concurrently(calls):
+            if error is not None:
+                raise error
+            exists += result['exists']
         if len(exists) > 0:
             print(fill('The following objects already existed in the destination container ' +
                        'and were left alone:') + '\n ' + '\n '.join(exists))
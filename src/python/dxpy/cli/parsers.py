@@ -22,7 +22,7 @@ those parsers.
 
 from __future__ import (print_function, unicode_literals)
 
-import argparse, json, os
+import argparse, json, os, collections
 from ..utils.env import set_env_var
 from ..utils.printing import fill
 from ..utils.pretty_print import format_table
@@ -37,6 +37,99 @@ class DXParserError(DXError):
     def __str__(self):
         return self.msg
 
+class LazySubparserMap(collections.OrderedDict):
+    '''
+    Map of subcommand names to their parsers, for use as the choices of
+    an :class:`argparse._SubParsersAction` (see
+    :func:`make_subparsers_lazy`). The parser of a subcommand registered
+    with :meth:`add_builder` is only built, by calling its builder, when
+    the subcommand is first looked up (i.e. when it is invoked or
+    completed), so that a command-line client does not have to build
+    the parsers of all its subcommands on every invocation.
+
+    Membership tests and iteration over the names include the
+    subcommands that are not built yet, in the order in which they were
+    registered; :meth:`values` and :meth:`items` only return the parsers
+    built so far.
+    '''
+
+    def __init__(self):
+        self._names = []
+        self._builders = {}
+        collections.OrderedDict.__init__(self)
+
+    def add_builder(self, name, build):
+        '''
+        :param name: Name of the subcommand
+        :type name: string
+        :param build: Function called without arguments to build the parser of the subcommand (with :meth:`argparse._SubParsersAction.add_parser`)
+        :type build: function
+        '''
+        self._names.append(name)
+        self._builders[name] = build
+
+    def build_all(self):
+        '''
+        Builds the parsers of all the subcommands that are not built yet,
+        in the order in which they were registered.
+        '''
+        for name in list(self._names):
+            self[name]
+
+    def __setitem__(self, name, parser):
+        if name not in self._builders and not dict.__contains__(self, name):
+            self._names.append(name)
+        collections.OrderedDict.__setitem__(self, name, parser)
+
+    def __missing__(self, name):
+        if name not in self._builders:
+            raise KeyError(name)
+        self._builders[name]()
+        del self._builders[name]
+        return dict.__getitem__(self, name)
+
+    def __contains__(self, name):
+        return name in self._builders or dict.__contains__(self, name)
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def keys(self):
+        return list(self._names)
+
+    def items(self):
+        return [(name, dict.__getitem__(self, name)) for name in self._names if dict.__contains__(self, name)]
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def values(self):
+        return [parser for _name, parser in self.items()]
+
+    def itervalues(self):
+        return iter(self.values())
+
+    def __repr__(self):
+        # Does not build the parsers (argcomplete prints the actions
+        # holding this map while completing)
+        return '%s(%r)' % (self.__class__.__name__, self._names)
+
+def make_subparsers_lazy(subparsers_action):
+    '''
+    :param subparsers_action: Action returned by :meth:`argparse.ArgumentParser.add_subparsers`
+    :type subparsers_action: :class:`argparse._SubParsersAction`
+    :returns: The :class:`LazySubparserMap` now holding the parsers of the subcommands
+
+    Makes *subparsers_action* look up its subparsers in a
+    :class:`LazySubparserMap`, to which subcommands can then be added
+    lazily.
+    '''
+    subparsers_action._name_parser_map = subparsers_action.choices = LazySubparserMap()
+    return subparsers_action.choices
+
 all_arg = argparse.ArgumentParser(add_help=False)
 all_arg.add_argument('-a', '--all', help=fill('Apply to all results with the same name without prompting', width_adjustment=-24), action='store_true')
 
@@ -55,6 +148,9 @@ delim_arg.add_argument('--delimiter', '--delim',
 json_arg = argparse.ArgumentParser(add_help=False)
 json_arg.add_argument('--json', help='Display return value in JSON', action='store_true')
 
+json_lines_arg = argparse.ArgumentParser(add_help=False)
+json_lines_arg.add_argument('--json-lines', help=fill('Display each result as one line of JSON (JSON Lines) as soon as it is found', width_adjustment=-24), action='store_true')
+
 stdout_args = argparse.ArgumentParser(add_help=False)
 stdout_args_gp = stdout_args.add_mutually_exclusive_group()
 stdout_args_gp.add_argument('--brief', help=fill('Display a brief version of the return value; for most commands, prints a DNAnexus ID per line', width_adjustment=-24), action='store_true')
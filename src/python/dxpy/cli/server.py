@@ -0,0 +1,413 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+'''
+This submodule contains the dx server, which runs dx commands on behalf
+of thin clients (the dx-client script) in one long-lived process, so
+that each command does not have to start an interpreter, import dxpy
+and the dx client, and open new connections to the API server.
+
+The server listens on a Unix socket and runs the commands of its
+clients one at a time, in its own process. For each command, it takes
+over the standard streams of the client (by opening them through /proc,
+so the server only runs on Linux), its environment, working directory
+and umask, runs the command as dx would, and sends its exit code back.
+
+Messages in both directions are JSON objects, each preceded by its
+length as a 4-byte big-endian integer:
+
+1. When it accepts a connection, the server sends {"ready": true}. A
+   client that does not receive it in time (because the server is busy
+   running another command) runs its command itself.
+2. The client sends {"argv": [...], "env": {...}, "cwd": ...,
+   "umask": ..., "ppid": ...}, or {"status": true} or {"stop": true}.
+3. The server sends {"local": true} if the command must be run by the
+   client (e.g. an interactive command); otherwise it runs the command
+   and sends {"exit": <exit code>, "interrupted": <bool>, "offsets":
+   {<fd>: <offset>}}, where "offsets" are the final positions in the
+   standard streams that are regular files, which the client seeks to.
+
+While the command runs, the client may send {"interrupt": true} (e.g.
+when it receives SIGINT), which raises KeyboardInterrupt in the
+command. Closing the connection has the same effect.
+
+The dx-client script implements the client side of this protocol
+without importing dxpy; the two must be kept in sync.
+'''
+
+from __future__ import (print_function, unicode_literals)
+
+import os, sys, json, socket, struct, signal, stat, threading, errno, logging, traceback
+
+from ..compat import USING_PYTHON2, rewrap_stdio
+from ..exceptions import DXCLIError
+from ..utils.env import get_user_conf_dir, get_session_conf_dir, sys_encoding
+
+# Commands that are always run by the client, because they need its
+# terminal (for getpass, readline or job control) or replace the process
+# running them
+LOCAL_COMMANDS = frozenset(['login', 'sh', 'ssh', 'ssh_config', 'upgrade'])
+
+# Seconds to wait for the request of a client once its connection is
+# accepted
+REQUEST_TIMEOUT = 10
+
+# Not defined by the socket module of Python 2
+_SO_PEERCRED = getattr(socket, 'SO_PEERCRED', 17)
+_O_ACCMODE = 3
+
+def get_default_socket_path():
+    '''
+    :returns: Path of the socket of the dx server: $DX_SERVER_SOCKET if set, or dx-server.sock in the user configuration directory
+    :rtype: string
+    '''
+    return os.environ.get('DX_SERVER_SOCKET') or os.path.join(get_user_conf_dir(), 'dx-server.sock')
+
+def send_message(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(struct.pack(b'>I', len(data)) + data)
+
+def recv_message(sock):
+    '''
+    :returns: The next message received on *sock*, or None if the connection was closed
+    :rtype: dict
+    '''
+    header = _recv_exactly(sock, 4)
+    if header is None:
+        return None
+    data = _recv_exactly(sock, struct.unpack(b'>I', header)[0])
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def connect_to_server(socket_path, timeout=None):
+    '''
+    :param socket_path: Path of the socket of the server
+    :type socket_path: string
+    :param timeout: Seconds to wait for the server to accept the connection
+    :type timeout: float
+    :returns: A socket connected to the server, which has sent its "ready" message
+    :raises: :exc:`socket.error` if no server accepts the connection in time
+    '''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        if recv_message(sock) is None:
+            raise socket.error(errno.ECONNRESET, 'The dx server closed the connection')
+        sock.settimeout(None)
+    except:
+        sock.close()
+        raise
+    return sock
+
+class DXServer(object):
+    '''
+    Runs dx commands sent by clients on a Unix socket (see the module
+    documentation for the protocol).
+
+    Call :meth:`listen` to create the socket, then :meth:`serve_forever`
+    to run commands until the server is stopped (or idle for
+    *idle_timeout* seconds, if given).
+    '''
+
+    def __init__(self, socket_path, idle_timeout=None):
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.num_commands = 0
+        self._socket = None
+        # Number of the command running, and of the last command whose
+        # client asked for it to be interrupted
+        self._command = None
+        self._interrupted_command = None
+
+    def listen(self):
+        if not sys.platform.startswith('linux'):
+            raise DXCLIError('The dx server is only supported on Linux')
+        if os.path.exists(self.socket_path):
+            try:
+                connect_to_server(self.socket_path, timeout=REQUEST_TIMEOUT).close()
+            except socket.error:
+                # Left behind by a server that is not running any more
+                os.remove(self.socket_path)
+            else:
+                raise DXCLIError('A dx server is already listening on ' + self.socket_path)
+        socket_dir = os.path.dirname(os.path.abspath(self.socket_path))
+        if not os.path.isdir(socket_dir):
+            os.makedirs(socket_dir, 0o700)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user running the server may connect to it
+        old_umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self._socket.listen(16)
+
+    def warm_up(self):
+        '''
+        Imports the dx client and builds the parsers of all its
+        subcommands, so that the commands run afterwards do not have to.
+        '''
+        from ..scripts import dx
+        dx.build_all_subparsers()
+
+    def serve_forever(self):
+        from ..scripts import dx
+        signal.signal(signal.SIGINT, self._handle_sigint)
+        self._socket.settimeout(self.idle_timeout)
+        try:
+            while True:
+                try:
+                    conn = self._socket.accept()[0]
+                except socket.timeout:
+                    break
+                except socket.error as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    raise
+                try:
+                    if not self._handle(conn, dx):
+                        break
+                except socket.error:
+                    pass # The client went away
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    try:
+                        # Also wakes up the thread watching the connection
+                        conn.shutdown(socket.SHUT_RDWR)
+                    except socket.error:
+                        pass
+                    conn.close()
+        finally:
+            self._socket.close()
+            os.remove(self.socket_path)
+
+    def _handle(self, conn, dx):
+        '''
+        Serves one connection.
+
+        :returns: False if the server was asked to stop, and True otherwise
+        '''
+        creds = conn.getsockopt(socket.SOL_SOCKET, _SO_PEERCRED, struct.calcsize(b'3i'))
+        pid, uid, _gid = struct.unpack(b'3i', creds)
+        if uid != os.getuid():
+            return True
+        conn.settimeout(REQUEST_TIMEOUT)
+        send_message(conn, {'ready': True})
+        request = recv_message(conn)
+        if request is None:
+            return True
+        if request.get('stop'):
+            send_message(conn, {'stopped': True})
+            return False
+        if request.get('status'):
+            send_message(conn, {'pid': os.getpid(), 'commands': self.num_commands})
+            return True
+
+        command = next((arg for arg in request['argv'] if not arg.startswith('-')), None)
+        # Completion (which writes to a file descriptor inherited from
+        # the shell, and exits with os._exit) is also left to the client
+        if command in LOCAL_COMMANDS or '_ARGCOMPLETE' in request['env']:
+            send_message(conn, {'local': True})
+            return True
+        try:
+            streams = self._open_client_streams(pid)
+        except (IOError, OSError):
+            # e.g. a stream of the client is a socket, which cannot be
+            # opened through /proc
+            send_message(conn, {'local': True})
+            return True
+        conn.settimeout(None)
+        send_message(conn, self._run(conn, dx, request, streams))
+        return True
+
+    def _open_client_streams(self, pid):
+        '''
+        Opens the files that file descriptors 0, 1 and 2 of the process
+        *pid* refer to, with the same access mode.
+
+        :returns: A list of pairs (new file descriptor, whether it is a regular file), for file descriptors 0, 1 and 2
+        '''
+        streams = []
+        try:
+            for fd in 0, 1, 2:
+                with open('/proc/{pid}/fdinfo/{fd}'.format(pid=pid, fd=fd)) as fdinfo:
+                    info = dict(line.split(':', 1) for line in fdinfo if ':' in line)
+                flags = int(info['flags'], 8)
+                new_fd = os.open('/proc/{pid}/fd/{fd}'.format(pid=pid, fd=fd),
+                                 (flags & (_O_ACCMODE | os.O_APPEND)) | os.O_NOCTTY)
+                regular = stat.S_ISREG(os.fstat(new_fd).st_mode)
+                streams.append((new_fd, regular))
+                if regular:
+                    # Continue where the client is in the file, rather
+                    # than at the beginning
+                    os.lseek(new_fd, int(info['pos']), os.SEEK_SET)
+        except:
+            for new_fd, _regular in streams:
+                os.close(new_fd)
+            raise
+        return streams
+
+    def _run(self, conn, dx, request, streams):
+        import dxpy
+        self.num_commands += 1
+        command = self.num_commands
+        saved_fds = [os.dup(fd) for fd in (0, 1, 2)]
+        saved_env, saved_cwd, saved_argv = dict(os.environ), os.getcwd(), sys.argv
+        saved_user_agent = dxpy.USER_AGENT
+        saved_umask = os.umask(request['umask'])
+        try:
+            for fd, (new_fd, _regular) in enumerate(streams):
+                os.dup2(new_fd, fd)
+                os.close(new_fd)
+            self._rewrap_stdio()
+
+            watcher = threading.Thread(target=self._watch, args=(conn, command))
+            watcher.daemon = True
+            watcher.start()
+            self._command = command
+            try:
+                exit_code = self._run_dx(dx, request)
+            except KeyboardInterrupt:
+                exit_code = 1
+            finally:
+                self._command = None
+
+            for stream in sys.stdout, sys.stderr:
+                try:
+                    stream.flush()
+                except (IOError, OSError, ValueError):
+                    pass
+            offsets = {}
+            for fd, (_new_fd, regular) in enumerate(streams):
+                if regular:
+                    offsets[fd] = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            for fd, saved_fd in enumerate(saved_fds):
+                os.dup2(saved_fd, fd)
+                os.close(saved_fd)
+            self._rewrap_stdio()
+            self._set_environ(saved_env)
+            os.chdir(saved_cwd)
+            os.umask(saved_umask)
+            sys.argv = saved_argv
+            dxpy.USER_AGENT = saved_user_agent
+        return {'exit': exit_code, 'interrupted': self._interrupted_command == command, 'offsets': offsets}
+
+    def _run_dx(self, dx, request):
+        '''
+        Runs the command of *request* with the dx client.
+
+        :returns: Exit code of the command
+        :rtype: int
+        '''
+        import dxpy
+        try:
+            self._set_environ(request['env'])
+            if 'LESS' in os.environ:
+                os.environ['LESS'] = os.environ['LESS'] + ' -RS'
+            else:
+                os.environ['LESS'] = '-RS'
+            if '_DX_SESSION_CONF_DIR' not in os.environ:
+                os.environ['_DX_SESSION_CONF_DIR'] = get_session_conf_dir(ppid=request['ppid'])
+            os.chdir(request['cwd'])
+            dxpy._initialize()
+
+            # Forget the project names resolved for previous commands,
+            # which may have been run against another API server or with
+            # another token, and may have been renamed or removed since
+            from ..utils import resolver
+            resolver.cached_project_names.clear()
+
+            # Reset the state that dx keeps between the commands run in
+            # its interactive shell
+            sys.argv = ['dx'] + request['argv']
+            dx.args_list = request['argv']
+            dx.state.update(interactive=False, colors='auto', delimiter=None, currentproj=None)
+            dx.upload_seen_paths.clear()
+            self._set_interactive_cli(sys.stdin.isatty() and sys.stdout.isatty())
+            dx.main()
+        except SystemExit as e:
+            if e.code is None:
+                return 0
+            elif isinstance(e.code, int):
+                return e.code
+            print(e.code, file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            raise
+        except BaseException:
+            traceback.print_exc()
+            return 1
+        return 0
+
+    def _watch(self, conn, command):
+        '''
+        Interrupts *command* when its client asks for it, or goes away.
+        '''
+        try:
+            message = recv_message(conn)
+            while message is not None and not message.get('interrupt'):
+                message = recv_message(conn)
+        except (socket.error, ValueError):
+            pass
+        if self._command == command:
+            self._interrupted_command = command
+            os.kill(os.getpid(), signal.SIGINT)
+
+    def _handle_sigint(self, signum, frame):
+        # Only interrupts the command that was asked to be interrupted:
+        # the signal may arrive after it finished
+        if self._command is not None and self._command == self._interrupted_command:
+            raise KeyboardInterrupt()
+
+    @staticmethod
+    def _rewrap_stdio():
+        old_stderr = sys.stderr
+        rewrap_stdio()
+        # dx logs to stderr, through a handler that holds on to the old
+        # stream
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is old_stderr:
+                handler.stream = sys.stderr
+
+    @staticmethod
+    def _set_environ(env):
+        os.environ.clear()
+        for name, value in env.items():
+            if USING_PYTHON2:
+                name, value = name.encode(sys_encoding), value.encode(sys_encoding)
+            os.environ[name] = value
+
+    @staticmethod
+    def _set_interactive_cli(interactive):
+        # INTERACTIVE_CLI is determined when dxpy.cli is imported, and
+        # imported by name by the modules that use it
+        for module in list(sys.modules.values()):
+            if getattr(module, '__name__', '').startswith('dxpy') and 'INTERACTIVE_CLI' in vars(module):
+                module.INTERACTIVE_CLI = interactive
@@ -16,7 +16,7 @@
 
 from __future__ import (print_function, unicode_literals)
 
-import os, sys, io, locale
+import os, sys, io, locale, types, importlib
 from io import TextIOWrapper
 from contextlib import contextmanager
 
@@ -87,17 +87,16 @@ else:
     open = open
     expanduser = os.path.expanduser
 
+class StderrTextIOWrapper(TextIOWrapper):
+    def write(self, text):
+        if USING_PYTHON2 and type(text) is not unicode:
+            text = unicode(text, self.encoding)
+        TextIOWrapper.write(self, text)
+
 def wrap_stdio_in_codecs():
     if USING_PYTHON2:
         global _stdio_wrapped
         if not _stdio_wrapped:
-            class StderrTextIOWrapper(TextIOWrapper):
-                def write(self, text):
-                    if type(text) is unicode:
-                        TextIOWrapper.write(self, text)
-                    else:
-                        TextIOWrapper.write(self, unicode(text, self.encoding))
-
             if hasattr(sys.stdin, 'fileno'):
                 original_stream = sys.stdin
                 sys.stdin = io.open(sys.stdin.fileno(), encoding=getattr(sys.stdin, 'encoding', None))
@@ -125,6 +124,41 @@ def wrap_stdio_in_codecs():
 
             _stdio_wrapped = True
 
+# Streams replaced by rewrap_stdio() that close their file descriptors
+# when they are deallocated
+_replaced_stdio = []
+
+def rewrap_stdio():
+    '''
+    Replaces sys.stdin, sys.stdout and sys.stderr with new text streams
+    on file descriptors 0, 1 and 2, for use after the files they refer
+    to have been replaced (e.g. with os.dup2()), so that the streams are
+    line buffered if (and only if) the new files are terminals. The new
+    streams leave the file descriptors open when they are closed.
+    '''
+    for name, fd, mode in ('stdin', 0, 'r'), ('stdout', 1, 'w'), ('stderr', 2, 'w'):
+        stream = getattr(sys, name)
+        try:
+            stream.flush()
+        except (IOError, OSError, ValueError):
+            pass
+        if not getattr(stream, '_rewrapped', False):
+            _replaced_stdio.append(stream)
+        encoding = getattr(stream, 'encoding', None)
+        line_buffering = name == 'stderr' or os.isatty(fd)
+        if mode == 'r':
+            new_stream = io.open(fd, mode, encoding=encoding, closefd=False)
+        elif USING_PYTHON2:
+            new_stream = StderrTextIOWrapper(io.FileIO(fd, mode=mode, closefd=False), encoding=encoding,
+                                             line_buffering=line_buffering)
+        else:
+            new_stream = io.TextIOWrapper(io.open(fd, mode + 'b', closefd=False), encoding=encoding,
+                                          line_buffering=line_buffering)
+        new_stream._rewrapped = True
+        if hasattr(stream, '_original_stream'):
+            new_stream._original_stream = stream._original_stream
+        setattr(sys, name, new_stream)
+
 def decode_command_line_args():
     if USING_PYTHON2:
         sys.argv = [i if isinstance(i, unicode) else i.decode(sys_encoding) for i in sys.argv]
@@ -204,3 +238,119 @@ def unwrap_stream(stream_name):
     finally:
         if wrapped_stream:
             setattr(sys, stream_name, wrapped_stream)
+
+class _LazyAttributes(object):
+    # Resolves the attributes of a module that are loaded on first use
+    # (see lazy_module_attributes)
+    def __init__(self, module, attributes, submodules, reexported_modules):
+        self.module = module
+        self.attributes = attributes
+        self.submodules = submodules
+        self.reexported_modules = reexported_modules
+        self.namespaces = [vars(module)]
+
+    def load(self, name):
+        if name in self.attributes:
+            value = getattr(importlib.import_module(self.attributes[name]), name)
+        elif name in self.submodules:
+            value = importlib.import_module(self.module.__name__ + '.' + name)
+        elif name == '__all__':
+            value = self.public_names()
+        else:
+            for module_name in self.reexported_modules if not name.startswith('_') else ():
+                module = importlib.import_module(module_name)
+                if hasattr(module, name):
+                    value = getattr(module, name)
+                    break
+            else:
+                raise AttributeError("'module' object has no attribute '{name}'".format(name=name))
+        setattr(self.module, name, value)
+        return value
+
+    def public_names(self):
+        # The names imported by "from <module> import *" before the
+        # attributes were made lazy
+        names = set(self.attributes) | self.submodules
+        for namespace in self.namespaces:
+            names.update(name for name in namespace if not name.startswith('_'))
+        for module_name in self.reexported_modules:
+            names.update(name for name in dir(importlib.import_module(module_name)) if not name.startswith('_'))
+        return sorted(builtin_str(name) for name in names)
+
+    def names(self):
+        names = set(self.attributes) | self.submodules
+        for namespace in self.namespaces:
+            names.update(namespace)
+        return sorted(names)
+
+class _LazyModule(types.ModuleType):
+    # Stands in for a module in sys.modules on versions of Python that do
+    # not support module-level __getattr__ (PEP 562). Attributes are read
+    # from and written to the original module, whose functions keep using
+    # its namespace as their globals. Functions, classes and modules are
+    # also kept in the namespace of this object, so that they are looked
+    # up without going through __getattr__ again.
+    def __init__(self, lazy_attributes):
+        module = lazy_attributes.module
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__['_lazy_attributes'] = lazy_attributes
+        # Submodules imported later are added to this namespace
+        lazy_attributes.namespaces.append(self.__dict__)
+        for name in '__file__', '__path__', '__package__', '__loader__':
+            if hasattr(module, name):
+                self.__dict__[name] = getattr(module, name)
+
+    def __getattr__(self, name):
+        lazy_attributes = self.__dict__['_lazy_attributes']
+        try:
+            value = getattr(lazy_attributes.module, name)
+        except AttributeError:
+            value = lazy_attributes.load(name)
+        self._keep(name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self.__dict__['_lazy_attributes'].module, name, value)
+        self.__dict__.pop(name, None)
+        self._keep(name, value)
+
+    def __delattr__(self, name):
+        delattr(self.__dict__['_lazy_attributes'].module, name)
+        self.__dict__.pop(name, None)
+
+    def __dir__(self):
+        return self.__dict__['_lazy_attributes'].names()
+
+    def _keep(self, name, value):
+        if isinstance(value, (type, types.FunctionType, types.ModuleType)) or \
+           (USING_PYTHON2 and isinstance(value, types.ClassType)):
+            self.__dict__[name] = value
+
+def lazy_module_attributes(module_name, attributes=None, submodules=(), reexported_modules=()):
+    '''
+    :param module_name: Name of the module (its ``__name__``)
+    :type module_name: string
+    :param attributes: Mapping of attribute names to the names of the modules they are imported from
+    :type attributes: dict
+    :param submodules: Names of submodules of the package that are imported when accessed as attributes
+    :type submodules: list of strings
+    :param reexported_modules: Names of modules whose public attributes are also attributes of the module (as with ``from <module> import *``)
+    :type reexported_modules: list of strings
+
+    Makes the given attributes of a module (which must have finished
+    executing everything else) load on first access instead of when the
+    module is imported, so that importing it does not import modules
+    that are not needed. Must be called at the end of the module.
+
+    On Python 3.7 and later, the module gets a ``__getattr__`` function
+    (see PEP 562). On earlier versions, it is replaced in sys.modules
+    with an object resolving the missing attributes, so that importing
+    it yields that object.
+    '''
+    module = sys.modules[module_name]
+    lazy_attributes = _LazyAttributes(module, attributes or {}, frozenset(submodules), tuple(reexported_modules))
+    if sys.version_info >= (3, 7):
+        module.__getattr__ = lazy_attributes.load
+        module.__dir__ = lazy_attributes.names
+    else:
+        sys.modules[module_name] = _LazyModule(lazy_attributes)
@@ -20,11 +20,12 @@
 from __future__ import print_function, unicode_literals
 
 import os, sys, datetime, getpass, collections, re, json, argparse, copy, hashlib, io, time, subprocess, glob, logging
+import functools
 import shlex # respects quoted substrings when splitting
 
 import requests
 
-from ..cli import try_call, prompt_for_yn, INTERACTIVE_CLI
+from ..cli import try_call, prompt_for_yn, INTERACTIVE_CLI, split_into_batches, run_concurrently
 from ..cli import workflow as workflow_cli
 from ..cli.cp import cp
 from ..exceptions import (err_exit, DXError, DXCLIError, DXAPIError, network_exceptions, default_expected_exceptions,
@@ -143,25 +144,30 @@ from dxpy.utils import group_array_by_field, normalize_timedelta, normalize_time
 from dxpy.utils.env import clearenv, write_env_var
 from dxpy.utils.printing import (CYAN, BLUE, YELLOW, GREEN, RED, WHITE, UNDERLINE, BOLD, ENDC, DNANEXUS_LOGO,
                                  DNANEXUS_X, set_colors, set_delimiter, get_delimiter, DELIMITER, fill,
-                                 tty_rows, tty_cols, pager)
-from dxpy.utils.pretty_print import format_tree, format_table
+                                 tty_rows, tty_cols, pager, JSONArrayPrinter)
+from dxpy.utils.pretty_print import format_tree, iter_format_tree, format_table
 from dxpy.utils.resolver import (pick, paginate_and_pick, is_hashid, is_data_obj_id, is_container_id, is_job_id,
                                  is_analysis_id, get_last_pos_of_char, resolve_container_id_or_name, resolve_path,
                                  resolve_existing_path, get_app_from_path, resolve_app, get_exec_handler,
                                  split_unescaped, ResolutionError, get_first_pos_of_char,
-                                 resolve_to_objects_or_project)
+                                 resolve_to_objects_or_project, resolve_existing_paths, resolve_glob_path,
+                                 is_glob_pattern)
+from dxpy.utils import resolver
+from dxpy.utils.folder_trie import FolderTries
+from dxpy.utils.metadata_cache import get_metadata_cache
 from dxpy.utils.completer import (path_completer, DXPathCompleter, DXAppCompleter, LocalCompleter,
-                                  ListCompleter, MultiCompleter)
+                                  ListCompleter, MultiCompleter, get_cached_in_project)
 from dxpy.utils.describe import (print_data_obj_desc, print_desc, print_ls_desc, get_ls_l_desc, print_ls_l_desc,
-                                 get_io_desc, get_find_executions_string)
-from dxpy.cli.parsers import (no_color_arg, delim_arg, env_args, stdout_args, all_arg, json_arg,
+                                 get_io_desc, get_find_executions_string, LS_DESC_FIELDS, LS_L_DESC_FIELDS,
+                                 FIND_EXECUTIONS_DESC_FIELDS)
+from dxpy.cli.parsers import (no_color_arg, delim_arg, env_args, stdout_args, all_arg, json_arg, json_lines_arg,
                               parser_dataobject_args, parser_single_dataobject_output_args,
                               process_properties_args,
                               find_by_properties_and_tags_args, process_find_by_property_args,
                               process_dataobject_args, process_single_dataobject_output_args, find_executions_args, add_find_executions_search_gp,
                               set_env_from_args,
                               extra_args, process_extra_args, DXParserError,
-                              exec_input_args, instance_type_arg, process_instance_type_arg)
+                              exec_input_args, instance_type_arg, process_instance_type_arg, make_subparsers_lazy)
 from dxpy.cli.exec_io import (ExecutableInputs, format_choices_or_suggestions)
 
 # Loading other variables used for pretty-printing
@@ -457,6 +463,19 @@ def set_project(project, write, name=None):
             write_env_var('DX_WORKSPACE_ID', project)
     dxpy.set_workspace_id(project)
 
+def forget_project_names(project=None):
+    '''
+    Discards the project names resolved so far (in this process and in
+    the metadata cache), and the cached metadata of *project* if given,
+    after a project is created, renamed or removed.
+    '''
+    resolver.cached_project_names.clear()
+    metadata_cache = get_metadata_cache()
+    if metadata_cache is not None:
+        metadata_cache.invalidate()
+        if project is not None:
+            metadata_cache.invalidate(project)
+
 def set_wd(folder, write):
     set_env_var('DX_CLI_WD', folder)
     if write:
@@ -746,7 +765,7 @@ def ls(args):
     if entity_results is None:
         try:
             resp = dxproj.list_folder(folder=folderpath,
-                                      describe={},
+                                      describe={"fields": LS_L_DESC_FIELDS if args.verbose else LS_DESC_FIELDS},
                                       only=only,
                                       includeHidden=args.all)
 
@@ -839,11 +858,23 @@ def rmdir(args):
 
 def rm(args):
     had_error = False
-    projects = {}
+    projects = collections.OrderedDict()
+    folder_tries = FolderTries()
+    resolutions = resolve_existing_paths([path for path in args.paths if not is_glob_pattern(path)],
+                                         allow_mult=True, all_mult=args.all)
     for path in args.paths:
         # Resolve the path and add it to the list
+        matching_folders = None
         try:
-            project, folderpath, entity_results = resolve_existing_path(path, allow_mult=True, all_mult=args.all)
+            if is_glob_pattern(path):
+                # Remove all matches: the folder names are matched locally, and the object names by the server
+                project, matching_folders, entity_results = resolve_glob_path(path, folder_tries,
+                                                                              describe={"fields": {"id": True}})
+                if project is not None and len(matching_folders) == 0 and len(entity_results) == 0:
+                    raise ResolutionError('No data objects or folders match it')
+            else:
+                _path, resolve = next(resolutions)
+                project, folderpath, entity_results = resolve()
         except Exception as details:
             print(fill('Could not resolve "' + path + '": ' + str(details)))
             had_error = True
@@ -854,7 +885,17 @@ def rm(args):
             continue
         if project not in projects:
             projects[project] = {"folders": [], "objects": []}
-        if entity_results is None:
+        if matching_folders is not None:
+            # Like rm in the shell, the matching objects are removed even
+            # if the matching folders cannot be
+            projects[project]['objects'] += [result['id'] for result in entity_results]
+            if args.recursive:
+                projects[project]['folders'] += matching_folders
+            elif len(matching_folders) > 0:
+                print(fill(u'"' + path + '" matches the folders ' + ', '.join(matching_folders) +
+                           ', which cannot be removed without setting the "-r" flag'))
+                had_error = True
+        elif entity_results is None:
             if folderpath is not None:
                 if not args.recursive:
                     print(fill(u'Did not find "' + path + '" as a data object; if it is a folder, cannot remove it without setting the "-r" flag'))
@@ -869,20 +910,23 @@ def rm(args):
         else:
             projects[project]['objects'] += [result['id'] for result in entity_results]
 
+    # Remove all of the folders, then the objects in batches, making
+    # several calls at a time
+    folder_calls, object_calls = [], []
     for project in projects:
         for folder in projects[project]['folders']:
-            try:
-                dxpy.api.project_remove_folder(project, {"folder": folder, "recurse": True})
-            except Exception as details:
-                print("Error while removing " + folder + " from " + project)
+            folder_calls.append((folder, project, functools.partial(dxpy.api.project_remove_folder, project,
+                                                                    {"folder": folder, "recurse": True})))
+        for objects in split_into_batches(projects[project]['objects']):
+            object_calls.append((json.dumps(objects), project,
+                                 functools.partial(dxpy.api.project_remove_objects, project, {"objects": objects})))
+    for calls in folder_calls, object_calls:
+        results = run_concurrently(call for _removed, _project, call in calls)
+        for (removed, project, _call), (_result, details) in zip(calls, results):
+            if details is not None:
+                print("Error while removing " + removed + " from " + project)
                 print("  " + str(details))
                 had_error = True
-        try:
-            dxpy.api.project_remove_objects(project, {"objects": projects[project]['objects']})
-        except Exception as details:
-            print("Error while removing " + json.dumps(projects[project]['objects']) + " from " + project)
-            print("  " + str(details))
-            had_error = True
     if had_error:
         parser.exit(1)
 
@@ -925,6 +969,7 @@ def rmproject(args):
                     dxpy.api.project_destroy(proj_id, {"terminateJobs": True})
                 else:
                     raise apierror
+            forget_project_names(proj_id)
             if not args.quiet:
                 print(fill('Successfully deleted project "' + proj_desc['name'] + '"'))
         except EOFError:
@@ -985,13 +1030,14 @@ def mv(args):
         else:
             try:
                 if src_results[0]['describe']['folder'] != dest_folder:
-                    dxpy.api.project_move(src_proj,
-                                          {"objects": [result['id'] for result in src_results],
-                                           "destination": dest_folder})
-                for result in src_results:
-                    dxpy.DXHTTPRequest('/' + result['id'] + '/rename',
-                                       {"project": src_proj,
-                                        "name": dest_name})
+                    for objects in split_into_batches([result['id'] for result in src_results]):
+                        dxpy.api.project_move(src_proj, {"objects": objects, "destination": dest_folder})
+                calls = [functools.partial(dxpy.DXHTTPRequest, '/' + result['id'] + '/rename',
+                                           {"project": src_proj, "name": dest_name})
+                         for result in src_results]
+                for _result, error in run_concurrently(calls):
+                    if error is not None:
+                        raise error
                 return
             except:
                 err_exit()
@@ -1000,10 +1046,8 @@ def mv(args):
         parser.exit(1, 'No sources provided to move\n')
     src_objects = []
     src_folders = []
-    for source in args.sources:
-        src_proj, src_folderpath, src_results = try_call(resolve_existing_path,
-                                                         source,
-                                                         allow_mult=True, all_mult=args.all)
+    for source, resolve in resolve_existing_paths(args.sources, allow_mult=True, all_mult=args.all):
+        src_proj, src_folderpath, src_results = try_call(resolve)
         if src_proj != dest_proj:
             parser.exit(1, fill('Using "mv" for moving something from one project to another is unsupported.  Please use "cp" and "rm" instead.') + '\n')
 
@@ -1011,15 +1055,27 @@ def mv(args):
             src_folders.append(src_folderpath)
         else:
             src_objects += [result['id'] for result in src_results]
+    # Move the folders with the first batch of objects
+    calls = [functools.partial(dxpy.api.project_move, src_proj,
+                               {"objects": objects,
+                                "folders": src_folders if i == 0 else [],
+                                "destination": dest_path})
+             for i, objects in enumerate(split_into_batches(src_objects) or [[]])]
     try:
-        dxpy.api.project_move(src_proj,
-                              {"objects": src_objects,
-                               "folders": src_folders,
-                               "destination": dest_path})
+        for _result, error in run_concurrently(calls):
+            if error is not None:
+                raise error
     except:
         err_exit()
 
 
+# Largest number of objects listed by "dx tree" for which the listing is
+# kept in the metadata cache
+MAX_CACHED_TREE_OBJECTS = 10000
+
+class _TreeListingTooLarge(Exception):
+    pass
+
 def tree(args):
     project, folderpath, _none = try_call(resolve_existing_path, args.path,
                                           expected='folder')
@@ -1027,39 +1083,110 @@ def tree(args):
     if project is None:
         parser.exit(1, fill('Current project must be set or specified before any data can be listed') + '\n')
     dxproj = dxpy.get_handler(project)
-
-    tree = collections.OrderedDict()
-    try:
-        folders = [folder for folder in dxproj.describe(input_params={"folders": True})['folders']
-                   if folder.startswith((folderpath + '/') if folderpath != '/' else '/')]
-        folders = [ folder[len(folderpath):] for folder in folders ]
+    desc_fields = LS_L_DESC_FIELDS if args.long else LS_DESC_FIELDS
+
+    def get_item_desc(item):
+        if args.long:
+            return get_ls_l_desc(item['describe'])
+        item_desc = item['describe']['name']
+        if item['describe']['class'] in ['applet', 'workflow']:
+            item_desc = BOLD() + GREEN() + item_desc + ENDC()
+        return item_desc
+
+    def get_subfolders(folders):
+        # Paths of the subfolders of each folder under folderpath, by name,
+        # in the order in which they are first found in *folders*
+        subfolders = collections.defaultdict(collections.OrderedDict)
         for folder in folders:
-            subtree = tree
-            for path_element in folder.split("/"):
-                if path_element == "":
-                    continue
-                path_element_desc = BOLD() + BLUE() + path_element + ENDC()
-                subtree.setdefault(path_element_desc, collections.OrderedDict())
-                subtree = subtree[path_element_desc]
-
-        for item in sorted(dxpy.find_data_objects(project=project, folder=folderpath,
-                                                  recurse=True, describe=True),
-                           key=cmp_names):
-            subtree = tree
-            for path_element in item['describe']['folder'][len(folderpath):].split("/"):
-                if path_element == "":
-                    continue
-                path_element_desc = BOLD() + BLUE() + path_element + ENDC()
-                subtree = subtree[path_element_desc]
-            if args.long:
-                item_desc = get_ls_l_desc(item['describe'])
-            else:
-                item_desc = item['describe']['name']
-                if item['describe']['class'] in ['applet', 'workflow']:
-                    item_desc = BOLD() + GREEN() + item_desc + ENDC()
-            subtree[item_desc] = None
+            if not folder.startswith((folderpath + '/') if folderpath != '/' else '/'):
+                continue
+            parent = folderpath
+            for path_element in folder[len(folderpath):].split("/"):
+                if path_element != "":
+                    parent = subfolders[parent].setdefault(path_element, parent.rstrip('/') + '/' + path_element)
+        return subfolders
+
+    def print_tree(subfolders, get_objects):
+        class FolderTree(collections.Mapping):
+            # Subfolders, then objects (sorted by name) of a folder, which
+            # are listed when first needed by iter_format_tree
+            def __init__(self, folder):
+                self.folder = folder
+                self._children = None
+
+            def _get_children(self):
+                if self._children is None:
+                    self._children = collections.OrderedDict(
+                        (BOLD() + BLUE() + path_element + ENDC(), FolderTree(subfolder))
+                        for path_element, subfolder in subfolders[self.folder].items())
+                    for item in sorted(get_objects(self.folder), key=cmp_names):
+                        self._children[get_item_desc(item)] = None
+                return self._children
+
+            def __getitem__(self, key):
+                return self._get_children()[key]
+
+            def __iter__(self):
+                return iter(self._get_children())
+
+            def __len__(self):
+                return len(self._get_children())
+
+        for line in iter_format_tree(FolderTree(folderpath), root=(BOLD() + BLUE() + args.path + ENDC())):
+            print(line)
+        sys.stdout.flush()
+
+    def list_and_print():
+        # Lists the objects of the folders several at a time, in the order
+        # in which they are printed, and prints each subtree as soon as its
+        # folders have been listed
+        listing = {"folders": dxproj.describe(input_params={"folders": True})['folders'], "objects": {}}
+        subfolders = get_subfolders(listing["folders"])
+        folder_order = []
+        def add_folder(folder):
+            folder_order.append(folder)
+            for subfolder in subfolders[folder].values():
+                add_folder(subfolder)
+        add_folder(folderpath)
+
+        def iter_folder_listings():
+            calls = [functools.partial(dxproj.list_folder, folder=folder, describe={"fields": desc_fields},
+                                       only='objects')
+                     for folder in folder_order]
+            results = run_concurrently(calls)
+            for folder in folder_order:
+                result, error = next(results)
+                if error is not None:
+                    raise error
+                yield folder, result['objects']
+        folder_listings = iter_folder_listings()
+
+        def get_objects(folder):
+            # Subtrees hidden by objects of the same name are skipped
+            for listed_folder, objects in folder_listings:
+                listing["objects"][listed_folder] = objects
+                if listed_folder == folder:
+                    return objects
+            return []
+
+        print_tree(subfolders, get_objects)
+        if sum(len(objects) for objects in listing["objects"].values()) > MAX_CACHED_TREE_OBJECTS:
+            raise _TreeListingTooLarge()
+        return listing
 
-        print(format_tree(tree, root=(BOLD() + BLUE() + args.path + ENDC())))
+    try:
+        # Repeated listings of an unmodified project are served from the
+        # metadata cache
+        printed = []
+        def compute():
+            printed.append(True)
+            return list_and_print()
+        try:
+            listing = get_cached_in_project(project, ("tree", folderpath, desc_fields), compute)
+        except _TreeListingTooLarge:
+            return
+        if not printed:
+            print_tree(get_subfolders(listing["folders"]), lambda folder: listing["objects"].get(folder, []))
     except:
         err_exit()
 
@@ -1232,10 +1359,11 @@ def new_project(args):
         if INTERACTIVE_CLI:
             args.name = input("Enter name for new project: ")
         else:
-            parser.exit(1, parser_new_project.format_help() +
+            parser.exit(1, parser_map['new project'].format_help() +
                            fill("No project name supplied, and input is not interactive") + '\n')
     try:
         resp = dxpy.api.project_new({"name": args.name})
+        forget_project_names()
         if args.brief:
             print(resp['id'])
         else:
@@ -1525,6 +1653,7 @@ def rename(args):
     else:
         try:
             dxpy.api.project_update(project, {"name": args.name})
+            forget_project_names()
         except:
             err_exit()
 
@@ -1621,6 +1750,11 @@ def download_one_file(project, file_desc, dest_filename, args):
         show_progress = args.show_progress
     except AttributeError:
         show_progress = False
+    if show_progress is None:
+        # Whether stderr is a terminal is checked when the command runs
+        # rather than when its parser is built (which may be much
+        # earlier, e.g. in the dx server)
+        show_progress = sys.stderr.isatty()
 
     try:
         dxpy.download_dxfile(file_desc['id'], dest_filename, show_progress=show_progress, project=project)
@@ -1632,8 +1766,6 @@ def download(args):
         cat(parser.parse_args(['cat'] + args.paths))
         return
 
-    from dxpy.utils import pathmatch
-
     def ensure_local_dir(d):
         if not os.path.isdir(d):
             if os.path.exists(d):
@@ -1645,12 +1777,12 @@ def download(args):
         if not args.recursive:
             err_exit('Error: "' + folder + '" is a folder but the -r/--recursive option was not given')
 
-        for subfolder in list_subfolders(project, folder, recurse=True):
+        for subfolder in [folder] + folder_tries[project].list_subfolders(folder, recurse=True):
             ensure_local_dir(os.path.join(destdir, subfolder[len(strip_prefix):].lstrip('/')))
 
         # TODO: control visibility=hidden
         for f in dxpy.search.find_data_objects(classname='file', state='closed', project=project, folder=folder,
-                                               recurse=True, describe=True):
+                                               recurse=True, describe={"fields": download_desc_fields}):
             file_desc = f['describe']
             dest_filename = os.path.join(destdir, file_desc['folder'][len(strip_prefix):].lstrip('/'), file_desc['name'])
             download_one_file(project, file_desc, dest_filename, args)
@@ -1670,63 +1802,45 @@ def download(args):
     def is_glob(path):
         return get_first_pos_of_char('*', path) > -1 or get_first_pos_of_char('?', path) > -1
 
-    def rel2abs(path, project):
-        if path.startswith('/') or dxpy.WORKSPACE_ID != project:
-            abs_path, strip_prefix = path, os.path.dirname(path.rstrip('/'))
-        else:
-            wd = get_env_var('DX_CLI_WD', u'/')
-            abs_path, strip_prefix = os.path.join(wd, path), os.path.dirname(os.path.join(wd, path).rstrip('/'))
-        if len(abs_path) > 1:
-            abs_path = abs_path.rstrip('/')
-        return abs_path, strip_prefix
-
-    cached_folder_lists = {}
-    def list_subfolders(project, path, recurse=True):
-        if project not in cached_folder_lists:
-            cached_folder_lists[project] = dxpy.get_handler(project).describe(input_params={'folders': True})['folders']
-        # TODO: support shell-style path globbing (i.e. /a*/c matches /ab/c but not /a/b/c)
-        # return pathmatch.filter(cached_folder_lists[project], os.path.join(path, '*'))
-        if recurse:
-            return [f for f in cached_folder_lists[project] if f.startswith(path)]
-        else:
-            return [f for f in cached_folder_lists[project] if f.startswith(path) and '/' not in f[len(path)+1:]]
+    # Fields of the descriptions of files used by download_one_file
+    download_desc_fields = {"id": True, "class": True, "state": True, "name": True, "folder": True}
+
+    # Folders of the projects of the paths, listed once for all paths
+    folder_tries = FolderTries()
 
     folders_to_get, files_to_get, count = collections.defaultdict(list), collections.defaultdict(list), 0
     foldernames, filenames = [], []
     for path in args.paths:
-        # Attempt to resolve name. If --all is given or the path looks like a glob, download all matches.
-        # Otherwise, the resolver will display a picker (or error out if there is no tty to display to).
-        resolver_kwargs = {'allow_empty_string': False}
-        if args.all or is_glob(path):
-            resolver_kwargs.update({'allow_mult': True, 'all_mult': True})
-        project, folderpath, matching_files = try_call(resolve_existing_path, path, **resolver_kwargs)
-        if matching_files is None:
-            matching_files = []
-        elif not isinstance(matching_files, list):
-            matching_files = [matching_files]
-
-        matching_folders = []
-        if project is not None:
-            # project may be none if path is an ID and there is no project context
-            colon_pos = get_first_pos_of_char(":", path)
-            if colon_pos >= 0:
-                path = path[colon_pos + 1:]
-            abs_path, strip_prefix = rel2abs(path, project)
+        if is_glob(path):
+            # Download all matches: the folder names are matched locally,
+            # and the file names by the server
+            project, matching_folders, matching_files = try_call(resolve_glob_path, path, folder_tries,
+                                                                 describe={"fields": download_desc_fields})
+        else:
+            # Attempt to resolve name. If --all is given, download all matches. Otherwise, the resolver will
+            # display a picker (or error out if there is no tty to display to).
+            project, folderpath, matching_files = try_call(resolve_existing_path, path, allow_empty_string=False,
+                                                           allow_mult=args.all, all_mult=args.all)
+            if matching_files is None:
+                matching_files = []
+            elif not isinstance(matching_files, list):
+                matching_files = [matching_files]
 
-            parent_folder = os.path.dirname(abs_path)
-            #folder_listing = dxpy.get_handler(project).list_folder(folder=parent_folder, only='folders')['folders'] # includeHidden=
-            folder_listing = list_subfolders(project, parent_folder, recurse=False)
-            matching_folders = pathmatch.filter(folder_listing, abs_path)
+            # project may be none if path is an ID and there is no project context
+            matching_folders = []
+            if project is not None:
+                matching_folders = try_call(resolve_glob_path, path, folder_tries, find_objects=False)[1]
 
         if len(matching_files) == 0 and len(matching_folders) == 0:
             err_exit(fill('Error: {path} is neither a file nor a folder name'.format(path=path)))
 
         files_to_get[project].extend(matching_files)
-        folders_to_get[project].extend(((f, strip_prefix) for f in matching_folders))
+        # Folders are downloaded into a local folder of the same name
+        folders_to_get[project].extend(((f, os.path.dirname(f)) for f in matching_folders))
         count += len(matching_files) + len(matching_folders)
 
         filenames.extend(f["describe"]["name"] for f in matching_files)
-        foldernames.extend(f[len(strip_prefix):].lstrip('/') for f in matching_folders)
+        foldernames.extend(os.path.basename(f) for f in matching_folders)
 
     if len(filenames) > 0 and len(foldernames) > 0:
         name_conflicts = set(filenames) & set(foldernames)
@@ -1922,6 +2036,8 @@ upload_seen_paths = set()
 def upload_one(args):
     try_call(process_dataobject_args, args)
 
+    if args.show_progress is None:
+        args.show_progress = sys.stderr.isatty()
     args.show_progress = args.show_progress and not args.brief
 
     if args.path is None:
@@ -2037,6 +2153,9 @@ def export(args):
     exporters[args.format.lower()](args)
 
 def find_executions(args):
+    if args.json and args.json_lines:
+        err_exit(exception=DXParserError('Cannot supply both --json and --json-lines.'),
+                 expected_exceptions=(DXParserError,))
     try_call(process_find_by_property_args, args)
     if not (args.origin_jobs or args.all_jobs):
         args.trees = True
@@ -2046,6 +2165,12 @@ def find_executions(args):
     origin = None
     more_results = False
     include_io = (args.verbose and args.json) or args.show_outputs
+    if args.json or args.json_lines:
+        describe = {"io": include_io}
+    else:
+        # Only request the fields that are printed
+        describe = {"fields": dict(FIND_EXECUTIONS_DESC_FIELDS, output=True) if args.show_outputs
+                              else FIND_EXECUTIONS_DESC_FIELDS}
     id_desc = None
 
     # Now start parsing flags
@@ -2076,7 +2201,7 @@ def find_executions(args):
              'state': args.state,
              'origin_job': origin,
              'parent_job': "none" if args.origin_jobs else args.parent,
-             'describe': {"io": include_io},
+             'describe': describe,
              'created_after': args.created_after,
              'created_before': args.created_before,
              'name': args.name,
@@ -2088,11 +2213,12 @@ def find_executions(args):
     if args.num_results < 1000 and not args.trees:
         query['limit'] = args.num_results + 1
 
-    json_output = []                        # for args.json
+    # for args.json and args.json_lines
+    json_output = JSONArrayPrinter(json_lines=args.json_lines) if args.json or args.json_lines else None
 
     def build_tree(root, executions_by_parent, execution_descriptions, is_cached_result=False):
         tree, root_string = {}, ''
-        if args.json:
+        if json_output is not None:
             json_output.append(execution_descriptions[root])
         elif args.brief:
             print(root)
@@ -2118,6 +2244,16 @@ def find_executions(args):
         tree, root = build_tree(result['id'], executions_by_parent, execution_descriptions)
         if tree:
             print(format_tree(tree[root], root))
+            sys.stdout.flush()
+
+    def forget_tree(root, executions_by_parent, execution_descriptions, cached_results):
+        # Drops the executions of a tree that has been printed, except for
+        # cached results, which other trees may also contain
+        if root in cached_results:
+            return
+        for child_execution in executions_by_parent.pop(root, []):
+            forget_tree(child_execution, executions_by_parent, execution_descriptions, cached_results)
+        del execution_descriptions[root]
 
     try:
         num_processed_results = 0
@@ -2137,7 +2273,7 @@ def find_executions(args):
                 more_results = True
                 break
 
-            if args.json:
+            if json_output is not None:
                 json_output.append(execution_result['describe'])
             elif args.trees:
                 roots[root] = root
@@ -2147,17 +2283,20 @@ def find_executions(args):
                     roots[root] = execution_result['describe']['id']
             elif args.brief:
                 print(execution_result['id'])
+                sys.stdout.flush()
             elif not args.trees:
                 print(format_tree({}, get_find_executions_string(execution_result['describe'],
                                                                  has_children=False,
                                                                  single_result=True,
                                                                  show_outputs=args.show_outputs)))
+                sys.stdout.flush()
         if args.trees:
             executions_by_parent, descriptions = collections.defaultdict(list), {}
+            cached_results, min_cached_result_created = set(), None
             root_field = 'origin_job' if args.classname == 'job' else 'root_execution'
             parent_field = 'masterJob' if args.no_subjobs else 'parentJob'
             query = {'classname': args.classname,
-                     'describe': {"io": include_io},
+                     'describe': describe,
                      'include_subjobs': False if args.no_subjobs else True,
                      root_field: list(roots.keys())}
             if not args.all_projects:
@@ -2172,6 +2311,8 @@ def find_executions(args):
                 query['project'] = project
 
             def process_execution_result(execution_result):
+                # Returns the creation time of the earliest cached result
+                # found in the execution, if any
                 execution_desc = execution_result['describe']
                 parent = execution_desc.get(parent_field) or execution_desc.get('parentAnalysis')
                 descriptions[execution_result['id']] = execution_desc
@@ -2179,6 +2320,7 @@ def find_executions(args):
                     executions_by_parent[parent].append(execution_result['id'])
 
                 # If an analysis with cached children, also insert those
+                min_created = None
                 if execution_desc['class'] == 'analysis':
                     for stage_desc in execution_desc['stages']:
                         if stage_desc['execution']['parentAnalysis'] != execution_result['id'] and \
@@ -2187,19 +2329,46 @@ def find_executions(args):
                             executions_by_parent[execution_result['id']].append(stage_desc['execution']['id'])
                             if stage_desc['execution']['id'] not in descriptions:
                                 descriptions[stage_desc['execution']['id']] = stage_desc['execution']
-
+                            cached_results.add(stage_desc['execution']['id'])
+                            created = descriptions[stage_desc['execution']['id']]['created']
+                            min_created = created if min_created is None else min(min_created, created)
+                return min_created
+
+            # Executions are found newest first, and are created after their
+            # parents, so a tree is complete once an execution created before
+            # its root is found. Cached results (and their descendants) are
+            # older than the analyses reusing them, so the trees containing
+            # them must also wait until executions created before the
+            # earliest cached result are found. The trees are printed (newest
+            # first, as their roots are found) and forgotten as soon as they
+            # are complete, so that only the trees being found are kept.
+            displayed_roots = set(roots.values())
+            complete_roots = collections.deque()
             for execution_result in dxpy.find_executions(**query):
-                process_execution_result(execution_result)
-
-            # ensure roots are sorted by their creation time
-            sorted_roots = sorted(roots.values(), key=lambda x: -descriptions[x]['created'])
-
-            for root in sorted_roots:
-                process_tree(descriptions[roots[root]], executions_by_parent, descriptions)
-        if args.json:
-            print(json.dumps(json_output, indent=4))
-
-        if more_results and get_delimiter() is None and not (args.brief or args.json):
+                created = execution_result['describe']['created']
+                while complete_roots and created < descriptions[complete_roots[0]]['created'] and \
+                      (min_cached_result_created is None or created < min_cached_result_created):
+                    root = complete_roots.popleft()
+                    process_tree(descriptions[root], executions_by_parent, descriptions)
+                    forget_tree(root, executions_by_parent, descriptions, cached_results)
+
+                min_created = process_execution_result(execution_result)
+                if min_created is not None and (min_cached_result_created is None or
+                                                min_created < min_cached_result_created):
+                    min_cached_result_created = min_created
+                if execution_result['id'] in displayed_roots:
+                    displayed_roots.remove(execution_result['id'])
+                    complete_roots.append(execution_result['id'])
+
+            # Roots that were only found as cached results of other trees
+            complete_roots.extend(sorted((root for root in displayed_roots if root in descriptions),
+                                         key=lambda x: -descriptions[x]['created']))
+            for root in complete_roots:
+                process_tree(descriptions[root], executions_by_parent, descriptions)
+        if json_output is not None:
+            json_output.close()
+
+        if more_results and get_delimiter() is None and not (args.brief or args.json or args.json_lines):
             print(fill("* More results not shown; use -n to increase number of results or --created-before to show older results", subsequent_indent='  '))
     except:
         err_exit()
@@ -2211,6 +2380,9 @@ def find_data(args):
     elif args.folder is not None and args.path is not None:
         err_exit(exception=DXParserError('Cannot supply both --folder and --path.'),
                  expected_exceptions=(DXParserError,))
+    if args.json and args.json_lines:
+        err_exit(exception=DXParserError('Cannot supply both --json and --json-lines.'),
+                 expected_exceptions=(DXParserError,))
 
     try_call(process_find_by_property_args, args)
     if args.all_projects:
@@ -2233,36 +2405,46 @@ def find_data(args):
     if args.folder is not None and not args.folder.startswith('/'):
         args.project, args.folder, _none = try_call(resolve_path, args.folder, 'folder')
 
+    if args.brief:
+        describe = False
+    elif args.json or args.json_lines or args.verbose:
+        describe = True
+    else:
+        describe = {"fields": LS_L_DESC_FIELDS}
+
     try:
-        results = list(dxpy.find_data_objects(classname=args.classname,
-                                              state=args.state,
-                                              visibility=args.visibility,
-                                              properties=args.properties,
-                                              name=args.name,
-                                              name_mode='glob',
-                                              typename=args.type,
-                                              tags=args.tag, link=args.link,
-                                              project=args.project,
-                                              folder=args.folder,
-                                              recurse=(args.recurse if not args.recurse else None),
-                                              modified_after=args.mod_after,
-                                              modified_before=args.mod_before,
-                                              created_after=args.created_after,
-                                              created_before=args.created_before,
-                                              describe=(not args.brief)))
-        if args.json:
-            print(json.dumps(results, indent=4))
-            return
-        if args.brief:
+        # Print the results as they are found
+        results = dxpy.find_data_objects(classname=args.classname,
+                                         state=args.state,
+                                         visibility=args.visibility,
+                                         properties=args.properties,
+                                         name=args.name,
+                                         name_mode='glob',
+                                         typename=args.type,
+                                         tags=args.tag, link=args.link,
+                                         project=args.project,
+                                         folder=args.folder,
+                                         recurse=(args.recurse if not args.recurse else None),
+                                         modified_after=args.mod_after,
+                                         modified_before=args.mod_before,
+                                         created_after=args.created_after,
+                                         created_before=args.created_before,
+                                         describe=describe)
+        if args.json or args.json_lines:
+            json_output = JSONArrayPrinter(json_lines=args.json_lines)
             for result in results:
+                json_output.append(result)
+            json_output.close()
+            return
+        for result in results:
+            if args.brief:
                 print(result['project'] + ':' + result['id'])
-        else:
-            for result in results:
-                if args.verbose:
-                    print("")
-                    print_data_obj_desc(result["describe"])
-                else:
-                    print_ls_l_desc(result["describe"], include_folder=True, include_project=args.all_projects)
+            elif args.verbose:
+                print("")
+                print_data_obj_desc(result["describe"])
+            else:
+                print_ls_l_desc(result["describe"], include_folder=True, include_project=args.all_projects)
+            sys.stdout.flush()
     except:
         err_exit()
 
@@ -3232,8 +3414,9 @@ def upgrade(args):
         err_exit()
 
 def print_help(args):
+    build_all_subparsers()
     if args.command_or_category is None:
-        parser_help.print_help()
+        parser_map['help'].print_help()
     elif args.command_or_category in parser_categories:
         print('dx ' + args.command_or_category + ': ' + parser_categories[args.command_or_category]['desc'].lstrip())
         print('\nCommands:\n')
@@ -3372,168 +3555,216 @@ parser.add_argument('--version', action=PrintDXVersion, nargs=0, help="show prog
 subparsers = parser.add_subparsers(help=argparse.SUPPRESS, dest='command')
 subparsers.metavar = 'command'
 
-parser_login = subparsers.add_parser('login', help='Log in (interactively or with an existing API token)',
-                                     description='Log in interactively and acquire credentials.  Use "--token" to log in with an existing API token.',
-                                     prog='dx login', parents=[env_args])
-parser_login.add_argument('--token', help='Authentication token to use')
-host_action = parser_login.add_argument('--host', help='Log into the given auth server host (port must also be given)')
-port_action = parser_login.add_argument('--port', type=int, help='Log into the given auth server port (host must also be given)')
-protocol_action = parser_login.add_argument('--protocol', help='Use the given protocol to contact auth server (by default, the correct protocol is guessed based on --port)')
-host_action.help = port_action.help = protocol_action.help = argparse.SUPPRESS
-parser_login.add_argument('--noprojects', dest='projects', help='Do not print available projects', action='store_false')
-parser_login.add_argument('--save', help='Save token and other environment variables for future sessions',
-                          action='store_true')
-parser_login.add_argument('--timeout', default='30d',
-                          help='Timeout for this login token (in seconds, or use suffix s, m, h, d, w, M, y)')
-parser_login.add_argument('--staging', nargs=0, help=argparse.SUPPRESS, action=SetStagingEnv)
-parser_login.set_defaults(staging=False, func=login)
-register_subparser(parser_login, categories='session')
-
-parser_logout = subparsers.add_parser('logout',
-                                      help='Log out and remove credentials',
-                                      description='Log out and remove credentials',
-                                      prog='dx logout',
-                                      parents=[env_args])
-parser_logout.add_argument('--host', help='Log out of the given auth server host (port must also be given)')
-parser_logout.add_argument('--port', type=int, help='Log out of the given auth server port (host must also be given)')
-parser_logout.set_defaults(func=logout)
-register_subparser(parser_logout, categories='session')
-
-parser_shell = subparsers.add_parser('sh', help='dx shell interpreter',
-                                     description='When run with no arguments, this command launches an interactive shell.  Otherwise, it will load the filename provided and interpret each nonempty line as a command to execute.  In both cases, the "dx" is expected to be omitted from the command or line.',
-                                     prog='dx sh',
-                                     parents=[env_args])
-parser_shell.add_argument('filename', help='File of dx commands to execute', nargs='?', default=None)
-parser_shell.set_defaults(func=shell)
-register_subparser(parser_shell, categories='session')
-
-parser_exit = subparsers.add_parser('exit', help='Exit out of the interactive shell',
-                                    description='Exit out of the interactive shell', prog='dx exit')
-parser_exit.set_defaults(func=exit_shell)
-register_subparser(parser_exit, categories='session')
-
-parser_whoami = subparsers.add_parser('whoami', help='Print the username of the current user',
-                                      description='Print the username of the current user, in the form "user-USERNAME"')
-parser_whoami.add_argument('--host', help='Query the specified auth server host (port must also be given)')
-parser_whoami.add_argument('--port', type=int, help='Query the specified auth server port (host must also be given)')
-parser_whoami.add_argument('--id', help='Print user ID instead of username', action='store_true', dest='user_id')
-parser_whoami.set_defaults(func=whoami)
-register_subparser(parser_whoami, categories='session')
-
-parser_env = subparsers.add_parser('env', help='Print all environment variables in use',
-                                   description=fill('Prints all environment variables in use as they have been resolved from environment variables and configuration files.  For more details, see') + '\n\nhttps://wiki.dnanexus.com/Command-Line-Client/Environment-Variables',
-                                   formatter_class=argparse.RawTextHelpFormatter, prog='dx env',
-                                   parents=[env_args])
-parser_env.add_argument('--bash', help=fill('Prints a list of bash commands to export the environment variables', width_adjustment=-14),
-                        action='store_true')
-parser_env.add_argument('--dx-flags', help=fill('Prints the dx options to override the environment variables', width_adjustment=-14),
-                        action='store_true')
-parser_env.set_defaults(func=env)
-register_subparser(parser_env, categories='session')
-
-parser_setenv = subparsers.add_parser('setenv',
-                                      help='Sets environment variables for the session',
-                                      description='Sets environment variables for communication with the API server')
-parser_setenv.add_argument('--noprojects', dest='projects', help='Do not print available projects', action='store_false')
-parser_setenv.add_argument('--save', help='Save settings for future sessions.  Only one set of settings can be saved at a time.  Always set to true if login is run in a non-interactive session',
-                           action='store_true')
-parser_setenv.add_argument('--current', help='Do not prompt for new values and just save current settings for future sessions.  Overrides --save to be true.',
-                           action='store_true')
-parser_setenv.set_defaults(func=setenv)
-register_subparser(parser_setenv, categories='other')
-
-parser_clearenv = subparsers.add_parser('clearenv', help='Clears all environment variables set by dx',
-                                        description='Clears all environment variables set by dx.  More specifically, it removes local state stored in ~/.dnanexus_config/environment.  Does not affect the environment variables currently set in your shell.', prog='dx clearenv')
-parser_clearenv.add_argument('--reset', help='Reset dx environment variables to empty values. Use this to avoid interference between multiple dx sessions when using shell environment variables.',
-                             action='store_true')
-parser_clearenv.set_defaults(func=clearenv, interactive=True)
-register_subparser(parser_clearenv, categories='session')
-
-parser_invite = subparsers.add_parser('invite',
-                                      help='Invite another user to a project or make it public',
-                                      description='Invite a DNAnexus entity to a project.  Use "PUBLIC" as the invitee and "VIEW" as the level to make the project public.  If the invitee is not recognized as a DNAnexus ID or is not "PUBLIC", it will be treated as a username, i.e. "dx invite alice : VIEW" is equivalent to inviting the user with user ID "user-alice" to view your current default project.',
-                                      prog='dx invite',
-                                      parents=[env_args])
-parser_invite.add_argument('invitee', help='Entity to invite')
-parser_invite.add_argument('project', help='Project to invite the invitee to', default=':', nargs='?')
-parser_invite.add_argument('level', help='Permissions level the new member should have',
-                           choices=['VIEW', 'UPLOAD', 'CONTRIBUTE', 'ADMINISTER'], default='VIEW', nargs='?')
-parser_invite.set_defaults(func=invite)
-# parser_invite.completer = TODO
-register_subparser(parser_invite, categories='other')
-
-parser_uninvite = subparsers.add_parser('uninvite',
-                                        help='Revoke others\' permissions on a project you administer',
-                                        description='Revoke others\' permissions on a project you administer.  Use "PUBLIC" as the entity to make the project no longer public.  If the entity is not recognized as a DNAnexus ID or is not "PUBLIC", it will be treated as a username, i.e. "dx uninvite alice :" is equivalent to revoking the permissions of the user with user ID "user-alice" to your current default project.',
-                                        prog='dx uninvite',
-                                        parents=[env_args])
-parser_uninvite.add_argument('entity', help='Entity to uninvite')
-parser_uninvite.add_argument('project', help='Project to revoke permissions from', default=':', nargs='?')
-parser_uninvite.set_defaults(func=uninvite)
-register_subparser(parser_uninvite, categories='other')
-
-parser_ls = subparsers.add_parser('ls', help='List folders and/or objects in a folder',
-                                  description='List folders and/or objects in a folder',
-                                  parents=[no_color_arg, delim_arg, env_args, stdout_args],
-                                  prog='dx ls')
-parser_ls.add_argument('-a', '--all', help='show hidden files', action='store_true')
-ls_output_args = parser_ls.add_mutually_exclusive_group()
-ls_output_args.add_argument('-l', '--long', dest='verbose', help='Alias for "verbose"', action='store_true')
-parser_ls.add_argument('--obj', help='show only objects', action='store_true')
-parser_ls.add_argument('--folders', help='show only folders', action='store_true')
-parser_ls.add_argument('--full', help='show full paths of folders', action='store_true')
-ls_path_action = parser_ls.add_argument('path', help='Folder (possibly in another project) to list the contents of, default is the current directory in the current project.  Syntax: projectID:/folder/path',
-                                        nargs='?', default='.')
-ls_path_action.completer = DXPathCompleter()
-parser_ls.set_defaults(func=ls)
-register_subparser(parser_ls, categories='fs')
-
-parser_tree = subparsers.add_parser('tree', help='List folders and objects in a tree',
-                                    description='List folders and objects in a tree',
-                                    parents=[no_color_arg, env_args],
-                                    prog='dx tree')
-parser_tree.add_argument('-a', '--all', help='show hidden files', action='store_true')
-parser_tree.add_argument('-l', '--long', help='use a long listing format', action='store_true')
-tree_path_action = parser_tree.add_argument('path', help='Folder (possibly in another project) to list the contents of, default is the current directory in the current project.  Syntax: projectID:/folder/path',
+# The parser of each subcommand is only built when the subcommand is
+# invoked, completed, or its help is displayed, so that dx does not
+# build the parsers of all its subcommands on every invocation.
+lazy_subparsers = make_subparsers_lazy(subparsers)
+
+def lazy_subcommand(name):
+    '''
+    Registers the decorated function as the builder of the parser of
+    the subcommand *name*, to be called when the subcommand is first
+    looked up.
+    '''
+    def register(build):
+        lazy_subparsers.add_builder(name, build)
+        return build
+    return register
+
+@lazy_subcommand('login')
+def build_login_parser():
+    parser_login = subparsers.add_parser('login', help='Log in (interactively or with an existing API token)',
+                                         description='Log in interactively and acquire credentials.  Use "--token" to log in with an existing API token.',
+                                         prog='dx login', parents=[env_args])
+    parser_login.add_argument('--token', help='Authentication token to use')
+    host_action = parser_login.add_argument('--host', help='Log into the given auth server host (port must also be given)')
+    port_action = parser_login.add_argument('--port', type=int, help='Log into the given auth server port (host must also be given)')
+    protocol_action = parser_login.add_argument('--protocol', help='Use the given protocol to contact auth server (by default, the correct protocol is guessed based on --port)')
+    host_action.help = port_action.help = protocol_action.help = argparse.SUPPRESS
+    parser_login.add_argument('--noprojects', dest='projects', help='Do not print available projects', action='store_false')
+    parser_login.add_argument('--save', help='Save token and other environment variables for future sessions',
+                              action='store_true')
+    parser_login.add_argument('--timeout', default='30d',
+                              help='Timeout for this login token (in seconds, or use suffix s, m, h, d, w, M, y)')
+    parser_login.add_argument('--staging', nargs=0, help=argparse.SUPPRESS, action=SetStagingEnv)
+    parser_login.set_defaults(staging=False, func=login)
+    register_subparser(parser_login, categories='session')
+
+@lazy_subcommand('logout')
+def build_logout_parser():
+    parser_logout = subparsers.add_parser('logout',
+                                          help='Log out and remove credentials',
+                                          description='Log out and remove credentials',
+                                          prog='dx logout',
+                                          parents=[env_args])
+    parser_logout.add_argument('--host', help='Log out of the given auth server host (port must also be given)')
+    parser_logout.add_argument('--port', type=int, help='Log out of the given auth server port (host must also be given)')
+    parser_logout.set_defaults(func=logout)
+    register_subparser(parser_logout, categories='session')
+
+@lazy_subcommand('sh')
+def build_sh_parser():
+    parser_shell = subparsers.add_parser('sh', help='dx shell interpreter',
+                                         description='When run with no arguments, this command launches an interactive shell.  Otherwise, it will load the filename provided and interpret each nonempty line as a command to execute.  In both cases, the "dx" is expected to be omitted from the command or line.',
+                                         prog='dx sh',
+                                         parents=[env_args])
+    parser_shell.add_argument('filename', help='File of dx commands to execute', nargs='?', default=None)
+    parser_shell.set_defaults(func=shell)
+    register_subparser(parser_shell, categories='session')
+
+@lazy_subcommand('exit')
+def build_exit_parser():
+    parser_exit = subparsers.add_parser('exit', help='Exit out of the interactive shell',
+                                        description='Exit out of the interactive shell', prog='dx exit')
+    parser_exit.set_defaults(func=exit_shell)
+    register_subparser(parser_exit, categories='session')
+
+@lazy_subcommand('whoami')
+def build_whoami_parser():
+    parser_whoami = subparsers.add_parser('whoami', help='Print the username of the current user',
+                                          description='Print the username of the current user, in the form "user-USERNAME"')
+    parser_whoami.add_argument('--host', help='Query the specified auth server host (port must also be given)')
+    parser_whoami.add_argument('--port', type=int, help='Query the specified auth server port (host must also be given)')
+    parser_whoami.add_argument('--id', help='Print user ID instead of username', action='store_true', dest='user_id')
+    parser_whoami.set_defaults(func=whoami)
+    register_subparser(parser_whoami, categories='session')
+
+@lazy_subcommand('env')
+def build_env_parser():
+    parser_env = subparsers.add_parser('env', help='Print all environment variables in use',
+                                       description=fill('Prints all environment variables in use as they have been resolved from environment variables and configuration files.  For more details, see') + '\n\nhttps://wiki.dnanexus.com/Command-Line-Client/Environment-Variables',
+                                       formatter_class=argparse.RawTextHelpFormatter, prog='dx env',
+                                       parents=[env_args])
+    parser_env.add_argument('--bash', help=fill('Prints a list of bash commands to export the environment variables', width_adjustment=-14),
+                            action='store_true')
+    parser_env.add_argument('--dx-flags', help=fill('Prints the dx options to override the environment variables', width_adjustment=-14),
+                            action='store_true')
+    parser_env.set_defaults(func=env)
+    register_subparser(parser_env, categories='session')
+
+@lazy_subcommand('setenv')
+def build_setenv_parser():
+    parser_setenv = subparsers.add_parser('setenv',
+                                          help='Sets environment variables for the session',
+                                          description='Sets environment variables for communication with the API server')
+    parser_setenv.add_argument('--noprojects', dest='projects', help='Do not print available projects', action='store_false')
+    parser_setenv.add_argument('--save', help='Save settings for future sessions.  Only one set of settings can be saved at a time.  Always set to true if login is run in a non-interactive session',
+                               action='store_true')
+    parser_setenv.add_argument('--current', help='Do not prompt for new values and just save current settings for future sessions.  Overrides --save to be true.',
+                               action='store_true')
+    parser_setenv.set_defaults(func=setenv)
+    register_subparser(parser_setenv, categories='other')
+
+@lazy_subcommand('clearenv')
+def build_clearenv_parser():
+    parser_clearenv = subparsers.add_parser('clearenv', help='Clears all environment variables set by dx',
+                                            description='Clears all environment variables set by dx.  More specifically, it removes local state stored in ~/.dnanexus_config/environment.  Does not affect the environment variables currently set in your shell.', prog='dx clearenv')
+    parser_clearenv.add_argument('--reset', help='Reset dx environment variables to empty values. Use this to avoid interference between multiple dx sessions when using shell environment variables.',
+                                 action='store_true')
+    parser_clearenv.set_defaults(func=clearenv, interactive=True)
+    register_subparser(parser_clearenv, categories='session')
+
+@lazy_subcommand('invite')
+def build_invite_parser():
+    parser_invite = subparsers.add_parser('invite',
+                                          help='Invite another user to a project or make it public',
+                                          description='Invite a DNAnexus entity to a project.  Use "PUBLIC" as the invitee and "VIEW" as the level to make the project public.  If the invitee is not recognized as a DNAnexus ID or is not "PUBLIC", it will be treated as a username, i.e. "dx invite alice : VIEW" is equivalent to inviting the user with user ID "user-alice" to view your current default project.',
+                                          prog='dx invite',
+                                          parents=[env_args])
+    parser_invite.add_argument('invitee', help='Entity to invite')
+    parser_invite.add_argument('project', help='Project to invite the invitee to', default=':', nargs='?')
+    parser_invite.add_argument('level', help='Permissions level the new member should have',
+                               choices=['VIEW', 'UPLOAD', 'CONTRIBUTE', 'ADMINISTER'], default='VIEW', nargs='?')
+    parser_invite.set_defaults(func=invite)
+    # parser_invite.completer = TODO
+    register_subparser(parser_invite, categories='other')
+
+@lazy_subcommand('uninvite')
+def build_uninvite_parser():
+    parser_uninvite = subparsers.add_parser('uninvite',
+                                            help='Revoke others\' permissions on a project you administer',
+                                            description='Revoke others\' permissions on a project you administer.  Use "PUBLIC" as the entity to make the project no longer public.  If the entity is not recognized as a DNAnexus ID or is not "PUBLIC", it will be treated as a username, i.e. "dx uninvite alice :" is equivalent to revoking the permissions of the user with user ID "user-alice" to your current default project.',
+                                            prog='dx uninvite',
+                                            parents=[env_args])
+    parser_uninvite.add_argument('entity', help='Entity to uninvite')
+    parser_uninvite.add_argument('project', help='Project to revoke permissions from', default=':', nargs='?')
+    parser_uninvite.set_defaults(func=uninvite)
+    register_subparser(parser_uninvite, categories='other')
+
+@lazy_subcommand('ls')
+def build_ls_parser():
+    parser_ls = subparsers.add_parser('ls', help='List folders and/or objects in a folder',
+                                      description='List folders and/or objects in a folder',
+                                      parents=[no_color_arg, delim_arg, env_args, stdout_args],
+                                      prog='dx ls')
+    parser_ls.add_argument('-a', '--all', help='show hidden files', action='store_true')
+    ls_output_args = parser_ls.add_mutually_exclusive_group()
+    ls_output_args.add_argument('-l', '--long', dest='verbose', help='Alias for "verbose"', action='store_true')
+    parser_ls.add_argument('--obj', help='show only objects', action='store_true')
+    parser_ls.add_argument('--folders', help='show only folders', action='store_true')
+    parser_ls.add_argument('--full', help='show full paths of folders', action='store_true')
+    ls_path_action = parser_ls.add_argument('path', help='Folder (possibly in another project) to list the contents of, default is the current directory in the current project.  Syntax: projectID:/folder/path',
                                             nargs='?', default='.')
-tree_path_action.completer = DXPathCompleter(expected='folder')
-parser_tree.set_defaults(func=tree)
-register_subparser(parser_tree, categories='fs')
-
-parser_pwd = subparsers.add_parser('pwd', help='Print current working directory',
-                                   description='Print current working directory',
-                                   prog='dx pwd',
-                                   parents=[env_args])
-parser_pwd.set_defaults(func=pwd)
-register_subparser(parser_pwd, categories='fs')
-
-parser_select = subparsers.add_parser('select', help='List and select a project to switch to',
-                                      description='Interactively list and select a project to switch to.  By default, only lists projects for which you have at least CONTRIBUTE permissions.  Use --public to see the list of public projects.',
-                                      prog='dx select',
+    ls_path_action.completer = DXPathCompleter()
+    parser_ls.set_defaults(func=ls)
+    register_subparser(parser_ls, categories='fs')
+
+@lazy_subcommand('tree')
+def build_tree_parser():
+    parser_tree = subparsers.add_parser('tree', help='List folders and objects in a tree',
+                                        description='List folders and objects in a tree',
+                                        parents=[no_color_arg, env_args],
+                                        prog='dx tree')
+    parser_tree.add_argument('-a', '--all', help='show hidden files', action='store_true')
+    parser_tree.add_argument('-l', '--long', help='use a long listing format', action='store_true')
+    tree_path_action = parser_tree.add_argument('path', help='Folder (possibly in another project) to list the contents of, default is the current directory in the current project.  Syntax: projectID:/folder/path',
+                                                nargs='?', default='.')
+    tree_path_action.completer = DXPathCompleter(expected='folder')
+    parser_tree.set_defaults(func=tree)
+    register_subparser(parser_tree, categories='fs')
+
+@lazy_subcommand('pwd')
+def build_pwd_parser():
+    parser_pwd = subparsers.add_parser('pwd', help='Print current working directory',
+                                       description='Print current working directory',
+                                       prog='dx pwd',
+                                       parents=[env_args])
+    parser_pwd.set_defaults(func=pwd)
+    register_subparser(parser_pwd, categories='fs')
+
+@lazy_subcommand('select')
+def build_select_parser():
+    parser_select = subparsers.add_parser('select', help='List and select a project to switch to',
+                                          description='Interactively list and select a project to switch to.  By default, only lists projects for which you have at least CONTRIBUTE permissions.  Use --public to see the list of public projects.',
+                                          prog='dx select',
+                                          parents=[env_args])
+    select_project_action = parser_select.add_argument('project', help='Name or ID of a project to switch to; if not provided a list will be provided for you',
+                                                       nargs='?', default=None)
+    select_project_action.completer = DXPathCompleter(expected='project', include_current_proj=False)
+    parser_select.add_argument('--name', help='Name of the project (wildcard patterns supported)')
+    parser_select.add_argument('--level', choices=['LIST', 'VIEW', 'UPLOAD', 'CONTRIBUTE', 'ADMINISTER'],
+                               help='Minimum level of permissions expected', default='CONTRIBUTE')
+    parser_select.add_argument('--public', help='Include ONLY public projects (will automatically set --level to VIEW)',
+                               action='store_true')
+    parser_select.set_defaults(func=select, save=False)
+    register_subparser(parser_select, categories='fs')
+
+@lazy_subcommand('cd')
+def build_cd_parser():
+    parser_cd = subparsers.add_parser('cd', help='Change the current working directory',
+                                      description='Change the current working directory', prog='dx cd',
                                       parents=[env_args])
-select_project_action = parser_select.add_argument('project', help='Name or ID of a project to switch to; if not provided a list will be provided for you',
-                                                   nargs='?', default=None)
-select_project_action.completer = DXPathCompleter(expected='project', include_current_proj=False)
-parser_select.add_argument('--name', help='Name of the project (wildcard patterns supported)')
-parser_select.add_argument('--level', choices=['LIST', 'VIEW', 'UPLOAD', 'CONTRIBUTE', 'ADMINISTER'],
-                           help='Minimum level of permissions expected', default='CONTRIBUTE')
-parser_select.add_argument('--public', help='Include ONLY public projects (will automatically set --level to VIEW)',
-                           action='store_true')
-parser_select.set_defaults(func=select, save=False)
-register_subparser(parser_select, categories='fs')
-
-parser_cd = subparsers.add_parser('cd', help='Change the current working directory',
-                                  description='Change the current working directory', prog='dx cd',
-                                  parents=[env_args])
-cd_path_action = parser_cd.add_argument('path', nargs='?', default='/',
-                                        help='Folder (possibly in another project) to which to change the current working directory, default is "/" in the current project')
-cd_path_action.completer = DXPathCompleter(expected='folder')
-parser_cd.set_defaults(func=cd)
-register_subparser(parser_cd, categories='fs')
-
-parser_cp = subparsers.add_parser('cp', help='Copy objects and/or folders between different projects',
-                                  formatter_class=argparse.RawTextHelpFormatter,
-                                  description=fill('Copy objects and/or folders between different projects.  Folders will automatically be copied recursively.  To specify which project to use as a source or destination, prepend the path or ID of the object/folder with the project ID or name and a colon.') + '''
+    cd_path_action = parser_cd.add_argument('path', nargs='?', default='/',
+                                            help='Folder (possibly in another project) to which to change the current working directory, default is "/" in the current project')
+    cd_path_action.completer = DXPathCompleter(expected='folder')
+    parser_cd.set_defaults(func=cd)
+    register_subparser(parser_cd, categories='fs')
+
+@lazy_subcommand('cp')
+def build_cp_parser():
+    parser_cp = subparsers.add_parser('cp', help='Copy objects and/or folders between different projects',
+                                      formatter_class=argparse.RawTextHelpFormatter,
+                                      description=fill('Copy objects and/or folders between different projects.  Folders will automatically be copied recursively.  To specify which project to use as a source or destination, prepend the path or ID of the object/folder with the project ID or name and a colon.') + '''
 
 EXAMPLES
 
@@ -3542,705 +3773,785 @@ EXAMPLES
   $ dx cp FirstProj:gtable-B0XBQFygpqGK8ZPjbk0Q000q .
   $ dx cp reads project-B0VK6F6gpqG6z7JGkbqQ000Q:/folder/path/newname
 ''',
-                                  prog='dx cp',
-                                  parents=[env_args, all_arg])
-cp_sources_action = parser_cp.add_argument('sources', help='Objects and/or folder names to copy', metavar='source',
-                                           nargs='+')
-cp_sources_action.completer = DXPathCompleter()
-parser_cp.add_argument('destination', help=fill('Folder into which to copy the sources or new pathname (if only one source is provided).  Must be in a different project/container than all source paths.', width_adjustment=-15))
-parser_cp.set_defaults(func=cp)
-register_subparser(parser_cp, categories='fs')
-
-parser_mv = subparsers.add_parser('mv', help='Move or rename objects and/or folders inside a project',
-                                  formatter_class=argparse.RawTextHelpFormatter,
-                                  description=fill('Move or rename data objects and/or folders inside a single project.  To copy data between different projects, use \'dx cp\' instead.'),
-                                  prog='dx mv',
-                                  parents=[env_args, all_arg])
-mv_sources_action = parser_mv.add_argument('sources', help='Objects and/or folder names to move', metavar='source',
-                                           nargs='+')
-mv_sources_action.completer = DXPathCompleter()
-parser_mv.add_argument('destination', help=fill('Folder into which to move the sources or new pathname (if only one source is provided).  Must be in the same project/container as all source paths.', width_adjustment=-15))
-parser_mv.set_defaults(func=mv)
-register_subparser(parser_mv, categories='fs')
-
-parser_mkdir = subparsers.add_parser('mkdir', help='Create a new folder',
-                                     description='Create a new folder', prog='dx mkdir',
-                                     parents=[env_args])
-parser_mkdir.add_argument('-p', '--parents', help='no error if existing, create parent directories as needed',
-                          action='store_true')
-mkdir_paths_action = parser_mkdir.add_argument('paths', help='Paths to folders to create', metavar='path', nargs='+')
-mkdir_paths_action.completer = DXPathCompleter(expected='folder')
-parser_mkdir.set_defaults(func=mkdir)
-register_subparser(parser_mkdir, categories='fs')
-
-parser_rmdir = subparsers.add_parser('rmdir', help='Remove a folder',
-                                     description='Remove a folder', prog='dx rmdir',
-                                     parents=[env_args])
-rmdir_paths_action = parser_rmdir.add_argument('paths', help='Paths to folders to remove', metavar='path', nargs='+')
-rmdir_paths_action.completer = DXPathCompleter(expected='folder')
-parser_rmdir.set_defaults(func=rmdir)
-register_subparser(parser_rmdir, categories='fs')
-
-parser_rm = subparsers.add_parser('rm', help='Remove data objects and folders',
-                                  description='Remove data objects and folders.', prog='dx rm',
-                                  parents=[env_args, all_arg])
-rm_paths_action = parser_rm.add_argument('paths', help='Paths to remove', metavar='path', nargs='+')
-rm_paths_action.completer = DXPathCompleter()
-parser_rm.add_argument('-r', '--recursive', help='Recurse into a directory', action='store_true')
-parser_rm.set_defaults(func=rm)
-register_subparser(parser_rm, categories='fs')
-
-# data
-
-parser_describe = subparsers.add_parser('describe', help='Describe a remote object',
-                                        description=fill('Describe a DNAnexus entity.  Use this command to describe data objects by name or ID, jobs, apps, users, organizations, etc.  If using the "--json" flag, it will thrown an error if more than one match is found (but if you would like a JSON array of the describe hashes of all matches, then provide the "--multi" flag).  Otherwise, it will always display all results it finds.') + '\n\nNOTES:\n\n- ' + fill('The project found in the path is used as a HINT when you are using an object ID; you may still get a result if you have access to a copy of the object in some other project, but if it exists in the specified project, its description will be returned.') + '\n\n- ' + fill('When describing apps or applets, options marked as advanced inputs will be hidden unless --verbose is provided'),
-                                        formatter_class=argparse.RawTextHelpFormatter,
-                                        parents=[json_arg, no_color_arg, delim_arg, env_args],
-                                        prog='dx describe')
-parser_describe.add_argument('--details', help='Include details of data objects', action='store_true')
-parser_describe.add_argument('--verbose', help='Include all possible metadata', action='store_true')
-parser_describe.add_argument('--name', help='Only print the matching names, one per line', action='store_true')
-parser_describe.add_argument('--multi', help=fill('If the flag --json is also provided, then returns a JSON array of describe hashes of all matching results', width_adjustment=-24),
-                             action='store_true')
-describe_path_action = parser_describe.add_argument('path', help=fill('Object ID or path to an object (possibly in another project) to describe.', width_adjustment=-24))
-describe_path_action.completer = DXPathCompleter()
-parser_describe.set_defaults(func=describe)
-register_subparser(parser_describe, categories=('data', 'metadata'))
-
-parser_upload = subparsers.add_parser('upload', help='Upload file(s) or directory',
-                                      description='Upload local file(s) or directory.  If "-" is provided, stdin will be used instead.  By default, the filename will be used as its new name.  If --path/--destination is provided with a path ending in a slash, the filename will be used, and the folder path will be used as a destination.  If it does not end in a slash, then it will be used as the final name.',
-                                      parents=[parser_dataobject_args, stdout_args, env_args],
-                                      prog="dx upload")
-upload_filename_action = parser_upload.add_argument('filename', nargs='+',
-                                                    help='Local file or directory to upload ("-" indicates stdin input); provide multiple times to upload multiple files or directories')
-upload_filename_action.completer = LocalCompleter()
-parser_upload.add_argument('-o', '--output', help=argparse.SUPPRESS) # deprecated; equivalent to --path/--destination
-parser_upload.add_argument('--path', '--destination',
-                           help=fill('DNAnexus path to upload file(s) to (default uses current project and folder if not provided)', width_adjustment=-24),
-                           nargs='?')
-parser_upload.add_argument('-r', '--recursive', help='Upload directories recursively', action='store_true')
-parser_upload.add_argument('--wait', help='Wait until the file has finished closing', action='store_true')
-parser_upload.add_argument('--no-progress', help='Do not show a progress bar', dest='show_progress',
-                           action='store_false', default=sys.stderr.isatty())
-parser_upload.set_defaults(func=upload, mute=False)
-register_subparser(parser_upload, categories='data')
-
-parser_download = subparsers.add_parser('download', help='Download file(s)',
-                                        description='Download the contents of a file object or multiple objects.  Use "-o -" to direct the output to stdout.',
-                                        prog='dx download',
-                                        parents=[env_args])
-parser_download_paths_arg = parser_download.add_argument('paths', help='Data object ID or name, or folder to download',
-                                                         nargs='+', metavar='path')
-parser_download_paths_arg.completer = DXPathCompleter(classes=['file'])
-parser_download.add_argument('-o', '--output', help='Local filename or directory to be used ("-" indicates stdout output); if not supplied or a directory is given, the object\'s name on the platform will be used, along with any applicable extensions')
-parser_download.add_argument('-f', '--overwrite', help='Overwrite the local file if necessary', action='store_true')
-parser_download.add_argument('-r', '--recursive', help='Download folders recursively', action='store_true')
-parser_download.add_argument('-a', '--all', help='If multiple objects match the input, download all of them',
-                             action='store_true')
-parser_download.add_argument('--no-progress', help='Do not show a progress bar', dest='show_progress',
-                             action='store_false', default=sys.stderr.isatty())
-parser_download.set_defaults(func=download)
-register_subparser(parser_download, categories='data')
-
-parser_make_download_url = subparsers.add_parser('make_download_url', help='Create a file download link for sharing',
-                                                 description='Creates a pre-authenticated link that can be used to download a file without logging in.')
-path_action = parser_make_download_url.add_argument('path', help='Data object ID or name to access')
-path_action.completer = DXPathCompleter(classes=['file'])
-parser_make_download_url.add_argument('--duration', help='Time for which the URL will remain valid (in seconds, or use suffix s, m, h, d, w, M, y). Default: 1 day')
-parser_make_download_url.add_argument('--filename', help='Name that the server will instruct the client to save the file as (default is the filename)')
-parser_make_download_url.set_defaults(func=make_download_url)
-register_subparser(parser_make_download_url, categories='data')
-
-parser_cat = subparsers.add_parser('cat', help='Print file(s) to stdout', prog='dx cat',
-                                   parents=[env_args])
-cat_path_action = parser_cat.add_argument('path', help='File ID or name(s) to print to stdout', nargs='+')
-cat_path_action.completer = DXPathCompleter(classes=['file'])
-parser_cat.set_defaults(func=cat)
-register_subparser(parser_cat, categories='data')
-
-parser_head = subparsers.add_parser('head',
-                                    help='Print part of a file or gtable',
-                                    description='Print the first part of a file or a gtable.  By default, prints the first 10 lines or rows, respectively.  Additional query parameters can be provided in the case of gtables.  The output for gtables is formatted for human-readability; to print rows in a machine-readable format, see "dx export tsv".',
-                                    parents=[no_color_arg, env_args],
-                                    prog='dx head')
-parser_head.add_argument('-n', '--lines', type=int, metavar='N', help='Print the first N lines or rows (default 10)',
-                         default=10)
-head_gtable_args = parser_head.add_argument_group(title='GTable-specific options')
-head_gtable_args.add_argument('-w', '--max-col-width', type=int, help='Maximum width of each column to display',
-                              default=32)
-head_gtable_args.add_argument('--starting', type=int, help='Specify starting row ID', default=0)
-head_gtable_args.add_argument('--gri', nargs=3, metavar=('CHR', 'LO', 'HI'), help='Specify chromosome name, low coordinate, and high coordinate for Genomic Range Index')
-head_gtable_args.add_argument('--gri-mode',
-                              help='Specify the mode of the GRI query (\'overlap\' or \'enclose\'; default \'overlap\')',
-                              default="overlap")
-head_gtable_args.add_argument('--gri-name',
-                              help='Override the default name of the Genomic Range Index (default: "gri"))',
-                              default="gri")
-head_path_action = parser_head.add_argument('path', help='File or gtable ID or name to access')
-head_path_action.completer = DXPathCompleter(classes=['file', 'gtable'])
-parser_head.set_defaults(func=head)
-register_subparser(parser_head, categories='data')
-
-parser_import = subparsers.add_parser('import',
-                                      help='Import (convert and upload) a local table or genomic file',
-                                      description=fill('Import a local file to the DNAnexus platform as a GenomicTable.') + '\n\n' + fill('For more details on how to import from a particular format, run ') + '\n  $ dx help import <format>' + '\n\nSupported formats:\n\n  ' + '\n  '.join(sorted(importers)),
-                                      formatter_class=argparse.RawTextHelpFormatter,
-                                      prog='dx import',
-                                      parents=[env_args])
-parser_import.add_argument('format', help='Format to import from')
-import_args_action = parser_import.add_argument('importer_args', help=fill('Arguments passed to the importer', width_adjustment=-24),
-                                                nargs=argparse.REMAINDER)
-import_args_action.completer = LocalCompleter()
-parser_import.set_defaults(func=dximport)
-register_subparser(parser_import, categories='data')
-
-parser_export = subparsers.add_parser('export',
-                                      help='Export (download and convert) a gtable into a local file',
-                                      description=fill('Export a GenomicTable into a local file with a particular file format.') + '\n\n' + fill('For more details on how to convert into a particular format, run ') + '\n  $ dx help export <format>' + '\n\nSupported formats:\n\n  ' + '\n  '.join(sorted(exporters)),
+                                      prog='dx cp',
+                                      parents=[env_args, all_arg])
+    cp_sources_action = parser_cp.add_argument('sources', help='Objects and/or folder names to copy', metavar='source',
+                                               nargs='+')
+    cp_sources_action.completer = DXPathCompleter()
+    parser_cp.add_argument('destination', help=fill('Folder into which to copy the sources or new pathname (if only one source is provided).  Must be in a different project/container than all source paths.', width_adjustment=-15))
+    parser_cp.set_defaults(func=cp)
+    register_subparser(parser_cp, categories='fs')
+
+@lazy_subcommand('mv')
+def build_mv_parser():
+    parser_mv = subparsers.add_parser('mv', help='Move or rename objects and/or folders inside a project',
                                       formatter_class=argparse.RawTextHelpFormatter,
-                                      prog='dx export',
-                                      parents=[env_args])
-parser_export.add_argument('format', help='Format to export to')
-parser_export.add_argument('exporter_args', help=fill('Arguments passed to the exporter', width_adjustment=-24),
-                           nargs=argparse.REMAINDER)
-parser_export.set_defaults(func=export)
-register_subparser(parser_export, categories='data')
-
-from dxpy.scripts.dx_build_app import parser as build_parser
-build_parser.prog = 'dx build'
-build_parser.set_defaults(mode="applet")
-
-parser_build = subparsers.add_parser('build', help='Upload and build a new applet/app',
-                                     description='Build an applet or app object from a local source directory.  You can use ' + BOLD("dx-app-wizard") + ' to generate a skeleton directory with the necessary files.',
-                                     prog='dx build',
-                                     add_help=False,
-                                     parents=[build_parser, env_args]
-)
-parser_build.set_defaults(func=build)
-register_subparser(parser_build, categories='exec')
-
-parser_add = subparsers.add_parser('add', help='Add one or more items to a list',
-                                   description='Use this command with one of the availabile subcommands to perform various actions such as adding other users to the list of developers or authorized users of an app',
-                                   prog='dx add')
-subparsers_add = parser_add.add_subparsers(parser_class=DXArgumentParser)
-subparsers_add.metavar = 'list_type'
-register_subparser(parser_add, categories=())
-
-parser_add_users = subparsers_add.add_parser('users', help='Add authorized users for an app',
-                                             description='Add users or orgs to the list of authorized users of an app.  Published versions of the app will only be accessible to users represented by this list and to developers of the app.  Unpublished versions are restricted to the developers.',
-                                             prog='dx add users', parents=[env_args])
-parser_add_users.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
-parser_add_users.add_argument('users', metavar='authorizedUser',
-                              help='One or more users or orgs to add; use "PUBLIC" to allow all access',
-                              nargs='+')
-parser_add_users.set_defaults(func=add_users)
-register_subparser(parser_add_users, subparsers_action=subparsers_add, categories='exec')
-
-parser_add_developers = subparsers_add.add_parser('developers', help='Add developers for an app',
-                                                  description='Add users to the list of developers for an app.  Developers are able to build and publish new versions of the app, and add or remove others from the list of developers and authorized users.',
-                                                  prog='dx add developers', parents=[env_args])
-parser_add_developers.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
-parser_add_developers.add_argument('developers', metavar='developer', help='One or more users to add',
-                              nargs='+')
-parser_add_developers.set_defaults(func=add_developers)
-register_subparser(parser_add_developers, subparsers_action=subparsers_add, categories='exec')
-
-parser_add_stage = subparsers_add.add_parser('stage', help='Add a stage to a workflow',
-                                             description='Add a stage to a workflow.  Default inputs for the stage can also be set at the same time.',
-                                             parents=[exec_input_args, stdout_args, env_args,
-                                                      instance_type_arg],
-                                             prog='dx add stage')
-parser_add_stage.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
-parser_add_stage.add_argument('executable', help='Name or ID of an executable to add as a stage in the workflow').completer = MultiCompleter([DXAppCompleter(),
-                                                                                                                                              DXPathCompleter(classes=['applet'])])
-parser_add_stage.add_argument('--alias', '--version', '--tag', dest='alias',
-                              help='Tag or version of the app to add if the executable is an app (default: "default" if an app)')
-parser_add_stage.add_argument('--name', help='Stage name')
-add_stage_folder_args = parser_add_stage.add_mutually_exclusive_group()
-add_stage_folder_args.add_argument('--output-folder', help='Path to the output folder for the stage (interpreted as an absolute path)')
-add_stage_folder_args.add_argument('--relative-output-folder', help='A relative folder path for the stage (interpreted as relative to the workflow\'s output folder)')
-parser_add_stage.set_defaults(func=workflow_cli.add_stage)
-register_subparser(parser_add_stage, subparsers_action=subparsers_add, categories='workflow')
-
-parser_list = subparsers.add_parser('list', help='Print the members of a list',
-                                   description='Use this command with one of the availabile subcommands to perform various actions such as printing the list of developers or authorized users of an app.',
-                                   prog='dx list')
-subparsers_list = parser_list.add_subparsers(parser_class=DXArgumentParser)
-subparsers_list.metavar = 'list_type'
-register_subparser(parser_list, categories=())
-
-parser_list_users = subparsers_list.add_parser('users', help='List authorized users for an app',
-                                               description='List the authorized users of an app.  Published versions of the app will only be accessible to users represented by this list and to developers of the app.  Unpublished versions are restricted to the developers',
-                                               prog='dx list users', parents=[env_args])
-parser_list_users.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
-parser_list_users.set_defaults(func=list_users)
-register_subparser(parser_list_users, subparsers_action=subparsers_list, categories='exec')
-
-parser_list_developers = subparsers_list.add_parser('developers', help='List developers for an app',
-                                                    description='List the developers for an app.  Developers are able to build and publish new versions of the app, and add or remove others from the list of developers and authorized users.',
-                                                    prog='dx list developers', parents=[env_args])
-parser_list_developers.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
-parser_list_developers.set_defaults(func=list_developers)
-register_subparser(parser_list_developers, subparsers_action=subparsers_list, categories='exec')
-
-parser_list_stages = subparsers_list.add_parser('stages', help='List the stages in a workflow',
-                                                description='List the stages in a workflow.',
-                                                parents=[env_args],
-                                                prog='dx list stages')
-parser_list_stages.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
-parser_list_stages.set_defaults(func=workflow_cli.list_stages)
-register_subparser(parser_list_stages, subparsers_action=subparsers_list, categories='workflow')
-
-parser_remove = subparsers.add_parser('remove', help='Remove one or more items to a list',
-                                      description='Use this command with one of the available subcommands to perform various actions such as removing other users from the list of developers or authorized users of an app.',
-                                      prog='dx remove')
-subparsers_remove = parser_remove.add_subparsers(parser_class=DXArgumentParser)
-subparsers_remove.metavar = 'list_type'
-register_subparser(parser_remove, categories=())
-
-parser_remove_users = subparsers_remove.add_parser('users', help='Remove authorized users for an app',
-                                                   description='Remove users or orgs from the list of authorized users of an app.  Published versions of the app will only be accessible to users represented by this list and to developers of the app.  Unpublished versions are restricted to the developers',
-                                                   prog='dx remove users', parents=[env_args])
-parser_remove_users.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
-parser_remove_users.add_argument('users', metavar='authorizedUser',
-                                 help='One or more users or orgs to remove; use "PUBLIC" to remove public access',
-                                 nargs='+')
-parser_remove_users.set_defaults(func=remove_users)
-register_subparser(parser_remove_users, subparsers_action=subparsers_remove, categories='exec')
-
-parser_remove_developers = subparsers_remove.add_parser('developers', help='Remove developers for an app',
-                                                        description='Remove users from the list of developers for an app.  Developers are able to build and publish new versions of the app, and add or remove others from the list of developers and authorized users.',
-                                                        prog='dx remove developers', parents=[env_args])
-parser_remove_developers.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
-parser_remove_developers.add_argument('developers', metavar='developer', help='One or more users to remove',
-                                      nargs='+')
-parser_remove_developers.set_defaults(func=remove_developers)
-register_subparser(parser_remove_developers, subparsers_action=subparsers_remove, categories='exec')
-
-parser_remove_stage = subparsers_remove.add_parser('stage', help='Remove a stage from a workflow',
-                                                   description='Remove a stage from a workflow.  The stage should be indicated either by an integer (0-indexed, i.e. "0" for the first stage), or a stage ID.',
-                                                   parents=[stdout_args, env_args],
-                                                   prog='dx remove stage')
-parser_remove_stage.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
-parser_remove_stage.add_argument('stage', help='Stage (index or ID) of the workflow to remove')
-parser_remove_stage.set_defaults(func=workflow_cli.remove_stage)
-register_subparser(parser_remove_stage, subparsers_action=subparsers_remove, categories='workflow')
-
-parser_update = subparsers.add_parser('update', help='Update certain types of metadata',
-                                      description='''
-Use this command with one of the available targets listed below to update
-their metadata that are not covered by the other
-subcommands.''',
-                                      prog='dx update')
-subparsers_update = parser_update.add_subparsers(parser_class=DXArgumentParser)
-subparsers_update.metavar = 'target'
-register_subparser(parser_update, categories=())
-
-parser_update_workflow = subparsers_update.add_parser('workflow', help='Update the metadata for a workflow',
-                                                      description='Update the metadata for an existing workflow',
-                                                      parents=[stdout_args, env_args],
-                                                      prog='dx update workflow')
-parser_update_workflow.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
-update_workflow_title_args = parser_update_workflow.add_mutually_exclusive_group()
-update_workflow_title_args.add_argument('--title', help='Workflow title')
-update_workflow_title_args.add_argument('--no-title', help='Unset the workflow title', action='store_true')
-parser_update_workflow.add_argument('--summary', help='Workflow summary')
-parser_update_workflow.add_argument('--description', help='Workflow description')
-update_workflow_output_folder_args = parser_update_workflow.add_mutually_exclusive_group()
-update_workflow_output_folder_args.add_argument('--output-folder', help='Default output folder for the workflow')
-update_workflow_output_folder_args.add_argument('--no-output-folder', help='Unset the default output folder for the workflow', action='store_true')
-parser_update_workflow.set_defaults(func=workflow_cli.update_workflow)
-register_subparser(parser_update_workflow, subparsers_action=subparsers_update, categories='workflow')
-
-parser_update_stage = subparsers_update.add_parser('stage', help='Update the metadata for a stage in a workflow',
-                                                   description='Update the metadata for a stage in a workflow',
-                                                   parents=[exec_input_args, stdout_args, env_args,
-                                                            instance_type_arg],
-                                                   prog='dx update stage')
-parser_update_stage.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
-parser_update_stage.add_argument('stage', help='Stage (index or ID) of the workflow to update')
-parser_update_stage.add_argument('--executable', help='Name or ID of an executable to replace in the stage').completer = MultiCompleter([DXAppCompleter(),
-                                                                                                                                         DXPathCompleter(classes=['applet'])])
-parser_update_stage.add_argument('--alias', '--version', '--tag', dest='alias',
-                                 help='Tag or version of the app to use if replacing the stage executable with an app (default: "default" if an app)')
-parser_update_stage.add_argument('--force',
-                                 help='Whether to replace the executable even if it the new one cannot be verified as compatible with the previous version',
+                                      description=fill('Move or rename data objects and/or folders inside a single project.  To copy data between different projects, use \'dx cp\' instead.'),
+                                      prog='dx mv',
+                                      parents=[env_args, all_arg])
+    mv_sources_action = parser_mv.add_argument('sources', help='Objects and/or folder names to move', metavar='source',
+                                               nargs='+')
+    mv_sources_action.completer = DXPathCompleter()
+    parser_mv.add_argument('destination', help=fill('Folder into which to move the sources or new pathname (if only one source is provided).  Must be in the same project/container as all source paths.', width_adjustment=-15))
+    parser_mv.set_defaults(func=mv)
+    register_subparser(parser_mv, categories='fs')
+
+@lazy_subcommand('mkdir')
+def build_mkdir_parser():
+    parser_mkdir = subparsers.add_parser('mkdir', help='Create a new folder',
+                                         description='Create a new folder', prog='dx mkdir',
+                                         parents=[env_args])
+    parser_mkdir.add_argument('-p', '--parents', help='no error if existing, create parent directories as needed',
+                              action='store_true')
+    mkdir_paths_action = parser_mkdir.add_argument('paths', help='Paths to folders to create', metavar='path', nargs='+')
+    mkdir_paths_action.completer = DXPathCompleter(expected='folder')
+    parser_mkdir.set_defaults(func=mkdir)
+    register_subparser(parser_mkdir, categories='fs')
+
+@lazy_subcommand('rmdir')
+def build_rmdir_parser():
+    parser_rmdir = subparsers.add_parser('rmdir', help='Remove a folder',
+                                         description='Remove a folder', prog='dx rmdir',
+                                         parents=[env_args])
+    rmdir_paths_action = parser_rmdir.add_argument('paths', help='Paths to folders to remove', metavar='path', nargs='+')
+    rmdir_paths_action.completer = DXPathCompleter(expected='folder')
+    parser_rmdir.set_defaults(func=rmdir)
+    register_subparser(parser_rmdir, categories='fs')
+
+@lazy_subcommand('rm')
+def build_rm_parser():
+    parser_rm = subparsers.add_parser('rm', help='Remove data objects and folders',
+                                      description='Remove data objects and folders.', prog='dx rm',
+                                      parents=[env_args, all_arg])
+    rm_paths_action = parser_rm.add_argument('paths', help='Paths to remove', metavar='path', nargs='+')
+    rm_paths_action.completer = DXPathCompleter()
+    parser_rm.add_argument('-r', '--recursive', help='Recurse into a directory', action='store_true')
+    parser_rm.set_defaults(func=rm)
+    register_subparser(parser_rm, categories='fs')
+
+    # data
+
+@lazy_subcommand('describe')
+def build_describe_parser():
+    parser_describe = subparsers.add_parser('describe', help='Describe a remote object',
+                                            description=fill('Describe a DNAnexus entity.  Use this command to describe data objects by name or ID, jobs, apps, users, organizations, etc.  If using the "--json" flag, it will thrown an error if more than one match is found (but if you would like a JSON array of the describe hashes of all matches, then provide the "--multi" flag).  Otherwise, it will always display all results it finds.') + '\n\nNOTES:\n\n- ' + fill('The project found in the path is used as a HINT when you are using an object ID; you may still get a result if you have access to a copy of the object in some other project, but if it exists in the specified project, its description will be returned.') + '\n\n- ' + fill('When describing apps or applets, options marked as advanced inputs will be hidden unless --verbose is provided'),
+                                            formatter_class=argparse.RawTextHelpFormatter,
+                                            parents=[json_arg, no_color_arg, delim_arg, env_args],
+                                            prog='dx describe')
+    parser_describe.add_argument('--details', help='Include details of data objects', action='store_true')
+    parser_describe.add_argument('--verbose', help='Include all possible metadata', action='store_true')
+    parser_describe.add_argument('--name', help='Only print the matching names, one per line', action='store_true')
+    parser_describe.add_argument('--multi', help=fill('If the flag --json is also provided, then returns a JSON array of describe hashes of all matching results', width_adjustment=-24),
+                                 action='store_true')
+    describe_path_action = parser_describe.add_argument('path', help=fill('Object ID or path to an object (possibly in another project) to describe.', width_adjustment=-24))
+    describe_path_action.completer = DXPathCompleter()
+    parser_describe.set_defaults(func=describe)
+    register_subparser(parser_describe, categories=('data', 'metadata'))
+
+@lazy_subcommand('upload')
+def build_upload_parser():
+    parser_upload = subparsers.add_parser('upload', help='Upload file(s) or directory',
+                                          description='Upload local file(s) or directory.  If "-" is provided, stdin will be used instead.  By default, the filename will be used as its new name.  If --path/--destination is provided with a path ending in a slash, the filename will be used, and the folder path will be used as a destination.  If it does not end in a slash, then it will be used as the final name.',
+                                          parents=[parser_dataobject_args, stdout_args, env_args],
+                                          prog="dx upload")
+    upload_filename_action = parser_upload.add_argument('filename', nargs='+',
+                                                        help='Local file or directory to upload ("-" indicates stdin input); provide multiple times to upload multiple files or directories')
+    upload_filename_action.completer = LocalCompleter()
+    parser_upload.add_argument('-o', '--output', help=argparse.SUPPRESS) # deprecated; equivalent to --path/--destination
+    parser_upload.add_argument('--path', '--destination',
+                               help=fill('DNAnexus path to upload file(s) to (default uses current project and folder if not provided)', width_adjustment=-24),
+                               nargs='?')
+    parser_upload.add_argument('-r', '--recursive', help='Upload directories recursively', action='store_true')
+    parser_upload.add_argument('--wait', help='Wait until the file has finished closing', action='store_true')
+    parser_upload.add_argument('--no-progress', help='Do not show a progress bar', dest='show_progress',
+                               action='store_false', default=None)
+    parser_upload.set_defaults(func=upload, mute=False)
+    register_subparser(parser_upload, categories='data')
+
+@lazy_subcommand('download')
+def build_download_parser():
+    parser_download = subparsers.add_parser('download', help='Download file(s)',
+                                            description='Download the contents of a file object or multiple objects.  Use "-o -" to direct the output to stdout.',
+                                            prog='dx download',
+                                            parents=[env_args])
+    parser_download_paths_arg = parser_download.add_argument('paths', help='Data object ID or name, or folder to download',
+                                                             nargs='+', metavar='path')
+    parser_download_paths_arg.completer = DXPathCompleter(classes=['file'])
+    parser_download.add_argument('-o', '--output', help='Local filename or directory to be used ("-" indicates stdout output); if not supplied or a directory is given, the object\'s name on the platform will be used, along with any applicable extensions')
+    parser_download.add_argument('-f', '--overwrite', help='Overwrite the local file if necessary', action='store_true')
+    parser_download.add_argument('-r', '--recursive', help='Download folders recursively', action='store_true')
+    parser_download.add_argument('-a', '--all', help='If multiple objects match the input, download all of them',
                                  action='store_true')
-update_stage_name_args = parser_update_stage.add_mutually_exclusive_group()
-update_stage_name_args.add_argument('--name', help='Stage name')
-update_stage_name_args.add_argument('--no-name', help='Unset the stage name', action='store_true')
-update_stage_folder_args = parser_update_stage.add_mutually_exclusive_group()
-update_stage_folder_args.add_argument('--output-folder', help='Path to the output folder for the stage (interpreted as an absolute path)')
-update_stage_folder_args.add_argument('--relative-output-folder', help='A relative folder path for the stage (interpreted as relative to the workflow\'s output folder)')
-parser_update_stage.set_defaults(func=workflow_cli.update_stage)
-register_subparser(parser_update_stage, subparsers_action=subparsers_update, categories='workflow')
-
-parser_install = subparsers.add_parser('install', help='Install an app',
-                                       description='Install an app by name.  To see a list of apps you can install, hit <TAB> twice after "dx install" or run "' + BOLD() + 'dx find apps' + ENDC() + '" to see a list of available apps.', prog='dx install',
+    parser_download.add_argument('--no-progress', help='Do not show a progress bar', dest='show_progress',
+                                 action='store_false', default=None)
+    parser_download.set_defaults(func=download)
+    register_subparser(parser_download, categories='data')
+
+@lazy_subcommand('make_download_url')
+def build_make_download_url_parser():
+    parser_make_download_url = subparsers.add_parser('make_download_url', help='Create a file download link for sharing',
+                                                     description='Creates a pre-authenticated link that can be used to download a file without logging in.')
+    path_action = parser_make_download_url.add_argument('path', help='Data object ID or name to access')
+    path_action.completer = DXPathCompleter(classes=['file'])
+    parser_make_download_url.add_argument('--duration', help='Time for which the URL will remain valid (in seconds, or use suffix s, m, h, d, w, M, y). Default: 1 day')
+    parser_make_download_url.add_argument('--filename', help='Name that the server will instruct the client to save the file as (default is the filename)')
+    parser_make_download_url.set_defaults(func=make_download_url)
+    register_subparser(parser_make_download_url, categories='data')
+
+@lazy_subcommand('cat')
+def build_cat_parser():
+    parser_cat = subparsers.add_parser('cat', help='Print file(s) to stdout', prog='dx cat',
                                        parents=[env_args])
-install_app_action = parser_install.add_argument('app', help='ID or name of app to install')
-install_app_action.completer = DXAppCompleter(installed=False)
-parser_install.set_defaults(func=install)
-register_subparser(parser_install, categories='exec')
-
-parser_uninstall = subparsers.add_parser('uninstall', help='Uninstall an app',
-                                         description='Uninstall an app by name.', prog='dx uninstall',
-                                         parents=[env_args])
-uninstall_app_action = parser_uninstall.add_argument('app', help='ID or name of app to uninstall')
-uninstall_app_action.completer = DXAppCompleter(installed=True)
-parser_uninstall.set_defaults(func=uninstall)
-register_subparser(parser_uninstall, categories='exec')
-
-parser_run = subparsers.add_parser('run', help='Run an applet, app, or workflow', add_help=False,
-                                   description=(fill('Run an applet, app, or workflow.  To see a list of executables you can run, hit <TAB> twice after "dx run" or run "' + BOLD() + 'dx find apps' + ENDC() + '" to see a list of available apps.') + '\n\n' + fill('If any inputs are required but not specified, an interactive mode for selecting inputs will be launched.  Inputs can be set in multiple ways.  Run "dx run --input-help" for more details.')),
-                                   prog='dx run',
-                                   formatter_class=argparse.RawTextHelpFormatter,
-                                   parents=[exec_input_args, stdout_args, env_args, extra_args,
-                                            instance_type_arg])
-run_executable_action = parser_run.add_argument('executable',
-                                                help=fill('Name or ID of an applet, app, or workflow to run; must be provided if --clone is not set', width_adjustment=-24),
-                                                nargs="?", default="")
-run_executable_action.completer = MultiCompleter([DXAppCompleter(),
-                                                  DXPathCompleter(classes=['applet', 'workflow'], visibility="visible")])
-parser_run.add_argument('-h', '--help', help='show this help message and exit', nargs=0, action=runHelp)
-parser_run.add_argument('--clone', help=fill('Job or analysis ID or name from which to use as default options (will use the exact same executable ID, destination project and folder, job input, instance type requests, and a similar name unless explicitly overridden by command-line arguments)', width_adjustment=-24))
-parser_run.add_argument('--alias', '--version', dest='alias',
-                        help=fill('Alias (tag) or version of the app to run (default: "default" if an app)', width_adjustment=-24))
-parser_run.add_argument('--destination', '--folder', metavar='PATH', dest='folder', help=fill('The full project:folder path in which to output the results.  By default, the current working directory will be used.', width_adjustment=-24))
-parser_run.add_argument('--project', metavar='PROJECT',
-                        help=fill('Project name or ID in which to run the executable. This can also ' +
-                                  'be specified together with the output folder in --destination.',
-                                  width_adjustment=-24))
-parser_run.add_argument('--stage-output-folder', metavar=('STAGE_ID', 'FOLDER'),
-                        help=fill('A stage identifier (ID, name, or index), and a folder path to ' +
-                                  'use as its output folder',
-                                  width_adjustment=-24),
-                        nargs=2,
-                        action='append',
-                        default=[])
-parser_run.add_argument('--stage-relative-output-folder', metavar=('STAGE_ID', 'FOLDER'),
-                        help=fill('A stage identifier (ID, name, or index), and a relative folder ' +
-                                  'path to the workflow output folder to use as the output folder',
-                                  width_adjustment=-24),
-                        nargs=2,
-                        action='append',
-                        default=[])
-parser_run.add_argument('--rerun-stage', metavar='STAGE_ID', dest='rerun_stages',
-                        help=fill('A stage (using its ID, name, or index) to rerun, or "*" to ' +
-                                  'indicate all stages should be rerun; repeat as necessary',
-                                  width_adjustment=-24),
-                        action='append')
-parser_run.add_argument('--name', help=fill('Name for the job (default is the app or applet name)', width_adjustment=-24))
-parser_run.add_argument('--property', dest='properties', metavar='KEY=VALUE',
-                        help=(fill('Key-value pair to add as a property; repeat as necessary,',
-                                   width_adjustment=-24) + '\n' +
-                              fill('e.g. "--property key1=val1 --property key2=val2"',
-                                   width_adjustment=-24, initial_indent=' ', subsequent_indent=' ',
-                                   break_on_hyphens=False)),
-                        action='append')
-parser_run.add_argument('--tag', metavar='TAG', dest='tags', help=fill('Tag for the resulting execution; repeat as necessary,', width_adjustment=-24) + '\n' + fill('e.g. "--tag tag1 --tag tag2"', width_adjustment=-24, break_on_hyphens=False, initial_indent=' ', subsequent_indent=' '), action='append')
-parser_run.add_argument('--delay-workspace-destruction',
-                        help=fill('Whether to keep the job\'s temporary workspace around for debugging purposes for 3 days after it succeeds or fails', width_adjustment=-24),
-                        action='store_true')
-parser_run.add_argument('--priority',
-                        choices=['normal', 'high'],
-                        help='Request a scheduling priority for all resulting jobs')
-parser_run.add_argument('-y', '--yes', dest='confirm', help='Do not ask for confirmation', action='store_false')
-parser_run.add_argument('--wait', help='Wait until the job is done before returning', action='store_true')
-parser_run.add_argument('--watch', help="Watch the job after launching it; sets --priority high", action='store_true')
-parser_run.add_argument('--allow-ssh', action='append', nargs='?', metavar='ADDRESS',
-                        help=fill('Configure the job to allow SSH access; sets --priority high. If an argument is ' +
-                                  'supplied, it is interpreted as an IP or hostname mask to allow connections from, ' +
-                                  'e.g. "--allow-ssh 1.2.3.4 --allow-ssh berkeley.edu"'))
-parser_run.add_argument('--ssh', help="Configure the job to allow SSH access and connect to it after launching; sets --priority high", action='store_true')
-parser_run.add_argument('--debug-on', action='append', choices=['AppError', 'AppInternalError', 'ExecutionError'],
-                        help="Configure the job to hold for debugging when any of the listed errors occur")
-parser_run.add_argument('--input-help',
-                        help=fill('Print help and examples for how to specify inputs',
-                                  width_adjustment=-24),
-                        action=runInputHelp, nargs=0)
-parser_run.set_defaults(func=run, verbose=False, help=False, details=None,
-                        stage_instance_types=None, stage_folders=None)
-register_subparser(parser_run, categories='exec')
-
-parser_watch = subparsers.add_parser('watch', help='Watch logs of a job and its subjobs', prog='dx watch',
-                                     description='Monitors logging output from a running job',
-                                     parents=[env_args, no_color_arg])
-parser_watch.add_argument('jobid', help='ID of the job to watch')
-# .completer = TODO
-parser_watch.add_argument('-n', '--num-recent-messages', help='Number of recent messages to get',
-                          type=int, default=1024*256)
-parser_watch.add_argument('--tree', help='Include the entire job tree', action='store_true')
-parser_watch.add_argument('-l', '--levels', action='append', choices=["EMERG", "ALERT", "CRITICAL", "ERROR", "WARNING",
-                                                                      "NOTICE", "INFO", "DEBUG", "STDERR", "STDOUT"])
-parser_watch.add_argument('--get-stdout', help='Extract stdout only from this job', action='store_true')
-parser_watch.add_argument('--get-stderr', help='Extract stderr only from this job', action='store_true')
-parser_watch.add_argument('--get-streams', help='Extract only stdout and stderr from this job', action='store_true')
-parser_watch.add_argument('--no-timestamps', help='Omit timestamps from messages', action='store_false',
-                          dest='timestamps')
-parser_watch.add_argument('--job-ids', help='Print job ID in each message', action='store_true')
-parser_watch.add_argument('--no-job-info', help='Omit job info and status updates', action='store_false',
-                          dest='job_info')
-parser_watch.add_argument('-q', '--quiet', help='Do not print extra info messages', action='store_true')
-parser_watch.add_argument('-f', '--format', help='Message format. Available fields: job, level, msg, date')
-parser_watch.add_argument('--no-wait', '--no-follow', action='store_false', dest='tail',
-                          help='Exit after the first new message is received, instead of waiting for all logs')
-parser_watch.set_defaults(func=watch)
-register_subparser(parser_watch, categories='exec')
-
-parser_ssh_config = subparsers.add_parser('ssh_config', help='Configure SSH keys for your DNAnexus account',
-                                   description='Configure SSH access credentials for your DNAnexus account',
-                                   prog='dx ssh_config',
-                                   parents=[env_args])
-parser_ssh_config.add_argument('ssh_keygen_args', help='Command-line arguments to pass to ssh-keygen',
+    cat_path_action = parser_cat.add_argument('path', help='File ID or name(s) to print to stdout', nargs='+')
+    cat_path_action.completer = DXPathCompleter(classes=['file'])
+    parser_cat.set_defaults(func=cat)
+    register_subparser(parser_cat, categories='data')
+
+@lazy_subcommand('head')
+def build_head_parser():
+    parser_head = subparsers.add_parser('head',
+                                        help='Print part of a file or gtable',
+                                        description='Print the first part of a file or a gtable.  By default, prints the first 10 lines or rows, respectively.  Additional query parameters can be provided in the case of gtables.  The output for gtables is formatted for human-readability; to print rows in a machine-readable format, see "dx export tsv".',
+                                        parents=[no_color_arg, env_args],
+                                        prog='dx head')
+    parser_head.add_argument('-n', '--lines', type=int, metavar='N', help='Print the first N lines or rows (default 10)',
+                             default=10)
+    head_gtable_args = parser_head.add_argument_group(title='GTable-specific options')
+    head_gtable_args.add_argument('-w', '--max-col-width', type=int, help='Maximum width of each column to display',
+                                  default=32)
+    head_gtable_args.add_argument('--starting', type=int, help='Specify starting row ID', default=0)
+    head_gtable_args.add_argument('--gri', nargs=3, metavar=('CHR', 'LO', 'HI'), help='Specify chromosome name, low coordinate, and high coordinate for Genomic Range Index')
+    head_gtable_args.add_argument('--gri-mode',
+                                  help='Specify the mode of the GRI query (\'overlap\' or \'enclose\'; default \'overlap\')',
+                                  default="overlap")
+    head_gtable_args.add_argument('--gri-name',
+                                  help='Override the default name of the Genomic Range Index (default: "gri"))',
+                                  default="gri")
+    head_path_action = parser_head.add_argument('path', help='File or gtable ID or name to access')
+    head_path_action.completer = DXPathCompleter(classes=['file', 'gtable'])
+    parser_head.set_defaults(func=head)
+    register_subparser(parser_head, categories='data')
+
+@lazy_subcommand('import')
+def build_import_parser():
+    parser_import = subparsers.add_parser('import',
+                                          help='Import (convert and upload) a local table or genomic file',
+                                          description=fill('Import a local file to the DNAnexus platform as a GenomicTable.') + '\n\n' + fill('For more details on how to import from a particular format, run ') + '\n  $ dx help import <format>' + '\n\nSupported formats:\n\n  ' + '\n  '.join(sorted(importers)),
+                                          formatter_class=argparse.RawTextHelpFormatter,
+                                          prog='dx import',
+                                          parents=[env_args])
+    parser_import.add_argument('format', help='Format to import from')
+    import_args_action = parser_import.add_argument('importer_args', help=fill('Arguments passed to the importer', width_adjustment=-24),
+                                                    nargs=argparse.REMAINDER)
+    import_args_action.completer = LocalCompleter()
+    parser_import.set_defaults(func=dximport)
+    register_subparser(parser_import, categories='data')
+
+@lazy_subcommand('export')
+def build_export_parser():
+    parser_export = subparsers.add_parser('export',
+                                          help='Export (download and convert) a gtable into a local file',
+                                          description=fill('Export a GenomicTable into a local file with a particular file format.') + '\n\n' + fill('For more details on how to convert into a particular format, run ') + '\n  $ dx help export <format>' + '\n\nSupported formats:\n\n  ' + '\n  '.join(sorted(exporters)),
+                                          formatter_class=argparse.RawTextHelpFormatter,
+                                          prog='dx export',
+                                          parents=[env_args])
+    parser_export.add_argument('format', help='Format to export to')
+    parser_export.add_argument('exporter_args', help=fill('Arguments passed to the exporter', width_adjustment=-24),
                                nargs=argparse.REMAINDER)
-parser_ssh_config.set_defaults(func=ssh_config)
-register_subparser(parser_ssh_config, categories='exec')
-
-parser_ssh = subparsers.add_parser('ssh', help='Connect to a running job via SSH',
-                                   description='Use an SSH client to connect to a job being executed on the DNAnexus ' +
-                                               'platform. The job must be launched using "dx run --allow-ssh" or ' +
-                                               'equivalent API options. Use "dx ssh_config" or the Profile page on ' +
-                                               'the DNAnexus website to configure SSH for your DNAnexus account.',
-                                   prog='dx ssh',
-                                   parents=[env_args])
-parser_ssh.add_argument('job_id', help='Name of job to connect to')
-parser_ssh.add_argument('ssh_args', help='Command-line arguments to pass to the SSH client', nargs=argparse.REMAINDER)
-parser_ssh.set_defaults(func=ssh)
-register_subparser(parser_ssh, categories='exec')
-
-parser_terminate = subparsers.add_parser('terminate', help='Terminate job(s)',
-                                         description='Terminate a job or jobs that have not yet finished',
-                                         prog='dx terminate',
-                                         parents=[env_args])
-parser_terminate.add_argument('jobid', help='ID of the job to terminate', nargs='+')
-parser_terminate.set_defaults(func=terminate)
-parser_map['terminate'] = parser_terminate
-parser_categories['all']['cmds'].append((subparsers._choices_actions[-1].dest, subparsers._choices_actions[-1].help))
-parser_categories['exec']['cmds'].append((subparsers._choices_actions[-1].dest, subparsers._choices_actions[-1].help))
-
-parser_rmproject = subparsers.add_parser('rmproject', help='Delete a project',
-                                         description='Delete projects and all their associated data',
-                                         prog='dx rmproject',
-                                         parents=[env_args])
-projects_action = parser_rmproject.add_argument('projects', help='Projects to remove', metavar='project', nargs='+')
-projects_action.completer = DXPathCompleter(expected='project', include_current_proj=True)
-parser_rmproject.add_argument('-y', '--yes', dest='confirm', help='Do not ask for confirmation', action='store_false')
-parser_rmproject.add_argument('-q', '--quiet', help='Do not print purely informational messages', action='store_true')
-parser_rmproject.set_defaults(func=rmproject)
-register_subparser(parser_rmproject, categories='fs')
-
-parser_new = subparsers.add_parser('new', help='Create a new project or data object',
-                                   description='Use this command with one of the available subcommands (classes) to create a new project or data object from scratch.  Not all data types are supported.  See \'dx upload\' for files and \'dx build\' for applets.',
-                                   prog="dx new")
-subparsers_new = parser_new.add_subparsers(parser_class=DXArgumentParser)
-subparsers_new.metavar = 'class'
-register_subparser(parser_new, categories='data')
-
-parser_new_project = subparsers_new.add_parser('project', help='Create a new project',
-                                               description='Create a new project',
-                                               parents=[stdout_args, env_args],
-                                               prog='dx new project')
-parser_new_project.add_argument('name', help='Name of the new project', nargs='?')
-parser_new_project.add_argument('-s', '--select', help='Select the new project as current after creating',
-                                action='store_true')
-parser_new_project.set_defaults(func=new_project)
-register_subparser(parser_new_project, subparsers_action=subparsers_new, categories='fs')
-
-parser_new_record = subparsers_new.add_parser('record', help='Create a new record',
-                                              description='Create a new record',
-                                              parents=[parser_dataobject_args, parser_single_dataobject_output_args,
-                                                       stdout_args, env_args],
-                                              formatter_class=argparse.RawTextHelpFormatter,
-                                              prog='dx new record')
-init_action = parser_new_record.add_argument('--init', help='Path to record from which to initialize all metadata')
-parser_new_record.add_argument('--close', help='Close the record immediately after creating it', action='store_true')
-init_action.completer = DXPathCompleter(classes=['record'])
-parser_new_record.set_defaults(func=new_record)
-register_subparser(parser_new_record, subparsers_action=subparsers_new, categories='fs')
-
-parser_new_workflow = subparsers_new.add_parser('workflow', help='Create a new workflow',
-                                                description='Create a new workflow',
-                                                parents=[parser_dataobject_args, parser_single_dataobject_output_args,
-                                                         stdout_args, env_args],
-                                                formatter_class=argparse.RawTextHelpFormatter,
-                                                prog='dx new workflow')
-parser_new_workflow.add_argument('--title', help='Workflow title')
-parser_new_workflow.add_argument('--summary', help='Workflow summary')
-parser_new_workflow.add_argument('--description', help='Workflow description')
-parser_new_workflow.add_argument('--output-folder', help='Default output folder for the workflow')
-init_action = parser_new_workflow.add_argument('--init', help=fill('Path to workflow or an analysis ID from which to initialize all metadata', width_adjustment=-24))
-init_action.completer = DXPathCompleter(classes=['workflow'])
-parser_new_workflow.set_defaults(func=workflow_cli.new_workflow)
-register_subparser(parser_new_workflow, subparsers_action=subparsers_new, categories='workflow')
-
-parser_new_gtable = subparsers_new.add_parser('gtable', add_help=False, #help='Create a new gtable',
-                                              description='Create a new gtable from scratch.  See \'dx import\' for importing special file formats (e.g. csv, fastq) into GenomicTables.',
-                                              parents=[parser_dataobject_args, parser_single_dataobject_output_args,
-                                                       stdout_args, env_args],
-                                              formatter_class=argparse.RawTextHelpFormatter,
-                                              prog='dx new gtable')
-parser_new_gtable.add_argument('--columns',
-                               help=fill('Comma-separated list of column names to use, e.g. "col1,col2,col3"; columns with non-string types can be specified using "name:type" syntax, e.g. "col1:int,col2:boolean".  If not given, the first line of the file will be used to infer column names.', width_adjustment=-24),
-                               required=True)
-new_gtable_indices_args = parser_new_gtable.add_mutually_exclusive_group()
-new_gtable_indices_args.add_argument('--gri', nargs=3, metavar=('CHR', 'LO', 'HI'),
-                                     help=fill('Specify column names to be used as chromosome, lo, and hi columns for a genomic range index (name will be set to "gri"); will also add the type "gri"', width_adjustment=-24))
-new_gtable_indices_args.add_argument('--indices', help='JSON for specifying any other indices')
-parser_new_gtable.set_defaults(func=new_gtable)
-#parser_new_gtable.completer = DXPathCompleter(classes=['gtable'])
-register_subparser(parser_new_gtable, subparsers_action=subparsers_new, categories='fs')
-
-parser_get_details = subparsers.add_parser('get_details', help='Get details of a data object',
-                                           description='Get the JSON details of a data object.', prog="dx get_details",
+    parser_export.set_defaults(func=export)
+    register_subparser(parser_export, categories='data')
+
+@lazy_subcommand('build')
+def build_build_parser():
+    from dxpy.scripts.dx_build_app import parser as build_parser
+    build_parser.prog = 'dx build'
+    build_parser.set_defaults(mode="applet")
+
+    parser_build = subparsers.add_parser('build', help='Upload and build a new applet/app',
+                                         description='Build an applet or app object from a local source directory.  You can use ' + BOLD("dx-app-wizard") + ' to generate a skeleton directory with the necessary files.',
+                                         prog='dx build',
+                                         add_help=False,
+                                         parents=[build_parser, env_args]
+    )
+    parser_build.set_defaults(func=build)
+    register_subparser(parser_build, categories='exec')
+
+@lazy_subcommand('add')
+def build_add_parser():
+    parser_add = subparsers.add_parser('add', help='Add one or more items to a list',
+                                       description='Use this command with one of the availabile subcommands to perform various actions such as adding other users to the list of developers or authorized users of an app',
+                                       prog='dx add')
+    subparsers_add = parser_add.add_subparsers(parser_class=DXArgumentParser)
+    subparsers_add.metavar = 'list_type'
+    register_subparser(parser_add, categories=())
+
+    parser_add_users = subparsers_add.add_parser('users', help='Add authorized users for an app',
+                                                 description='Add users or orgs to the list of authorized users of an app.  Published versions of the app will only be accessible to users represented by this list and to developers of the app.  Unpublished versions are restricted to the developers.',
+                                                 prog='dx add users', parents=[env_args])
+    parser_add_users.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
+    parser_add_users.add_argument('users', metavar='authorizedUser',
+                                  help='One or more users or orgs to add; use "PUBLIC" to allow all access',
+                                  nargs='+')
+    parser_add_users.set_defaults(func=add_users)
+    register_subparser(parser_add_users, subparsers_action=subparsers_add, categories='exec')
+
+    parser_add_developers = subparsers_add.add_parser('developers', help='Add developers for an app',
+                                                      description='Add users to the list of developers for an app.  Developers are able to build and publish new versions of the app, and add or remove others from the list of developers and authorized users.',
+                                                      prog='dx add developers', parents=[env_args])
+    parser_add_developers.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
+    parser_add_developers.add_argument('developers', metavar='developer', help='One or more users to add',
+                                  nargs='+')
+    parser_add_developers.set_defaults(func=add_developers)
+    register_subparser(parser_add_developers, subparsers_action=subparsers_add, categories='exec')
+
+    parser_add_stage = subparsers_add.add_parser('stage', help='Add a stage to a workflow',
+                                                 description='Add a stage to a workflow.  Default inputs for the stage can also be set at the same time.',
+                                                 parents=[exec_input_args, stdout_args, env_args,
+                                                          instance_type_arg],
+                                                 prog='dx add stage')
+    parser_add_stage.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
+    parser_add_stage.add_argument('executable', help='Name or ID of an executable to add as a stage in the workflow').completer = MultiCompleter([DXAppCompleter(),
+                                                                                                                                                  DXPathCompleter(classes=['applet'])])
+    parser_add_stage.add_argument('--alias', '--version', '--tag', dest='alias',
+                                  help='Tag or version of the app to add if the executable is an app (default: "default" if an app)')
+    parser_add_stage.add_argument('--name', help='Stage name')
+    add_stage_folder_args = parser_add_stage.add_mutually_exclusive_group()
+    add_stage_folder_args.add_argument('--output-folder', help='Path to the output folder for the stage (interpreted as an absolute path)')
+    add_stage_folder_args.add_argument('--relative-output-folder', help='A relative folder path for the stage (interpreted as relative to the workflow\'s output folder)')
+    parser_add_stage.set_defaults(func=workflow_cli.add_stage)
+    register_subparser(parser_add_stage, subparsers_action=subparsers_add, categories='workflow')
+
+@lazy_subcommand('list')
+def build_list_parser():
+    parser_list = subparsers.add_parser('list', help='Print the members of a list',
+                                       description='Use this command with one of the availabile subcommands to perform various actions such as printing the list of developers or authorized users of an app.',
+                                       prog='dx list')
+    subparsers_list = parser_list.add_subparsers(parser_class=DXArgumentParser)
+    subparsers_list.metavar = 'list_type'
+    register_subparser(parser_list, categories=())
+
+    parser_list_users = subparsers_list.add_parser('users', help='List authorized users for an app',
+                                                   description='List the authorized users of an app.  Published versions of the app will only be accessible to users represented by this list and to developers of the app.  Unpublished versions are restricted to the developers',
+                                                   prog='dx list users', parents=[env_args])
+    parser_list_users.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
+    parser_list_users.set_defaults(func=list_users)
+    register_subparser(parser_list_users, subparsers_action=subparsers_list, categories='exec')
+
+    parser_list_developers = subparsers_list.add_parser('developers', help='List developers for an app',
+                                                        description='List the developers for an app.  Developers are able to build and publish new versions of the app, and add or remove others from the list of developers and authorized users.',
+                                                        prog='dx list developers', parents=[env_args])
+    parser_list_developers.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
+    parser_list_developers.set_defaults(func=list_developers)
+    register_subparser(parser_list_developers, subparsers_action=subparsers_list, categories='exec')
+
+    parser_list_stages = subparsers_list.add_parser('stages', help='List the stages in a workflow',
+                                                    description='List the stages in a workflow.',
+                                                    parents=[env_args],
+                                                    prog='dx list stages')
+    parser_list_stages.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
+    parser_list_stages.set_defaults(func=workflow_cli.list_stages)
+    register_subparser(parser_list_stages, subparsers_action=subparsers_list, categories='workflow')
+
+@lazy_subcommand('remove')
+def build_remove_parser():
+    parser_remove = subparsers.add_parser('remove', help='Remove one or more items to a list',
+                                          description='Use this command with one of the available subcommands to perform various actions such as removing other users from the list of developers or authorized users of an app.',
+                                          prog='dx remove')
+    subparsers_remove = parser_remove.add_subparsers(parser_class=DXArgumentParser)
+    subparsers_remove.metavar = 'list_type'
+    register_subparser(parser_remove, categories=())
+
+    parser_remove_users = subparsers_remove.add_parser('users', help='Remove authorized users for an app',
+                                                       description='Remove users or orgs from the list of authorized users of an app.  Published versions of the app will only be accessible to users represented by this list and to developers of the app.  Unpublished versions are restricted to the developers',
+                                                       prog='dx remove users', parents=[env_args])
+    parser_remove_users.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
+    parser_remove_users.add_argument('users', metavar='authorizedUser',
+                                     help='One or more users or orgs to remove; use "PUBLIC" to remove public access',
+                                     nargs='+')
+    parser_remove_users.set_defaults(func=remove_users)
+    register_subparser(parser_remove_users, subparsers_action=subparsers_remove, categories='exec')
+
+    parser_remove_developers = subparsers_remove.add_parser('developers', help='Remove developers for an app',
+                                                            description='Remove users from the list of developers for an app.  Developers are able to build and publish new versions of the app, and add or remove others from the list of developers and authorized users.',
+                                                            prog='dx remove developers', parents=[env_args])
+    parser_remove_developers.add_argument('app', help='Name or ID of an app').completer = DXAppCompleter(installed=True)
+    parser_remove_developers.add_argument('developers', metavar='developer', help='One or more users to remove',
+                                          nargs='+')
+    parser_remove_developers.set_defaults(func=remove_developers)
+    register_subparser(parser_remove_developers, subparsers_action=subparsers_remove, categories='exec')
+
+    parser_remove_stage = subparsers_remove.add_parser('stage', help='Remove a stage from a workflow',
+                                                       description='Remove a stage from a workflow.  The stage should be indicated either by an integer (0-indexed, i.e. "0" for the first stage), or a stage ID.',
+                                                       parents=[stdout_args, env_args],
+                                                       prog='dx remove stage')
+    parser_remove_stage.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
+    parser_remove_stage.add_argument('stage', help='Stage (index or ID) of the workflow to remove')
+    parser_remove_stage.set_defaults(func=workflow_cli.remove_stage)
+    register_subparser(parser_remove_stage, subparsers_action=subparsers_remove, categories='workflow')
+
+@lazy_subcommand('update')
+def build_update_parser():
+    parser_update = subparsers.add_parser('update', help='Update certain types of metadata',
+                                          description='''
+Use this command with one of the available targets listed below to update
+their metadata that are not covered by the other
+subcommands.''',
+                                          prog='dx update')
+    subparsers_update = parser_update.add_subparsers(parser_class=DXArgumentParser)
+    subparsers_update.metavar = 'target'
+    register_subparser(parser_update, categories=())
+
+    parser_update_workflow = subparsers_update.add_parser('workflow', help='Update the metadata for a workflow',
+                                                          description='Update the metadata for an existing workflow',
+                                                          parents=[stdout_args, env_args],
+                                                          prog='dx update workflow')
+    parser_update_workflow.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
+    update_workflow_title_args = parser_update_workflow.add_mutually_exclusive_group()
+    update_workflow_title_args.add_argument('--title', help='Workflow title')
+    update_workflow_title_args.add_argument('--no-title', help='Unset the workflow title', action='store_true')
+    parser_update_workflow.add_argument('--summary', help='Workflow summary')
+    parser_update_workflow.add_argument('--description', help='Workflow description')
+    update_workflow_output_folder_args = parser_update_workflow.add_mutually_exclusive_group()
+    update_workflow_output_folder_args.add_argument('--output-folder', help='Default output folder for the workflow')
+    update_workflow_output_folder_args.add_argument('--no-output-folder', help='Unset the default output folder for the workflow', action='store_true')
+    parser_update_workflow.set_defaults(func=workflow_cli.update_workflow)
+    register_subparser(parser_update_workflow, subparsers_action=subparsers_update, categories='workflow')
+
+    parser_update_stage = subparsers_update.add_parser('stage', help='Update the metadata for a stage in a workflow',
+                                                       description='Update the metadata for a stage in a workflow',
+                                                       parents=[exec_input_args, stdout_args, env_args,
+                                                                instance_type_arg],
+                                                       prog='dx update stage')
+    parser_update_stage.add_argument('workflow', help='Name or ID of a workflow').completer = DXPathCompleter(classes=['workflow'])
+    parser_update_stage.add_argument('stage', help='Stage (index or ID) of the workflow to update')
+    parser_update_stage.add_argument('--executable', help='Name or ID of an executable to replace in the stage').completer = MultiCompleter([DXAppCompleter(),
+                                                                                                                                             DXPathCompleter(classes=['applet'])])
+    parser_update_stage.add_argument('--alias', '--version', '--tag', dest='alias',
+                                     help='Tag or version of the app to use if replacing the stage executable with an app (default: "default" if an app)')
+    parser_update_stage.add_argument('--force',
+                                     help='Whether to replace the executable even if it the new one cannot be verified as compatible with the previous version',
+                                     action='store_true')
+    update_stage_name_args = parser_update_stage.add_mutually_exclusive_group()
+    update_stage_name_args.add_argument('--name', help='Stage name')
+    update_stage_name_args.add_argument('--no-name', help='Unset the stage name', action='store_true')
+    update_stage_folder_args = parser_update_stage.add_mutually_exclusive_group()
+    update_stage_folder_args.add_argument('--output-folder', help='Path to the output folder for the stage (interpreted as an absolute path)')
+    update_stage_folder_args.add_argument('--relative-output-folder', help='A relative folder path for the stage (interpreted as relative to the workflow\'s output folder)')
+    parser_update_stage.set_defaults(func=workflow_cli.update_stage)
+    register_subparser(parser_update_stage, subparsers_action=subparsers_update, categories='workflow')
+
+@lazy_subcommand('install')
+def build_install_parser():
+    parser_install = subparsers.add_parser('install', help='Install an app',
+                                           description='Install an app by name.  To see a list of apps you can install, hit <TAB> twice after "dx install" or run "' + BOLD() + 'dx find apps' + ENDC() + '" to see a list of available apps.', prog='dx install',
                                            parents=[env_args])
-parser_get_details.add_argument('path', help='ID or path to data object to get details for').completer = DXPathCompleter()
-parser_get_details.set_defaults(func=get_details)
-register_subparser(parser_get_details, categories='metadata')
-
-parser_set_details = subparsers.add_parser('set_details', help='Set details on a data object',
-                                           description='Set the JSON details of a data object.', prog="dx set_details",
-                                           parents=[env_args, all_arg])
-parser_set_details.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
-parser_set_details.add_argument('details', help='JSON to store as details', nargs='?')
-parser_set_details.add_argument('-f', '--details-file', help='Path to local file containing JSON to store as details')
-parser_set_details.set_defaults(func=set_details)
-register_subparser(parser_set_details, categories='metadata')
-
-parser_set_visibility = subparsers.add_parser('set_visibility', help='Set visibility on a data object',
-                                              description='Set visibility on a data object.', prog='dx set_visibility',
-                                              parents=[env_args, all_arg])
-parser_set_visibility.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
-parser_set_visibility.add_argument('visibility', choices=['hidden', 'visible'],
-                                   help='Visibility that the object should have')
-parser_set_visibility.set_defaults(func=set_visibility)
-register_subparser(parser_set_visibility, categories='metadata')
-
-parser_add_types = subparsers.add_parser('add_types', help='Add types to a data object',
-                                         description='Add types to a data object.  See https://wiki.dnanexus.com/pages/Types/ for a list of DNAnexus types.',
-                                         prog='dx add_types',
-                                         parents=[env_args, all_arg])
-parser_add_types.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
-parser_add_types.add_argument('types', nargs='+', metavar='type', help='Types to add')
-parser_add_types.set_defaults(func=add_types)
-register_subparser(parser_add_types, categories='metadata')
-
-parser_remove_types = subparsers.add_parser('remove_types', help='Remove types from a data object',
-                                            description='Remove types from a data object.  See https://wiki.dnanexus.com/pages/Types/ for a list of DNAnexus types.',
-                                            prog='dx remove_types',
-                                            parents=[env_args, all_arg])
-parser_remove_types.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
-parser_remove_types.add_argument('types', nargs='+', metavar='type', help='Types to remove')
-parser_remove_types.set_defaults(func=remove_types)
-register_subparser(parser_remove_types, categories='metadata')
-
-parser_tag = subparsers.add_parser('tag', help='Tag a project, data object, or execution', prog='dx tag',
-                                   description='Tag a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.',
-                                   parents=[env_args, all_arg])
-parser_tag.add_argument('path', help='ID or path to project, data object, or execution to modify').completer = DXPathCompleter()
-parser_tag.add_argument('tags', nargs='+', metavar='tag', help='Tags to add')
-parser_tag.set_defaults(func=add_tags)
-register_subparser(parser_tag, categories='metadata')
-
-parser_untag = subparsers.add_parser('untag', help='Untag a project, data object, or execution', prog='dx untag',
-                                     description='Untag a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.',
-                                     parents=[env_args, all_arg])
-parser_untag.add_argument('path', help='ID or path to project, data object, or execution to modify').completer = DXPathCompleter()
-parser_untag.add_argument('tags', nargs='+', metavar='tag', help='Tags to remove')
-parser_untag.set_defaults(func=remove_tags)
-register_subparser(parser_untag, categories='metadata')
-
-parser_rename = subparsers.add_parser('rename',
-                                      help='Rename a project or data object',
-                                      description='Rename a project or data object.  To rename folders, use \'dx mv\' instead.  Note that a project context must be either set or specified to rename a data object.  To specify a project or a project context, append a colon character ":" after the project ID or name.',
-                                      prog='dx rename',
-                                      parents=[env_args, all_arg])
-path_action = parser_rename.add_argument('path', help='Path to project or data object to rename')
-path_action.completer = DXPathCompleter(include_current_proj=True)
-parser_rename.add_argument('name', help='New name')
-parser_rename.set_defaults(func=rename)
-register_subparser(parser_rename, categories='metadata')
-
-parser_set_properties = subparsers.add_parser('set_properties', help='Set properties of a project, data object, or execution',
-                                              description='Set properties of a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.', prog='dx set_properties',
-                                              parents=[env_args, all_arg])
-parser_set_properties.add_argument('path', help='ID or path to project, data object, or execution to modify').completer = DXPathCompleter()
-parser_set_properties.add_argument('properties', nargs='+', metavar='propertyname=value',
-                                   help='Key-value pairs of property names and their new values')
-parser_set_properties.set_defaults(func=set_properties)
-register_subparser(parser_set_properties, categories='metadata')
-
-parser_unset_properties = subparsers.add_parser('unset_properties', help='Unset properties of a project, data object, or execution',
-                                                description='Unset properties of a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.',
-                                                prog='dx unset_properties',
+    install_app_action = parser_install.add_argument('app', help='ID or name of app to install')
+    install_app_action.completer = DXAppCompleter(installed=False)
+    parser_install.set_defaults(func=install)
+    register_subparser(parser_install, categories='exec')
+
+@lazy_subcommand('uninstall')
+def build_uninstall_parser():
+    parser_uninstall = subparsers.add_parser('uninstall', help='Uninstall an app',
+                                             description='Uninstall an app by name.', prog='dx uninstall',
+                                             parents=[env_args])
+    uninstall_app_action = parser_uninstall.add_argument('app', help='ID or name of app to uninstall')
+    uninstall_app_action.completer = DXAppCompleter(installed=True)
+    parser_uninstall.set_defaults(func=uninstall)
+    register_subparser(parser_uninstall, categories='exec')
+
+@lazy_subcommand('run')
+def build_run_parser():
+    parser_run = subparsers.add_parser('run', help='Run an applet, app, or workflow', add_help=False,
+                                       description=(fill('Run an applet, app, or workflow.  To see a list of executables you can run, hit <TAB> twice after "dx run" or run "' + BOLD() + 'dx find apps' + ENDC() + '" to see a list of available apps.') + '\n\n' + fill('If any inputs are required but not specified, an interactive mode for selecting inputs will be launched.  Inputs can be set in multiple ways.  Run "dx run --input-help" for more details.')),
+                                       prog='dx run',
+                                       formatter_class=argparse.RawTextHelpFormatter,
+                                       parents=[exec_input_args, stdout_args, env_args, extra_args,
+                                                instance_type_arg])
+    run_executable_action = parser_run.add_argument('executable',
+                                                    help=fill('Name or ID of an applet, app, or workflow to run; must be provided if --clone is not set', width_adjustment=-24),
+                                                    nargs="?", default="")
+    run_executable_action.completer = MultiCompleter([DXAppCompleter(),
+                                                      DXPathCompleter(classes=['applet', 'workflow'], visibility="visible")])
+    parser_run.add_argument('-h', '--help', help='show this help message and exit', nargs=0, action=runHelp)
+    parser_run.add_argument('--clone', help=fill('Job or analysis ID or name from which to use as default options (will use the exact same executable ID, destination project and folder, job input, instance type requests, and a similar name unless explicitly overridden by command-line arguments)', width_adjustment=-24))
+    parser_run.add_argument('--alias', '--version', dest='alias',
+                            help=fill('Alias (tag) or version of the app to run (default: "default" if an app)', width_adjustment=-24))
+    parser_run.add_argument('--destination', '--folder', metavar='PATH', dest='folder', help=fill('The full project:folder path in which to output the results.  By default, the current working directory will be used.', width_adjustment=-24))
+    parser_run.add_argument('--project', metavar='PROJECT',
+                            help=fill('Project name or ID in which to run the executable. This can also ' +
+                                      'be specified together with the output folder in --destination.',
+                                      width_adjustment=-24))
+    parser_run.add_argument('--stage-output-folder', metavar=('STAGE_ID', 'FOLDER'),
+                            help=fill('A stage identifier (ID, name, or index), and a folder path to ' +
+                                      'use as its output folder',
+                                      width_adjustment=-24),
+                            nargs=2,
+                            action='append',
+                            default=[])
+    parser_run.add_argument('--stage-relative-output-folder', metavar=('STAGE_ID', 'FOLDER'),
+                            help=fill('A stage identifier (ID, name, or index), and a relative folder ' +
+                                      'path to the workflow output folder to use as the output folder',
+                                      width_adjustment=-24),
+                            nargs=2,
+                            action='append',
+                            default=[])
+    parser_run.add_argument('--rerun-stage', metavar='STAGE_ID', dest='rerun_stages',
+                            help=fill('A stage (using its ID, name, or index) to rerun, or "*" to ' +
+                                      'indicate all stages should be rerun; repeat as necessary',
+                                      width_adjustment=-24),
+                            action='append')
+    parser_run.add_argument('--name', help=fill('Name for the job (default is the app or applet name)', width_adjustment=-24))
+    parser_run.add_argument('--property', dest='properties', metavar='KEY=VALUE',
+                            help=(fill('Key-value pair to add as a property; repeat as necessary,',
+                                       width_adjustment=-24) + '\n' +
+                                  fill('e.g. "--property key1=val1 --property key2=val2"',
+                                       width_adjustment=-24, initial_indent=' ', subsequent_indent=' ',
+                                       break_on_hyphens=False)),
+                            action='append')
+    parser_run.add_argument('--tag', metavar='TAG', dest='tags', help=fill('Tag for the resulting execution; repeat as necessary,', width_adjustment=-24) + '\n' + fill('e.g. "--tag tag1 --tag tag2"', width_adjustment=-24, break_on_hyphens=False, initial_indent=' ', subsequent_indent=' '), action='append')
+    parser_run.add_argument('--delay-workspace-destruction',
+                            help=fill('Whether to keep the job\'s temporary workspace around for debugging purposes for 3 days after it succeeds or fails', width_adjustment=-24),
+                            action='store_true')
+    parser_run.add_argument('--priority',
+                            choices=['normal', 'high'],
+                            help='Request a scheduling priority for all resulting jobs')
+    parser_run.add_argument('-y', '--yes', dest='confirm', help='Do not ask for confirmation', action='store_false')
+    parser_run.add_argument('--wait', help='Wait until the job is done before returning', action='store_true')
+    parser_run.add_argument('--watch', help="Watch the job after launching it; sets --priority high", action='store_true')
+    parser_run.add_argument('--allow-ssh', action='append', nargs='?', metavar='ADDRESS',
+                            help=fill('Configure the job to allow SSH access; sets --priority high. If an argument is ' +
+                                      'supplied, it is interpreted as an IP or hostname mask to allow connections from, ' +
+                                      'e.g. "--allow-ssh 1.2.3.4 --allow-ssh berkeley.edu"'))
+    parser_run.add_argument('--ssh', help="Configure the job to allow SSH access and connect to it after launching; sets --priority high", action='store_true')
+    parser_run.add_argument('--debug-on', action='append', choices=['AppError', 'AppInternalError', 'ExecutionError'],
+                            help="Configure the job to hold for debugging when any of the listed errors occur")
+    parser_run.add_argument('--input-help',
+                            help=fill('Print help and examples for how to specify inputs',
+                                      width_adjustment=-24),
+                            action=runInputHelp, nargs=0)
+    parser_run.set_defaults(func=run, verbose=False, help=False, details=None,
+                            stage_instance_types=None, stage_folders=None)
+    register_subparser(parser_run, categories='exec')
+
+@lazy_subcommand('watch')
+def build_watch_parser():
+    parser_watch = subparsers.add_parser('watch', help='Watch logs of a job and its subjobs', prog='dx watch',
+                                         description='Monitors logging output from a running job',
+                                         parents=[env_args, no_color_arg])
+    parser_watch.add_argument('jobid', help='ID of the job to watch')
+    # .completer = TODO
+    parser_watch.add_argument('-n', '--num-recent-messages', help='Number of recent messages to get',
+                              type=int, default=1024*256)
+    parser_watch.add_argument('--tree', help='Include the entire job tree', action='store_true')
+    parser_watch.add_argument('-l', '--levels', action='append', choices=["EMERG", "ALERT", "CRITICAL", "ERROR", "WARNING",
+                                                                          "NOTICE", "INFO", "DEBUG", "STDERR", "STDOUT"])
+    parser_watch.add_argument('--get-stdout', help='Extract stdout only from this job', action='store_true')
+    parser_watch.add_argument('--get-stderr', help='Extract stderr only from this job', action='store_true')
+    parser_watch.add_argument('--get-streams', help='Extract only stdout and stderr from this job', action='store_true')
+    parser_watch.add_argument('--no-timestamps', help='Omit timestamps from messages', action='store_false',
+                              dest='timestamps')
+    parser_watch.add_argument('--job-ids', help='Print job ID in each message', action='store_true')
+    parser_watch.add_argument('--no-job-info', help='Omit job info and status updates', action='store_false',
+                              dest='job_info')
+    parser_watch.add_argument('-q', '--quiet', help='Do not print extra info messages', action='store_true')
+    parser_watch.add_argument('-f', '--format', help='Message format. Available fields: job, level, msg, date')
+    parser_watch.add_argument('--no-wait', '--no-follow', action='store_false', dest='tail',
+                              help='Exit after the first new message is received, instead of waiting for all logs')
+    parser_watch.set_defaults(func=watch)
+    register_subparser(parser_watch, categories='exec')
+
+@lazy_subcommand('ssh_config')
+def build_ssh_config_parser():
+    parser_ssh_config = subparsers.add_parser('ssh_config', help='Configure SSH keys for your DNAnexus account',
+                                       description='Configure SSH access credentials for your DNAnexus account',
+                                       prog='dx ssh_config',
+                                       parents=[env_args])
+    parser_ssh_config.add_argument('ssh_keygen_args', help='Command-line arguments to pass to ssh-keygen',
+                                   nargs=argparse.REMAINDER)
+    parser_ssh_config.set_defaults(func=ssh_config)
+    register_subparser(parser_ssh_config, categories='exec')
+
+@lazy_subcommand('ssh')
+def build_ssh_parser():
+    parser_ssh = subparsers.add_parser('ssh', help='Connect to a running job via SSH',
+                                       description='Use an SSH client to connect to a job being executed on the DNAnexus ' +
+                                                   'platform. The job must be launched using "dx run --allow-ssh" or ' +
+                                                   'equivalent API options. Use "dx ssh_config" or the Profile page on ' +
+                                                   'the DNAnexus website to configure SSH for your DNAnexus account.',
+                                       prog='dx ssh',
+                                       parents=[env_args])
+    parser_ssh.add_argument('job_id', help='Name of job to connect to')
+    parser_ssh.add_argument('ssh_args', help='Command-line arguments to pass to the SSH client', nargs=argparse.REMAINDER)
+    parser_ssh.set_defaults(func=ssh)
+    register_subparser(parser_ssh, categories='exec')
+
+@lazy_subcommand('terminate')
+def build_terminate_parser():
+    parser_terminate = subparsers.add_parser('terminate', help='Terminate job(s)',
+                                             description='Terminate a job or jobs that have not yet finished',
+                                             prog='dx terminate',
+                                             parents=[env_args])
+    parser_terminate.add_argument('jobid', help='ID of the job to terminate', nargs='+')
+    parser_terminate.set_defaults(func=terminate)
+    parser_map['terminate'] = parser_terminate
+    parser_categories['all']['cmds'].append((subparsers._choices_actions[-1].dest, subparsers._choices_actions[-1].help))
+    parser_categories['exec']['cmds'].append((subparsers._choices_actions[-1].dest, subparsers._choices_actions[-1].help))
+
+@lazy_subcommand('rmproject')
+def build_rmproject_parser():
+    parser_rmproject = subparsers.add_parser('rmproject', help='Delete a project',
+                                             description='Delete projects and all their associated data',
+                                             prog='dx rmproject',
+                                             parents=[env_args])
+    projects_action = parser_rmproject.add_argument('projects', help='Projects to remove', metavar='project', nargs='+')
+    projects_action.completer = DXPathCompleter(expected='project', include_current_proj=True)
+    parser_rmproject.add_argument('-y', '--yes', dest='confirm', help='Do not ask for confirmation', action='store_false')
+    parser_rmproject.add_argument('-q', '--quiet', help='Do not print purely informational messages', action='store_true')
+    parser_rmproject.set_defaults(func=rmproject)
+    register_subparser(parser_rmproject, categories='fs')
+
+@lazy_subcommand('new')
+def build_new_parser():
+    parser_new = subparsers.add_parser('new', help='Create a new project or data object',
+                                       description='Use this command with one of the available subcommands (classes) to create a new project or data object from scratch.  Not all data types are supported.  See \'dx upload\' for files and \'dx build\' for applets.',
+                                       prog="dx new")
+    subparsers_new = parser_new.add_subparsers(parser_class=DXArgumentParser)
+    subparsers_new.metavar = 'class'
+    register_subparser(parser_new, categories='data')
+
+    parser_new_project = subparsers_new.add_parser('project', help='Create a new project',
+                                                   description='Create a new project',
+                                                   parents=[stdout_args, env_args],
+                                                   prog='dx new project')
+    parser_new_project.add_argument('name', help='Name of the new project', nargs='?')
+    parser_new_project.add_argument('-s', '--select', help='Select the new project as current after creating',
+                                    action='store_true')
+    parser_new_project.set_defaults(func=new_project)
+    register_subparser(parser_new_project, subparsers_action=subparsers_new, categories='fs')
+
+    parser_new_record = subparsers_new.add_parser('record', help='Create a new record',
+                                                  description='Create a new record',
+                                                  parents=[parser_dataobject_args, parser_single_dataobject_output_args,
+                                                           stdout_args, env_args],
+                                                  formatter_class=argparse.RawTextHelpFormatter,
+                                                  prog='dx new record')
+    init_action = parser_new_record.add_argument('--init', help='Path to record from which to initialize all metadata')
+    parser_new_record.add_argument('--close', help='Close the record immediately after creating it', action='store_true')
+    init_action.completer = DXPathCompleter(classes=['record'])
+    parser_new_record.set_defaults(func=new_record)
+    register_subparser(parser_new_record, subparsers_action=subparsers_new, categories='fs')
+
+    parser_new_workflow = subparsers_new.add_parser('workflow', help='Create a new workflow',
+                                                    description='Create a new workflow',
+                                                    parents=[parser_dataobject_args, parser_single_dataobject_output_args,
+                                                             stdout_args, env_args],
+                                                    formatter_class=argparse.RawTextHelpFormatter,
+                                                    prog='dx new workflow')
+    parser_new_workflow.add_argument('--title', help='Workflow title')
+    parser_new_workflow.add_argument('--summary', help='Workflow summary')
+    parser_new_workflow.add_argument('--description', help='Workflow description')
+    parser_new_workflow.add_argument('--output-folder', help='Default output folder for the workflow')
+    init_action = parser_new_workflow.add_argument('--init', help=fill('Path to workflow or an analysis ID from which to initialize all metadata', width_adjustment=-24))
+    init_action.completer = DXPathCompleter(classes=['workflow'])
+    parser_new_workflow.set_defaults(func=workflow_cli.new_workflow)
+    register_subparser(parser_new_workflow, subparsers_action=subparsers_new, categories='workflow')
+
+    parser_new_gtable = subparsers_new.add_parser('gtable', add_help=False, #help='Create a new gtable',
+                                                  description='Create a new gtable from scratch.  See \'dx import\' for importing special file formats (e.g. csv, fastq) into GenomicTables.',
+                                                  parents=[parser_dataobject_args, parser_single_dataobject_output_args,
+                                                           stdout_args, env_args],
+                                                  formatter_class=argparse.RawTextHelpFormatter,
+                                                  prog='dx new gtable')
+    parser_new_gtable.add_argument('--columns',
+                                   help=fill('Comma-separated list of column names to use, e.g. "col1,col2,col3"; columns with non-string types can be specified using "name:type" syntax, e.g. "col1:int,col2:boolean".  If not given, the first line of the file will be used to infer column names.', width_adjustment=-24),
+                                   required=True)
+    new_gtable_indices_args = parser_new_gtable.add_mutually_exclusive_group()
+    new_gtable_indices_args.add_argument('--gri', nargs=3, metavar=('CHR', 'LO', 'HI'),
+                                         help=fill('Specify column names to be used as chromosome, lo, and hi columns for a genomic range index (name will be set to "gri"); will also add the type "gri"', width_adjustment=-24))
+    new_gtable_indices_args.add_argument('--indices', help='JSON for specifying any other indices')
+    parser_new_gtable.set_defaults(func=new_gtable)
+    #parser_new_gtable.completer = DXPathCompleter(classes=['gtable'])
+    register_subparser(parser_new_gtable, subparsers_action=subparsers_new, categories='fs')
+
+@lazy_subcommand('get_details')
+def build_get_details_parser():
+    parser_get_details = subparsers.add_parser('get_details', help='Get details of a data object',
+                                               description='Get the JSON details of a data object.', prog="dx get_details",
+                                               parents=[env_args])
+    parser_get_details.add_argument('path', help='ID or path to data object to get details for').completer = DXPathCompleter()
+    parser_get_details.set_defaults(func=get_details)
+    register_subparser(parser_get_details, categories='metadata')
+
+@lazy_subcommand('set_details')
+def build_set_details_parser():
+    parser_set_details = subparsers.add_parser('set_details', help='Set details on a data object',
+                                               description='Set the JSON details of a data object.', prog="dx set_details",
+                                               parents=[env_args, all_arg])
+    parser_set_details.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
+    parser_set_details.add_argument('details', help='JSON to store as details', nargs='?')
+    parser_set_details.add_argument('-f', '--details-file', help='Path to local file containing JSON to store as details')
+    parser_set_details.set_defaults(func=set_details)
+    register_subparser(parser_set_details, categories='metadata')
+
+@lazy_subcommand('set_visibility')
+def build_set_visibility_parser():
+    parser_set_visibility = subparsers.add_parser('set_visibility', help='Set visibility on a data object',
+                                                  description='Set visibility on a data object.', prog='dx set_visibility',
+                                                  parents=[env_args, all_arg])
+    parser_set_visibility.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
+    parser_set_visibility.add_argument('visibility', choices=['hidden', 'visible'],
+                                       help='Visibility that the object should have')
+    parser_set_visibility.set_defaults(func=set_visibility)
+    register_subparser(parser_set_visibility, categories='metadata')
+
+@lazy_subcommand('add_types')
+def build_add_types_parser():
+    parser_add_types = subparsers.add_parser('add_types', help='Add types to a data object',
+                                             description='Add types to a data object.  See https://wiki.dnanexus.com/pages/Types/ for a list of DNAnexus types.',
+                                             prog='dx add_types',
+                                             parents=[env_args, all_arg])
+    parser_add_types.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
+    parser_add_types.add_argument('types', nargs='+', metavar='type', help='Types to add')
+    parser_add_types.set_defaults(func=add_types)
+    register_subparser(parser_add_types, categories='metadata')
+
+@lazy_subcommand('remove_types')
+def build_remove_types_parser():
+    parser_remove_types = subparsers.add_parser('remove_types', help='Remove types from a data object',
+                                                description='Remove types from a data object.  See https://wiki.dnanexus.com/pages/Types/ for a list of DNAnexus types.',
+                                                prog='dx remove_types',
                                                 parents=[env_args, all_arg])
-path_action = parser_unset_properties.add_argument('path', help='ID or path to project, data object, or execution to modify')
-path_action.completer = DXPathCompleter()
-parser_unset_properties.add_argument('properties', nargs='+', metavar='propertyname', help='Property names to unset')
-parser_unset_properties.set_defaults(func=unset_properties)
-register_subparser(parser_unset_properties, categories='metadata')
-
-parser_close = subparsers.add_parser('close', help='Close data object(s)',
-                                     description='Close a remote data object or set of objects.',
-                                     prog='dx close',
-                                     parents=[env_args, all_arg])
-parser_close.add_argument('path', help='Path to a data object to close', nargs='+').completer = DXPathCompleter()
-parser_close.add_argument('--wait', help='Wait for the object(s) to close', action='store_true')
-parser_close.set_defaults(func=close)
-register_subparser(parser_close, categories=('data', 'metadata'))
-
-parser_wait = subparsers.add_parser('wait', help='Wait for data object(s) to close or job(s) to finish',
-                                    description='Polls the state of specified data object(s) or job(s) until they are all in the desired state.  Waits until the "closed" state for a data object, and for any terminal state for a job ("terminated", "failed", or "done").  Exits with a non-zero code if a job reaches a terminal state that is not "done".',
-                                    prog='dx wait',
-                                    parents=[env_args])
-path_action = parser_wait.add_argument('path', help='Path to a data object or job ID to wait for', nargs='+')
-path_action.completer = DXPathCompleter()
-parser_wait.set_defaults(func=wait)
-register_subparser(parser_wait, categories=('data', 'metadata', 'exec'))
-
-parser_get = subparsers.add_parser('get', help='Download records, applets, and files',
-                                   description='Download the contents of some types of data (records, applets, and files).  For gtables, see "dx export".  Downloading an applet will attempt to reconstruct a source directory that can be used to rebuild the app with "dx build".  Use "-o -" to direct the output to stdout.',
-                                   prog='dx get',
-                                   parents=[env_args])
-parser_get.add_argument('path', help='Data object ID or name to access').completer = DXPathCompleter(classes=['file', 'record', 'applet'])
-parser_get.add_argument('-o', '--output', help='local file path where the data is to be saved ("-" indicates stdout output for objects of class file and record). If not supplied, the object\'s name on the platform will be used, along with any applicable extensions. For applets, if OUTPUT does not exist, an applet source directory will be created there; if OUTPUT is an existing directory, a new directory with the applet\'s name will be created inside it.')
-parser_get.add_argument('--no-ext', help='If -o is not provided, do not add an extension to the filename', action='store_true')
-parser_get.add_argument('-f', '--overwrite', help='Overwrite the local file if necessary', action='store_true')
-parser_get.set_defaults(func=get)
-register_subparser(parser_get, categories='data')
-
-parser_find = subparsers.add_parser('find', help='Search functionality over various DNAnexus entities',
-                                    description='Search functionality over various DNAnexus entities.',
-                                    prog='dx find')
-subparsers_find = parser_find.add_subparsers(parser_class=DXArgumentParser)
-subparsers_find.metavar = 'category'
-register_subparser(parser_find, categories=())
-
-parser_find_apps = subparsers_find.add_parser('apps', help='List available apps',
-                                              description='Finds apps with the given search parameters.  Use --category to restrict by a category; common categories are available as tab completions and can be listed with --category-help.',
-                                              parents=[stdout_args, json_arg, delim_arg, env_args],
-                                              prog='dx find apps')
-parser_find_apps.add_argument('--name', help='Name of the app')
-parser_find_apps.add_argument('--category', help='Category of the app').completer = ListCompleter(APP_CATEGORIES)
-parser_find_apps.add_argument('--category-help',
-                              help='Print a list of common app categories',
-                              nargs=0,
-                              action=PrintCategoryHelp)
-parser_find_apps.add_argument('-a', '--all', help='Whether to return all versions of the app', action='store_true')
-parser_find_apps.add_argument('--unpublished', help='Whether to return unpublished apps as well', action='store_true')
-parser_find_apps.add_argument('--installed', help='Whether to restrict the list to installed apps only', action='store_true')
-parser_find_apps.add_argument('--billed-to', help='User or organization responsible for the app')
-parser_find_apps.add_argument('--creator', help='Creator of the app version')
-parser_find_apps.add_argument('--developer', help='Developer of the app')
-parser_find_apps.add_argument('--created-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the app version was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_apps.add_argument('--created-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the app version was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_apps.add_argument('--mod-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the app was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_apps.add_argument('--mod-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the app was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_apps.set_defaults(func=find_apps)
-register_subparser(parser_find_apps, subparsers_action=subparsers_find, categories='exec')
-
-parser_find_jobs = subparsers_find.add_parser('jobs', help='List jobs in your project',
-                                              description=fill('Finds jobs with the given search parameters.  By default, output is formatted to show the last several job trees that you\'ve run in the current project.') + '''
+    parser_remove_types.add_argument('path', help='ID or path to data object to modify').completer = DXPathCompleter()
+    parser_remove_types.add_argument('types', nargs='+', metavar='type', help='Types to remove')
+    parser_remove_types.set_defaults(func=remove_types)
+    register_subparser(parser_remove_types, categories='metadata')
+
+@lazy_subcommand('tag')
+def build_tag_parser():
+    parser_tag = subparsers.add_parser('tag', help='Tag a project, data object, or execution', prog='dx tag',
+                                       description='Tag a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.',
+                                       parents=[env_args, all_arg])
+    parser_tag.add_argument('path', help='ID or path to project, data object, or execution to modify').completer = DXPathCompleter()
+    parser_tag.add_argument('tags', nargs='+', metavar='tag', help='Tags to add')
+    parser_tag.set_defaults(func=add_tags)
+    register_subparser(parser_tag, categories='metadata')
+
+@lazy_subcommand('untag')
+def build_untag_parser():
+    parser_untag = subparsers.add_parser('untag', help='Untag a project, data object, or execution', prog='dx untag',
+                                         description='Untag a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.',
+                                         parents=[env_args, all_arg])
+    parser_untag.add_argument('path', help='ID or path to project, data object, or execution to modify').completer = DXPathCompleter()
+    parser_untag.add_argument('tags', nargs='+', metavar='tag', help='Tags to remove')
+    parser_untag.set_defaults(func=remove_tags)
+    register_subparser(parser_untag, categories='metadata')
+
+@lazy_subcommand('rename')
+def build_rename_parser():
+    parser_rename = subparsers.add_parser('rename',
+                                          help='Rename a project or data object',
+                                          description='Rename a project or data object.  To rename folders, use \'dx mv\' instead.  Note that a project context must be either set or specified to rename a data object.  To specify a project or a project context, append a colon character ":" after the project ID or name.',
+                                          prog='dx rename',
+                                          parents=[env_args, all_arg])
+    path_action = parser_rename.add_argument('path', help='Path to project or data object to rename')
+    path_action.completer = DXPathCompleter(include_current_proj=True)
+    parser_rename.add_argument('name', help='New name')
+    parser_rename.set_defaults(func=rename)
+    register_subparser(parser_rename, categories='metadata')
+
+@lazy_subcommand('set_properties')
+def build_set_properties_parser():
+    parser_set_properties = subparsers.add_parser('set_properties', help='Set properties of a project, data object, or execution',
+                                                  description='Set properties of a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.', prog='dx set_properties',
+                                                  parents=[env_args, all_arg])
+    parser_set_properties.add_argument('path', help='ID or path to project, data object, or execution to modify').completer = DXPathCompleter()
+    parser_set_properties.add_argument('properties', nargs='+', metavar='propertyname=value',
+                                       help='Key-value pairs of property names and their new values')
+    parser_set_properties.set_defaults(func=set_properties)
+    register_subparser(parser_set_properties, categories='metadata')
+
+@lazy_subcommand('unset_properties')
+def build_unset_properties_parser():
+    parser_unset_properties = subparsers.add_parser('unset_properties', help='Unset properties of a project, data object, or execution',
+                                                    description='Unset properties of a project, data object, or execution.  Note that a project context must be either set or specified for data object IDs or paths.',
+                                                    prog='dx unset_properties',
+                                                    parents=[env_args, all_arg])
+    path_action = parser_unset_properties.add_argument('path', help='ID or path to project, data object, or execution to modify')
+    path_action.completer = DXPathCompleter()
+    parser_unset_properties.add_argument('properties', nargs='+', metavar='propertyname', help='Property names to unset')
+    parser_unset_properties.set_defaults(func=unset_properties)
+    register_subparser(parser_unset_properties, categories='metadata')
+
+@lazy_subcommand('close')
+def build_close_parser():
+    parser_close = subparsers.add_parser('close', help='Close data object(s)',
+                                         description='Close a remote data object or set of objects.',
+                                         prog='dx close',
+                                         parents=[env_args, all_arg])
+    parser_close.add_argument('path', help='Path to a data object to close', nargs='+').completer = DXPathCompleter()
+    parser_close.add_argument('--wait', help='Wait for the object(s) to close', action='store_true')
+    parser_close.set_defaults(func=close)
+    register_subparser(parser_close, categories=('data', 'metadata'))
+
+@lazy_subcommand('wait')
+def build_wait_parser():
+    parser_wait = subparsers.add_parser('wait', help='Wait for data object(s) to close or job(s) to finish',
+                                        description='Polls the state of specified data object(s) or job(s) until they are all in the desired state.  Waits until the "closed" state for a data object, and for any terminal state for a job ("terminated", "failed", or "done").  Exits with a non-zero code if a job reaches a terminal state that is not "done".',
+                                        prog='dx wait',
+                                        parents=[env_args])
+    path_action = parser_wait.add_argument('path', help='Path to a data object or job ID to wait for', nargs='+')
+    path_action.completer = DXPathCompleter()
+    parser_wait.set_defaults(func=wait)
+    register_subparser(parser_wait, categories=('data', 'metadata', 'exec'))
+
+@lazy_subcommand('get')
+def build_get_parser():
+    parser_get = subparsers.add_parser('get', help='Download records, applets, and files',
+                                       description='Download the contents of some types of data (records, applets, and files).  For gtables, see "dx export".  Downloading an applet will attempt to reconstruct a source directory that can be used to rebuild the app with "dx build".  Use "-o -" to direct the output to stdout.',
+                                       prog='dx get',
+                                       parents=[env_args])
+    parser_get.add_argument('path', help='Data object ID or name to access').completer = DXPathCompleter(classes=['file', 'record', 'applet'])
+    parser_get.add_argument('-o', '--output', help='local file path where the data is to be saved ("-" indicates stdout output for objects of class file and record). If not supplied, the object\'s name on the platform will be used, along with any applicable extensions. For applets, if OUTPUT does not exist, an applet source directory will be created there; if OUTPUT is an existing directory, a new directory with the applet\'s name will be created inside it.')
+    parser_get.add_argument('--no-ext', help='If -o is not provided, do not add an extension to the filename', action='store_true')
+    parser_get.add_argument('-f', '--overwrite', help='Overwrite the local file if necessary', action='store_true')
+    parser_get.set_defaults(func=get)
+    register_subparser(parser_get, categories='data')
+
+@lazy_subcommand('find')
+def build_find_parser():
+    parser_find = subparsers.add_parser('find', help='Search functionality over various DNAnexus entities',
+                                        description='Search functionality over various DNAnexus entities.',
+                                        prog='dx find')
+    subparsers_find = parser_find.add_subparsers(parser_class=DXArgumentParser)
+    subparsers_find.metavar = 'category'
+    register_subparser(parser_find, categories=())
+
+    parser_find_apps = subparsers_find.add_parser('apps', help='List available apps',
+                                                  description='Finds apps with the given search parameters.  Use --category to restrict by a category; common categories are available as tab completions and can be listed with --category-help.',
+                                                  parents=[stdout_args, json_arg, delim_arg, env_args],
+                                                  prog='dx find apps')
+    parser_find_apps.add_argument('--name', help='Name of the app')
+    parser_find_apps.add_argument('--category', help='Category of the app').completer = ListCompleter(APP_CATEGORIES)
+    parser_find_apps.add_argument('--category-help',
+                                  help='Print a list of common app categories',
+                                  nargs=0,
+                                  action=PrintCategoryHelp)
+    parser_find_apps.add_argument('-a', '--all', help='Whether to return all versions of the app', action='store_true')
+    parser_find_apps.add_argument('--unpublished', help='Whether to return unpublished apps as well', action='store_true')
+    parser_find_apps.add_argument('--installed', help='Whether to restrict the list to installed apps only', action='store_true')
+    parser_find_apps.add_argument('--billed-to', help='User or organization responsible for the app')
+    parser_find_apps.add_argument('--creator', help='Creator of the app version')
+    parser_find_apps.add_argument('--developer', help='Developer of the app')
+    parser_find_apps.add_argument('--created-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the app version was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_apps.add_argument('--created-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the app version was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_apps.add_argument('--mod-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the app was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_apps.add_argument('--mod-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the app was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_apps.set_defaults(func=find_apps)
+    register_subparser(parser_find_apps, subparsers_action=subparsers_find, categories='exec')
+
+    parser_find_jobs = subparsers_find.add_parser('jobs', help='List jobs in your project',
+                                                  description=fill('Finds jobs with the given search parameters.  By default, output is formatted to show the last several job trees that you\'ve run in the current project.') + '''
 
 EXAMPLES
 
@@ -4252,83 +4563,85 @@ EXAMPLES
 
   $ dx find jobs --name bwa*
 ''',
-                                              parents=[find_executions_args, stdout_args, json_arg, no_color_arg,
-                                                       delim_arg, env_args, find_by_properties_and_tags_args],
-                                              formatter_class=argparse.RawTextHelpFormatter,
-                                              conflict_handler='resolve',
-                                              prog='dx find jobs')
-add_find_executions_search_gp(parser_find_jobs)
-parser_find_jobs.set_defaults(func=find_executions, classname='job')
-parser_find_jobs.completer = DXPathCompleter(expected='project')
-register_subparser(parser_find_jobs, subparsers_action=subparsers_find, categories='exec')
-
-parser_find_analyses = subparsers_find.add_parser('analyses', help='List analyses in your project',
-                                                  description=fill('Finds analyses with the given search parameters.  By default, output is formatted to show the last several job trees that you\'ve run in the current project.'),
-                                                  parents=[find_executions_args, stdout_args, json_arg, no_color_arg,
+                                                  parents=[find_executions_args, stdout_args, json_arg, json_lines_arg, no_color_arg,
                                                            delim_arg, env_args, find_by_properties_and_tags_args],
                                                   formatter_class=argparse.RawTextHelpFormatter,
                                                   conflict_handler='resolve',
-                                                  prog='dx find analyses')
-add_find_executions_search_gp(parser_find_analyses)
-parser_find_analyses.set_defaults(func=find_executions, classname='analysis')
-parser_find_analyses.completer = DXPathCompleter(expected='project')
-register_subparser(parser_find_analyses, subparsers_action=subparsers_find, categories='exec')
-
-parser_find_executions = subparsers_find.add_parser('executions', help='List executions (jobs and analyses) in your project',
-                                                    description=fill('Finds executions (jobs and analyses) with the given search parameters.  By default, output is formatted to show the last several job trees that you\'ve run in the current project.'),
-                                                    parents=[find_executions_args, stdout_args, json_arg, no_color_arg,
-                                                             delim_arg, env_args, find_by_properties_and_tags_args],
-                                                    formatter_class=argparse.RawTextHelpFormatter,
-                                                    conflict_handler='resolve',
-                                                    prog='dx find executions')
-add_find_executions_search_gp(parser_find_executions)
-parser_find_executions.set_defaults(func=find_executions, classname=None)
-parser_find_executions.completer = DXPathCompleter(expected='project')
-register_subparser(parser_find_executions, subparsers_action=subparsers_find, categories='exec')
-
-parser_find_data = subparsers_find.add_parser('data', help='Find data objects',
-                                              description='Finds data objects with the given search parameters.  By' +
-                                              ' default, restricts the search to the current project if set.  To ' +
-                                              'search over all projects (excludes public projects), use ' +
-                                              '--all-projects (overrides --path and --norecurse).',
-                                              parents=[stdout_args, json_arg, no_color_arg, delim_arg, env_args,
-                                                       find_by_properties_and_tags_args],
-                                              prog='dx find data')
-parser_find_data.add_argument('--class', dest='classname', choices=['record', 'file', 'gtable', 'applet', 'workflow'], help='Data object class')
-parser_find_data.add_argument('--state', choices=['open', 'closing', 'closed', 'any'], help='State of the object')
-parser_find_data.add_argument('--visibility', choices=['hidden', 'visible', 'either'], default='visible', help='Whether the object is hidden or not')
-parser_find_data.add_argument('--name', help='Name of the object')
-parser_find_data.add_argument('--type', help='Type of the data object')
-parser_find_data.add_argument('--link', help='Object ID that the data object links to')
-parser_find_data.add_argument('--all-projects', '--allprojects', help='Extend search to all projects (excluding public projects)', action='store_true')
-parser_find_data.add_argument('--project', help=argparse.SUPPRESS)
-parser_find_data.add_argument('--folder', help=argparse.SUPPRESS).completer = DXPathCompleter(expected='folder')
-parser_find_data.add_argument('--path', help='Project and/or folder in which to restrict the results',
-                              metavar='PROJECT:FOLDER').completer = DXPathCompleter(expected='folder')
-parser_find_data.add_argument('--norecurse', dest='recurse', help='Do not recurse into subfolders', action='store_false')
-parser_find_data.add_argument('--mod-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the object was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_data.add_argument('--mod-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the object was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_data.add_argument('--created-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the object was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_data.add_argument('--created-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the object was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
-parser_find_data.set_defaults(func=find_data)
-register_subparser(parser_find_data, subparsers_action=subparsers_find, categories=('data', 'metadata'))
-
-parser_find_projects = subparsers_find.add_parser('projects', help='Find projects',
-                                                  description='Finds projects with the given search parameters.  Use the --public flag to list all public projects.',
-                                                  parents=[stdout_args, json_arg, delim_arg, env_args, find_by_properties_and_tags_args],
-                                                  prog='dx find projects')
-parser_find_projects.add_argument('--name', help='Name of the project')
-parser_find_projects.add_argument('--level', choices=['LIST', 'VIEW', 'UPLOAD', 'CONTRIBUTE', 'ADMINISTER'],
-                                  help='Minimum level of permissions expected')
-parser_find_projects.add_argument('--public',
-                                  help='Include ONLY public projects (will automatically set --level to VIEW)',
-                                  action='store_true')
-parser_find_projects.set_defaults(func=find_projects)
-register_subparser(parser_find_projects, subparsers_action=subparsers_find, categories='data')
-
-parser_api = subparsers.add_parser('api', help='Call an API method',
-                                   formatter_class=argparse.RawTextHelpFormatter,
-                                   description=fill('Call an API method directly.  The JSON response from the API server will be returned if successful.  No name resolution is performed; DNAnexus IDs must always be provided.  The API specification can be found at') + '''
+                                                  prog='dx find jobs')
+    add_find_executions_search_gp(parser_find_jobs)
+    parser_find_jobs.set_defaults(func=find_executions, classname='job')
+    parser_find_jobs.completer = DXPathCompleter(expected='project')
+    register_subparser(parser_find_jobs, subparsers_action=subparsers_find, categories='exec')
+
+    parser_find_analyses = subparsers_find.add_parser('analyses', help='List analyses in your project',
+                                                      description=fill('Finds analyses with the given search parameters.  By default, output is formatted to show the last several job trees that you\'ve run in the current project.'),
+                                                      parents=[find_executions_args, stdout_args, json_arg, json_lines_arg, no_color_arg,
+                                                               delim_arg, env_args, find_by_properties_and_tags_args],
+                                                      formatter_class=argparse.RawTextHelpFormatter,
+                                                      conflict_handler='resolve',
+                                                      prog='dx find analyses')
+    add_find_executions_search_gp(parser_find_analyses)
+    parser_find_analyses.set_defaults(func=find_executions, classname='analysis')
+    parser_find_analyses.completer = DXPathCompleter(expected='project')
+    register_subparser(parser_find_analyses, subparsers_action=subparsers_find, categories='exec')
+
+    parser_find_executions = subparsers_find.add_parser('executions', help='List executions (jobs and analyses) in your project',
+                                                        description=fill('Finds executions (jobs and analyses) with the given search parameters.  By default, output is formatted to show the last several job trees that you\'ve run in the current project.'),
+                                                        parents=[find_executions_args, stdout_args, json_arg, json_lines_arg, no_color_arg,
+                                                                 delim_arg, env_args, find_by_properties_and_tags_args],
+                                                        formatter_class=argparse.RawTextHelpFormatter,
+                                                        conflict_handler='resolve',
+                                                        prog='dx find executions')
+    add_find_executions_search_gp(parser_find_executions)
+    parser_find_executions.set_defaults(func=find_executions, classname=None)
+    parser_find_executions.completer = DXPathCompleter(expected='project')
+    register_subparser(parser_find_executions, subparsers_action=subparsers_find, categories='exec')
+
+    parser_find_data = subparsers_find.add_parser('data', help='Find data objects',
+                                                  description='Finds data objects with the given search parameters.  By' +
+                                                  ' default, restricts the search to the current project if set.  To ' +
+                                                  'search over all projects (excludes public projects), use ' +
+                                                  '--all-projects (overrides --path and --norecurse).',
+                                                  parents=[stdout_args, json_arg, json_lines_arg, no_color_arg, delim_arg,
+                                                           env_args, find_by_properties_and_tags_args],
+                                                  prog='dx find data')
+    parser_find_data.add_argument('--class', dest='classname', choices=['record', 'file', 'gtable', 'applet', 'workflow'], help='Data object class')
+    parser_find_data.add_argument('--state', choices=['open', 'closing', 'closed', 'any'], help='State of the object')
+    parser_find_data.add_argument('--visibility', choices=['hidden', 'visible', 'either'], default='visible', help='Whether the object is hidden or not')
+    parser_find_data.add_argument('--name', help='Name of the object')
+    parser_find_data.add_argument('--type', help='Type of the data object')
+    parser_find_data.add_argument('--link', help='Object ID that the data object links to')
+    parser_find_data.add_argument('--all-projects', '--allprojects', help='Extend search to all projects (excluding public projects)', action='store_true')
+    parser_find_data.add_argument('--project', help=argparse.SUPPRESS)
+    parser_find_data.add_argument('--folder', help=argparse.SUPPRESS).completer = DXPathCompleter(expected='folder')
+    parser_find_data.add_argument('--path', help='Project and/or folder in which to restrict the results',
+                                  metavar='PROJECT:FOLDER').completer = DXPathCompleter(expected='folder')
+    parser_find_data.add_argument('--norecurse', dest='recurse', help='Do not recurse into subfolders', action='store_false')
+    parser_find_data.add_argument('--mod-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the object was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_data.add_argument('--mod-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the object was last modified (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_data.add_argument('--created-after', help='Date (e.g. 2012-01-01) or integer timestamp after which the object was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_data.add_argument('--created-before', help='Date (e.g. 2012-01-01) or integer timestamp before which the object was created (negative number means ms in the past, or use suffix s, m, h, d, w, M, y)')
+    parser_find_data.set_defaults(func=find_data)
+    register_subparser(parser_find_data, subparsers_action=subparsers_find, categories=('data', 'metadata'))
+
+    parser_find_projects = subparsers_find.add_parser('projects', help='Find projects',
+                                                      description='Finds projects with the given search parameters.  Use the --public flag to list all public projects.',
+                                                      parents=[stdout_args, json_arg, delim_arg, env_args, find_by_properties_and_tags_args],
+                                                      prog='dx find projects')
+    parser_find_projects.add_argument('--name', help='Name of the project')
+    parser_find_projects.add_argument('--level', choices=['LIST', 'VIEW', 'UPLOAD', 'CONTRIBUTE', 'ADMINISTER'],
+                                      help='Minimum level of permissions expected')
+    parser_find_projects.add_argument('--public',
+                                      help='Include ONLY public projects (will automatically set --level to VIEW)',
+                                      action='store_true')
+    parser_find_projects.set_defaults(func=find_projects)
+    register_subparser(parser_find_projects, subparsers_action=subparsers_find, categories='data')
+
+@lazy_subcommand('api')
+def build_api_parser():
+    parser_api = subparsers.add_parser('api', help='Call an API method',
+                                       formatter_class=argparse.RawTextHelpFormatter,
+                                       description=fill('Call an API method directly.  The JSON response from the API server will be returned if successful.  No name resolution is performed; DNAnexus IDs must always be provided.  The API specification can be found at') + '''
 
 https://wiki.dnanexus.com/API-Specification-v1.0.0/Introduction
 
@@ -4342,25 +4655,29 @@ EXAMPLE
   }
 
 ''',
-                                   prog='dx api',
-                                   parents=[env_args])
-parser_api.add_argument('resource', help=fill('One of "system", a class name (e.g. "record"), or an entity ID such as "record-xxxx".  Use "app-name/1.0.0" to refer to version "1.0.0" of the app named "name".', width_adjustment=-17))
-parser_api.add_argument('method', help=fill('Method name for the resource as documented by the API specification', width_adjustment=-17))
-parser_api.add_argument('input_json', nargs='?', default="{}", help='JSON input for the method (if not given, "{}" is used)')
-parser_api.add_argument('--input', help=fill('Load JSON input from FILENAME ("-" to use stdin)', width_adjustment=-17))
-parser_api.set_defaults(func=api)
-# parser_api.completer = TODO
-register_subparser(parser_api)
-
-parser_upgrade = subparsers.add_parser('upgrade', help='Upgrade dx-toolkit (the DNAnexus SDK and this program)',
-                                       description='Upgrades dx-toolkit (the DNAnexus SDK and this program) to the latest recommended version, or to a specified version and platform.')
-parser_upgrade.add_argument('args', nargs='*')
-parser_upgrade.set_defaults(func=upgrade)
-register_subparser(parser_upgrade)
-
-category_list = '\n  '.join([category + parser_categories[category]['desc'] for category in parser_categories_sorted])
-parser_help = subparsers.add_parser('help', help='Display help messages and dx commands by category',
-                                    description=fill('Displays the help message for the given command (and subcommand if given), or displays the list of all commands in the given category.') + '\n\nCATEGORIES\n\n  ' + category_list + '''
+                                       prog='dx api',
+                                       parents=[env_args])
+    parser_api.add_argument('resource', help=fill('One of "system", a class name (e.g. "record"), or an entity ID such as "record-xxxx".  Use "app-name/1.0.0" to refer to version "1.0.0" of the app named "name".', width_adjustment=-17))
+    parser_api.add_argument('method', help=fill('Method name for the resource as documented by the API specification', width_adjustment=-17))
+    parser_api.add_argument('input_json', nargs='?', default="{}", help='JSON input for the method (if not given, "{}" is used)')
+    parser_api.add_argument('--input', help=fill('Load JSON input from FILENAME ("-" to use stdin)', width_adjustment=-17))
+    parser_api.set_defaults(func=api)
+    # parser_api.completer = TODO
+    register_subparser(parser_api)
+
+@lazy_subcommand('upgrade')
+def build_upgrade_parser():
+    parser_upgrade = subparsers.add_parser('upgrade', help='Upgrade dx-toolkit (the DNAnexus SDK and this program)',
+                                           description='Upgrades dx-toolkit (the DNAnexus SDK and this program) to the latest recommended version, or to a specified version and platform.')
+    parser_upgrade.add_argument('args', nargs='*')
+    parser_upgrade.set_defaults(func=upgrade)
+    register_subparser(parser_upgrade)
+
+@lazy_subcommand('help')
+def build_help_parser():
+    category_list = '\n  '.join([category + parser_categories[category]['desc'] for category in parser_categories_sorted])
+    parser_help = subparsers.add_parser('help', help='Display help messages and dx commands by category',
+                                        description=fill('Displays the help message for the given command (and subcommand if given), or displays the list of all commands in the given category.') + '\n\nCATEGORIES\n\n  ' + category_list + '''
 
 EXAMPLE
 
@@ -4371,17 +4688,30 @@ EXAMPLE
   $ dx help run
     <help message for dx run>
 ''', formatter_class=argparse.RawTextHelpFormatter, prog='dx help')
-parser_help.add_argument('command_or_category', help=fill('Display the help message for the given command, or the list of all available commands for the given category', width_adjustment=-24), nargs='?', default=None)
-parser_help.add_argument('subcommand', help=fill('Display the help message for the given subcommand of the command', width_adjustment=-23), nargs='?', default=None)
-parser_help.set_defaults(func=print_help)
-# TODO: make this completer conditional on whether "help run" is in args
-# parser_help.completer = MultiCompleter([DXAppCompleter(),
-#                                         DXPathCompleter(classes=['applet'])])
-parser_map['help'] = parser_help # TODO: a special help completer
-parser_map['help run'] = parser_help
-for category in parser_categories:
-    parser_categories[category]['cmds'].append(('help', subparsers._choices_actions[-1].help))
-parser_categories['all']['cmds'].sort()
+    parser_help.add_argument('command_or_category', help=fill('Display the help message for the given command, or the list of all available commands for the given category', width_adjustment=-24), nargs='?', default=None)
+    parser_help.add_argument('subcommand', help=fill('Display the help message for the given subcommand of the command', width_adjustment=-23), nargs='?', default=None)
+    parser_help.set_defaults(func=print_help)
+    # TODO: make this completer conditional on whether "help run" is in args
+    # parser_help.completer = MultiCompleter([DXAppCompleter(),
+    #                                         DXPathCompleter(classes=['applet'])])
+    parser_map['help'] = parser_help # TODO: a special help completer
+    parser_map['help run'] = parser_help
+    for category in parser_categories:
+        parser_categories[category]['cmds'].append(('help', subparsers._choices_actions[-1].help))
+
+def build_all_subparsers():
+    '''
+    Builds the parsers of all the subcommands that have not been built
+    yet, which fills in parser_map and parser_categories (e.g. for "dx
+    help"). The commands of each category are listed in the order in
+    which they were registered, whatever the order in which they were
+    built.
+    '''
+    lazy_subparsers.build_all()
+    order = dict((name, i) for i, name in enumerate(lazy_subparsers.keys()))
+    for category in parser_categories:
+        parser_categories[category]['cmds'].sort(key=lambda cmd: order[cmd[0].split(' ')[0]])
+    parser_categories['all']['cmds'].sort()
 
 def main():
     # Bash argument completer hook
@@ -20,166 +20,212 @@ from __future__ import print_function
 
 import dxpy
 import json
-import string
-import random
 import sys
 import argparse
+import tempfile
+import warnings
+
+from dxpy.utils.gtable_import import open_input, iterate_batches, import_batches, GTableRowWriter
+
+numpy_available = True
+try:
+    import numpy
+except ImportError:
+    numpy_available = False
+
+# number of lines parsed, and of rows added to the table, at a time
+ROW_BATCH_SIZE = 10000
+
+# number of lines at the start of each track that are kept to detect its format
+HEAD_LINES = 100
+
+def detect_type(head_lines, delimiter, num_cols):
+    header=""
+    lines = iter(head_lines)
+    while "track" not in header:
+        header=next(lines, "")
+        # if this isn't a browser line either then there isn't a header
+        if "browser" not in header:
+            break
+    if "type=bedDetail" in header:
+        print("File is a BED detail file", file=sys.stderr)
+        return {"type": "bedDetail", "delimiter": delimiter}
 
-# to find the magic library
-import magic
-import subprocess
-
-def id_generator(size=10, chars=string.ascii_uppercase + string.digits):
-    return ''.join(random.choice(chars) for x in range(size))
-
-def unpack(input):
-    m = magic.Magic()
-
-    # determine compression format
-    try:
-        file_type = m.from_file(input)
-    except Exception as e:
-        raise dxpy.AppError("Error while identifying compression format: " + str(e))
-    
-    # if we find a tar file throw a program error telling the user to unpack it
-    if file_type == 'application/x-tar':
-        raise dxpy.AppError("App does not support tar files.  Please unpack.")
-
-    # since we haven't returned, the file is compressed.  Determine what program to use to uncompress
-    uncomp_util = None
-    if file_type == 'XZ compressed data':
-        uncomp_util = 'xzcat'
-    elif file_type[:21] == 'bzip2 compressed data':
-        uncomp_util = 'bzcat'
-    elif file_type[:20] == 'gzip compressed data':
-        uncomp_util = 'zcat'
-    elif file_type == 'POSIX tar archive (GNU)' or 'tar' in file_type:
-        raise dxpy.AppError("Found a tar archive.  Please untar your sequences before importing")
-    else:
-        # just return input filename since it's already uncompressed
-        return input
-
-    if uncomp_util != None:        
-        # bzcat does not support -t.  Use non streaming decompressors for testing input
-        test_util = None
-        if uncomp_util == 'xzcat':
-            test_util = 'xz'
-        elif uncomp_util == 'bzcat':
-            test_util = 'bzip2'
-        elif uncomp_util == 'zcat':
-            test_util = 'gzip'
-
-        try:
-            subprocess.check_call(" ".join([test_util, "-t", input]), shell=True)
-        except subprocess.CalledProcessError:
-            raise dxpy.AppError("File failed integrity check by "+uncomp_util+".  Compressed file is corrupted.")
-
-    # with that in hand, unzip file.  If we find a tar archive then exit with error.
-    try:
-        with subprocess.Popen([uncomp_util, input], stdout=subprocess.PIPE).stdout as pipe:
-            line = pipe.next()
-        uncomp_type = m.from_buffer(line)
-    except Exception as e:
-        raise dxpy.AppError("Error detecting file format after decompression: " + str(e))
-
-    if uncomp_type == 'POSIX tar archive (GNU)' or 'tar' in uncomp_type:
-        raise dxpy.AppError("Found a tar archive after decompression.  Please untar your files before importing")
-    elif 'ASCII text' not in uncomp_type:
-        raise dxpy.AppError("After decompression found file type other than plain text")
-    
-    try:
-        out_name = id_generator()
-        subprocess.check_call(" ".join([uncomp_util, "--stdout", input, ">", out_name]), shell=True)
-        return out_name
-    except subprocess.CalledProcessError as e:
-        raise dxpy.AppError("Unable to open compressed input for reading: " + str(e))
-
-def detect_type(bed_file):
-    delimiter = find_delimiter(bed_file)
-    with open(bed_file, 'rU') as bf:
-        header=""
-        while "track" not in header:
-            header=bf.readline()
-            # if this isn't a browser line either then there isn't a header
-            if "browser" not in header:
-                break
-        if "type=bedDetail" in header:
-            print("File is a BED detail file", file=sys.stderr)
-            return {"type": "bedDetail", "delimiter": delimiter}
-            
-    num_cols = find_num_columns(bed_file, delimiter)
     if num_cols >= 12:
         return {"type": "genes", "delimiter": delimiter}
     else:
         return {"type": "spans", "delimiter": delimiter}
-    
-# takes the whole bed file and splits into separate files for each track contained in it
-
-def split_on_track(bed_file):
-    files = []
-    current_filename = id_generator()
-    # open bed file
-    with open(bed_file, 'rU') as bf:
-        curr_file = open(current_filename, "w")
-        line = bf.readline()
-        if line.startswith("browser"):
-            line = bf.readline()
-        curr_file.write(line)
-        line = bf.readline()
-        while True:
+
+def new_track():
+    return {"file": tempfile.TemporaryFile(), "head": [], "max_tabs": 0, "max_spaces": 0}
+
+def add_line_to_track(track, line):
+    track["file"].write(line)
+    if len(track["head"]) < HEAD_LINES:
+        track["head"].append(line)
+    if not line.startswith("track"):
+        # the number of columns is one more than the number of
+        # delimiters, whichever delimiter turns out to be used
+        track["max_tabs"] = max(track["max_tabs"], line.count("\t"))
+        track["max_spaces"] = max(track["max_spaces"], line.count(" "))
+
+def finish_track(track):
+    track["file"].seek(0)
+    track["delimiter"] = find_delimiter(track["head"])
+    if track["delimiter"] == "\t":
+        track["num_cols"] = track["max_tabs"] + 1
+    else:
+        track["num_cols"] = track["max_spaces"] + 1
+    print("Found num cols: " + str(track["num_cols"]), file=sys.stderr)
+    track["type"] = detect_type(track["head"], track["delimiter"], track["num_cols"])["type"]
+    return track
+
+# takes the whole bed file and splits it into the tracks contained in it
+
+def split_on_track(bed_input):
+    '''
+    Reads the (decompressed) BED input once, spooling each track to a
+    temporary file. Yields, for each track, a dict with the spooled lines
+    ("file", positioned at its start) and the format of the track
+    ("type", "delimiter", "num_cols"), which is detected while the track
+    is read.
+    '''
+    track = new_track()
+    for i, line in enumerate(bed_input):
+        # universal newlines
+        if line.endswith("\r\n"):
+            line = line[:-2] + "\n"
+        if i == 0 and line.startswith("browser"):
+            continue
+        if line.startswith("track") and len(track["head"]) > 0:
+            # save our last track and start a new one for the next track
+            yield finish_track(track)
+            track = new_track()
+        add_line_to_track(track, line)
+    yield finish_track(track)
+
+def find_delimiter(head_lines):
+    line = head_lines[0] if len(head_lines) > 0 else ""
+    if line.startswith("track"):
+        line = head_lines[1] if len(head_lines) > 1 else ""
+    tab_split = line.split("\t")
+
+    if len(tab_split) >= 3: 
+        print("Bed file is tab delimited", file=sys.stderr)
+        return "\t"
+    else: 
+        space_split = line.split()
+        if len(space_split) < 3: 
+            raise dxpy.AppError("File is not a valid bed file (neither space delimited nor tab delimited)")
+        print("Bed file is space delimited", file=sys.stderr)
+        return " "
+
+def parse_coordinates(split_lines):
+    '''
+    Converts the lo and hi columns of a batch of lines to integers at
+    once with NumPy. Returns None, so that the lines are validated and
+    converted one at a time, if NumPy is not available or if any of the
+    values is not a valid (non-negative, 32-bit) coordinate.
+    '''
+    if not numpy_available or len(split_lines) == 0:
+        return None
+    try:
+        # NumPy stops parsing at the first invalid value, keeping a valid
+        # prefix of it (e.g. "10" of "10.5"), so a last value is appended
+        # for the prefix of the last coordinate not to be taken for it
+        coordinates = " ".join([line[1] + " " + line[2] for line in split_lines]) + " 0"
+    except IndexError:
+        return None
+    with warnings.catch_warnings():
+        # NumPy warns when it stops parsing at an invalid value
+        warnings.simplefilter("ignore")
+        values = numpy.fromstring(coordinates, dtype=numpy.int64, sep=" ")
+    if len(values) != 2 * len(split_lines) + 1:
+        return None
+    values = values[:-1]
+    if (values < 0).any() or (values > 2**31 - 1).any():
+        return None
+    return values.reshape(len(split_lines), 2).tolist()
+
+def iterate_track_line_batches(bed_file, span):
+    # Yields the lines of a track ROW_BATCH_SIZE at a time; the track
+    # line is stored in the details of the table instead
+    for batch in iterate_batches(bed_file, ROW_BATCH_SIZE):
+        lines = []
+        for line in batch:
             if line.startswith("track"):
-                # close and save our last track as a new file
-                curr_file.close()
-                files.append(current_filename)
-                # open a new file for the next track
-                current_filename = id_generator()
-                curr_file = open(current_filename, "w")
-            elif line == "":
-                curr_file.close()
-                files.append(current_filename)
-                break
-            
-            curr_file.write(line)
-            line = bf.readline()
+                details = span.get_details()
+                details['track'] = line
+                span.set_details(details)
+                continue
+            lines.append(line)
+        yield lines
+
+def parse_span_lines(context, lines):
+    num_cols, default_row, isBedDetail, delimiter = context
+    split_lines = [line.rstrip("\n").split(delimiter) for line in lines]
+
+    # the lo and hi columns of the whole batch, if they can be
+    # converted at once (and need not be validated line by line)
+    coordinates = parse_coordinates(split_lines)
+
+    rows = []
+    for line_number, line in enumerate(split_lines):
+        row = list(default_row)
+
+        if isBedDetail:
+            # only the first 4 columns are guaranteed to be defined by UCSC
+            validate_line(line[:4], check_coordinates=coordinates is None)
+            # save last two fields separately
+            bedDetailFields = line[-2:]
+            line = line[:-2]     
+        else:        
+            validate_line(line[:num_cols], check_coordinates=coordinates is None)
+
+        # check to see if this is a weird line
+        if len(line) < 3:
+            raise dxpy.AppError("Line: "+"\t".join(line)+" in BED file contains less than the minimum 3 columns.  Invalid BED file.")
 
-    return files
+        try:
+            row[0] = line[0]
+            if coordinates is None:
+                row[1] = int(line[1])
+                row[2] = int(line[2])
+            else:
+                row[1], row[2] = coordinates[line_number]
+            row[3] = line[3]
+            # dashes are sometimes used when field is invalid
+            if line[4] == "-" or line[4] == ".":
+                line[4] = 0
+            row[4] = float(line[4])
+            row[5] = line[5]
+            # dashes are sometimes used when field is invalid
+            if line[6] == "-" or line[6] == ".":
+                line[6] = 0
+            row[6] = int(line[6])
+            # dashes are sometimes used when field is invalid
+            if line[7] == "-" or line[7] == ".":
+                line[7] = 0
+            row[7] = int(line[7])
+            row[8] = line[8]
+
+        # an index error would come from having fewer columns in a row, which we should handle ok
+        except IndexError:
+            pass
+        # value error when fields are messed up and string gets converted to int, etc.  Throw these out.
+        except ValueError:
+            continue
 
-def find_num_columns(bed_file, delimiter="\t"):
-    num_cols = 0
+        if isBedDetail:
+            # add these in at the end if we have a bedDetail file
+            row[num_cols] = bedDetailFields[0]
+            row[num_cols+1] = bedDetailFields[1]
 
-    with open(bed_file, "rU") as bf:
-        line = bf.readline()
-        while line != "":
-            if line.startswith("track"):
-                line = bf.readline()
-            line = line.split(delimiter)
-            if len(line) > num_cols:
-                num_cols = len(line)
-            line = bf.readline()
-
-    print("Found num cols: " + str(num_cols), file=sys.stderr)
-    return num_cols
-
-def find_delimiter(bed_file):
-    with open(bed_file, "rU") as bf: 
-        line = bf.readline()
-        if line.startswith("track"):
-            line = bf.readline()
-        tab_split = line.split("\t")
-        
-        if len(tab_split) >= 3: 
-            print("Bed file is tab delimited", file=sys.stderr)
-            return "\t"
-        else: 
-            space_split = line.split()
-            if len(space_split) < 3: 
-                raise dxpy.AppError("File is not a valid bed file (neither space delimited nor tab delimited)")
-            print("Bed file is space delimited", file=sys.stderr)
-            return " "
-            
-def import_spans(bed_file, table_name, ref_id, file_id, additional_types, property_keys, property_values, tags, isBedDetail, delimiter="\t"):
-    num_cols = find_num_columns(bed_file, delimiter)
+        rows.append(row)
+
+    return rows
 
+def import_spans(bed_file, num_cols, table_name, ref_id, file_id, additional_types, property_keys, property_values, tags, isBedDetail, delimiter="\t"):
     # if this is a bedDetail file we should treat the last two columns separately
     if isBedDetail:
         num_cols -= 2
@@ -226,7 +272,7 @@ def import_spans(bed_file, table_name, ref_id, file_id, additional_types, proper
                               dxpy.DXGTable.lexicographic_index_column("hi")], "search"))
             break
             
-    with open(bed_file, 'rU') as bed, dxpy.new_dxgtable(column_descs, indices=indices, mode='w') as span:
+    with dxpy.new_dxgtable(column_descs, indices=indices, mode='w') as span:
         details = {"original_contigset": dxpy.dxlink(ref_id)}
         if file_id != None:
             details["original_file"] = dxpy.dxlink(file_id)
@@ -240,64 +286,8 @@ def import_spans(bed_file, table_name, ref_id, file_id, additional_types, proper
         span.add_types(["Spans", "gri"])
         span.rename(table_name)
 
-        for line in bed:
-            row = list(default_row)
-
-            if line.startswith("track"):
-                details = span.get_details()
-                details['track'] = line
-                span.set_details(details)
-                continue
-            line = line.rstrip("\n")
-            line = line.split(delimiter)
-            if isBedDetail:
-                # only the first 4 columns are guaranteed to be defined by UCSC
-                validate_line(line[:4])
-                # save last two fields separately
-                bedDetailFields = line[-2:]
-                line = line[:-2]     
-            else:        
-                validate_line(line[:num_cols])
-            
-            # check to see if this is a weird line
-            if len(line) == 0:
-                break
-            if len(line) < 3:
-                raise dxpy.AppError("Line: "+"\t".join(line)+" in BED file contains less than the minimum 3 columns.  Invalid BED file.")
-
-            try:
-                row[0] = line[0]
-                row[1] = int(line[1])
-                row[2] = int(line[2])
-                row[3] = line[3]
-                # dashes are sometimes used when field is invalid
-                if line[4] == "-" or line[4] == ".":
-                    line[4] = 0
-                row[4] = float(line[4])
-                row[5] = line[5]
-                # dashes are sometimes used when field is invalid
-                if line[6] == "-" or line[6] == ".":
-                    line[6] = 0
-                row[6] = int(line[6])
-                # dashes are sometimes used when field is invalid
-                if line[7] == "-" or line[7] == ".":
-                    line[7] = 0
-                row[7] = int(line[7])
-                row[8] = line[8]
-
-            # an index error would come from having fewer columns in a row, which we should handle ok
-            except IndexError:
-                pass
-            # value error when fields are messed up and string gets converted to int, etc.  Throw these out.
-            except ValueError:
-                continue
-            
-            if isBedDetail:
-                # add these in at the end if we have a bedDetail file
-                row[num_cols] = bedDetailFields[0]
-                row[num_cols+1] = bedDetailFields[1]
-            
-            span.add_row(row)
+        import_batches(span, iterate_track_line_batches(bed_file, span), parse_span_lines,
+                       context=(num_cols, default_row, isBedDetail, delimiter))
 
         span.flush()
 
@@ -394,7 +384,7 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
 
     default_row = ["", 0, 0, "", -1, "", ".", False, -1, -1, ""]
 
-    with open(bed_file, 'rU') as bed, dxpy.new_dxgtable(column_descs, indices=indices, mode='w') as span:
+    with dxpy.new_dxgtable(column_descs, indices=indices, mode='w') as span:
         span_table_id = span.get_id()
 
         details = {"original_contigset": dxpy.dxlink(ref_id)}
@@ -410,9 +400,10 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
         span.rename(table_name)
 
         current_span_id = 0
+        rows = GTableRowWriter(span, ROW_BATCH_SIZE)
 
         # where the parsing magic happens
-        for line in bed:
+        for line in bed_file:
             if line.startswith("track"):
                 details = span.get_details()
                 details['track'] = line
@@ -428,7 +419,7 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
             # add parent gene track
             row = generate_gene_row(line, 0, 0, "transcript", default_row, -1, current_span_id)
             if row != None:
-                span.add_row(row)
+                rows.append(row)
                 current_parent_id = current_span_id
                 current_span_id += 1          
                 
@@ -451,13 +442,13 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
                     # if thick* are the same or cover the whole transcript then we ignore them
                     # else, we partition the exons into CDS and UTR based on their boundaries
                     if thickStart == thickEnd or (thickStart == gene_lo and thickEnd == gene_hi):
-                        span.add_row(generate_gene_row(line, 
-                                                       blockSizes[i], 
-                                                       blockStarts[i], 
-                                                       "exon", 
-                                                       default_row, 
-                                                       current_parent_id, 
-                                                       current_span_id))
+                        rows.append(generate_gene_row(line, 
+                                                      blockSizes[i], 
+                                                      blockStarts[i], 
+                                                      "exon", 
+                                                      default_row, 
+                                                      current_parent_id, 
+                                                      current_span_id))
                         current_span_id += 1
                     else:
                         exon_lo = int(line[1])+blockStarts[i]
@@ -465,35 +456,35 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
 
                         # we're all UTR if we enter either of these
                         if (exon_hi <= thickStart and line[5] == '+') or (exon_lo >= thickEnd and line[5] == '-'):
-                            span.add_row(generate_gene_row(line, 
-                                                           blockSizes[i], 
-                                                           blockStarts[i], 
-                                                           "5' UTR", 
-                                                           default_row, 
-                                                           current_parent_id, 
-                                                           current_span_id))
+                            rows.append(generate_gene_row(line, 
+                                                          blockSizes[i], 
+                                                          blockStarts[i], 
+                                                          "5' UTR", 
+                                                          default_row, 
+                                                          current_parent_id, 
+                                                          current_span_id))
                             current_span_id += 1
                         elif (exon_hi <= thickStart and line[5] == '-') or (exon_lo >= thickEnd and line[5] == '+'):
-                            span.add_row(generate_gene_row(line, 
-                                                           blockSizes[i], 
-                                                           blockStarts[i], 
-                                                           "3' UTR", 
-                                                           default_row, 
-                                                           current_parent_id, 
-                                                           current_span_id))
+                            rows.append(generate_gene_row(line, 
+                                                          blockSizes[i], 
+                                                          blockStarts[i], 
+                                                          "3' UTR", 
+                                                          default_row, 
+                                                          current_parent_id, 
+                                                          current_span_id))
                             current_span_id += 1
 
                         # if this is true then we overlap CDS partially or completely
                         elif (exon_lo < thickEnd and exon_hi > thickStart):
                             # entirely contained
                             if exon_lo >= thickStart and exon_hi <= thickEnd:
-                                span.add_row(generate_gene_row(line, 
-                                                               blockSizes[i], 
-                                                               blockStarts[i], 
-                                                               "CDS", 
-                                                               default_row, 
-                                                               current_parent_id, 
-                                                               current_span_id))
+                                rows.append(generate_gene_row(line, 
+                                                              blockSizes[i], 
+                                                              blockStarts[i], 
+                                                              "CDS", 
+                                                              default_row, 
+                                                              current_parent_id, 
+                                                              current_span_id))
                                 current_span_id += 1
                             else:
                                 # left portion is UTR
@@ -503,26 +494,26 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
                                     else:
                                         UTR_type = "3' UTR"
                                     UTR_size = (min(blockSizes[i], thickStart - exon_lo))
-                                    span.add_row(generate_gene_row(line, 
-                                                                   UTR_size, 
-                                                                   blockStarts[i], 
-                                                                   UTR_type,
-                                                                   default_row, 
-                                                                   current_parent_id, 
-                                                                   current_span_id))
+                                    rows.append(generate_gene_row(line, 
+                                                                  UTR_size, 
+                                                                  blockStarts[i], 
+                                                                  UTR_type,
+                                                                  default_row, 
+                                                                  current_parent_id, 
+                                                                  current_span_id))
                                     current_span_id += 1
 
                                 # CDS portion
                                 CDS_size = blockSizes[i] - (max(exon_lo, thickStart) - exon_lo)
                                 CDS_size -= (exon_hi - min(exon_hi, thickEnd))
                                 CDS_start = (max(exon_lo, thickStart) - exon_lo) + blockStarts[i]
-                                span.add_row(generate_gene_row(line, 
-                                                               CDS_size, 
-                                                               CDS_start, 
-                                                               "CDS",
-                                                               default_row, 
-                                                               current_parent_id, 
-                                                               current_span_id))
+                                rows.append(generate_gene_row(line, 
+                                                              CDS_size, 
+                                                              CDS_start, 
+                                                              "CDS",
+                                                              default_row, 
+                                                              current_parent_id, 
+                                                              current_span_id))
                                 current_span_id += 1
 
                                 # right portion is UTR
@@ -533,15 +524,17 @@ def import_genes(bed_file, table_name, ref_id, file_id, additional_types, proper
                                         UTR_type = "5' UTR"
                                     UTR_size = (min(blockSizes[i], exon_hi - thickEnd))
                                     UTR_start = blockStarts[i] + thickEnd - exon_lo
-                                    span.add_row(generate_gene_row(line, 
-                                                                   UTR_size, 
-                                                                   UTR_start, 
-                                                                   UTR_type,
-                                                                   default_row, 
-                                                                   current_parent_id, 
-                                                                   current_span_id))
+                                    rows.append(generate_gene_row(line, 
+                                                                  UTR_size, 
+                                                                  UTR_start, 
+                                                                  UTR_type,
+                                                                  default_row, 
+                                                                  current_parent_id, 
+                                                                  current_span_id))
                                     current_span_id += 1
 
+        rows.flush()
+
     return dxpy.dxlink(span.get_id())
 
 
@@ -575,24 +568,24 @@ def import_BED(**args):
     tags = args['tag']
 
     job_outputs = []
-    # uncompresses file if necessary.  Returns new filename
-    bed_filename_uncomp = unpack( bed_filename )
+    # the input is decompressed (if necessary) once, as it is read
+    bed_input = open_input(bed_filename)
 
     current_file = 1
 
-    for import_filename in split_on_track(bed_filename_uncomp):
+    for track in split_on_track(bed_input):
         if current_file == 1:
             name = bed_filename
         else:
             name = bed_filename+"_"+str(current_file)
         current_file += 1
-        bed_type = detect_type(import_filename)["type"]
-        delimiter = detect_type(import_filename)["delimiter"]
+        bed_type = track["type"]
+        delimiter = track["delimiter"]
 
         print("Bed type is : " + bed_type, file=sys.stderr)
         if bed_type == "genes":
             print("Importing as Genes Type", file=sys.stderr)
-            job_outputs.append(import_genes(import_filename, name, reference, file_id, additional_types, property_keys, property_values, tags, delimiter))
+            job_outputs.append(import_genes(track["file"], name, reference, file_id, additional_types, property_keys, property_values, tags, delimiter))
         elif bed_type == "spans" or bed_type == "bedDetail":
             print("Importing as Spans Type", file=sys.stderr)
             if bed_type == "bedDetail":
@@ -600,30 +593,31 @@ def import_BED(**args):
                 bedDetail=True
             else:
                 bedDetail=False
-            job_outputs.append(import_spans(import_filename, name, reference, file_id, additional_types, property_keys, property_values, tags, bedDetail, delimiter))
+            job_outputs.append(import_spans(track["file"], track["num_cols"], name, reference, file_id, additional_types, property_keys, property_values, tags, bedDetail, delimiter))
         else:
             raise dxpy.AppError("Unable to determine type of BED file")
 
-        subprocess.check_call(" ".join(["rm", import_filename]), shell=True)
+        track["file"].close()
 
-    if(bed_filename != bed_filename_uncomp):
-        subprocess.check_call(" ".join(["rm", bed_filename_uncomp]), shell=True)
+    bed_input.close()
 
     print(json.dumps(job_outputs))
     return job_outputs
 
-def validate_line(line):
+def validate_line(line, check_coordinates=True):
+    # check_coordinates is False when the start and end positions have
+    # already been validated (see parse_coordinates)
     line_str = "\t".join(line)
     entries = list(line)
     
-    if len(entries) > 1:
+    if len(entries) > 1 and check_coordinates:
         try:
             if int(entries[1]) < 0:
                 raise dxpy.AppError("The start position for one entry was unexpectedly negative. \nOffending line_str: " + line_str + "\nOffending value: " + str(entries[1]))
         except ValueError:
             raise dxpy.AppError("One of the start values could not be translated to an integer. " + "\nOffending line_str: " + line_str + "\nOffending value: " + str(entries[1]))
     
-    if len(entries) > 2:    
+    if len(entries) > 2 and check_coordinates:
         try:
             if int(entries[2]) < 0:
                 raise dxpy.AppError("The end position for one entry was unexpectedly negative. \nOffending line_str: " + line_str + "\nOffending value: " + str(entries[2]))
@@ -21,16 +21,15 @@ from __future__ import print_function
 import sys
 import json
 import logging
-import subprocess
 import re
 import string
 import argparse
 import ast
 
-sys.path.append('/usr/local/lib/')
-import magic
 import dxpy
 from dxpy.compat import USING_PYTHON2
+from dxpy.utils.decompression import DecompressedInput
+from dxpy.utils.gtable_import import iterate_batches, iterate_line_batches, import_batches, ImportProgress
 
 parser = argparse.ArgumentParser(description='Import local FASTQ file(s) as a Reads object.')
 parser.add_argument('--name', help='ID of ContigSet object (reference) that this BED file annotates')
@@ -48,6 +47,7 @@ parser.add_argument('--pair_min_dist', help='For paired reads: Smallest expected
 parser.add_argument('--pair_max_dist', help='For paired reads: Largest expected fragment length (in bp), if known.')
 parser.add_argument('--pair_avg_dist', help='For paired reads: Average fragment length (in bp), if known.')
 parser.add_argument('--pair_std_dev_dist', help='For paired reads: Standard deviation of fragment length (in bp), if known.')
+parser.add_argument('--workers', type=int, default=1, help='Number of worker processes parsing and uploading batches of FASTQ reads in parallel (the reads are stored in the same order as with a single worker).')
 
 args = {}
 
@@ -59,6 +59,15 @@ NUM_TO_AVERAGE = 10
 READS_TO_ESTIMATE = 10000
 MAX_READ_NAME_LEN = 255
 
+# number of reads parsed, converted and added to the table at a time
+READ_BATCH_SIZE = 10000
+
+# phred64 -> phred33 translation table: subtracts the difference in ASCII offsets
+PHRED64_TO_PHRED33 = bytes(bytearray((i - 31) % 256 for i in range(256)))
+
+# translation table for enforcing string syntax: bad sequence chars become Ns
+SEQ_TRANSTABLE = string.maketrans('.-', 'NN')
+
 # allowed_qual_chars = ''.join(chr(i) for i in range(33, 127))
 # Use /[^...]+/ to search for any character other than the permitted ones (ASCII 33 through 126).
 disallowed_qual_chars_re = re.compile('[^!-~]')
@@ -69,70 +78,9 @@ disallowed_letterspace_chars_re = re.compile('[^ACGTNacgtn.-]+')
 job = {}
 
 def unpack_and_open(input):
-    m = magic.Magic()
-
-    # determine compression format
-    try:
-        file_type = m.from_file(input)
-    except:
-        raise dxpy.AppError("Unable to identify compression format")
-
-    
-    # if we find a tar file throw a program error telling the user to unpack it
-    if file_type == 'application/x-tar':
-        raise dxpy.AppError("Program does not support tar files.  Please unpack.")
-
-    # since we haven't returned, the file is compressed.  Determine what program to use to uncompress
-    uncomp_util = None
-    if file_type == 'XZ compressed data':
-        uncomp_util = 'xzcat'
-    elif file_type[:21] == 'bzip2 compressed data':
-        uncomp_util = 'bzcat'
-    elif file_type[:20] == 'gzip compressed data':
-        uncomp_util = 'zcat'
-    elif file_type == 'POSIX tar archive (GNU)' or 'tar' in file_type:
-        raise dxpy.AppError("Found a tar archive.  Please untar your sequences before importing")
-    else:
-        # Assume is uncompressed.  Open the file and return a handle to it
-        try:
-            return open(input)
-        except:
-            raise dxpy.AppError("Detected uncompressed input but unable to open file. File may be corrupted.")
-
-    if uncomp_util != None:
-        
-        # bzcat does not support -t.  Use non streaming decompressors for testing input
-        test_util = None
-        if uncomp_util == 'xzcat':
-            test_util = 'xz'
-        elif uncomp_util == 'bzcat':
-            test_util = 'bzip2'
-        elif uncomp_util == 'zcat':
-            test_util = 'gzip'
-
-        try:
-            subprocess.check_call(" ".join([test_util, "-t", input]), shell=True)
-        except subprocess.CalledProcessError:
-            raise dxpy.AppError("File failed integrity check by "+uncomp_util+".  Compressed file is corrupted.")
-
-    # with that in hand, open file for reading.  If we find a tar archive then exit with error.
-    try:
-        with subprocess.Popen([uncomp_util, input], stdout=subprocess.PIPE).stdout as pipe:
-            line = pipe.next()
-        uncomp_type = m.from_buffer(line)
-    except:
-        raise dxpy.AppError("Error detecting file format after decompression")
-
-    if uncomp_type == 'POSIX tar archive (GNU)' or 'tar' in uncomp_type:
-        raise dxpy.AppError("Found a tar archive after decompression.  Please untar your sequences before importing")
-    elif 'ASCII text' not in uncomp_type:
-        raise dxpy.AppError("After decompression found file type other than plain text")
-    
-    try:
-        return subprocess.Popen([uncomp_util, input], stdout=subprocess.PIPE).stdout
-    except:
-        raise dxpy.AppError("Unable to open compressed input for reading")
-    
+    # The input is decompressed once, as it is read; its integrity is
+    # checked when the end of the file is reached
+    return DecompressedInput(input)
 
 def remove_file_type( name ):
 
@@ -152,7 +100,7 @@ def remove_file_type( name ):
     return name
 
 
-def estimateQualEncoding(fastq_filename, basesToEstimate, readsToEstimate, threshold):
+def estimateQualEncoding(fastq_lines, basesToEstimate, readsToEstimate, threshold):
     i = 0
 
     # long int to avoid overruns in big reads files (NB: ints are longs in Python 3 but not 2)
@@ -163,33 +111,27 @@ def estimateQualEncoding(fastq_filename, basesToEstimate, readsToEstimate, thres
     encoding = ""
     numLines = 0
 
-    with unpack_and_open(fastq_filename) as fastq_file:
-        while numLines < readsToEstimate:
-            try:
-                line = fastq_file.next()
+    for line in fastq_lines:
+        currentLine = i % 4
 
-                currentLine = i % 4
-            
-                # quality line
-                if currentLine == 3:
-                    numLines += 1
-                    
-                    for base in range(basesToEstimate):
-                        try:
-                            base_num = ord(line[base])
-                            
-                            if base_num < 64:
-                                print("found Qual less than 64 -> encoding phred33")
-                                encoding = "phred33"
-                                return encoding
-                            avgQual += base_num
-                        except:
-                            break
-                i += 1
-
-            except StopIteration:
-                #print("EOF!")
+        # quality line
+        if currentLine == 3:
+            if numLines == readsToEstimate:
                 break
+            numLines += 1
+
+            for base in range(basesToEstimate):
+                try:
+                    base_num = ord(line[base])
+
+                    if base_num < 64:
+                        print("found Qual less than 64 -> encoding phred33")
+                        encoding = "phred33"
+                        return encoding
+                    avgQual += base_num
+                except:
+                    break
+        i += 1
 
     avgQual /= numLines * basesToEstimate
 
@@ -210,8 +152,7 @@ def convert_qual(qualString, qual_encode):
     if qual_encode == 'phred64':
         #convert to phred33 do this by subtracting the difference in ASCII offsets
         #should be scaling values here? Lose some top end values by doing this
-        for i in range(len(qualString)):
-            convQualString += chr(ord(qualString[i]) - 31)
+        convQualString = qualString.translate(PHRED64_TO_PHRED33)
     elif qual_encode == 'qual_file':
         convQualString = ''.join(chr(int(i) + 33) for i in qualString.strip(' ').split(' '))
     elif qual_encode == 'phred33':
@@ -221,18 +162,21 @@ def convert_qual(qualString, qual_encode):
 
     return convQualString
 
-def sniff_fastq(filename):
-    with unpack_and_open(filename) as fh:
-        header, seq = fh.readline(), fh.readline()
-        is_fasta = True if header[0] == '>' else False
-        is_colorspace = True if re.match("^[ATGCN][0123.]+$", seq) else False
-        
-        if args['qual_encoding'] == 'auto' and not (is_fasta or args['discard_qualities']):
-            qual_encoding = estimateQualEncoding(filename, NUM_TO_AVERAGE, READS_TO_ESTIMATE, THRESHOLD)
-        else:
-            qual_encoding = args['qual_encoding']
-        
-        logging.debug("Detected: fasta={f}, colorspace={c}, qual_encoding={q}".format(f=is_fasta, c=is_colorspace, q=qual_encoding))
+def sniff_fastq(fh):
+    # Only looks at the buffered head of the (already opened) input, so
+    # that the file does not have to be decompressed again
+    header, seq = (fh.peek_lines(2) + ['', ''])[:2]
+    if len(header) == 0:
+        raise dxpy.AppError("Input file is empty")
+    is_fasta = True if header[0] == '>' else False
+    is_colorspace = True if re.match("^[ATGCN][0123.]+$", seq) else False
+
+    if args['qual_encoding'] == 'auto' and not (is_fasta or args['discard_qualities']):
+        qual_encoding = estimateQualEncoding(fh.peek_lines(READS_TO_ESTIMATE * 4), NUM_TO_AVERAGE, READS_TO_ESTIMATE, THRESHOLD)
+    else:
+        qual_encoding = args['qual_encoding']
+
+    logging.debug("Detected: fasta={f}, colorspace={c}, qual_encoding={q}".format(f=is_fasta, c=is_colorspace, q=qual_encoding))
 
     return is_fasta, is_colorspace, qual_encoding
 
@@ -387,8 +331,8 @@ class get_read( object ):
         '''
 #############################################################
 
-def iterate_reads(fastqa1_filename, fastqa2_filename, qual1_filename, qual2_filename, is_fasta, is_colorspace, qual_encoding):
-    fastqa1_iter = unpack_and_open(fastqa1_filename).__iter__()
+def iterate_reads(fastqa1_file, fastqa2_filename, qual1_filename, qual2_filename, is_fasta, is_colorspace, qual_encoding):
+    fastqa1_iter = fastqa1_file.__iter__()
     fastqa2_iter, qual1_iter, qual2_iter = None, None, None
     if fastqa2_filename != None:
         fastqa2_iter = unpack_and_open(fastqa2_filename).__iter__()
@@ -398,7 +342,7 @@ def iterate_reads(fastqa1_filename, fastqa2_filename, qual1_filename, qual2_file
         qual2_iter = unpack_and_open(qual2_filename).__iter__()
 
     read_iter = get_read(fastqa1_iter, qual1_iter, is_fasta, is_colorspace, qual_encoding).__iter__()
-    if fastqa1_filename != None:
+    if fastqa2_filename != None:
         read_iter2 = get_read(fastqa2_iter, qual2_iter, is_fasta, is_colorspace, qual_encoding).__iter__()
 
     try:
@@ -423,6 +367,118 @@ def iterate_reads(fastqa1_filename, fastqa2_filename, qual1_filename, qual2_file
                 except StopIteration:
                     pass
 
+def is_valid_fastq_batch(names, seqs, qual_names, quals, is_colorspace):
+    # Checks a whole batch of FASTQ records at once with a few scans of
+    # the joined fields; get_read performs the same checks one record at
+    # a time.
+    if len(names) == 0:
+        return True
+    if ('\n' + '\n'.join(names)).count('\n@') != len(names) or max(map(len, names)) > MAX_READ_NAME_LEN:
+        return False
+    if ('\n' + '\n'.join(qual_names)).count('\n+') != len(qual_names):
+        return False
+    if min(map(len, seqs)) == 0:
+        return False
+    disallowed_seq_chars_re = disallowed_colorspace_chars_re if is_colorspace else disallowed_letterspace_chars_re
+    if disallowed_seq_chars_re.search(''.join(seqs)):
+        return False
+    if not args['discard_qualities']:
+        if disallowed_qual_chars_re.search(''.join(quals)) or list(map(len, quals)) != list(map(len, seqs)):
+            return False
+    return True
+
+def parse_fastq_batch(lines, is_colorspace, qual_encoding):
+    names, seqs, qual_names, quals = lines[0::4], lines[1::4], lines[2::4], lines[3::4]
+    if len(lines) % 4 != 0 or not is_valid_fastq_batch(names, seqs, qual_names, quals, is_colorspace):
+        # Parse the batch again record by record, which reports the
+        # first invalid one
+        reads = list(get_read(iter(lines), None, False, is_colorspace, qual_encoding))
+        return [read[0] for read in reads], [read[1] for read in reads], [read[2] for read in reads]
+
+    if not args['discard_qualities']:
+        if is_colorspace: # Strip the quality scores of the primer letter
+            quals = [qual[1:] for qual in quals]
+        elif qual_encoding != 'phred33':
+            quals = [convert_qual(qual, qual_encoding) for qual in quals]
+    return names, seqs, quals
+
+def iterate_fastq_line_batches(fastq_file):
+    # Yields the lines of READ_BATCH_SIZE records at a time
+    return iterate_line_batches(fastq_file, 4 * READ_BATCH_SIZE)
+
+def iterate_fastq_batch_pairs(fastqa1_file, fastqa2_filename):
+    '''
+    Yields (lines1, lines2) for successive batches of (at most
+    READ_BATCH_SIZE) FASTQ records of each mate, read in lockstep;
+    lines2 is None for unpaired reads.
+    '''
+    batches1 = iterate_fastq_line_batches(fastqa1_file)
+    if fastqa2_filename == None:
+        for lines1 in batches1:
+            yield lines1, None
+        return
+    batches2 = iterate_fastq_line_batches(unpack_and_open(fastqa2_filename))
+    for lines1 in batches1:
+        yield lines1, next(batches2, [])
+    if next(batches2, None) is not None:
+        raise dxpy.AppError("Number of reads in each file must be equal")
+
+def parse_fastq_batch_pair(context, batch):
+    # Parses one batch of FASTQ lines (of each mate) into rows; run by
+    # the import workers
+    is_colorspace, qual_encoding = context
+    lines1, lines2 = batch
+    names1, seqs1, quals1 = parse_fastq_batch(lines1, is_colorspace, qual_encoding)
+    names2, seqs2, quals2 = None, None, None
+    if lines2 is not None:
+        names2, seqs2, quals2 = parse_fastq_batch(lines2, is_colorspace, qual_encoding)
+        if len(names2) != len(names1):
+            raise dxpy.AppError("Number of reads in each file must be equal")
+    return make_rows(names1, seqs1, quals1, names2, seqs2, quals2, is_colorspace, True)
+
+def iterate_fasta_batches(fastqa1_file, fastqa2_filename, qual1_filename, qual2_filename, is_colorspace, qual_encoding):
+    '''
+    Yields (names1, seqs1, quals1, names2, seqs2, quals2) for successive
+    batches of (at most READ_BATCH_SIZE) FASTA reads; the fields of the
+    second mates are None for unpaired reads.
+    '''
+    reads = iterate_reads(fastqa1_file, fastqa2_filename, qual1_filename, qual2_filename, True, is_colorspace, qual_encoding)
+    for batch in iterate_batches(reads, READ_BATCH_SIZE):
+        yield tuple(list(field) for field in zip(*batch))
+
+def make_fasta_rows(context, batch):
+    is_colorspace, reads_have_qualities = context
+    return make_rows(*(batch + (is_colorspace, reads_have_qualities)))
+
+def format_seqs(seqs, is_colorspace):
+    # enforce UPPERCASE and translate bad chars into Ns, for the whole batch at once
+    seqs = '\n'.join(seqs).upper()
+    if not is_colorspace:
+        seqs = seqs.translate(SEQ_TRANSTABLE)
+    return seqs.split('\n')
+
+def make_rows(names1, seqs1, quals1, names2, seqs2, quals2, is_colorspace, reads_have_qualities):
+    paired = names2 is not None
+    columns = []
+    # add names, without the leading '>' or '@'
+    if args['discard_names'] == False:
+        columns.append([name[1:] for name in names1])
+        if paired:
+            columns.append([name[1:] for name in names2])
+
+    # add seqs
+    columns.append(format_seqs(seqs1, is_colorspace))
+    if paired:
+        columns.append(format_seqs(seqs2, is_colorspace))
+
+    # add quals
+    if reads_have_qualities and not args['discard_qualities']:
+        columns.append(quals1)
+        if paired:
+            columns.append(quals2)
+
+    return list(zip(*columns))
+
 def import_reads(job_input):
 
     global args
@@ -454,7 +510,8 @@ def import_reads(job_input):
     else:
         paired = False
    
-    is_fasta, is_colorspace, qual_encoding = sniff_fastq(args["file"])
+    fastqa1_file = unpack_and_open(args["file"])
+    is_fasta, is_colorspace, qual_encoding = sniff_fastq(fastqa1_file)
     
     if is_fasta == False and ('qual' in args or 'qual2' in args):
         raise dxpy.AppError("Qualities supplied twice:  FASTQ format file found along with separate quality file.")
@@ -518,57 +575,29 @@ def import_reads(job_input):
         readsTable.set_details(details)
 
 
-    # generate translation table for enforcing string syntax
-    to_replace=''.join([".","-"])
-    N=''.join(['N'] * len(to_replace))
-    transtable = string.maketrans( to_replace, N )
-
-    for name1, seq1, qual1, name2, seq2, qual2 in iterate_reads(fastqa1_filename=args["file"],
-                                                                fastqa2_filename=args["file2"] if 'file2' in args else None,
-                                                                qual1_filename=args["qual"] if 'qual' in args else None,
-                                                                qual2_filename=args["qual2"] if 'qual2' in args else None,
-                                                                is_fasta=is_fasta,
-                                                                is_colorspace=is_colorspace,
-                                                                qual_encoding=qual_encoding):
-        
-        row = []
-        # add name
-        if args['discard_names'] == False:
-            if is_fasta and name1[0] == '>':
-                name1 = name1[1:]
-            elif name1[0] == '@':
-                name1 = name1[1:]
-            row.append(name1)
-            if paired:
-                if is_fasta and name2[0] == '>':
-                    name2 = name2[1:]
-                elif name2[0] == '@':
-                    name2 = name2[1:]
-                row.append(name2)
-    
-        # enforce UPPERCASE
-        seq1 = seq1.upper()
-        if paired:
-            seq2 = seq2.upper()
-        
-        # translate bad chars into Ns
-        if not is_colorspace:
-            seq1 = seq1.translate(transtable)
-            if paired:
-                seq2 = seq2.translate(transtable)
-
-        # add seq
-        row.append(seq1)
-        if paired:
-            row.append(seq2)
-
-        # add quals
-        if reads_have_qualities and not args['discard_qualities']:
-            row.append(qual1)
-            if paired:
-                row.append(qual2)
-        
-        readsTable.add_row(row)
+    # the rows are built from the table schema, so they need not be validated again
+    progress = ImportProgress(sys.stderr)
+    if is_fasta:
+        if args.get('workers', 1) > 1:
+            print("Warning: --workers is ignored for FASTA input, whose reads are imported by a single worker",
+                  file=sys.stderr)
+        import_batches(readsTable,
+                       iterate_fasta_batches(fastqa1_file=fastqa1_file,
+                                             fastqa2_filename=args["file2"] if 'file2' in args else None,
+                                             qual1_filename=args["qual"] if 'qual' in args else None,
+                                             qual2_filename=args["qual2"] if 'qual2' in args else None,
+                                             is_colorspace=is_colorspace,
+                                             qual_encoding=qual_encoding),
+                       make_fasta_rows, context=(is_colorspace, reads_have_qualities),
+                       validate=False, progress=progress)
+    else:
+        # With several workers, each batch is uploaded by the worker that
+        # parsed it, as a separate part, so the reads stay in input order
+        import_batches(readsTable,
+                       iterate_fastq_batch_pairs(fastqa1_file, args["file2"] if 'file2' in args else None),
+                       parse_fastq_batch_pair, context=(is_colorspace, qual_encoding),
+                       num_workers=args.get('workers', 1), write_from_workers=True,
+                       validate=False, progress=progress)
 
     # print out table ID
     print(json.dumps({'table_id': readsTable.get_id()}))
@@ -22,9 +22,10 @@ import dxpy
 import sys
 import re
 import argparse
-import subprocess
+from dxpy.utils.gtable_import import open_input, GTableRowWriter
 
-import magic
+# number of rows added to the table at a time
+ROW_BATCH_SIZE = 10000
 
 parser = argparse.ArgumentParser(description='Import a local GFF file as a Spans or Genes object.')
 parser.add_argument('fileName', help='local fileName to import')
@@ -69,29 +70,12 @@ def importGFF(**args):
         if args.get('file_id') != None:
             file_id = args['file_id']
     
-    inputFileName = unpack(fileName)
+    # The input is decompressed once; the decompressed data is spooled
+    # for the second pass
+    inputFile = open_input(fileName, spool=True)
         
     #Rows of this type will not be written to the gtable as their information is fully encompassed by the rest of the data
     discardedTypes = {"start_codon": True, "stop_codon": True}
-   
-    ##Isolate the attribute tags from the file and check integrity
-    spansTable, additionalColumns = constructTable(inputFileName)
-    
-    details = {'original_contigset': dxpy.dxlink(reference)}
-    if file_id != None:
-            details['original_file'] = dxpy.dxlink(file_id)
-    if len(property_key) != len(property_value):
-        raise dxpy.AppError("Expected each provided property to have a corresponding value.")
-    for i in range(len(property_key)):
-        details[property_key[i]] = property_value[i]
-
-    spansTable.set_details(details)
-    spansTable.add_tags(tag)
-
-    if outputName == '':
-        spansTable.rename(fileName)
-    else:
-        spansTable.rename(outputName)
 
     hasGenes = False
 
@@ -117,9 +101,11 @@ def importGFF(**args):
     codingRegions = {}
     spans = {}
     
-    inputFile = open(inputFileName, 'r')
+    ##Isolate the attribute tags from the file and check integrity while computing the coding regions
+    attributes = {}
     for line in inputFile:
         if line[0] != "#":
+            checkLineAttributes(line, attributes)
             values = parseLine(line.split("#")[0])
         
             if values["attributes"].get("Parent") != None:
@@ -135,9 +121,29 @@ def importGFF(**args):
                 spans[values["attributes"]["ID"]] = spanId
             spanId += 1
     
-    inputFile = open(inputFileName, 'r')
+    ##The attribute tags found in the file are the additional columns of the table
+    spansTable, additionalColumns = constructTable(attributes)
+    
+    details = {'original_contigset': dxpy.dxlink(reference)}
+    if file_id != None:
+            details['original_file'] = dxpy.dxlink(file_id)
+    if len(property_key) != len(property_value):
+        raise dxpy.AppError("Expected each provided property to have a corresponding value.")
+    for i in range(len(property_key)):
+        details[property_key[i]] = property_value[i]
+
+    spansTable.set_details(details)
+    spansTable.add_tags(tag)
+
+    if outputName == '':
+        spansTable.rename(fileName)
+    else:
+        spansTable.rename(outputName)
+
+    inputFile = inputFile.rewind()
     overflowSpans = spanId
     spanId = 0
+    rows = GTableRowWriter(spansTable, ROW_BATCH_SIZE)
     
     for line in inputFile:
         if line[0] != "#":
@@ -192,8 +198,11 @@ def importGFF(**args):
                         entry.append(values["attributes"][x])
                     else:
                         entry.append('')
-                spansTable.add_rows([entry])
+                rows.append(entry)
             spanId += 1
+
+    inputFile.close()
+    rows.flush()
     
     if hasGenes:
         types = ["Genes", "gri"]
@@ -289,28 +298,25 @@ def parseLine(line):
     values = {"chromosome": chromosome, "lo": lo, "hi": hi, "source": source, "type": typ, "strand": strand, "score": score, "frame": frame, "attributes": lineAttributes}
     return values
     
-def constructTable(inputFileName):
-    inputFile = open(inputFileName, 'r')
-    attributes = {}
-    for line in inputFile:
-        if line[0] != "#":
-            line = line.strip().split("#")[0]
-            tabSplit = line.split("\t")
-            if len(tabSplit) == 1:
-                tabSplit = line.split(" ")
-                if len(tabSplit) < 9:
-                    raise dxpy.AppError("One row did not have 8 or 9 entries, it had 1 instead. Offending line: " + line)
-                tabSplit[8] = " ".join(tabSplit[8:])
-                tabSplit = tabSplit[:9]
-            
-            if len(tabSplit) != 8 and len(tabSplit) != 9:
-                raise dxpy.AppError("One row did not have 8 or 9 entries, it had " + str(len(tabSplit)) + " instead. Offending line: " + line)
-            elif len(tabSplit) == 9:
-                reg = re.findall("([^=]*)=([^;]*);", tabSplit[8].strip() + ";")
-                for x in reg:
-                    attributes[x[0]] = True
-    
+def checkLineAttributes(line, attributes):
+    # Checks the integrity of one line and records the attribute tags it uses
+    line = line.strip().split("#")[0]
+    tabSplit = line.split("\t")
+    if len(tabSplit) == 1:
+        tabSplit = line.split(" ")
+        if len(tabSplit) < 9:
+            raise dxpy.AppError("One row did not have 8 or 9 entries, it had 1 instead. Offending line: " + line)
+        tabSplit[8] = " ".join(tabSplit[8:])
+        tabSplit = tabSplit[:9]
     
+    if len(tabSplit) != 8 and len(tabSplit) != 9:
+        raise dxpy.AppError("One row did not have 8 or 9 entries, it had " + str(len(tabSplit)) + " instead. Offending line: " + line)
+    elif len(tabSplit) == 9:
+        reg = re.findall("([^=]*)=([^;]*);", tabSplit[8].strip() + ";")
+        for x in reg:
+            attributes[x[0]] = True
+
+def constructTable(attributes):
     reservedColumns = ["", "chr", "lo", "hi", "name", "span_id", "type", "score", "is_coding", "parent_id", "frame", "description", "source"]
     
     #Construct table
@@ -345,70 +351,6 @@ def constructTable(inputFileName):
     spansTable = dxpy.new_dxgtable(columns=schema, indices=indices)
     return spansTable, additionalColumns
 
-def unpack(input):
-    m = magic.Magic()
-
-    # determine compression format
-    try:
-        file_type = m.from_file(input)
-    except:
-        raise dxpy.AppError("Unable to identify compression format")
-
-
-    # if we find a tar file throw a program error telling the user to unpack it
-    if file_type == 'application/x-tar':
-        raise dxpy.AppError("App does not support tar files.  Please unpack.")
-
-    # since we haven't returned, the file is compressed.  Determine what program to use to uncompress
-    uncomp_util = None
-    if file_type == 'XZ compressed data':
-        uncomp_util = 'xzcat'
-    elif file_type[:21] == 'bzip2 compressed data':
-        uncomp_util = 'bzcat'
-    elif file_type[:20] == 'gzip compressed data':
-        uncomp_util = 'zcat'
-    elif file_type == 'POSIX tar archive (GNU)' or 'tar' in file_type:
-        raise dxpy.AppError("Found a tar archive.  Please untar your sequences before importing")
-    else:
-        # just return input filename since it's already uncompressed
-        return input
-
-    if uncomp_util != None:
-
-        # bzcat does not support -t.  Use non streaming decompressors for testing input
-        test_util = None
-        if uncomp_util == 'xzcat':
-            test_util = 'xz'
-        elif uncomp_util == 'bzcat':
-            test_util = 'bzip2'
-        elif uncomp_util == 'zcat':
-            test_util = 'gzip'
-
-        try:
-            subprocess.check_call(" ".join([test_util, "-t", input]), shell=True)
-        except subprocess.CalledProcessError:
-            raise dxpy.AppError("File failed integrity check by "+uncomp_util+".  Compressed file is corrupted.")
-
-    # with that in hand, unzip file.  If we find a tar archive then exit with error.
-    try:
-        with subprocess.Popen([uncomp_util, input], stdout=subprocess.PIPE).stdout as pipe:
-            line = pipe.next()
-        uncomp_type = m.from_buffer(line)
-    except:
-        raise dxpy.AppError("Error detecting file format after decompression")
-
-    if uncomp_type == 'POSIX tar archive (GNU)' or 'tar' in uncomp_type:
-        raise dxpy.AppError("Found a tar archive after decompression.  Please untar your files before importing")
-    elif 'ASCII text' not in uncomp_type:
-        raise dxpy.AppError("After decompression found file type other than plain text")
-
-    try:
-        subprocess.check_call(" ".join([uncomp_util, "--stdout", input, ">", "uncompressed.gff"]), shell=True)
-        return "uncompressed.gff"
-    except subprocess.CalledProcessError:
-        raise dxpy.AppError("Unable to open compressed input for reading")
-
-
 def main(**args):
     return importGFF(**args)
 
@@ -21,9 +21,11 @@ from __future__ import print_function
 import dxpy
 import sys
 
-import magic
-import subprocess
 import argparse
+from dxpy.utils.gtable_import import open_input, GTableRowWriter
+
+# number of rows added to the table at a time
+ROW_BATCH_SIZE = 10000
 
 parser = argparse.ArgumentParser(description='Import a local GTF file as a Spans or Genes object.')
 parser.add_argument('fileName', help='local fileName to import')
@@ -66,37 +68,14 @@ def importGTF(**args):
         if args.get('file_id') != None:
             file_id = args['file_id']
 
-    inputFileName = unpack(fileName)
+    # The input is decompressed once; the decompressed data is spooled
+    # for the second pass
+    inputFile = open_input(fileName, spool=True)
 
     capturedTypes = {"5UTR": "5' UTR", "3UTR": "3' UTR", "CDS": "CDS", "inter": "intergenic", "inter_CNS": "intergenic_conserved", "intron_CNS": "intron_conserved", "exon": "exon", "transcript": "transcript", "gene":"gene", "stop_codon": "stop_codon", "start_codon":"start_codon"}
     
     #Rows of this type will not be written to the gtable as their information is fully encompassed by the rest of the data
 
-    ##Isolate the attribute tags from the file and check integrity
-    spansTable, additionalColumns = constructTable(inputFileName)
-    spansTable.add_tags(tag)
-
-    types = ["Genes", "gri"]
-    for x in additional_type:
-        types.append(x)
-    spansTable.add_types(types)
-    details = {'original_contigset': dxpy.dxlink(reference)}
-
-    if len(property_key) != len(property_value):
-        raise dxpy.AppError("Expected each provided property to have a corresponding value")
-    for i in range(len(property_key)):
-        details[property_key[i]] = property_value[i]
-    for x in additional_type:
-        types.append(x)
-
-    if file_id != None:
-        details['original_file'] = dxpy.dxlink(file_id)
-    spansTable.set_details(details)
-    if outputName == '':
-        spansTable.rename(fileName)
-    else:
-        spansTable.rename(outputName)
-
     #This passes through the file calculates the gene and transcript models 
     genes = {}
     transcripts = {}
@@ -105,9 +84,11 @@ def importGTF(**args):
     stopCodons = {}
     
 
-    inputFile = open(inputFileName, 'r')
+    ##Isolate the attribute tags from the file and check integrity while computing the models
+    attributes = {"gene_id" : True, "transcript_id": True}
     for line in inputFile:
         if line[0] != "#":
+            checkLineAttributes(line, attributes)
             values = parseLine(line, capturedTypes)
 
             if values["type"] == "CDS":
@@ -143,23 +124,49 @@ def importGTF(**args):
                 genes[values["geneId"]][values["chromosome"]]["coding"] = True
                 transcripts[values["transcriptId"]][values["chromosome"]]["coding"] = True
 
+    ##The attribute tags found in the file are the additional columns of the table
+    spansTable, additionalColumns = constructTable(attributes)
+    spansTable.add_tags(tag)
+
+    types = ["Genes", "gri"]
+    for x in additional_type:
+        types.append(x)
+    spansTable.add_types(types)
+    details = {'original_contigset': dxpy.dxlink(reference)}
+
+    if len(property_key) != len(property_value):
+        raise dxpy.AppError("Expected each provided property to have a corresponding value")
+    for i in range(len(property_key)):
+        details[property_key[i]] = property_value[i]
+    for x in additional_type:
+        types.append(x)
+
+    if file_id != None:
+        details['original_file'] = dxpy.dxlink(file_id)
+    spansTable.set_details(details)
+    if outputName == '':
+        spansTable.rename(fileName)
+    else:
+        spansTable.rename(outputName)
+
+    rows = GTableRowWriter(spansTable, ROW_BATCH_SIZE)
     for gId, chrList in genes.iteritems():
         for k, v in chrList.iteritems():
             entry = [k, v["lo"], v["hi"], v["name"], v["spanId"], "gene", v["strand"], v["score"], v["coding"], -1, -1, '', '', v["originalGeneId"], '']
             for x in additionalColumns:
                 if x != "gene_id" and x != "transcript_id":
                     entry.append('')
-            spansTable.add_rows([entry])
+            rows.append(entry)
     for gId, chrList in transcripts.iteritems():
         for k, v in chrList.iteritems():
             entry = [k, v["lo"], v["hi"], v["name"], v["spanId"], "transcript", v["strand"], v["score"], genes[v["geneId"]][k]["coding"], genes[v["geneId"]][k]["spanId"], -1, '', '', v["originalGeneId"], v["originalTranscriptId"]]
             for x in additionalColumns:
                 if x != "gene_id" and x != "transcript_id":
                     entry.append('')
-            spansTable.add_rows([entry])
+            rows.append(entry)
 
     exons = {}
-    inputFile = open(inputFileName, 'r')
+    inputFile = inputFile.rewind()
     
     for line in inputFile:
         if line[0] != "#":
@@ -174,7 +181,7 @@ def importGTF(**args):
             if capturedTypes.get(values["type"]) != None:
                 #If type is 5'UTR, 3'UTR, intergenic, or conserved intron, type is always noncoding
                 if values["type"] == "5UTR" or values["type"] == "3UTR" or values["type"] == "inter" or values["type"] == "inter_CNS" or values["type"] == "intron_CNS":
-                    writeEntry(spansTable, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], values["lo"], values["hi"], values["attributes"], [values["chromosome"], values["lo"], values["hi"], values["name"], spanId, capturedTypes[values["type"]], values["strand"], values["score"], False, transcripts[values["transcriptId"]]["spanId"], values["frame"], '', values["source"]])
+                    writeEntry(rows, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], values["lo"], values["hi"], values["attributes"], [values["chromosome"], values["lo"], values["hi"], values["name"], spanId, capturedTypes[values["type"]], values["strand"], values["score"], False, transcripts[values["transcriptId"]]["spanId"], values["frame"], '', values["source"]])
 
                 if "exon_number" in values["attributes"]:
                     values["transcriptName"] += "." + values["attributes"]["exon_number"]
@@ -187,7 +194,7 @@ def importGTF(**args):
                                 values["hi"] = x[1]
                                 break                            
                     if [values["lo"], values["hi"]] not in exons[values["transcriptId"]][values["chromosome"]]:
-                        spanId = writeEntry(spansTable, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], values["lo"], values["hi"], values["attributes"], [values["chromosome"], values["lo"], values["hi"], values["transcriptName"], spanId, capturedTypes[values["type"]], values["strand"], values["score"], True, transcripts[values["transcriptId"]][values["chromosome"]]["spanId"], values["frame"], '', values["source"]])
+                        spanId = writeEntry(rows, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], values["lo"], values["hi"], values["attributes"], [values["chromosome"], values["lo"], values["hi"], values["transcriptName"], spanId, capturedTypes[values["type"]], values["strand"], values["score"], True, transcripts[values["transcriptId"]][values["chromosome"]]["spanId"], values["frame"], '', values["source"]])
 
                 #If type is exon do calculation as to whether coding or non-coding
                 if values["type"] == "stop_codon":
@@ -205,11 +212,12 @@ def importGTF(**args):
                                 values["frame"] = frames[values["transcriptId"]][values["lo"]]
 
                         for x in splitExons(transcripts[values["transcriptId"]], values["chromosome"], values["lo"], values["hi"], values["strand"]):
-                            spanId = writeEntry(spansTable, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], x[1], x[2], values["attributes"], [values["chromosome"], x[1], x[2], values["transcriptName"], spanId, x[0], values["strand"], values["score"], x[3], transcripts[values["transcriptId"]][values["chromosome"]]["spanId"], values["frame"], '', values["source"]])
+                            spanId = writeEntry(rows, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], x[1], x[2], values["attributes"], [values["chromosome"], x[1], x[2], values["transcriptName"], spanId, x[0], values["strand"], values["score"], x[3], transcripts[values["transcriptId"]][values["chromosome"]]["spanId"], values["frame"], '', values["source"]])
                     else:
-                        spanId = writeEntry(spansTable, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], values["lo"], values["hi"], values["attributes"],  [values["chromosome"], values["lo"], values["hi"], values["transcriptName"], spanId, capturedTypes[values["type"]], values["strand"], values["score"], False, transcripts[values["transcriptId"]][values["chromosome"]]["spanId"], values["frame"], '', values["source"]])
+                        spanId = writeEntry(rows, spanId, exons[values["transcriptId"]], additionalColumns, values["chromosome"], values["lo"], values["hi"], values["attributes"],  [values["chromosome"], values["lo"], values["hi"], values["transcriptName"], spanId, capturedTypes[values["type"]], values["strand"], values["score"], False, transcripts[values["transcriptId"]][values["chromosome"]]["spanId"], values["frame"], '', values["source"]])
 
-    spansTable.flush()
+    inputFile.close()
+    rows.flush()
     spansTable.close()
     outputFile = open("result.txt", 'w')
     outputFile.write(spansTable.get_id())
@@ -217,7 +225,7 @@ def importGTF(**args):
     print(spansTable.get_id())
     return spansTable.get_id()
 
-def writeEntry(spansTable, spanId, exonInfo, additionalColumns, chromosome, lo, hi, attributes, entry):
+def writeEntry(rows, spanId, exonInfo, additionalColumns, chromosome, lo, hi, attributes, entry):
     if [lo, hi] not in exonInfo[chromosome] and [lo, hi-2] not in exonInfo[chromosome]:
         checkOverlap = trimOverlap(exonInfo[chromosome], lo, hi)
         if checkOverlap["hi"] - checkOverlap["lo"] > 0:
@@ -235,7 +243,7 @@ def writeEntry(spansTable, spanId, exonInfo, additionalColumns, chromosome, lo,
                     entry.append(attributes[x])
                 else:
                     entry.append('')
-            spansTable.add_rows([entry])
+            rows.append(entry)
     return spanId
 
 def trimOverlap(exons, lo, hi):
@@ -347,40 +355,37 @@ def parseLine(line, capturedTypes):
     values = {"chromosome": chromosome, "lo": lo, "hi": hi, "geneName": geneName, "transcriptName": transcriptName, "source": source, "type": typ, "strand": strand, "score": score, "frame": frame, "geneId": geneId, "transcriptId": transcriptId, "attributes": lineAttributes}
     return values
 
-def constructTable(inputFileName):
-    inputFile = open(inputFileName, 'r')
-    attributes = {"gene_id" : True, "transcript_id": True}
-    for line in inputFile:
-        if line[0] != "#":
-            tabSplit = line.split("\t")
-            if len(tabSplit) == 1:
-                tabSplit = line.split(" ")
-                if len(tabSplit) < 9:
-                    raise dxpy.AppError("One row did not have 9 entries, it had 1 instead. Offending line: " + line)
-                tabSplit[8] = " ".join(tabSplit[8:])
-                tabSplit = tabSplit[:9]
-
-            if len(tabSplit) != 9:
-                raise dxpy.AppError("One row did not have 9 entries, it had " + str(len(tabSplit)) + " instead. Offending line: " + line)
-            else:
-                entrySplit = tabSplit[8].split(";")
-                geneIdPresent = False
-                transcriptIdPresent = False
-                result = []
-                for x in entrySplit:
-                    keyValue = x.strip().split(" ")
-                    key = keyValue[0]
-                    if key == "gene_id":
-                        geneIdPresent = True
-                    elif key == "transcript_id":
-                        transcriptIdPresent = True
-                    attributes[key] = True
-            if not geneIdPresent:
-                raise dxpy.AppError("One row did not have a gene_id Offending line: " + line)
-            if not transcriptIdPresent:
-                raise dxpy.AppError("One row did not have a gene_id Offending line: " + line)
-
-
+def checkLineAttributes(line, attributes):
+    # Checks the integrity of one line and records the attribute tags it uses
+    tabSplit = line.split("\t")
+    if len(tabSplit) == 1:
+        tabSplit = line.split(" ")
+        if len(tabSplit) < 9:
+            raise dxpy.AppError("One row did not have 9 entries, it had 1 instead. Offending line: " + line)
+        tabSplit[8] = " ".join(tabSplit[8:])
+        tabSplit = tabSplit[:9]
+
+    if len(tabSplit) != 9:
+        raise dxpy.AppError("One row did not have 9 entries, it had " + str(len(tabSplit)) + " instead. Offending line: " + line)
+    else:
+        entrySplit = tabSplit[8].split(";")
+        geneIdPresent = False
+        transcriptIdPresent = False
+        result = []
+        for x in entrySplit:
+            keyValue = x.strip().split(" ")
+            key = keyValue[0]
+            if key == "gene_id":
+                geneIdPresent = True
+            elif key == "transcript_id":
+                transcriptIdPresent = True
+            attributes[key] = True
+    if not geneIdPresent:
+        raise dxpy.AppError("One row did not have a gene_id Offending line: " + line)
+    if not transcriptIdPresent:
+        raise dxpy.AppError("One row did not have a gene_id Offending line: " + line)
+
+def constructTable(attributes):
     #Construct table
     schema = [
             {"name": "chr", "type": "string"},
@@ -415,69 +420,6 @@ def constructTable(inputFileName):
     spansTable = dxpy.new_dxgtable(columns=schema, indices=indices)
     return spansTable, additionalColumns
 
-def unpack(input):
-    m = magic.Magic()
-
-    # determine compression format
-    try:
-        file_type = m.from_file(input)
-    except:
-        raise dxpy.AppError("Unable to identify compression format")
-
-
-    # if we find a tar file throw a program error telling the user to unpack it
-    if file_type == 'application/x-tar':
-        raise dxpy.AppError("App does not support tar files.  Please unpack.")
-
-    # since we haven't returned, the file is compressed.  Determine what program to use to uncompress
-    uncomp_util = None
-    if file_type == 'XZ compressed data':
-        uncomp_util = 'xzcat'
-    elif file_type[:21] == 'bzip2 compressed data':
-        uncomp_util = 'bzcat'
-    elif file_type[:20] == 'gzip compressed data':
-        uncomp_util = 'zcat'
-    elif file_type == 'POSIX tar archive (GNU)' or 'tar' in file_type:
-        raise dxpy.AppError("Found a tar archive.  Please untar your sequences before importing")
-    else:
-        # just return input filename since it's already uncompressed
-        return input
-
-    if uncomp_util != None:
-
-        # bzcat does not support -t.  Use non streaming decompressors for testing input
-        test_util = None
-        if uncomp_util == 'xzcat':
-            test_util = 'xz'
-        elif uncomp_util == 'bzcat':
-            test_util = 'bzip2'
-        elif uncomp_util == 'zcat':
-            test_util = 'gzip'
-
-        try:
-            subprocess.check_call(" ".join([test_util, "-t", input]), shell=True)
-        except subprocess.CalledProcessError:
-            raise dxpy.AppError("File failed integrity check by "+uncomp_util+".  Compressed file is corrupted.")
-
-    # with that in hand, unzip file.  If we find a tar archive then exit with error.
-    try:
-        with subprocess.Popen([uncomp_util, input], stdout=subprocess.PIPE).stdout as pipe:
-            line = pipe.next()
-        uncomp_type = m.from_buffer(line)
-    except:
-        raise dxpy.AppError("Error detecting file format after decompression")
-
-    if uncomp_type == 'POSIX tar archive (GNU)' or 'tar' in uncomp_type:
-        raise dxpy.AppError("Found a tar archive after decompression.  Please untar your files before importing")
-    #elif 'ASCII text' not in uncomp_type:
-        #raise dxpy.AppError("After decompression found file type other than plain text")
-
-    try:
-        subprocess.check_call(" ".join([uncomp_util, "--stdout", input, ">", "uncompressed.gtf"]), shell=True)
-        return "uncompressed.gtf"
-    except subprocess.CalledProcessError:
-        raise dxpy.AppError("Unable to open compressed input for reading")
-
 def main(**args):
     return importGTF(**args)
 
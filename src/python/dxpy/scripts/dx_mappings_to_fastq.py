@@ -19,6 +19,7 @@
 import dxpy
 import argparse
 import sys
+from dxpy.utils.gtable_export import select_columns
 
 parser = argparse.ArgumentParser(description="Export Mappings gtable to a FASTQ/FASTA file")
 parser.add_argument("mappings_id", help="Mappings table id to read from")
@@ -66,7 +67,8 @@ def main(**kwargs):
     else:
         outputFastq = False
 
-    for row in mappingsTable.iterate_rows(want_dict=True):
+    columns = select_columns(mappingsTable.get_col_names(), ["name", "sequence", "quality"])
+    for row in mappingsTable.iterate_rows(columns=columns, want_dict=True):
         if outputFastq:
             writeFastq( row, fh )
         else:
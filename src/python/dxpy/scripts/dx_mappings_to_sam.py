@@ -23,6 +23,7 @@ import re
 import sys
 
 from dxpy.utils.genomic_utils import reverse_complement as reverseComplement
+from dxpy.utils.gtable_export import select_columns, split_row_range, export_shards, iterate_pages, OutputBuffer
 
 #Usage: sample input: dx_MappingsTableToSamBwa --table_id <gtable_id> --output <filename>
 #Example: dx_MappingsTableToSamBwa --table_id gtable-9yZvF200000PYKJyV4k00005 --output mappings.sam
@@ -43,6 +44,7 @@ parser.add_argument("--only_interchromosomal_mate", dest="only_interchromosomal"
 parser.add_argument("--assign_read_group", dest="assign_read_group", default="", help="If entered, this value will be used for the read group id of all exported mappings")
 parser.add_argument("--read_group_platform", dest="read_group_platform", default="", help="If entered, will print this as the platform used for the read group in the SAM header")
 parser.add_argument("--write_row_id", dest="write_row_id", default=False, action="store_true", help="If selected, the row of the mappings table will be written into optional sam tag ZD")
+parser.add_argument("--workers", dest="workers", type=int, default=1, help="Number of worker processes exporting row ranges (or regions) in parallel; the output is the same as with a single worker")
 
 def main(**kwargs):
 
@@ -109,10 +111,7 @@ def main(**kwargs):
     else:
         sys.stdout.write(header)
 
-    col = {}
     names = mappingsTable.get_col_names()
-    for i in range(len(names)):
-        col[names[i]] = i+1
 
     column_descs = mappingsTable.describe()['columns']
 
@@ -144,8 +143,21 @@ def main(**kwargs):
                   "proper_pair":False, 
                   "read_group":0}
 
+    # Only download the columns that formatRow can use with these options
+    neededCols = [c for c in defaultCol if c not in ("name", "read_group")]
+    if idAsName:
+        neededCols.append("template_id")
+    else:
+        neededCols.append("name")
+    if assignReadGroup == "":
+        neededCols.append("read_group")
+    exportCols = select_columns(names, neededCols + sam_col_names, include_row_id=True)
+
     #unmappedFile = open("unmapped.txt", 'w')
-        
+
+    context = {"table": mappingsTable, "opts": opts, "paired": paired, "exportCols": exportCols,
+               "formatArgs": (defaultCol, idAsName, idPrepend, writeRowId, assignReadGroup, sam_col_names, sam_col_types)}
+
     if len(regions) == 0:
 
         if opts.start_row > mappingsTable.describe()['length']:
@@ -154,45 +166,67 @@ def main(**kwargs):
             raise dxpy.AppError("Ending row is before Start")
 
         if opts.end_row > 0:
-            generator = mappingsTable.iterate_rows(start=opts.start_row, end=opts.end_row, want_dict=True)
+            endRow = opts.end_row
         else:
-            generator = mappingsTable.iterate_rows(start=opts.start_row, want_dict=True)
-
-        # write each row unless we're throwing out unmapped 
-        for row in generator:
-            if row["status"] != "UNMAPPED" or opts.discard_unmapped == False:
-                if not paired:
-                    writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                elif opts.no_interchromosomal and row["chr"] == row["chr2"]:
-                    writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                elif opts.only_interchromosomal and opts.no_interchromosomal == False and (row["chr"] != row["chr2"] or (row["chr"] == "" and row["chr2"] == "")):
-                    writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                elif opts.no_interchromosomal == False and opts.only_interchromosomal == False:
-                    writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                
+            endRow = mappingsTable.describe()['length']
 
+        # with several workers, split the rows into a few shards per worker
+        # so that the work stays balanced
+        if opts.workers > 1:
+            rowRanges = split_row_range(opts.start_row, endRow, opts.workers * 4)
+        else:
+            rowRanges = [(opts.start_row, endRow)]
+        shards = [('rows', start, end) for start, end in rowRanges]
     else:
-        for x in regions:
-            # generate the query for this region
-            query = mappingsTable.genomic_range_query(x[0],int(x[1])+opts.region_index_offset,int(x[2])+opts.region_index_offset, index='gri')
-            for row in mappingsTable.get_rows(query=query, limit=1)['data']:
-                startRow =  row[0]
-                for row in mappingsTable.iterate_rows(start=startRow, want_dict=True):
-                    if row["chr"] != x[0] or row["lo"] > int(x[2])+opts.region_index_offset:
-                        break
-                    if row["status"] != "UNMAPPED" or opts.discard_unmapped == False:
-                        if not paired:
-                            writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                        elif opts.no_interchromosomal and row["chr"] == row["chr2"]:
-                            writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                        elif opts.only_interchromosomal and opts.no_interchromosomal == False and (row["chr"] != row["chr2"] or (row["chr"] == "" and row["chr2"] == "")):
-                            writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
-                        elif opts.no_interchromosomal == False and opts.only_interchromosomal == False:
-                            writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types)
+        shards = [('region', x[0], int(x[1])+opts.region_index_offset, int(x[2])+opts.region_index_offset) for x in regions]
+
+    export_shards(exportShard, shards, outputFile if outputFile != None else sys.stdout, num_workers=opts.workers, context=context)
 
     if outputFile != None:
         outputFile.close()
 
+def exportShard(context, shard, outputFile):
+    # shard is either ('rows', start, end) or ('region', chromosome, lo, hi)
+    mappingsTable, opts, paired = context["table"], context["opts"], context["paired"]
+
+    kind = shard[0]
+    if kind == 'rows':
+        _kind, start, end = shard
+        generator = mappingsTable.iterate_rows(start=start, end=end, columns=context["exportCols"], want_dict=True)
+    elif kind == 'region':
+        # read only the rows from the first one overlapping this region
+        # up to the last one starting before its end
+        _kind, chromosome, lo, hi = shard
+        generator = mappingsTable.iterate_genomic_range_rows(chromosome, lo, hi, columns=context["exportCols"], want_dict=True, index='gri')
+    else:
+        raise ValueError("Unknown kind of shard: " + repr(kind))
+
+    formatRow = makeRowFormatter(context["exportCols"], *context["formatArgs"])
+    isExported = makeRowFilter(opts, paired)
+
+    # write each row unless we're throwing out unmapped 
+    with OutputBuffer(outputFile) as out:
+        for page in iterate_pages(generator):
+            out.writelines([formatRow(row) for row in page if isExported(row)])
+
+def makeRowFilter(opts, paired):
+    '''
+    Returns a function telling whether a row is to be written with the
+    given options.
+    '''
+    def isExported(row):
+        if row["status"] != "UNMAPPED" or opts.discard_unmapped == False:
+            if not paired:
+                return True
+            elif opts.no_interchromosomal and row["chr"] == row["chr2"]:
+                return True
+            elif opts.only_interchromosomal and opts.no_interchromosomal == False and (row["chr"] != row["chr2"] or (row["chr"] == "" and row["chr2"] == "")):
+                return True
+            elif opts.no_interchromosomal == False and opts.only_interchromosomal == False:
+                return True
+        return False
+    return isExported
+
 def tag_value_is_default(value):
     #2**31 is a legacy Null value and will be removed when possible
     return value == dxpy.NULL or value == 2**31-1 or value == "" or (type(value) == float and math.isnan(value))
@@ -211,96 +245,105 @@ def col_type_to_field_type(col_type):
     else:
         return 'Z'
 
-def format_tag_field(name, value, sam_col_types):
-    if name == "sam_optional_fields":
-        return value
+def makeRowFormatter(exportCols, defaultCol, idAsName, idPrepend, writeRowId, assignReadGroup, sam_col_names, sam_col_types):
+    '''
+    Returns a function formatting a row (a dict with the columns in
+    *exportCols*) as a SAM line. Everything that depends only on the
+    columns of the table is worked out once here rather than for each
+    row.
+    '''
+    # defaults of the columns the table does not have
+    missingDefaults = [(name, value) for name, value in defaultCol.items() if name not in exportCols]
+    # "XX:t:" prefix of each tag column
+    tagPrefixes = {}
+    for name in sam_col_names:
+        if name != "sam_optional_fields":
+            tagPrefixes[name] = col_name_to_field_name(name) + ":" + col_type_to_field_type(sam_col_types[name]) + ":"
+    if assignReadGroup != "":
+        readGroupTag = "RG:Z:" + assignReadGroup
     else:
-        return ":".join([col_name_to_field_name(name), col_type_to_field_type(sam_col_types[name]), str(value)])
-
-def writeRow(row, col, defaultCol, outputFile, idAsName, idPrepend, writeRowId, assignReadGroup, column_descs, sam_cols, sam_col_names, sam_col_types):
-    out_row = ""
-
-    values = dict(defaultCol)
-    values.update(row)
-
-    flag =  0x1*(values["mate_id"] > -1 and values["mate_id"] <= 1)
-    flag += 0x2*(values["proper_pair"] == True) 
-    flag += 0x4*(values["status"] == "UNMAPPED")
-    flag += 0x8*(values["status2"] == "UNMAPPED") 
-    flag += 0x10*(values["negative_strand"] == True) 
-    flag += 0x20*(values["negative_strand2"] == True)
-    flag += 0x40*(values["mate_id"] == 0) 
-    flag += 0x80*(values["mate_id"] == 1) 
-    flag += 0x100*(values["status"] == "SECONDARY")
-    flag += 0x200*(values["qc_fail"]) 
-    flag += 0x400*(values["duplicate"])
+        readGroupTag = None
+
+    def formatRow(row):
+        values = row
+        for name, value in missingDefaults:
+            values[name] = value
+
+        flag =  0x1*(values["mate_id"] > -1 and values["mate_id"] <= 1)
+        flag += 0x2*(values["proper_pair"] == True) 
+        flag += 0x4*(values["status"] == "UNMAPPED")
+        flag += 0x8*(values["status2"] == "UNMAPPED") 
+        flag += 0x10*(values["negative_strand"] == True) 
+        flag += 0x20*(values["negative_strand2"] == True)
+        flag += 0x40*(values["mate_id"] == 0) 
+        flag += 0x80*(values["mate_id"] == 1) 
+        flag += 0x100*(values["status"] == "SECONDARY")
+        flag += 0x200*(values["qc_fail"]) 
+        flag += 0x400*(values["duplicate"])
+
+        chromosome = values["chr"]
+        lo = values["lo"]+1
+        if values["chr"] == "":
+            chromosome = "*"
+            lo = 0
+
+        if values["chr2"] == values["chr"]:
+            chromosome2 = "="
+        else:
+            chromosome2 = values["chr2"]
 
-    
-    chromosome = values["chr"]
-    lo = values["lo"]+1
-    if values["chr"] == "":
-        chromosome = "*"
-        lo = 0
-
-    if values["chr2"] == values["chr"]:
-        chromosome2 = "="
-    else:
-        chromosome2 = values["chr2"]
+        lo2 = values["lo2"]+1
+        if values["chr2"] == "":
+            chromosome2 = "*"
+            lo2 = 0
 
-    lo2 = values["lo2"]+1
-    if values["chr2"] == "":
-        chromosome2 = "*"
-        lo2 = 0
-    
-    if idAsName:
-        readName = idPrepend
-        readName += str(row["template_id"])
+        if idAsName:
+            readName = idPrepend + str(row["template_id"])
+        else:
+            readName = values["name"]    
+            if readName.strip("@") == "":
+                readName = "*"    
 
-    else:
-        readName = values["name"]    
-        if readName.strip("@") == "":
-            readName = "*"    
-    
-    if values.get("quality") == None or values.get("quality") == "":
-        qual = "*"
-    else:
-        qual = values["quality"].rstrip('\n')
-    seq = values["sequence"]
-    
-    if values["negative_strand"]:
-        try:
-            seq = reverseComplement(seq)
-        except ValueError as e:
-            raise dxpy.AppError("Error converting row %d: %s" % (row["__id__"], e.message))
-        qual = qual[::-1]
-    
-    if values["mate_id"] == -1 or values["chr"] != values["chr2"] or values["chr"] == '' or values["chr"] == '*':
-        tlen = 0
-    else:
-        tlen = (max(int(values["hi2"]),int(values["hi"])) - min(int(values["lo2"]),int(values["lo"])))
-        if int(values["lo"]) > int(values["lo2"]):
-            tlen *= -1
+        if values.get("quality") == None or values.get("quality") == "":
+            qual = "*"
+        else:
+            qual = values["quality"].rstrip('\n')
+        seq = values["sequence"]
+
+        if values["negative_strand"]:
+            try:
+                seq = reverseComplement(seq)
+            except ValueError as e:
+                raise dxpy.AppError("Error converting row %d: %s" % (row["__id__"], e.message))
+            qual = qual[::-1]
+
+        if values["mate_id"] == -1 or values["chr"] != values["chr2"] or values["chr"] == '' or values["chr"] == '*':
+            tlen = 0
+        else:
+            tlen = (max(int(values["hi2"]),int(values["hi"])) - min(int(values["lo2"]),int(values["lo"])))
+            if int(values["lo"]) > int(values["lo2"]):
+                tlen *= -1
 
-    out_row = [readName.strip("@"), str(flag), chromosome, str(lo), str(values["error_probability"]), values["cigar"] , chromosome2, str(lo2), str(tlen), seq, qual]
-    tag_values = {c: values[c] for c in sam_col_names if not tag_value_is_default(values[c])}
+        out_row = [readName.strip("@"), str(flag), chromosome, str(lo), str(values["error_probability"]), values["cigar"] , chromosome2, str(lo2), str(tlen), seq, qual]
+        tag_values = {c: values[c] for c in sam_col_names if not tag_value_is_default(values[c])}
 
-    out_row.extend([format_tag_field(name, value, sam_col_types) for name, value in tag_values.iteritems()])
+        for name, value in tag_values.iteritems():
+            if name == "sam_optional_fields":
+                out_row.append(value)
+            else:
+                out_row.append(tagPrefixes[name] + str(value))
 
-    if assignReadGroup != "":
-        out_row.append("RG:Z:" + assignReadGroup)
-    else:
-        out_row.append("RG:Z:"+str(values['read_group']))
-        
-    if writeRowId:
-        out_row.append("ZD:Z:"+str(row["__id__"]))
-    
-    
-    out_row = "\t".join(out_row) + "\n"
+        if readGroupTag is not None:
+            out_row.append(readGroupTag)
+        else:
+            out_row.append("RG:Z:"+str(values['read_group']))
 
-    if outputFile != None:
-        outputFile.write(out_row)
-    else:
-        sys.stdout.write(out_row)
+        if writeRowId:
+            out_row.append("ZD:Z:"+str(row["__id__"]))
+
+        return "\t".join(out_row) + "\n"
+
+    return formatRow
 
 if __name__ == '__main__':
     main()
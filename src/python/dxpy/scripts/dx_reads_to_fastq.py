@@ -16,8 +16,10 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
-import sys, argparse
+import os, sys, gzip, argparse
 import dxpy
+from dxpy.utils.gtable_export import (iterate_pages, OutputBuffer, split_row_range, chunk_row_range, export_shards,
+                                      export_shard_files)
 
 arg_parser = argparse.ArgumentParser(description="Download a reads table into a FASTQ file")
 arg_parser.add_argument("reads_table", help="ID of the reads GTable object")
@@ -27,6 +29,10 @@ arg_parser.add_argument("--discard_names", help="Discard read names", type=bool,
 arg_parser.add_argument("--output_FASTA", help="Output FASTA instead of FASTQ", type=bool, default=False)
 arg_parser.add_argument("-s", "--start_row", help="Start at this table row", type=int, default=0)
 arg_parser.add_argument("-e", "--end_row", help="End at this table row", type=int, default=None)
+arg_parser.add_argument("--workers", help="Number of worker processes exporting row ranges in parallel", type=int, default=1)
+arg_parser.add_argument("--shard-rows", help="Number of rows exported by a worker at a time (by default, the rows are divided evenly among the workers)", type=int, default=None)
+arg_parser.add_argument("--gzip", help="Compress the output with gzip", action="store_true")
+arg_parser.add_argument("--split-shards", help="Write each range of rows to its own file, numbered after the output file name, instead of a single file", action="store_true")
 
 def main(**kwargs):
     if len(kwargs) == 0:
@@ -38,6 +44,9 @@ def main(**kwargs):
     if kwargs["end_row"] is not None and kwargs["end_row"] <= kwargs["start_row"]:
         arg_parser.error("End row %d must be greater than start row %d" % (kwargs["end_row"], kwargs["start_row"]))
 
+    if kwargs.get("shard_rows") is not None and kwargs["shard_rows"] < 1:
+        arg_parser.error("--shard-rows must be positive")
+
     try:
         table = dxpy.DXGTable(kwargs['reads_table'])
     except:
@@ -81,54 +90,122 @@ def main(**kwargs):
     if kwargs['output'] is None:
             raise dxpy.AppError("output parameter is required")
 
-    with open(kwargs['output'], 'wb') as out_fh:
-        exportToFile(columns=col, table=table, output_file=out_fh, hasName=hasName, hasQual=hasQual, FASTA=kwargs['output_FASTA'], start_row=kwargs['start_row'], end_row=kwargs['end_row'])
+    workers = kwargs.get('workers', 1)
+    shard_rows = kwargs.get('shard_rows')
+    compress = kwargs.get('gzip', False)
+    split_shards = kwargs.get('split_shards', False)
 
-    if isPaired == True:
-        if kwargs['output2'] is None:
-            raise dxpy.AppError("output2 parameter is required for paired reads")
-        with open(kwargs['output2'], 'wb') as out_fh2:
-            exportToFile(columns=col2, table=table, output_file=out_fh2, hasName=hasName, hasQual=hasQual, FASTA=kwargs['output_FASTA'], start_row=kwargs['start_row'], end_row=kwargs['end_row'])
+    if workers <= 1 and shard_rows is None and not compress and not split_shards:
+        with open(kwargs['output'], 'wb') as out_fh:
+            exportToFile(columns=col, table=table, output_file=out_fh, hasName=hasName, hasQual=hasQual, FASTA=kwargs['output_FASTA'], start_row=kwargs['start_row'], end_row=kwargs['end_row'])
 
-def exportToFile(columns, table, output_file, hasName = True, hasQual = True, FASTA = False, start_row = 0, end_row = None):
-    for row in table.iterate_rows(start=start_row, end=end_row, columns=columns):
-        if FASTA == True:
-            if hasName == True:
+        if isPaired == True:
+            if kwargs['output2'] is None:
+                raise dxpy.AppError("output2 parameter is required for paired reads")
+            with open(kwargs['output2'], 'wb') as out_fh2:
+                exportToFile(columns=col2, table=table, output_file=out_fh2, hasName=hasName, hasQual=hasQual, FASTA=kwargs['output_FASTA'], start_row=kwargs['start_row'], end_row=kwargs['end_row'])
+        return
+
+    if isPaired == True and kwargs['output2'] is None:
+        raise dxpy.AppError("output2 parameter is required for paired reads")
+
+    # Divide the rows into disjoint ranges, each exported by a worker
+    # with its own iterate_rows
+    start_row, end_row = kwargs['start_row'], kwargs['end_row']
+    if end_row is None:
+        end_row = int(table.describe()['length'])
+    if shard_rows is not None:
+        shards = chunk_row_range(start_row, end_row, shard_rows)
+    else:
+        shards = split_row_range(start_row, end_row, max(1, workers))
+
+    outputs = [(col, kwargs['output'])]
+    if isPaired == True:
+        outputs.append((col2, kwargs['output2']))
+    for columns, filename in outputs:
+        context = {"table": table, "columns": columns, "hasName": hasName, "hasQual": hasQual,
+                   "FASTA": kwargs['output_FASTA'], "gzip": compress}
+        if split_shards:
+            export_shard_files(exportRowRange, shards, [shardFileName(filename, i) for i in range(len(shards))],
+                               num_workers=workers, context=context)
+        else:
+            with open(filename, 'wb') as out_fh:
+                export_shards(exportRowRange, shards, out_fh, num_workers=workers, context=context)
+
+def shardFileName(filename, index):
+    '''
+    Returns the name of the file to which shard *index* is written, e.g.
+    reads_00002.fastq.gz for the third shard of reads.fastq.gz.
+    '''
+    root, ext = os.path.splitext(filename)
+    if ext == '.gz':
+        root, ext2 = os.path.splitext(root)
+        ext = ext2 + ext
+    return "%s_%05d%s" % (root, index, ext)
+
+def makeRecordFormatter(hasName = True, hasQual = True, FASTA = False):
+    '''
+    Returns a function formatting a row (with the columns selected for
+    these options) as one FASTA or FASTQ record.
+    '''
+    if FASTA == True:
+        if hasName == True:
+            def formatRecord(row):
+                name = row[0]
                 # change comment character for FASTA
-                if row[0][0] == '@':
-                    row[0] = u'>' + row[0][1:]
-                # if already has comment character (>)
-                if row[0][0] == ">":
-                    output_file.write('\n'.join([ row[0], row[1] ]))
-                # otherwise, add it
-                else:
-                    output_file.write('\n'.join([">" + row[0], row[1] ]))
-            else:
-                output_file.write('\n'.join([">", row[0]]))
-
-        #output FASTQ
+                if name[0] == '@':
+                    name = u'>' + name[1:]
+                # add it unless it is already there
+                elif name[0] != '>':
+                    name = '>' + name
+                return name + '\n' + row[1] + '\n'
         else:
-            if hasName == True:
-            # if alread has comment character (@)
-                if row[0][0] == "@":
-                    output_file.write('\n'.join([ row[0], row[1] ]))
-            # otherwise, add it
-                else:
-                    output_file.write('\n'.join(["@" + row[0], row[1] ]))
-            # add qualities if they exist
-                if hasQual == True:
-                    output_file.write('\n'.join(["\n+", row[2] ]))
-            # else add without name
-            else:
-                output_file.write('\n'.join(["@", row[0]]))
-                if hasQual == True:
-                    output_file.write('\n'.join(['', "+", row[1] ]))
-
-        # end of current record
-        output_file.write('\n')
+            def formatRecord(row):
+                return '>\n' + row[0] + '\n'
+
+    #output FASTQ
+    elif hasName == True:
+        def formatRecord(row):
+            name = row[0]
+            # add the comment character unless it is already there
+            if name[0] != '@':
+                name = '@' + name
+            if hasQual == True:
+                return name + '\n' + row[1] + '\n+\n' + row[2] + '\n'
+            return name + '\n' + row[1] + '\n'
+    # else add without name
+    elif hasQual == True:
+        def formatRecord(row):
+            return '@\n' + row[0] + '\n+\n' + row[1] + '\n'
+    else:
+        def formatRecord(row):
+            return '@\n' + row[0] + '\n'
+    return formatRecord
 
+def writeRecords(columns, table, output_file, hasName = True, hasQual = True, FASTA = False, start_row = 0, end_row = None):
+    formatRecord = makeRecordFormatter(hasName=hasName, hasQual=hasQual, FASTA=FASTA)
+    with OutputBuffer(output_file) as out:
+        for page in iterate_pages(table.iterate_rows(start=start_row, end=end_row, columns=columns)):
+            out.writelines(map(formatRecord, page))
+
+def exportToFile(columns, table, output_file, hasName = True, hasQual = True, FASTA = False, start_row = 0, end_row = None):
+    writeRecords(columns, table, output_file, hasName=hasName, hasQual=hasQual, FASTA=FASTA, start_row=start_row, end_row=end_row)
     output_file.close()
     return output_file.name
 
+def exportRowRange(context, rowRange, output_file):
+    '''
+    Writes the records of the rows in *rowRange* to *output_file*, as a
+    separate gzip member if the output is compressed (the concatenation
+    of gzip members is itself a valid gzip file).
+    '''
+    if context["gzip"]:
+        output_file = gzip.GzipFile(filename='', mode='wb', compresslevel=6, fileobj=output_file)
+    writeRecords(context["columns"], context["table"], output_file, hasName=context["hasName"], hasQual=context["hasQual"],
+                 FASTA=context["FASTA"], start_row=rowRange[0], end_row=rowRange[1])
+    if context["gzip"]:
+        # Writes the gzip trailer, without closing the underlying file
+        output_file.close()
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+from __future__ import print_function, unicode_literals
+
+import os, sys, argparse, socket
+
+from dxpy.cli.server import DXServer, get_default_socket_path, connect_to_server, send_message, recv_message
+from dxpy.exceptions import err_exit, DXCLIError
+from dxpy.utils.printing import fill
+
+description = fill('Starts, stops or checks a dx server, which runs the dx commands given to the dx-client script in '
+                   'one long-lived process, saving most of the time it takes dx to start. dx-client runs the '
+                   'commands itself when no server is running, so it can always be used in place of dx (e.g. with '
+                   '"alias dx=dx-client").')
+
+parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawTextHelpFormatter)
+subparsers = parser.add_subparsers(dest='action')
+
+socket_arg = argparse.ArgumentParser(add_help=False)
+socket_arg.add_argument('--socket', help='Path of the socket of the server (default: $DX_SERVER_SOCKET, or '
+                                         'dx-server.sock in the dx configuration directory)')
+
+parser_start = subparsers.add_parser('start', help='Start a server in the background', parents=[socket_arg])
+parser_start.add_argument('--idle-timeout', type=float,
+                          help='Stop the server after this many seconds without commands')
+parser_start.add_argument('--foreground', action='store_true',
+                          help='Run the server in the foreground instead of as a daemon')
+parser_start.add_argument('--log', default=os.devnull,
+                          help='File to write the output of the daemon (not that of the commands) to')
+
+parser_stop = subparsers.add_parser('stop', help='Stop the server', parents=[socket_arg])
+parser_status = subparsers.add_parser('status', help='Print whether a server is running', parents=[socket_arg])
+
+def daemonize(log_filename):
+    '''
+    Detaches the process from its session and terminal; returns in the
+    daemon, and exits in the calling process.
+    '''
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if os.fork() > 0:
+        os._exit(0)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    os.chdir('/')
+    with open(os.devnull, 'rb') as devnull:
+        os.dup2(devnull.fileno(), 0)
+    with open(log_filename, 'ab') as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+
+def start(args, socket_path):
+    server = DXServer(socket_path, idle_timeout=args.idle_timeout)
+    log_filename = os.path.abspath(args.log)
+    try:
+        server.listen()
+        server.warm_up()
+    except DXCLIError:
+        err_exit()
+    if not args.foreground:
+        # The socket is already listening, so clients may connect as
+        # soon as this returns
+        print('dx server listening on ' + socket_path)
+        daemonize(log_filename)
+    server.serve_forever()
+
+def send_request(socket_path, request):
+    try:
+        sock = connect_to_server(socket_path, timeout=10)
+    except socket.error:
+        sock = None
+    if sock is None:
+        print('No dx server is listening on ' + socket_path, file=sys.stderr)
+        sys.exit(1)
+    try:
+        send_message(sock, request)
+        return recv_message(sock)
+    finally:
+        sock.close()
+
+def main():
+    args = parser.parse_args()
+    socket_path = os.path.abspath(args.socket or get_default_socket_path())
+    if args.action == 'start':
+        start(args, socket_path)
+    elif args.action == 'stop':
+        send_request(socket_path, {'stop': True})
+        print('Stopped the dx server listening on ' + socket_path)
+    else:
+        status = send_request(socket_path, {'status': True})
+        print('dx server (pid {pid}) listening on {path}, {commands} commands run'.format(path=socket_path, **status))
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,7 @@
 
 import argparse, json, sys, os
 import dxpy
+from dxpy.utils.gtable_export import select_columns
 
 
 arg_parser = argparse.ArgumentParser(description="Download a Spans object into a BED file.  The spans type definition can be found here:  https://wiki.dnanexus.com/Types/Spans.  Information about the BED file format is available here: http://genome.ucsc.edu/FAQ/FAQformat.html#format1")
@@ -175,7 +176,9 @@ def export_genes(spans, out_name):
         incomplete_buffer = []
         gene_model = []
 
-        generator = spans.iterate_rows(want_dict=True)
+        gene_cols = select_columns(span_cols, ["chr", "lo", "hi", "name", "strand", "score", "thick_start",
+                                               "thick_end", "type", "span_id", "parent_id"])
+        generator = spans.iterate_rows(columns=gene_cols, want_dict=True)
 
         while(True):
 
@@ -251,7 +254,7 @@ def export_generic_bed(spans, out_name):
 
     with open(out_name, 'w') as bed_file:
         # iterate over all entries in the Spans object
-        for entry in spans.iterate_rows(want_dict=True):
+        for entry in spans.iterate_rows(columns=select_columns(spans_columns, bed_col), want_dict=True):
             output_row = default_bed_line[:num_bed_cols]
             for col in bed_col:
                 # if we have the column, add its value in the right place
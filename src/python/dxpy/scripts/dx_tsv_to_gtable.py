@@ -18,12 +18,13 @@
 
 from __future__ import print_function
 
-import os, sys, json, argparse, csv
+import os, sys, json, argparse, csv, itertools
 import dxpy
 from dxpy.cli.parsers import *
 from dxpy.utils.env import get_env_var
 from dxpy.utils.resolver import *
 from dxpy.utils.describe import print_desc
+from dxpy.utils.gtable_import import open_input, iterate_batches, import_batches
 
 parser = argparse.ArgumentParser(description='Import a local file as a GenomicTable.  The table will be closed after creation.  If no flags are given, the file given will be interpreted based on its contents.',
                                  parents=[stdout_args, json_arg, no_color_arg, parser_dataobject_args, parser_single_dataobject_output_args])
@@ -49,6 +50,40 @@ def parse_item(item, item_type):
     else:
         raise Exception('Unrecognized column type: ' + item_type + '\n')
 
+def parse_column(values, item_type):
+    '''
+    Converts the values of one column of a batch at once; equivalent to
+    calling parse_item on each of them.
+    '''
+    if item_type == 'string':
+        return values
+    elif item_type == 'int':
+        column = list(map(int, values))
+        for value in column:
+            # values too large for an int column are parsed as longs
+            if type(value) is not int:
+                raise ValueError("Expected an int, got %r instead" % (value,))
+        return column
+    elif item_type == 'float':
+        return list(map(float, values))
+    elif item_type == 'boolean':
+        return [not (item == '0' or item[:1] in ('f', 'F')) for item in values]
+    else:
+        raise Exception('Unrecognized column type: ' + item_type + '\n')
+
+def parse_rows(types, rows):
+    '''
+    Converts a batch of rows read from the file column by column. The
+    values produced match the column types, so the rows need not be
+    validated again when they are added to the table.
+    '''
+    num_cols = len(types)
+    for row in rows:
+        if len(row) < num_cols:
+            raise ValueError("Expected %d columns, got %d in row %r" % (num_cols, len(row), row))
+    columns = list(zip(*rows))[:num_cols]
+    return list(zip(*[parse_column(list(column), item_type) for column, item_type in zip(columns, types)]))
+
 def main(**kwargs):
     if len(kwargs) == 0:
         args = parser.parse_args(sys.argv[1:])
@@ -82,13 +117,10 @@ def main(**kwargs):
         args.indices.append(dxpy.DXGTable.genomic_range_index(args.gri[0], args.gri[1], args.gri[2]))
         args.types = ['gri'] if args.types is None else args.types + ['gri']
 
-    if args.filename == '-':
-        fd = sys.stdin
-    else:
-        try:
-            fd = open(args.filename, 'rb')
-        except:
-            parser.exit(1, fill(unicode('Could not open ' + args.filename + ' for reading')) + '\n')
+    try:
+        fd = open_input(args.filename)
+    except:
+        parser.exit(1, fill(unicode('Could not open ' + args.filename + ' for reading')) + '\n')
 
     firstrow = fd.readline()
 
@@ -143,9 +175,8 @@ def main(**kwargs):
                                      columns=column_specs,
                                      indices=args.indices)
         if args.columns is not None:
-            dxgtable.add_row([ parse_item(firstrow_data[i], types[i]) for i in range(len(types))])
-        for row in reader:
-            dxgtable.add_row([ parse_item(row[i], types[i]) for i in range(len(types))])
+            reader = itertools.chain([firstrow_data], reader)
+        import_batches(dxgtable, iterate_batches(reader), parse_rows, context=types, validate=False)
         dxgtable.close(block=args.wait)
         if args.brief:
             print(dxgtable.get_id())
@@ -21,6 +21,8 @@ import os, sys, re, math, argparse, collections, tempfile
 import dxpy
 from dxpy.utils.resolver import ResolutionError, resolve_existing_path
 from dxpy.utils.printing import fill
+from dxpy.utils.gtable_export import select_columns, export_shards, OutputBuffer
+from dxpy.utils.reference_sequence import MappedSequence, RangeFetchedSequence
 
 parser = argparse.ArgumentParser(description='Export a Variants gtable into a VCF file.  WARNING: This can take a while because it downloads the entire reference genome.  It is recommended that this script only be called from within an application running on the cloud.')
 parser.add_argument("path", help="Path to the Variants gtable")
@@ -30,6 +32,8 @@ parser.add_argument("--export-no-calls", action="store_true" , help="If selected
 parser.add_argument("--chr", action="append" , help="If any chr are provided, export will only write rows of the specified chromosomes; repeat to include additional chromosomes")
 parser.add_argument("--no-write-header", dest="write_header", action="store_false", help="If selected, do not write the header the VCF file (useful for concatenating files together with chr")
 parser.add_argument("--reference", help="If present, take reference from this file instead of trying to download it")
+parser.add_argument("--fetch-reference", action="store_true", help="Instead of downloading the whole reference genome, fetch only the regions of it that are needed while exporting (useful when exporting a few chromosomes or a sparse set of variants)")
+parser.add_argument("--workers", type=int, default=1, help="Number of worker processes exporting chromosomes in parallel; the output is the same as with a single worker")
 
 def main(**kwargs):
 
@@ -64,11 +68,12 @@ def main(**kwargs):
         raise dxpy.AppError("The original reference genome must be attached as a detail")        
     contigDetails = dxpy.DXRecord(originalContigSet).get_details()
     
+    refFileName = None
     if kwargs['reference'] is not None:
         refFileName = kwargs['reference']
         if not os.path.isfile(refFileName):
             raise dxpy.AppError("The reference expected by the variants to vcf script was not a valid file")
-    else:    
+    elif not kwargs.get('fetch_reference'):
         refFileName = tempfile.NamedTemporaryFile(prefix='reference_', suffix='.txt', delete=False).name
         dxpy.download_dxfile(contigDetails['flat_sequence_file']['$dnanexus_link'], refFileName)
  
@@ -112,12 +117,20 @@ def main(**kwargs):
     for i in range(len(contigDetails['contigs']['names'])):
         chromosomeOffsets[contigDetails['contigs']['names'][i]] = contigDetails['contigs']['offsets'][i]
 
-    contigSequence = open(refFileName,'r').read()
+    # The reference is looked up at the offsets above without being read
+    # into memory. The mapping is created before the workers are forked,
+    # so they all share it.
+    if refFileName is not None:
+        contigSequence = MappedSequence(refFileName)
+    else:
+        contigSequence = RangeFetchedSequence(dxpy.DXFile(contigDetails['flat_sequence_file']))
 
+    # Only download the columns that formatRow reads
+    names = select_columns(variantsTable.get_col_names(), ["chr", "lo", "ref", "alt", "ids", "filter", "qual"],
+                           predicate=isExportedColumn, include_row_id=True)
     col = {}
-    names = variantsTable.get_col_names()   
-    for i in range(len(names)):
-        col[names[i]] = i+1
+    for i in range(1, len(names)):
+        col[names[i]] = i
     col = collections.OrderedDict(sorted(col.items()))
     
     chromosomeList = contigDetails['contigs']['names']
@@ -128,53 +141,44 @@ def main(**kwargs):
                 intersection.append(x)
         chromosomeList = intersection[:]
  
-    for chromosome in chromosomeList:
-        buff = []
-        lastPosition = -1
-        query = variantsTable.genomic_range_query(chr=chromosome, lo=0, hi=sys.maxint)
-        for row in variantsTable.get_rows(query=query, limit=1)['data']:
-            startRow =  row[0]
-            for row in variantsTable.iterate_rows(start=startRow):
-                if row[1] != chromosome:
-                    break
-                if lastPosition < row[col["lo"]]:
-                    writeBuffer(buff, col, outputFile, contigSequence, chromosomeOffsets, exportRef, exportNoCall)
-                    buff = []
-                buff.append(row)
-                lastPosition = row[col["lo"]]
-        writeBuffer(buff, col, outputFile, contigSequence, chromosomeOffsets, exportRef, exportNoCall)
-        buff = []
-
-def writeBuffer(buff, col, outputFile, contigSequence, chromosomeOffsets, exportRef, exportNoCall):
-    for x in buff:
-        printPreceedingCharacter = False
-        altOptions = x[col["alt"]].split(",")
-        for y in altOptions:
-            if (len(x[col["ref"]]) != len(y) or len(x[col["ref"]]) == 0 or len(y) == 0) and not re.search("[^ATGCNatgcn\.-]", y):
-                printPreceedingCharacter = True
-                break
-        if printPreceedingCharacter:
-            writeRowCheck(x[:], col, outputFile, contigSequence, chromosomeOffsets, exportRef, exportNoCall)
-    for x in buff:
-        printPreceedingCharacter = False
-        altOptions = x[col["alt"]].split(",")
-        for y in altOptions:
-            if (len(x[col["ref"]]) != len(y) or len(x[col["ref"]]) == 0 or len(y) == 0) and not re.search("[^ATGCNatgcn\.-]", y):
-                printPreceedingCharacter = True
-                break
-        if printPreceedingCharacter == False:
-            writeRowCheck(x[:], col, outputFile, contigSequence, chromosomeOffsets, exportRef, exportNoCall)
+    context = {"table": variantsTable, "names": names, "col": col, "contigSequence": contigSequence,
+               "chromosomeOffsets": chromosomeOffsets, "exportRef": exportRef, "exportNoCall": exportNoCall}
+    export_shards(exportChromosome, chromosomeList, outputFile, num_workers=kwargs.get('workers', 1), context=context)
 
+# Characters other than bases, in alternate alleles such as <DEL>
+nonBaseRe = re.compile("[^ATGCNatgcn\.-]")
 
-def writeRowCheck(row, col, outputFile, contigSequence, chromosomeOffsets, exportRef, exportNoCall):
-    if checkRowIsAllType(row, col, "ref"):
-        if exportRef:
-            writeRow(row, col, outputFile, contigSequence, chromosomeOffsets)
-    elif checkRowIsAllType(row, col, "no-call"):
-        if exportNoCall:
-            writeRow(row, col, outputFile, contigSequence, chromosomeOffsets)
-    else:
-        writeRow(row, col, outputFile, contigSequence, chromosomeOffsets)
+def exportChromosome(context, chromosome, outputFile):
+    col = context["col"]
+    formatRow = makeRowFormatter(col, context["contigSequence"], context["chromosomeOffsets"], context["exportRef"], context["exportNoCall"])
+    buff = []
+    lastPosition = -1
+    with OutputBuffer(outputFile) as out:
+        for row in context["table"].iterate_genomic_range_rows(chromosome, 0, sys.maxint, columns=context["names"]):
+            if lastPosition < row[col["lo"]]:
+                writeBuffer(buff, col, formatRow, out)
+                buff = []
+            buff.append(row)
+            lastPosition = row[col["lo"]]
+        writeBuffer(buff, col, formatRow, out)
+
+def isExportedColumn(name):
+    return ("info_" in name or "format_" in name or
+            re.match("^(type|genotype|coverage|total_coverage)_\d+$", name) is not None)
+
+def needsPreceedingCharacter(ref, altOptions):
+    for y in altOptions:
+        if (len(ref) != len(y) or len(ref) == 0 or len(y) == 0) and not nonBaseRe.search(y):
+            return True
+    return False
+
+def writeBuffer(buff, col, formatRow, outputFile):
+    # Rows at the same position are written with the insertions and
+    # deletions (which are shifted to the preceding position) first
+    refIndex, altIndex = col["ref"], col["alt"]
+    preceeding = [needsPreceedingCharacter(x[refIndex], x[altIndex].split(",")) for x in buff]
+    outputFile.writelines([formatRow(x) for x, p in zip(buff, preceeding) if p] +
+                          [formatRow(x) for x, p in zip(buff, preceeding) if not p])
 
 def parseRegions(input):
     result = []
@@ -182,93 +186,42 @@ def parseRegions(input):
         result.append(re.findall("(\w+):(\d+)-(\d+)", x))
     return result
 
-def writeRow(row, col, outputFile, contigSequence, chromosomeOffsets):
-
-    chr = str(row[col["chr"]]).strip()
-    pos = row[col["lo"]]+1
-    ref = row[col["ref"]].strip()
-    alt = row[col["alt"]].strip()
-
-    ids = '.'
-    if col.get("ids") is not None:
-        if row[col["ids"]] != '':
-            ids = row[col["ids"]].strip()
-
-    filt = '.'
-    if col.get("filter") is not None:
-        if row[col["filter"]] != '':
-            filt = row[col["filter"]].strip()
-        else:
-            filt = "PASS"
-            
-    qual = '.'
-    if col.get("qual") is not None:
-        if row[col["qual"]] != dxpy.NULL or row[col["qual"]] == -999999:
-            qual = row[col["qual"]]
-        
-    #Check if any types are ins/del, if so pull out the character before as well.
-    sample = 0
-    printPreceedingCharacter = False
-    altOptions = row[col["alt"]].split(",")
-    if altOptions == ['']:
-        printPreceedingCharacter = True
-    for x in altOptions:
-        if (len(ref) != len(x) or len(ref) == 0 or len(alt) == 0) and not re.search("[^ATGCNatgcn\.-]", x):
-            printPreceedingCharacter = True
-            
-    if printPreceedingCharacter:
-        ref = contigSequence[chromosomeOffsets[chr]+int(pos)-2]+ref
-        altOptions = row[col["alt"]].split(",")
-        alt = ''
-        for x in altOptions:
-            if re.search("[^ATGCNatgcn\.-]", x):
-                alt += x+","
-            else:
-                alt += contigSequence[chromosomeOffsets[chr]+int(pos)-2]+x+","
-                validAlt = False
-        alt = alt.rstrip(",")
-        pos -= 1
-                
-    outputFile.write(chr+"\t"+str(pos).strip()+"\t"+str(ids).strip()+"\t"+ref.upper().strip()+"\t"+alt.upper().strip()+"\t"+str(qual).strip()+"\t"+str(filt).strip())
-
-    infos = ''
-    for x in col:
-        if "info_" in x:
-            if col.get(x) is not None:
-                if isinstance(row[col[x]], bool):
-                    if row[col[x]] == True:
-                        infos += x.lstrip("info_")+";"
-                elif isDefault(row[col[x]]):
-                    infos += x.lstrip("info_")+"="+str(row[col[x]])+";"
-    if infos == '':
-        infos = '.'
-    outputFile.write("\t"+infos.rstrip(";"))
-    
+def makeRowFormatter(col, contigSequence, chromosomeOffsets, exportRef, exportNoCall):
+    '''
+    Returns a function formatting a row as a VCF line (or returning an
+    empty string if the row is not to be exported). The layout of the
+    INFO and sample columns depends only on the columns of the table,
+    so it is worked out once here rather than for each row.
+    '''
+    chrIndex, loIndex, refIndex, altIndex = col["chr"], col["lo"], col["ref"], col["alt"]
+    idsIndex, filterIndex, qualIndex = col.get("ids"), col.get("filter"), col.get("qual")
+
+    infoCols = [(x.lstrip("info_"), col[x]) for x in col if "info_" in x]
+
     #Check whether the reserved fields coverage and total coverage are present, and put them into the info index if so
-    sample = 0
+    numSamples = 0
     coverage = False
     totalCoverage = False
-    while 1:
-        if col.get("type_"+str(sample)) is None:
-            break
+    while col.get("type_"+str(numSamples)) is not None:
         if coverage == False:
-            coverage = col.get("coverage_"+str(sample))
+            coverage = col.get("coverage_"+str(numSamples))
         if totalCoverage == False:
-            totalCoverage = col.get("total_coverage_"+str(sample))
-        sample += 1
-    
+            totalCoverage = col.get("total_coverage_"+str(numSamples))
+        numSamples += 1
+    typeIndices = [col["type_"+str(sample)] for sample in range(numSamples)]
+
     #Check which info tags are present and use them to construct the info Index
     observedFormats = []
     for x in col:
         if "format_" in x:
-            if col.get(x) is not None:
-                entrySplit = x.split("_")[1:]
-                entrySplit.pop()
-                tag = '_'.join(entrySplit)
-                if tag not in observedFormats:
-                    observedFormats.append(tag)
-    if col.get("type_0") is not None:
-        outputFile.write("\t")
+            entrySplit = x.split("_")[1:]
+            entrySplit.pop()
+            tag = '_'.join(entrySplit)
+            if tag not in observedFormats:
+                observedFormats.append(tag)
+
+    formatOrdering = None
+    if numSamples > 0:
         formatOrdering = 'GT:'
         if coverage:
             formatOrdering += "AD:"
@@ -276,47 +229,118 @@ def writeRow(row, col, outputFile, contigSequence, chromosomeOffsets):
             formatOrdering += "DP:"
         for x in observedFormats:
             formatOrdering += x+":"
-        outputFile.write(formatOrdering.rstrip(":"))
-    
-        sample = 0
-        while 1:
-            if col.get("type_"+str(sample)) is not None:
-                formats = row[col["genotype_"+str(sample)]]+":"
-                if coverage:
-                    if col.get("coverage_"+str(sample)):
-                        cov = row[col.get("coverage_"+str(sample))]
-                        formats += cov+":"
-                    else:
-                        cov += ".:"
+        formatOrdering = "\t" + formatOrdering.rstrip(":")
+
+    samples = []
+    for sample in range(numSamples):
+        samples.append((col["genotype_"+str(sample)],
+                        col.get("coverage_"+str(sample)),
+                        col.get("total_coverage_"+str(sample)),
+                        [(x, col.get("format_"+x+"_"+str(sample))) for x in observedFormats]))
+
+    def isAllType(row, typ):
+        if len(typeIndices) == 0:
+            return False
+        for typeIndex in typeIndices:
+            if row[typeIndex] != typ:
+                return False
+        return True
+
+    def formatRow(row):
+        if isAllType(row, "ref"):
+            if not exportRef:
+                return ''
+        elif isAllType(row, "no-call"):
+            if not exportNoCall:
+                return ''
+
+        chr = str(row[chrIndex]).strip()
+        pos = row[loIndex]+1
+        ref = row[refIndex].strip()
+        alt = row[altIndex].strip()
+
+        ids = '.'
+        if idsIndex is not None:
+            if row[idsIndex] != '':
+                ids = row[idsIndex].strip()
+
+        filt = '.'
+        if filterIndex is not None:
+            if row[filterIndex] != '':
+                filt = row[filterIndex].strip()
+            else:
+                filt = "PASS"
+
+        qual = '.'
+        if qualIndex is not None:
+            if row[qualIndex] != dxpy.NULL or row[qualIndex] == -999999:
+                qual = row[qualIndex]
+
+        #Check if any types are ins/del, if so pull out the character before as well.
+        altOptions = row[altIndex].split(",")
+        printPreceedingCharacter = altOptions == ['']
+        for x in altOptions:
+            if (len(ref) != len(x) or len(ref) == 0 or len(alt) == 0) and not nonBaseRe.search(x):
+                printPreceedingCharacter = True
+                break
+
+        if printPreceedingCharacter:
+            preceedingCharacter = contigSequence[chromosomeOffsets[chr]+int(pos)-2]
+            ref = preceedingCharacter+ref
+            alt = ",".join([x if nonBaseRe.search(x) else preceedingCharacter+x for x in altOptions])
+            pos -= 1
+
+        line = [chr, "\t", str(pos).strip(), "\t", str(ids).strip(), "\t", ref.upper().strip(), "\t",
+                alt.upper().strip(), "\t", str(qual).strip(), "\t", str(filt).strip()]
+
+        infos = []
+        for name, index in infoCols:
+            value = row[index]
+            if isinstance(value, bool):
+                if value == True:
+                    infos.append(name+";")
+            elif isDefault(value):
+                infos.append(name+"="+str(value)+";")
+        line.append("\t")
+        line.append("".join(infos).rstrip(";") if infos else ".")
+
+        if formatOrdering is not None:
+            line.append(formatOrdering)
+            for genotypeIndex, coverageIndex, totalCoverageIndex, formatIndices in samples:
+                formats = [row[genotypeIndex], ":"]
+                if coverage and coverageIndex:
+                    formats.append(row[coverageIndex]+":")
                 if totalCoverage:
-                    if col.get("total_coverage_"+str(sample)) is not None:
-                        tCov = row[col.get("total_coverage_"+str(sample))]
+                    if totalCoverageIndex is not None:
+                        tCov = row[totalCoverageIndex]
                         if tCov == dxpy.NULL or tCov == -999999:
-                            formats += "0:"
+                            formats.append("0:")
                         else:
-                            formats += str(tCov)+":"
+                            formats.append(str(tCov)+":")
                     else:
-                        formats += ".:"
-                for x in observedFormats:
-                    if col.get("format_"+x+"_"+str(sample)) is not None:
-                        if isinstance(row[col["format_"+x+"_"+str(sample)]], bool):
-                            if row[col["format_"+x+"_"+str(sample)]]:
-                                formats += x
+                        formats.append(".:")
+                for x, index in formatIndices:
+                    if index is not None:
+                        value = row[index]
+                        if isinstance(value, bool):
+                            if value:
+                                formats.append(x)
                             else:
-                                formats += "."
-                        elif row[col["format_"+x+"_"+str(sample)]] == dxpy.NULL or row[col["format_"+x+"_"+str(sample)]] == -999999:
-                            formats += "."
+                                formats.append(".")
+                        elif value == dxpy.NULL or value == -999999:
+                            formats.append(".")
                         else:
-                            formats += str(row[col["format_"+x+"_"+str(sample)]])
+                            formats.append(str(value))
                     else:
-                        formats += "."
-                    formats += ":"
-                outputFile.write("\t"+formats.rstrip(":"))
-            else:
-                break
-            sample += 1
-    outputFile.write("\n")
-        
+                        formats.append(".")
+                    formats.append(":")
+                line.append("\t")
+                line.append("".join(formats).rstrip(":"))
+        line.append("\n")
+        return "".join(line)
+
+    return formatRow
+
 def isDefault(entry):
     if isinstance(entry, float):
         if entry == dxpy.NULL or entry == -999999:
@@ -331,17 +355,5 @@ def isDefault(entry):
         return False
     return True
 
-def checkRowIsAllType(row, col, typ):
-    sample = 0
-    while 1:
-        if col.get("type_"+str(sample)) is None:
-            if sample > 0:
-                return True
-            else:
-                return False
-        if row[col["type_"+str(sample)]] != typ:
-            return False
-        sample += 1
-
 if __name__ == '__main__':
     main()
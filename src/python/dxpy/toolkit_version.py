@@ -0,0 +1 @@
+version = '01fd0df'
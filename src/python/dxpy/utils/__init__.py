@@ -20,11 +20,9 @@ Utilities shared by dxpy modules.
 
 from __future__ import (print_function, unicode_literals)
 
-import os, json, collections, concurrent.futures, traceback, sys, time, gc
-import dateutil.parser
-from .thread_pool import PrioritizingThreadPool
+import os, json, collections, traceback, sys, time, gc
 from .. import logger
-from ..compat import basestring
+from ..compat import basestring, lazy_module_attributes
 
 
 def _force_quit(signum, frame):
@@ -37,6 +35,7 @@ def get_futures_threadpool(max_workers):
     #if force_quit_on_sigint:
     #    signal.signal(signal.SIGINT, _force_quit)
     #return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    from .thread_pool import PrioritizingThreadPool
     return PrioritizingThreadPool(max_workers=max_workers)
 
 def wait_for_a_future(futures, print_traceback=False):
@@ -45,6 +44,7 @@ def wait_for_a_future(futures, print_traceback=False):
     received, then the entire process is exited immediately.  See
     wait_for_all_futures for more notes.
     """
+    import concurrent.futures
     while True:
         try:
             future = next(concurrent.futures.as_completed(futures, timeout=10000000000))
@@ -74,6 +74,7 @@ def wait_for_all_futures(futures, print_traceback=False):
     Note: os._exit() doesn't work well with interactive mode (e.g. ipython). This may help:
     import __main__ as main; if hasattr(main, '__file__'): os._exit() else: os.exit()
     """
+    import concurrent.futures
     try:
         while True:
             waited_futures = concurrent.futures.wait(futures, timeout=60)
@@ -112,6 +113,8 @@ def response_iterator(request_iterator, thread_pool, max_active_tasks=4, num_ret
     If retries are used, tasks should be idempotent.
     """
 
+    import concurrent.futures
+
     # Debug fallback
     #for _callable, args, kwargs in request_iterator:
     #    yield _callable(*args, **kwargs)
@@ -216,6 +219,7 @@ def normalize_time_input(t, future=False):
         try:
             t = normalize_timedelta(t)
         except ValueError:
+            import dateutil.parser
             try:
                 t = int(time.mktime(dateutil.parser.parse(t).timetuple())*1000)
             except ValueError:
@@ -314,5 +318,14 @@ def json_loads_raise_on_duplicates(*args, **kwargs):
 def warn(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
-# Moved to the bottom due to circular imports
-from .exec_utils import run, convert_handlers_to_dxlinks, parse_args_as_job_input, entry_point, DXJSONEncoder
+# The app helpers (and the submodules that dxpy used to import eagerly)
+# are only imported when they are first used
+lazy_module_attributes(__name__,
+                       attributes={'run': 'dxpy.utils.exec_utils',
+                                   'convert_handlers_to_dxlinks': 'dxpy.utils.exec_utils',
+                                   'parse_args_as_job_input': 'dxpy.utils.exec_utils',
+                                   'entry_point': 'dxpy.utils.exec_utils',
+                                   'DXJSONEncoder': 'dxpy.utils.exec_utils',
+                                   'PrioritizingThreadPool': 'dxpy.utils.thread_pool'},
+                       submodules=['describe', 'exec_utils', 'file_load_utils', 'local_exec_utils', 'metadata_cache',
+                                   'printing', 'resolver', 'thread_pool'])
@@ -28,6 +28,7 @@ from collections import namedtuple, OrderedDict
 import dxpy
 from dxpy.utils.resolver import (get_first_pos_of_char, get_last_pos_of_char, clean_folder_path, resolve_path,
                                  split_unescaped, ResolutionError)
+from dxpy.utils.metadata_cache import get_metadata_cache
 from dxpy.utils.printing import fill
 
 def startswith(text):
@@ -84,6 +85,16 @@ def split_path(path):
 # def unescape_completion_name_str(string):
 #     return string.replace('\\)', ')').replace('\\(', '(').replace('\\\\\\\\?', '?').replace('\\\\\\\\*', '*').replace('\\\\/', '/').replace('\\\\:', ':').replace('\ ', ' ').replace('\\\\\\\\', '\\')
 
+def get_cached_in_project(project, key, compute):
+    '''
+    Returns the value computed by *compute* for the given key and
+    project, served from the metadata cache if it is enabled.
+    '''
+    metadata_cache = get_metadata_cache()
+    if metadata_cache is None:
+        return compute()
+    return metadata_cache.get_in_project(project, metadata_cache.make_key(*key), compute)
+
 def get_folder_matches(text, delim_pos, dxproj, folderpath):
     '''
     :param text: String to be tab-completed; still in escaped form
@@ -101,10 +112,12 @@ def get_folder_matches(text, delim_pos, dxproj, folderpath):
     and be in escaped form for consumption by the command-line.
     '''
     try:
+        folders = get_cached_in_project(dxproj.get_id(), ("folders", folderpath),
+                                        lambda: dxproj.list_folder(folder=folderpath,
+                                                                   only='folders')['folders'])
         folder_names = map(lambda folder_name:
                                folder_name[folder_name.rfind('/') + 1:],
-                           dxproj.list_folder(folder=folderpath,
-                                              only='folders')['folders'])
+                           folders)
         if text != '' and delim_pos != len(text) - 1:
             folder_names += ['.', '..']
         prefix = text[:delim_pos + 1]
@@ -144,18 +157,23 @@ def get_data_matches(text, delim_pos, dxproj, folderpath, classname=None,
             visibility = "visible"
 
     try:
-        results = list(dxpy.find_data_objects(project=dxproj.get_id(),
-                                              folder=folderpath,
-                                              name=unescaped_text + "*",
-                                              name_mode="glob",
-                                              recurse=False,
-                                              visibility=visibility,
-                                              classname=classname,
-                                              limit=100,
-                                              describe=True,
-                                              typename=typespec))
+        def find_names():
+            results = dxpy.find_data_objects(project=dxproj.get_id(),
+                                             folder=folderpath,
+                                             name=unescaped_text + "*",
+                                             name_mode="glob",
+                                             recurse=False,
+                                             visibility=visibility,
+                                             classname=classname,
+                                             limit=100,
+                                             describe=True,
+                                             typename=typespec)
+            return [result['describe']['name'] for result in results]
+        names = get_cached_in_project(dxproj.get_id(),
+                                      ("names", folderpath, unescaped_text, visibility, classname, typespec),
+                                      find_names)
         prefix = '' if text == '' else text[:delim_pos + 1]
-        return [prefix + escape_name(result['describe']['name']) for result in results]
+        return [prefix + escape_name(name) for name in names]
     except:
         return []
 
@@ -194,10 +212,16 @@ def path_completer(text, expected=None, classes=None, perm_level=None,
         # Also, don't bother if text=="" and expected is NOT "project"
         # Also, add space if expected == "project"
         if text != "" or expected == 'project':
-            results = dxpy.find_projects(describe=True, level=perm_level)
+            def find_projects():
+                return [[r['id'], r['describe']['name']] for r in dxpy.find_projects(describe=True, level=perm_level)]
+            metadata_cache = get_metadata_cache()
+            if metadata_cache is not None:
+                projects = metadata_cache.get(metadata_cache.make_key("projects", perm_level), find_projects)
+            else:
+                projects = find_projects()
             if not include_current_proj:
-                results = [r for r in results if r['id'] != dxpy.WORKSPACE_ID]
-            matches += [escape_colon(r['describe']['name'])+':' for r in results if r['describe']['name'].startswith(text)]
+                projects = [p for p in projects if p[0] != dxpy.WORKSPACE_ID]
+            matches += [escape_colon(name)+':' for _id, name in projects if name.startswith(text)]
 
     if expected == 'project':
         return matches
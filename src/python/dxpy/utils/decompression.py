@@ -0,0 +1,311 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+Streaming access to (possibly compressed) local input files, for the
+scripts that import flat files into GTables (dx-fastq-to-reads, etc.).
+
+A compressed file is decompressed exactly once, by an external
+decompressor whose output is read as it is produced. The decompressor
+verifies the integrity of the data (e.g. the gzip CRC) as it goes, and
+its exit status is checked when the end of the stream is reached, so a
+corrupted file makes the import fail without a separate pass over the
+whole file.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import os, stat, subprocess, tempfile, collections
+from distutils.spawn import find_executable
+
+from ..exceptions import AppError
+
+# Leading bytes identifying each supported compression format
+_COMPRESSION_MAGIC = [(b'\x1f\x8b', 'gzip'),
+                      (b'BZh', 'bzip2'),
+                      (b'\xfd7zXZ\x00', 'xz')]
+
+DEFAULT_BLOCK_SIZE = 1024*1024*4 # bytes
+
+# Decompressors for each format, in order of preference. The parallel
+# implementations are used when they are installed.
+_DECOMPRESSORS = {'gzip': [['pigz', '-dc'], ['gzip', '-dc']],
+                  'bzip2': [['pbzip2', '-dc'], ['bzip2', '-dc']],
+                  'xz': [['xz', '-dc']]}
+
+def _is_tar_header(data):
+    return data[257:262] == b'ustar'
+
+def detect_compression(filename):
+    '''
+    :param filename: Local path of the file
+    :type filename: string
+    :returns: "gzip", "bzip2", "xz" or None if the file is not compressed
+    :rtype: string or None
+    :raises: :exc:`~dxpy.exceptions.AppError` if the file is a tar archive or cannot be read
+
+    Identifies the compression format of a file from its leading bytes.
+    '''
+    try:
+        with open(filename, 'rb') as fd:
+            head = fd.read(512)
+    except (IOError, OSError) as e:
+        raise AppError("Unable to identify compression format: " + str(e))
+    if _is_tar_header(head):
+        raise AppError("Found a tar archive.  Please untar your sequences before importing")
+    for magic, compression in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+def _is_regular_file(filename):
+    try:
+        return stat.S_ISREG(os.stat(filename).st_mode)
+    except (IOError, OSError):
+        # Let opening the file report the error
+        return True
+
+def get_decompressor(compression):
+    '''
+    :param compression: Compression format, as returned by :func:`detect_compression`
+    :type compression: string
+    :returns: Command line (without the input file name) that writes the decompressed data to stdout
+    :rtype: list of strings
+
+    Returns the preferred available decompressor for *compression*
+    (e.g. pigz rather than gzip).
+    '''
+    candidates = _DECOMPRESSORS[compression]
+    for command in candidates:
+        if find_executable(command[0]) is not None:
+            return command
+    return candidates[-1]
+
+class _TeeReader(object):
+    # Copies everything read from a file to another one
+    def __init__(self, fd, copy):
+        self._fd, self._copy = fd, copy
+
+    def readline(self):
+        line = self._fd.readline()
+        self._copy.write(line)
+        return line
+
+    def read(self, size=-1):
+        data = self._fd.read(size)
+        self._copy.write(data)
+        return data
+
+class DecompressedInput(object):
+    '''
+    :param filename: Local path of the (possibly compressed) file to read
+    :type filename: string
+    :param spool: If True, the decompressed data is also written to a temporary file, so that it can be read again with :meth:`rewind`
+    :type spool: boolean
+    :raises: :exc:`~dxpy.exceptions.AppError` if the file is a tar archive, is not text, or cannot be opened
+
+    File-like object yielding the lines of a local file, which is
+    decompressed on the fly if necessary. Lines are returned as
+    :class:`bytes` (i.e. :class:`str` in Python 2).
+
+    Lines can be looked at with :meth:`peek_lines` before being
+    consumed, so that the format of the input can be sniffed without
+    opening it again.
+
+    When the end of a compressed file is reached, the exit status of
+    the decompressor is checked, and :exc:`~dxpy.exceptions.AppError`
+    is raised if the file failed its integrity check. Closing the
+    object before the end of the file stops the decompressor without
+    any check.
+
+    Importers that need a second pass over their input should pass
+    *spool=True* rather than opening the file again, so that it is not
+    decompressed twice.
+
+    Only regular files are checked for compression. Other files (e.g.
+    named pipes, or process substitutions such as "<(zcat x.gz)") are
+    opened only once, since the bytes read to identify their format
+    could not be read again, and are read as plain text.
+
+    Example::
+
+        with DecompressedInput("reads.fastq.gz") as fastq:
+            header = fastq.peek_lines(1)[0]
+            for line in fastq:
+                ...
+
+    '''
+
+    def __init__(self, filename, spool=False):
+        self.filename = filename
+        self.compression = detect_compression(filename) if _is_regular_file(filename) else None
+        self._process, self._stderr, self._spool = None, None, None
+        self._head = collections.deque()
+        self._finished = False
+        if self.compression is None:
+            try:
+                self._fd = open(filename, 'rb')
+            except (IOError, OSError):
+                raise AppError("Detected uncompressed input but unable to open file. File may be corrupted.")
+        else:
+            self.decompressor = get_decompressor(self.compression)
+            self._stderr = tempfile.TemporaryFile()
+            try:
+                self._process = subprocess.Popen(self.decompressor + [filename], stdout=subprocess.PIPE,
+                                                 stderr=self._stderr, bufsize=-1)
+            except OSError as e:
+                self._stderr.close()
+                raise AppError("Unable to open compressed input for reading: " + str(e))
+            self._fd = self._process.stdout
+            if spool:
+                self._spool = tempfile.TemporaryFile()
+                self._fd = _TeeReader(self._process.stdout, self._spool)
+
+        first_line = self.peek_lines(1)
+        if first_line and (_is_tar_header(first_line[0]) or b'\x00' in first_line[0]):
+            self.close()
+            if _is_tar_header(first_line[0]):
+                raise AppError("Found a tar archive after decompression.  Please untar your sequences before importing")
+            raise AppError("After decompression found file type other than plain text")
+
+    def peek_lines(self, num_lines):
+        '''
+        :param num_lines: Number of lines to look at
+        :type num_lines: int
+        :returns: The next *num_lines* lines (fewer if the file ends before), which are not consumed
+        :rtype: list
+
+        Should not be called once iteration over the lines has started.
+        '''
+        while len(self._head) < num_lines:
+            line = self._readline()
+            if not line:
+                break
+            self._head.append(line)
+        return [self._head[i] for i in range(min(num_lines, len(self._head)))]
+
+    def readline(self):
+        '''
+        :returns: The next line, or an empty string at the end of the file
+        '''
+        if self._head:
+            return self._head.popleft()
+        return self._readline()
+
+    def __iter__(self):
+        head = self._head
+        while head:
+            yield head.popleft()
+        if self._finished:
+            return
+        for line in iter(self._fd.readline, b''):
+            yield line
+        self._finish()
+
+    def iter_line_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        '''
+        :param block_size: Number of bytes to read at a time
+        :type block_size: int
+        :returns: Iterator over lists of consecutive lines, without their line terminators
+
+        Reads the rest of the file in large blocks and splits each block
+        into lines in bulk, which is much faster than reading it line by
+        line. Every line (including blank ones) is returned exactly once,
+        in order; a block boundary never splits a line.
+        '''
+        if self._head:
+            head = [line.rstrip(b'\n') for line in self._head]
+            self._head.clear()
+            yield head
+        if self._finished:
+            return
+        leftover = b''
+        while True:
+            data = self._fd.read(block_size)
+            if not data:
+                break
+            lines = (leftover + data).split(b'\n')
+            leftover = lines.pop()
+            if lines:
+                yield lines
+        if leftover:
+            yield [leftover]
+        self._finish()
+
+    def _readline(self):
+        if self._finished:
+            return b''
+        line = self._fd.readline()
+        if not line:
+            self._finish()
+        return line
+
+    def _finish(self):
+        # Called at the end of the stream: the decompressor has verified
+        # the whole file by now
+        if self._finished or self._process is None:
+            self._finished = True
+            return
+        self._finished = True
+        self._process.stdout.close()
+        if self._process.wait() != 0:
+            self._stderr.seek(0)
+            message = self._stderr.read().decode('utf-8', 'replace').strip()
+            self._stderr.close()
+            raise AppError("File failed integrity check by " + self.decompressor[0] +
+                           ".  Compressed file is corrupted." + (" " + message if message else ""))
+        self._stderr.close()
+
+    def rewind(self):
+        '''
+        :returns: A file object (owned by the caller) reading the decompressed data again from the beginning
+        :rtype: file
+
+        Can only be called once the whole file has been read, and, for a
+        compressed file, if it was opened with *spool=True*.
+        '''
+        if not self._finished:
+            raise ValueError("The input must be read to the end before being rewound")
+        if self.compression is None:
+            return open(self.filename, 'rb')
+        if self._spool is None:
+            raise ValueError("Compressed input can only be rewound if it is spooled")
+        spool, self._spool = self._spool, None
+        spool.seek(0)
+        return spool
+
+    def close(self):
+        '''
+        Closes the file, stopping the decompressor if it is still running.
+        '''
+        if self._process is not None and not self._finished:
+            self._finished = True
+            self._process.stdout.close()
+            if self._process.poll() is None:
+                try:
+                    self._process.kill()
+                except OSError:
+                    pass
+            self._process.wait()
+            self._stderr.close()
+        elif self._process is None:
+            self._fd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
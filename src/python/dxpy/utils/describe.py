@@ -772,6 +772,17 @@ def print_desc(desc, verbose=False):
     else:
         print_data_obj_desc(desc, verbose=verbose)
 
+# Fields of the descriptions of data objects used by get_ls_desc and
+# get_ls_l_desc, and of executions used by get_find_executions_string
+# (plus those needed to build execution trees), which can be requested
+# with describe({"fields": ...}) instead of the whole descriptions
+LS_DESC_FIELDS = {"id": True, "class": True, "name": True}
+LS_L_DESC_FIELDS = dict(LS_DESC_FIELDS, project=True, folder=True, state=True, modified=True, size=True, length=True)
+FIND_EXECUTIONS_DESC_FIELDS = {field: True for field in ("id", "class", "name", "executableName", "function", "state",
+                                                        "launchedBy", "created", "startedRunning", "stoppedRunning",
+                                                        "failureReason", "failureMessage", "parentJob", "masterJob",
+                                                        "originJob", "parentAnalysis", "rootExecution", "stages")}
+
 def get_ls_desc(desc, print_id=False):
     addendum = ' : ' + desc['id'] if print_id is True else ''
     if desc['class'] in ['applet', 'workflow']:
@@ -44,7 +44,7 @@ def get_user_conf_dir():
         return expanduser(os.environ["DX_USER_CONF_DIR"])
     return expanduser("~/.dnanexus_config")
 
-def get_session_conf_dir(cleanup=True):
+def get_session_conf_dir(cleanup=True, ppid=None):
     """
     Tries to find the session configuration directory by looking in ~/.dnanexus_config/sessions/<PID>,
     where <PID> is pid of the parent of this process, then its parent, and so on.
@@ -52,8 +52,20 @@ def get_session_conf_dir(cleanup=True):
 
     If *cleanup* is True, looks up and deletes all session configuration directories that belong to nonexistent
     processes.
+
+    If *ppid* is given, the lookup starts at the process *ppid* instead of the parent of this process.
+
+    The environment variable _DX_SESSION_CONF_DIR, if set, overrides the
+    directory found (the dx server sets it for the commands it runs on
+    behalf of its clients, which are not its parent processes).
     """
+    if '_DX_SESSION_CONF_DIR' in os.environ:
+        return os.environ['_DX_SESSION_CONF_DIR']
     sessions_dir = os.path.join(get_user_conf_dir(), "sessions")
+    if not os.path.isdir(sessions_dir):
+        # There is nothing to look up or clean up, so skip importing
+        # psutil (which is slow to import)
+        return _get_ppid_session_conf_dir(sessions_dir, ppid)
     try:
         from psutil import Process, pid_exists
 
@@ -70,7 +82,7 @@ def get_session_conf_dir(cleanup=True):
                 if not pid_exists(int(session_dir)):
                     rmtree(os.path.join(sessions_dir, session_dir), ignore_errors=True)
 
-        parent_process = Process(os.getpid()).parent()
+        parent_process = Process(os.getpid()).parent() if ppid is None else Process(ppid)
         default_session_dir = os.path.join(sessions_dir, str(parent_process.pid))
         while parent_process is not None and parent_process.pid != 0:
             session_dir = os.path.join(sessions_dir, str(parent_process.pid))
@@ -83,9 +95,11 @@ def get_session_conf_dir(cleanup=True):
     except Exception as e:
         msg = "Unexpected error ({e}) while retrieving session configuration\n"
         sys.stderr.write(textwrap.fill(msg.format(e=type(e))))
-    return _get_ppid_session_conf_dir(sessions_dir)
+    return _get_ppid_session_conf_dir(sessions_dir, ppid)
 
-def _get_ppid_session_conf_dir(sessions_dir):
+def _get_ppid_session_conf_dir(sessions_dir, ppid=None):
+    if ppid is not None:
+        return os.path.join(sessions_dir, str(ppid))
     try:
         return os.path.join(sessions_dir, str(os.getppid()))
     except AttributeError:
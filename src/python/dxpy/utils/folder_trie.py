@@ -0,0 +1,122 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+This module contains FolderTrie, an in-memory index of the folders of
+a project, built from a single describe call, which lists the
+subfolders of a folder and matches folder path globs (e.g. "/a*/b/c?")
+by only visiting the folders whose parents match.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import re, fnmatch
+
+import dxpy
+from .resolver import split_unescaped, is_glob_pattern, unescape_folder_str
+
+def _glob_to_regex(pattern):
+    # Escaped characters (e.g. "\*") are matched literally
+    pattern = re.sub(r'\\(.)', lambda match: '[' + match.group(1) + ']' if match.group(1) in '*?[' else match.group(1),
+                     pattern)
+    return re.compile(fnmatch.translate(pattern))
+
+class FolderTrie(object):
+    '''
+    :param folders: Paths of all of the folders of a project (as returned by describe with "folders": True)
+    :type folders: list of strings
+
+    Each node of the trie is a dict mapping the names of the subfolders
+    of a folder to their nodes.
+
+    Example::
+
+        trie = FolderTrie(dxpy.api.project_describe(project_id, {"folders": True})["folders"])
+        trie.glob("/reads/sample*")
+
+    '''
+    def __init__(self, folders):
+        self._root = {}
+        for folder in folders:
+            node = self._root
+            for name in folder.split('/'):
+                if name:
+                    node = node.setdefault(name, {})
+
+    def _find(self, folder):
+        node = self._root
+        for name in folder.split('/'):
+            if name:
+                node = node.get(name)
+                if node is None:
+                    return None
+        return node
+
+    def __contains__(self, folder):
+        return self._find(folder) is not None
+
+    def list_subfolders(self, folder, recurse=False):
+        '''
+        :param folder: Path of a folder
+        :type folder: string
+        :param recurse: Whether to list all of the descendants of the folder, rather than its children
+        :type recurse: boolean
+        :returns: Sorted paths of the subfolders (empty if *folder* does not exist)
+        :rtype: list of strings
+        '''
+        subfolders = []
+        def add_subfolders(path, node):
+            for name in sorted(node):
+                subfolders.append(path + '/' + name)
+                if recurse:
+                    add_subfolders(path + '/' + name, node[name])
+        node = self._find(folder)
+        if node is not None:
+            add_subfolders(folder.rstrip('/'), node)
+        return subfolders
+
+    def glob(self, pattern):
+        '''
+        :param pattern: Absolute folder path, possibly with the glob characters "*" and "?" in any of its folder names, escaped as in dx paths
+        :type pattern: string
+        :returns: Sorted paths of the existing folders matching *pattern*
+        :rtype: list of strings
+
+        Like in shell globs, the wildcards only match within a folder
+        name (so "/a*/c" matches "/ab/c" but not "/a/b/c").
+        '''
+        matches = [('', self._root)]
+        for name_pattern in split_unescaped('/', pattern):
+            if is_glob_pattern(name_pattern):
+                match = _glob_to_regex(name_pattern).match
+                matches = [(path + '/' + name, node[name]) for path, node in matches
+                           for name in sorted(node) if match(name)]
+            else:
+                name = unescape_folder_str(name_pattern)
+                matches = [(path + '/' + name, node[name]) for path, node in matches if name in node]
+        return [path or '/' for path, _node in matches]
+
+class FolderTries(dict):
+    '''
+    Maps project IDs to the :class:`FolderTrie` of their folders, which
+    is built (with one API call) when a project is first looked up.
+    Meant to be shared by all of the paths given to one command, but
+    not kept for longer, as the folders of projects change.
+    '''
+    def __missing__(self, project):
+        trie = FolderTrie(dxpy.DXHTTPRequest('/' + project + '/describe', {'folders': True})['folders'])
+        self[project] = trie
+        return trie
@@ -0,0 +1,282 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+Utilities shared by the scripts that export GTables to flat file formats
+(dx-mappings-to-sam, dx-variants-to-vcf, dx-spans-to-bed, etc.).
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import os, shutil, tempfile, itertools, multiprocessing
+
+DEFAULT_PAGE_SIZE = 1000 # rows
+DEFAULT_OUTPUT_BUFFER_SIZE = 1024*1024*4 # characters
+
+# State shared with the export worker processes. It is set before the
+# workers are forked and inherited by them, so it is never pickled (it
+# may contain e.g. a whole reference genome).
+_worker_context = None
+
+def select_columns(col_names, names=(), prefixes=(), predicate=None, include_row_id=False):
+    '''
+    :param col_names: Names of the columns of the GTable being exported
+    :type col_names: list of strings
+    :param names: Names of columns that the output may need
+    :type names: iterable of strings
+    :param prefixes: Columns whose names start with any of these prefixes are also needed
+    :type prefixes: iterable of strings
+    :param predicate: If given, columns for which predicate(name) is true are also needed
+    :type predicate: function
+    :param include_row_id: If True, "__id__" is the first column returned
+    :type include_row_id: boolean
+    :returns: Names of the columns to request, in table order
+    :rtype: list of strings
+
+    Computes the exact set of columns an exporter has to download, to
+    be passed as the *columns* argument of
+    :meth:`~dxpy.bindings.dxgtable.DXGTable.iterate_rows` or
+    :meth:`~dxpy.bindings.dxgtable.DXGTable.get_rows`. Columns that the
+    exporter asks for but that do not exist in the table are left out,
+    so callers must still supply defaults for optional columns.
+    '''
+    names = set(names)
+    prefixes = tuple(prefixes)
+    selected = [name for name in col_names
+                if name in names or (prefixes and name.startswith(prefixes)) or (predicate is not None and predicate(name))]
+    if include_row_id:
+        selected.insert(0, '__id__')
+    return selected
+
+def iterate_pages(rows, page_size=DEFAULT_PAGE_SIZE):
+    '''
+    :param rows: Iterable of rows (e.g. from :meth:`~dxpy.bindings.dxgtable.DXGTable.iterate_rows`)
+    :param page_size: Maximum number of rows per page
+    :type page_size: int
+    :returns: Iterator over lists of (at most *page_size*) consecutive rows
+
+    Groups rows into pages, so that exporters can format a whole page
+    at a time.
+    '''
+    rows = iter(rows)
+    while True:
+        page = list(itertools.islice(rows, page_size))
+        if len(page) == 0:
+            break
+        yield page
+
+def _join(chunks):
+    # Joins with an empty string of the type of the chunks, so that byte
+    # strings are not decoded in Python 2
+    return chunks[0][:0].join(chunks)
+
+class OutputBuffer(object):
+    '''
+    :param output_file: File to which the output is written
+    :type output_file: file
+    :param buffer_size: Number of characters collected before they are written to *output_file*
+    :type buffer_size: int
+
+    Collects the strings written by an exporter, and writes them to
+    *output_file* in large chunks, so that formatting a row costs no
+    more than appending its fields to a list. :meth:`flush` must be
+    called after the last write (or the buffer used as a context
+    manager).
+
+    Example::
+
+        with OutputBuffer(output_file) as out:
+            for page in iterate_pages(table.iterate_rows()):
+                out.write("".join(format_row(row) for row in page))
+
+    '''
+
+    def __init__(self, output_file, buffer_size=DEFAULT_OUTPUT_BUFFER_SIZE):
+        self.output_file = output_file
+        self.buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        '''
+        :param data: String to write
+        :type data: string
+        '''
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self._write_chunks()
+
+    def writelines(self, lines):
+        '''
+        :param lines: Strings to write, which are concatenated (no line terminators are added)
+        :type lines: iterable of strings
+        '''
+        lines = list(lines)
+        if len(lines) > 0:
+            self.write(_join(lines))
+
+    def flush(self):
+        '''
+        Writes the buffered data to the output file and flushes it.
+        '''
+        self._write_chunks()
+        self.output_file.flush()
+
+    def _write_chunks(self):
+        if len(self._chunks) == 0:
+            return
+        data = _join(self._chunks)
+        self._chunks, self._size = [], 0
+        self.output_file.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+def split_row_range(start, end, num_shards):
+    '''
+    :returns: List of (start, end) row ranges covering [*start*, *end*) in order
+    :rtype: list of tuples
+
+    Splits a range of row IDs into at most *num_shards* contiguous
+    ranges of (nearly) equal size.
+    '''
+    num_shards = max(1, min(num_shards, end - start))
+    bounds = [start + ((end - start) * i) // num_shards for i in range(num_shards + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def chunk_row_range(start, end, chunk_size):
+    '''
+    :returns: List of (start, end) row ranges covering [*start*, *end*) in order
+    :rtype: list of tuples
+
+    Splits a range of row IDs into contiguous ranges of *chunk_size*
+    rows (the last one may be shorter).
+    '''
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be positive")
+    if end <= start:
+        return [(start, end)]
+    return [(lo, min(lo + chunk_size, end)) for lo in range(start, end, chunk_size)]
+
+def _init_export_worker():
+    # Thread pools inherited from the parent process have no threads
+    # in the child; make the bindings create new ones
+    import dxpy
+    dxpy.DXGTable._http_threadpool = None
+
+def _export_shard_to_file(args):
+    export_shard, shard, temp_dir = args
+    fd, shard_path = tempfile.mkstemp(prefix='dx_export_', suffix='.shard', dir=temp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as shard_file:
+            export_shard(_worker_context, shard, shard_file)
+    except:
+        os.remove(shard_path)
+        raise
+    return shard_path
+
+def _export_shard_to_named_file(args):
+    export_shard, shard, filename = args
+    with open(filename, 'wb') as shard_file:
+        export_shard(_worker_context, shard, shard_file)
+    return filename
+
+def export_shards(export_shard, shards, output_file, num_workers=1, context=None, temp_dir=None):
+    '''
+    :param export_shard: Module-level function called as export_shard(context, shard, output_file) to write one shard
+    :type export_shard: function
+    :param shards: Descriptions of the shards (e.g. chromosomes or row ranges), in output order
+    :type shards: list
+    :param output_file: File to which the shards are written, in order
+    :type output_file: file
+    :param num_workers: Number of worker processes to use
+    :type num_workers: int
+    :param context: Object passed to *export_shard*, shared with the worker processes without being pickled
+    :param temp_dir: Directory in which to write the shards exported by the workers (defaults to the system temporary directory)
+    :type temp_dir: string
+
+    Exports the given shards (chromosomes, regions or row ranges) of a
+    table. With more than one worker, each shard is fetched and
+    formatted in a worker process into a temporary file, and the files
+    are appended to *output_file* in the order of *shards* as soon as
+    all preceding shards are done, so the output is identical to that
+    of the sequential export.
+    '''
+    global _worker_context
+    if num_workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            export_shard(context, shard, output_file)
+        return
+
+    _worker_context = context
+    output_file.flush()
+    pool = multiprocessing.Pool(min(num_workers, len(shards)), initializer=_init_export_worker)
+    try:
+        for shard_path in pool.imap(_export_shard_to_file, [(export_shard, shard, temp_dir) for shard in shards]):
+            with open(shard_path, 'rb') as shard_file:
+                shutil.copyfileobj(shard_file, output_file)
+            os.remove(shard_path)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        _worker_context = None
+
+def export_shard_files(export_shard, shards, filenames, num_workers=1, context=None):
+    '''
+    :param export_shard: Module-level function called as export_shard(context, shard, output_file) to write one shard
+    :type export_shard: function
+    :param shards: Descriptions of the shards (e.g. chromosomes or row ranges)
+    :type shards: list
+    :param filenames: Names of the files to which the shards are written, one per shard
+    :type filenames: list of strings
+    :param num_workers: Number of worker processes to use
+    :type num_workers: int
+    :param context: Object passed to *export_shard*, shared with the worker processes without being pickled
+
+    Like :func:`export_shards`, but writes each shard to its own file
+    instead of concatenating them, e.g. for downstream tools that
+    process the files in parallel.
+    '''
+    global _worker_context
+    if len(shards) != len(filenames):
+        raise ValueError("Exactly one file name must be given for each shard")
+    if num_workers <= 1 or len(shards) <= 1:
+        for shard, filename in zip(shards, filenames):
+            with open(filename, 'wb') as shard_file:
+                export_shard(context, shard, shard_file)
+        return
+
+    _worker_context = context
+    pool = multiprocessing.Pool(min(num_workers, len(shards)), initializer=_init_export_worker)
+    try:
+        for _ in pool.imap_unordered(_export_shard_to_named_file,
+                                     [(export_shard, shard, filename) for shard, filename in zip(shards, filenames)]):
+            pass
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        _worker_context = None
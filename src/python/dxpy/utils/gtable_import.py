@@ -0,0 +1,343 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+Ingestion engine shared by the scripts that import flat files into
+GTables (dx-tsv-to-gtable, dx-fastq-to-reads, dx-bed-to-spans, etc.).
+
+An importer reads its input with :func:`open_input`, groups the records
+(lines, CSV rows, ...) into batches, and supplies a function that turns
+one batch of records into a list of rows. :func:`import_batches` then
+parses the batches, in the calling process or in a pool of worker
+processes, and adds the rows to the table a batch at a time.
+Importers whose rows depend on state accumulated over the whole file
+can use :class:`GTableRowWriter` directly to get the same batched
+writes.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import sys, time, itertools, multiprocessing
+
+from .decompression import DecompressedInput
+from ..exceptions import DXGTableError
+
+DEFAULT_BATCH_SIZE = 10000 # records
+
+# Number of seconds between two progress reports
+DEFAULT_PROGRESS_INTERVAL = 30
+
+# Largest part ID accepted by the GTable API
+MAX_PART_ID = 250000
+
+# (parse_batch, context) of the current import, shared with the worker
+# processes. It is set before the workers are forked and inherited by
+# them, so it is never pickled.
+_worker_state = None
+
+def open_input(filename, spool=False):
+    '''
+    :param filename: Local path of the file to import, or "-" for stdin
+    :type filename: string
+    :param spool: Passed to :class:`~dxpy.utils.decompression.DecompressedInput`
+    :type spool: boolean
+    :returns: File-like object yielding the (decompressed) lines of the input
+
+    Opens the input of an importer. Compressed files are decompressed
+    on the fly; stdin is read as is.
+    '''
+    if filename == '-':
+        return sys.stdin
+    return DecompressedInput(filename, spool=spool)
+
+def iterate_batches(records, batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    :param records: Iterable of records
+    :param batch_size: Maximum number of records per batch
+    :type batch_size: int
+    :returns: Iterator over lists of (at most *batch_size*) consecutive records
+    '''
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if len(batch) == 0:
+            break
+        yield batch
+
+def iterate_line_batches(input_file, batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    :param input_file: Input, as returned by :func:`open_input`
+    :param batch_size: Maximum number of lines per batch
+    :type batch_size: int
+    :returns: Iterator over lists of consecutive lines, without their line terminators
+
+    Reads a :class:`~dxpy.utils.decompression.DecompressedInput` in
+    large blocks (see
+    :meth:`~dxpy.utils.decompression.DecompressedInput.iter_line_blocks`),
+    and any other file line by line.
+    '''
+    if hasattr(input_file, 'iter_line_blocks'):
+        lines = itertools.chain.from_iterable(input_file.iter_line_blocks())
+    else:
+        lines = (line.rstrip(b'\n') for line in input_file)
+    return iterate_batches(lines, batch_size)
+
+class ImportProgress(object):
+    '''
+    :param stream: If given, file to which the progress of the import is reported periodically
+    :type stream: file
+    :param interval: Minimum number of seconds between two reports
+    :type interval: number
+
+    Counts the batches and rows imported, and computes the throughput
+    of the import. Imports that take less than *interval* seconds are
+    not reported at all.
+    '''
+
+    def __init__(self, stream=None, interval=DEFAULT_PROGRESS_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self.rows, self.batches = 0, 0
+        self.start_time = time.time()
+        self._last_report = self.start_time
+        self._reported = False
+
+    @property
+    def elapsed(self):
+        '''
+        Number of seconds since the import started.
+        '''
+        return time.time() - self.start_time
+
+    @property
+    def rows_per_second(self):
+        '''
+        Average number of rows written per second since the import started.
+        '''
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def update(self, num_rows):
+        '''
+        :param num_rows: Number of rows written for the batch
+        :type num_rows: int
+
+        Records the completion of a batch, and reports the progress if
+        it has not been reported for *interval* seconds.
+        '''
+        self.rows += num_rows
+        self.batches += 1
+        if self.stream is not None and time.time() - self._last_report >= self.interval:
+            self._report()
+
+    def finish(self):
+        '''
+        Reports the totals of the import, if its progress was reported
+        before.
+        '''
+        if self._reported:
+            self._report()
+
+    def __str__(self):
+        return "Imported {rows} rows in {batches} batches, {elapsed:.1f}s ({rate:.0f} rows/s)".format(
+            rows=self.rows, batches=self.batches, elapsed=self.elapsed, rate=self.rows_per_second)
+
+    def _report(self):
+        print(str(self), file=self.stream)
+        self.stream.flush()
+        self._last_report = time.time()
+        self._reported = True
+
+class GTableRowWriter(object):
+    '''
+    :param table: Open table to which the rows are added
+    :type table: :class:`~dxpy.bindings.dxgtable.DXGTable`
+    :param batch_size: Number of rows added to the table at a time
+    :type batch_size: int
+    :param validate: Passed to :meth:`~dxpy.bindings.dxgtable.DXGTable.add_rows`
+    :type validate: boolean
+    :param progress: If given, updated with each batch of rows written
+    :type progress: :class:`ImportProgress`
+
+    Collects rows appended one at a time (it can be used in place of a
+    list of rows) and adds them to *table* in batches of *batch_size*.
+    :meth:`flush` must be called after the last row.
+    '''
+
+    def __init__(self, table, batch_size=DEFAULT_BATCH_SIZE, validate=True, progress=None):
+        self.table = table
+        self.batch_size = batch_size
+        self.validate = validate
+        self.progress = progress
+        self._rows = []
+
+    def append(self, row):
+        '''
+        :param row: Row to add to the table
+        :type row: list
+        '''
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._write()
+
+    def extend(self, rows):
+        '''
+        :param rows: Rows to add to the table
+        :type rows: list of lists
+        '''
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size:
+            self._write()
+
+    def flush(self):
+        '''
+        Adds the remaining rows to the table, and flushes it.
+        '''
+        self._write()
+        self.table.flush()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _write(self):
+        if len(self._rows) == 0:
+            return
+        rows, self._rows = self._rows, []
+        self.table.add_rows(rows, validate=self.validate)
+        if self.progress is not None:
+            self.progress.update(len(rows))
+
+def _init_import_worker():
+    # Thread pools inherited from the parent process have no threads
+    # in the child; make the bindings create new ones
+    import dxpy
+    dxpy.DXGTable._http_threadpool = None
+
+def _parse_batch(batch):
+    parse_batch, context = _worker_state
+    return parse_batch(context, batch)
+
+def _parse_and_write_batch(task):
+    import dxpy
+    table_id, part_id, validate, batch = task
+    parse_batch, context = _worker_state
+    rows = parse_batch(context, batch)
+    if len(rows) > 0:
+        dxpy.DXGTable(table_id).add_rows(rows, part=part_id, validate=validate)
+    return len(rows)
+
+def _pop_result(pending, ordered):
+    # Returns the result of the oldest task, or, if *ordered* is false,
+    # of the first one to complete
+    while True:
+        for i in range(len(pending)):
+            if ordered or pending[i].ready():
+                return pending.pop(i).get()
+        pending[0].wait(0.05)
+
+def import_batches(table, batches, parse_batch, context=None, num_workers=1, ordered=True,
+                   write_from_workers=False, validate=True, progress=None):
+    '''
+    :param table: Open table to which the rows are added
+    :type table: :class:`~dxpy.bindings.dxgtable.DXGTable`
+    :param batches: Iterable of batches of records (e.g. from :func:`iterate_line_batches`)
+    :param parse_batch: Module-level function called as parse_batch(context, batch), returning the list of rows of a batch
+    :type parse_batch: function
+    :param context: Object passed to *parse_batch*, shared with the worker processes without being pickled
+    :param num_workers: Number of processes parsing batches in parallel
+    :type num_workers: int
+    :param ordered: If False, the rows parsed by the workers may be added to the table in a different order than that of the input
+    :type ordered: boolean
+    :param write_from_workers: If True, each worker adds the rows it parses to the table itself, as a separate part
+    :type write_from_workers: boolean
+    :param validate: Passed to :meth:`~dxpy.bindings.dxgtable.DXGTable.add_rows`
+    :type validate: boolean
+    :param progress: If given, updated with each batch imported
+    :type progress: :class:`ImportProgress`
+    :returns: Number of rows added to the table
+    :rtype: int
+
+    Parses *batches* and adds the resulting rows to *table*, one
+    :meth:`~dxpy.bindings.dxgtable.DXGTable.add_rows` call per batch.
+
+    With a single worker, *parse_batch* is called in the calling
+    process, on each batch in order, so it may keep state across
+    batches in *context*.
+
+    With more than one worker, the batches are parsed in parallel by a
+    pool of processes, and only a bounded number of batches is read
+    ahead of the workers. The parsed rows are sent back and added to the
+    table by the calling process, in input order unless *ordered* is
+    False. With *write_from_workers*, the workers upload the rows
+    themselves instead, each batch as a part of the table, whose ID is
+    obtained from the table (in input order, so that the parts keep the
+    rows in input order). A :exc:`~dxpy.exceptions.DXGTableError` is
+    raised if the table runs out of part IDs. The caller flushes or
+    closes the table afterwards.
+    '''
+    global _worker_state
+    if progress is None:
+        progress = ImportProgress()
+    initial_rows = progress.rows
+
+    if num_workers <= 1:
+        for batch in batches:
+            rows = parse_batch(context, batch)
+            if len(rows) > 0:
+                table.add_rows(rows, validate=validate)
+            progress.update(len(rows))
+        progress.finish()
+        return progress.rows - initial_rows
+
+    _worker_state = (parse_batch, context)
+    pool = multiprocessing.Pool(num_workers, initializer=_init_import_worker)
+    try:
+        pending = []
+
+        def complete_task():
+            if write_from_workers:
+                num_rows = _pop_result(pending, ordered)
+            else:
+                rows = _pop_result(pending, ordered)
+                num_rows = len(rows)
+                if num_rows > 0:
+                    table.add_rows(rows, validate=validate)
+            progress.update(num_rows)
+
+        for batch in batches:
+            if write_from_workers:
+                part_id = table.get_unused_part_id()
+                if part_id > MAX_PART_ID:
+                    raise DXGTableError("Cannot add more than {n} parts to the table {table}".format(
+                        n=MAX_PART_ID, table=table.get_id()))
+                pending.append(pool.apply_async(_parse_and_write_batch, [(table.get_id(), part_id, validate, batch)]))
+            else:
+                pending.append(pool.apply_async(_parse_batch, [batch]))
+            # Keep a bounded number of batches in flight, so that reading
+            # the input does not get ahead of the workers
+            if len(pending) > 2 * num_workers:
+                complete_task()
+        while pending:
+            complete_task()
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        _worker_state = None
+    progress.finish()
+    return progress.rows - initial_rows
@@ -0,0 +1,473 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+Local snapshots of closed GTables.
+
+A snapshot is a single file containing one typed block per column
+(fixed-width little-endian values for numeric and boolean columns;
+an offsets block plus a UTF-8 data block for string columns), an
+optional genomic range index, and a JSON footer holding the table
+description and the location of each block::
+
+    <column and index blocks> <footer JSON> <footer length: 8 bytes> DXGTSNAP1\\n
+
+:func:`write_snapshot` (also available as
+:meth:`dxpy.bindings.dxgtable.DXGTable.snapshot`) creates a snapshot of a
+closed GTable, and :class:`LocalGTable` reads one back through a
+memory map with the same row access methods as
+:class:`~dxpy.bindings.dxgtable.DXGTable`.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import os, json, mmap, struct, bisect, tempfile, shutil
+
+from ..exceptions import DXGTableError
+
+SNAPSHOT_MAGIC = b'DXGTSNAP1\n'
+
+# Number of rows decoded at a time when iterating over a snapshot
+DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE = 40000
+
+# struct format characters for the fixed-width column types
+_STRUCT_CODES = {'boolean': '?',
+                 'uint8': 'B', 'int8': 'b',
+                 'uint16': 'H', 'int16': 'h',
+                 'uint32': 'I', 'int32': 'i',
+                 'int64': 'q', 'uint64': 'Q',
+                 'float': 'f', 'double': 'd'}
+
+_FOOTER_LENGTH = struct.Struct(str('<Q'))
+
+
+def _struct_code(column_type):
+    if column_type == 'string':
+        return None
+    try:
+        return _STRUCT_CODES[column_type]
+    except KeyError:
+        raise DXGTableError('Cannot snapshot columns of type %r' % (column_type,))
+
+def _unpack(buf, code, offset, count):
+    return struct.unpack_from(str('<%d%s' % (count, code)), buf, offset)
+
+def _read_block(buf, block, column_type, start, end):
+    """
+    Decodes the values of rows [start, end) from a column block.
+    """
+    code = _struct_code(column_type)
+    if code is not None:
+        return _unpack(buf, code, block['data'] + start * struct.calcsize(str(code)), end - start)
+    offsets = _unpack(buf, 'Q', block['offsets'] + start * 8, end - start + 1)
+    data_start = block['data']
+    return [buf[data_start + offsets[i]:data_start + offsets[i + 1]].decode('utf-8') for i in range(end - start)]
+
+
+class _BlockWriter(object):
+    """
+    Accumulates the values of one column into a temporary spool file.
+    """
+    def __init__(self, column_type, temp_dir):
+        self.code = _struct_code(column_type)
+        self.data = tempfile.TemporaryFile(dir=temp_dir)
+        if self.code is None:
+            self.offsets = tempfile.TemporaryFile(dir=temp_dir)
+            self.offsets.write(_FOOTER_LENGTH.pack(0))
+            self.data_length = 0
+
+    def add(self, values):
+        if self.code is not None:
+            self.data.write(struct.pack(str('<%d%s' % (len(values), self.code)), *values))
+            return
+        offsets = []
+        for value in values:
+            encoded = value.encode('utf-8')
+            self.data.write(encoded)
+            self.data_length += len(encoded)
+            offsets.append(self.data_length)
+        self.offsets.write(struct.pack(str('<%dQ' % len(offsets)), *offsets))
+
+    def copy_to(self, out_fd):
+        """
+        Appends the spooled block(s) to *out_fd*, and returns the block
+        descriptor to be stored in the footer.
+        """
+        descriptor = {}
+        spools = [('data', self.data)] if self.code is not None else [('offsets', self.offsets), ('data', self.data)]
+        for name, spool in spools:
+            _pad_to_alignment(out_fd)
+            descriptor[name] = out_fd.tell()
+            spool.seek(0)
+            shutil.copyfileobj(spool, out_fd)
+            spool.close()
+        return descriptor
+
+def _pad_to_alignment(fd, alignment=8):
+    remainder = fd.tell() % alignment
+    if remainder:
+        fd.write(b'\0' * (alignment - remainder))
+
+def _get_gri_index(indices):
+    for index in indices or []:
+        if index.get('type') == 'genomic':
+            return index
+    return None
+
+
+def write_snapshot(dxgtable, path, **kwargs):
+    '''
+    :param dxgtable: Closed GTable to snapshot
+    :type dxgtable: :class:`~dxpy.bindings.dxgtable.DXGTable`
+    :param path: Local filename to write the snapshot to
+    :type path: string
+    :raises: :exc:`~dxpy.exceptions.DXGTableError` if the GTable is not closed
+    :returns: The description of the GTable stored in the snapshot
+    :rtype: dict
+
+    Downloads all rows of *dxgtable* and writes them to *path* in the
+    snapshot format. The file is written to a temporary name and
+    renamed into place once complete.
+    '''
+    desc = dxgtable.describe(incl_details=True, incl_properties=True, **kwargs)
+    if desc['state'] != 'closed':
+        raise DXGTableError('Cannot snapshot %s: only closed GTables can be snapshotted (state is %r)' % (desc['id'], desc['state']))
+
+    columns = desc['columns']
+    col_names = [col['name'] for col in columns]
+    temp_dir = os.path.dirname(os.path.abspath(path))
+    writers = [_BlockWriter(col['type'], temp_dir) for col in columns]
+
+    gri = _get_gri_index(desc.get('indices'))
+    if gri is not None:
+        gri_cols = [col_names.index(gri[field]) for field in ('chr', 'lo', 'hi')]
+        chr_ranges, max_spans = {}, {}
+        gri_sorted = True
+        prev_chr, prev_lo = None, None
+
+    def write_page(rows):
+        for col_index, writer in enumerate(writers):
+            writer.add([row[col_index + 1] for row in rows])
+
+    page, row_id = [], 0
+    for row in dxgtable.iterate_rows(**kwargs):
+        page.append(row)
+        if gri is not None:
+            chrom, lo, hi = row[gri_cols[0] + 1], row[gri_cols[1] + 1], row[gri_cols[2] + 1]
+            max_spans[chrom] = max(max_spans.get(chrom, 0), hi - lo)
+            if chrom != prev_chr:
+                if chrom in chr_ranges:
+                    gri_sorted = False
+                else:
+                    chr_ranges[chrom] = [row_id, row_id]
+            elif lo < prev_lo:
+                gri_sorted = False
+            chr_ranges[chrom][1] = row_id + 1
+            prev_chr, prev_lo = chrom, lo
+        row_id += 1
+        if len(page) >= DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE:
+            write_page(page)
+            page = []
+    if page:
+        write_page(page)
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w+b') as out_fd:
+        blocks = {}
+        for col, writer in zip(columns, writers):
+            blocks[col['name']] = writer.copy_to(out_fd)
+
+        gri_footer = None
+        if gri is not None:
+            gri_footer = {'index': gri, 'maxSpans': max_spans, 'chromosomes': {}}
+            if gri_sorted:
+                # Rows of each chromosome are contiguous and ordered by lo,
+                # so the lo column itself can be bisected
+                for chrom, (start, end) in chr_ranges.items():
+                    gri_footer['chromosomes'][chrom] = {'start': start, 'end': end}
+            else:
+                gri_footer['chromosomes'], gri_footer['permutation'] = _write_gri_permutation(out_fd, blocks, columns,
+                                                                                              gri, row_id)
+
+        footer = json.dumps({'describe': desc,
+                             'length': row_id,
+                             'blocks': blocks,
+                             'gri': gri_footer}).encode('utf-8')
+        out_fd.write(footer)
+        out_fd.write(_FOOTER_LENGTH.pack(len(footer)))
+        out_fd.write(SNAPSHOT_MAGIC)
+    os.rename(temp_path, path)
+    return desc
+
+
+def _write_gri_permutation(out_fd, blocks, columns, gri, num_rows):
+    # The rows are not ordered by the index, so store, for each
+    # chromosome, the row IDs ordered by lo. The chr and lo columns are
+    # read back from the blocks just written.
+    out_fd.flush()
+    col_types = dict((col['name'], col['type']) for col in columns)
+    buf = mmap.mmap(out_fd.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        keys = []
+        for page_start in range(0, num_rows, DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE):
+            page_end = min(num_rows, page_start + DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE)
+            keys.extend(zip(_read_block(buf, blocks[gri['chr']], col_types[gri['chr']], page_start, page_end),
+                            _read_block(buf, blocks[gri['lo']], col_types[gri['lo']], page_start, page_end),
+                            range(page_start, page_end)))
+    finally:
+        buf.close()
+    keys.sort()
+
+    _pad_to_alignment(out_fd)
+    permutation_offset = out_fd.tell()
+    chromosomes = {}
+    for position, (chrom, _lo, row_id) in enumerate(keys):
+        if chrom not in chromosomes:
+            chromosomes[chrom] = {'start': position, 'end': position}
+        chromosomes[chrom]['end'] = position + 1
+        out_fd.write(_FOOTER_LENGTH.pack(row_id))
+    return chromosomes, permutation_offset
+
+
+class _ColumnView(object):
+    """
+    Read-only view of the values of a fixed-width block, decoded on
+    access.
+    """
+    def __init__(self, buf, code, offset):
+        self._buf, self._offset = buf, offset
+        self._struct = struct.Struct(str('<' + code))
+
+    def __getitem__(self, i):
+        return self._struct.unpack_from(self._buf, self._offset + i * self._struct.size)[0]
+
+class _IndexOrderView(object):
+    """
+    Sequence of the lo values of the rows of one chromosome, in index
+    order, so that it can be bisected.
+    """
+    def __init__(self, los, get_row_id, count):
+        self._los, self._get_row_id, self._count = los, get_row_id, count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        return self._los[self._get_row_id(i)]
+
+
+class LocalGTable(object):
+    '''
+    :param path: Filename of a snapshot created by :meth:`dxpy.bindings.dxgtable.DXGTable.snapshot`
+    :type path: string
+
+    Read-only handler for a local GTable snapshot. The file is memory
+    mapped, and only the requested row ranges and columns are decoded.
+
+    Provides the reading methods of
+    :class:`~dxpy.bindings.dxgtable.DXGTable`
+    (:meth:`get_rows`, :meth:`iterate_rows`, :meth:`iterate_query_rows`,
+    :meth:`get_columns`, :meth:`get_col_names`, :meth:`describe` and
+    :meth:`get_details`), so code that only reads a closed table can be
+    pointed at either.
+
+    Example::
+
+        dxpy.DXGTable("gtable-xxxx").snapshot("mappings.snapshot")
+        with LocalGTable("mappings.snapshot") as table:
+            query = table.genomic_range_query("chr1", 10000, 20000)
+            for row in table.iterate_query_rows(query, want_dict=True):
+                print(row["name"])
+
+    '''
+
+    def __init__(self, path):
+        self._fd = open(path, 'rb')
+        self._mmap = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+        trailer_start = len(self._mmap) - len(SNAPSHOT_MAGIC) - _FOOTER_LENGTH.size
+        if trailer_start < 0 or self._mmap[trailer_start + _FOOTER_LENGTH.size:] != SNAPSHOT_MAGIC:
+            self.close()
+            raise DXGTableError('%s is not a GTable snapshot' % (path,))
+        footer_length = _FOOTER_LENGTH.unpack_from(self._mmap, trailer_start)[0]
+        footer = json.loads(self._mmap[trailer_start - footer_length:trailer_start].decode('utf-8'))
+
+        self._desc = footer['describe']
+        self._dxid = self._desc['id']
+        self.length = footer['length']
+        self._columns = self._desc['columns']
+        self._col_names = [col['name'] for col in self._columns]
+        self._col_types = dict((col['name'], col['type']) for col in self._columns)
+        self._blocks = footer['blocks']
+        self._gri = footer['gri']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        '''
+        Releases the memory map and the underlying file.
+        '''
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._fd.close()
+
+    def get_id(self):
+        return self._dxid
+
+    def describe(self, **kwargs):
+        '''
+        :returns: Description of the GTable at the time it was snapshotted
+        :rtype: dict
+        '''
+        return self._desc
+
+    def get_details(self, **kwargs):
+        return self._desc.get('details', {})
+
+    def get_columns(self, **kwargs):
+        return self._columns
+
+    def get_col_names(self, **kwargs):
+        return self._col_names
+
+    def _read_column(self, name, start, end):
+        if name == '__id__':
+            return range(start, end)
+        if name not in self._blocks:
+            raise DXGTableError('Column %r does not exist in this GTable' % (name,))
+        return _read_block(self._mmap, self._blocks[name], self._col_types[name], start, end)
+
+    def _read_rows(self, row_ids, columns):
+        # Decodes the rows with the given (ascending) IDs, reading each
+        # contiguous run of IDs with a single unpack per column
+        names = ['__id__'] + self._col_names if columns is None else columns
+        rows, run_start = [], 0
+        for i in range(1, len(row_ids) + 1):
+            if i == len(row_ids) or row_ids[i] != row_ids[i - 1] + 1:
+                start, end = row_ids[run_start], row_ids[i - 1] + 1
+                rows.extend(zip(*[self._read_column(name, start, end) for name in names]))
+                run_start = i
+        return [list(row) for row in rows]
+
+    def _read_rows_in_order(self, row_ids, columns):
+        # Like _read_rows, but returns the rows in the order of row_ids
+        by_id = dict(zip(sorted(row_ids), self._read_rows(sorted(row_ids), columns)))
+        return [by_id[row_id] for row_id in row_ids]
+
+    def get_rows(self, query=None, columns=None, starting=None, limit=None, **kwargs):
+        '''
+        Same as :meth:`dxpy.bindings.dxgtable.DXGTable.get_rows`, but
+        reads from the snapshot. Only genomic range queries are
+        supported.
+        '''
+        if limit is None:
+            limit = DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE
+        if query is None:
+            start = 0 if starting is None else starting
+            end = min(self.length, start + limit)
+            data = self._read_rows(list(range(start, end)), columns)
+            next_row = end if end < self.length else None
+        else:
+            # For queries, the cursor is a position in the list of
+            # matching rows
+            matches = self._query_row_ids(query)
+            position = 0 if starting is None else starting
+            data = self._read_rows_in_order(matches[position:position + limit], columns)
+            next_row = position + limit if position + limit < len(matches) else None
+        return {'length': len(data), 'next': next_row, 'data': data}
+
+    def iterate_rows(self, start=0, end=None, columns=None, want_dict=False, **kwargs):
+        '''
+        Same as :meth:`dxpy.bindings.dxgtable.DXGTable.iterate_rows`.
+        '''
+        if end is None:
+            end = self.length
+        col_names = ['__id__'] + self._col_names if columns is None else columns
+        for page_start in range(start, end, DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE):
+            page_end = min(end, page_start + DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE)
+            for row in self._read_rows(list(range(page_start, page_end)), columns):
+                yield dict(zip(col_names, row)) if want_dict else row
+
+    def iterate_query_rows(self, query=None, columns=None, limit=None, want_dict=False, **kwargs):
+        '''
+        Same as :meth:`dxpy.bindings.dxgtable.DXGTable.iterate_query_rows`.
+        Only genomic range queries are supported.
+        '''
+        if query is None:
+            end = self.length if limit is None else min(self.length, limit)
+            for row in self.iterate_rows(0, end, columns=columns, want_dict=want_dict):
+                yield row
+            return
+        col_names = ['__id__'] + self._col_names if columns is None else columns
+        matches = self._query_row_ids(query)
+        if limit is not None:
+            matches = matches[:limit]
+        for page_start in range(0, len(matches), DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE):
+            page = matches[page_start:page_start + DEFAULT_SNAPSHOT_READ_ROW_BUFFER_SIZE]
+            for row in self._read_rows_in_order(page, columns):
+                yield dict(zip(col_names, row)) if want_dict else row
+
+    def __iter__(self):
+        return self.iterate_rows()
+
+    def _query_row_ids(self, query):
+        # Returns the IDs of the rows matching a genomic range query, in
+        # index order (by lo within the chromosome)
+        if self._gri is None or query.get('index') != self._gri['index']['name']:
+            raise DXGTableError('Only queries against the genomic range index are supported on GTable snapshots')
+        mode = query['parameters'].get('mode', 'overlap')
+        chrom, lo, hi = query['parameters']['coords']
+        if chrom not in self._gri['chromosomes']:
+            return []
+        bounds = self._gri['chromosomes'][chrom]
+        index = self._gri['index']
+        los = _ColumnView(self._mmap, _struct_code(self._col_types[index['lo']]), self._blocks[index['lo']]['data'])
+        his = _ColumnView(self._mmap, _struct_code(self._col_types[index['hi']]), self._blocks[index['hi']]['data'])
+        if 'permutation' in self._gri:
+            permutation = _ColumnView(self._mmap, 'Q', self._gri['permutation'] + bounds['start'] * 8)
+            get_row_id = permutation.__getitem__
+        else:
+            get_row_id = lambda i: bounds['start'] + i
+        in_index_order = _IndexOrderView(los, get_row_id, bounds['end'] - bounds['start'])
+
+        # Rows that overlap [lo, hi) start before hi, and no earlier
+        # than lo minus the longest interval on this chromosome
+        if mode == 'enclose':
+            scan_from = bisect.bisect_left(in_index_order, lo)
+        else:
+            scan_from = bisect.bisect_left(in_index_order, lo - self._gri['maxSpans'][chrom])
+        scan_to = bisect.bisect_left(in_index_order, hi)
+        row_ids = []
+        for i in range(scan_from, scan_to):
+            row_id = get_row_id(i)
+            if mode == 'enclose':
+                if his[row_id] <= hi:
+                    row_ids.append(row_id)
+            elif his[row_id] > lo:
+                row_ids.append(row_id)
+        return row_ids
+
+    @staticmethod
+    def genomic_range_query(chr, lo, hi, mode="overlap", index="gri"):
+        '''
+        Same as :meth:`dxpy.bindings.dxgtable.DXGTable.genomic_range_query`.
+        '''
+        return {"index": index, "parameters": {"mode": mode,
+                                               "coords": [chr, lo, hi] } }
@@ -0,0 +1,259 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+This module contains MetadataCache, a persistent on-disk cache of the
+project metadata looked up by path resolution and tab completion
+(project name to ID mappings, folder listings and object names), so
+that consecutive dx invocations do not make the same API calls again.
+
+Entries that do not belong to a project (e.g. the project names) expire
+after a fixed time to live. Entries belonging to a project are served
+as is for the time to live, then revalidated with a single describe
+call: they are kept as long as the "modified" timestamp of the project
+is unchanged, and all discarded when it changes.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import os, json, time, hashlib, tempfile
+
+import dxpy
+from .env import get_user_conf_dir
+
+DEFAULT_TTL = 60 # seconds
+DEFAULT_MAX_ENTRIES = 1000 # per project
+
+class MetadataCache(object):
+    '''
+    :param cache_dir: Directory in which the entries are stored
+    :type cache_dir: string
+    :param ttl: Number of seconds for which entries are used without being revalidated
+    :type ttl: number
+    :param max_entries: Maximum number of entries kept for each project (the oldest ones are evicted first)
+    :type max_entries: int
+
+    Values are stored as JSON, one file per project (plus one for the
+    entries that do not belong to any project), so concurrent dx
+    processes share them.
+    Errors reading or writing the cache are ignored: the values are
+    then computed as if they were not cached.
+
+    Example::
+
+        cache = MetadataCache(cache_dir)
+        folders = cache.get_in_project(project_id, MetadataCache.make_key("folders", folder),
+                                       lambda: dxpy.api.project_list_folder(project_id, {...})["folders"])
+
+    '''
+
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(*args):
+        '''
+        :returns: Cache key for the given arguments (which must be JSON-serializable)
+        :rtype: string
+        '''
+        return json.dumps(args, sort_keys=True, separators=(',', ':'))
+
+    def lookup(self, key):
+        '''
+        :param key: Cache key, as returned by :meth:`make_key`
+        :type key: string
+        :returns: The cached value, or None if it is not in the cache or has expired
+
+        Looks up an entry that does not belong to a project, which
+        expires *ttl* seconds after it was stored.
+        '''
+        entries = self._read('global').get('entries', {})
+        if key in entries and 0 <= time.time() - entries[key][0] < self.ttl:
+            return entries[key][1]
+        return None
+
+    def put(self, key, value):
+        '''
+        :param key: Cache key, as returned by :meth:`make_key`
+        :type key: string
+        :param value: JSON-serializable value
+
+        Stores an entry that does not belong to a project.
+        '''
+        now = time.time()
+        self._update('global', lambda data: self._store(data, key, value, now))
+
+    def get(self, key, compute):
+        '''
+        :param key: Cache key, as returned by :meth:`make_key`
+        :type key: string
+        :param compute: Function called without arguments to compute the value if it is not cached or has expired
+        :type compute: function
+        :returns: The (possibly cached) value
+
+        Like :meth:`lookup`, but computes and stores the value if it is
+        not cached.
+        '''
+        value = self.lookup(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def get_in_project(self, project, key, compute):
+        '''
+        :param project: ID of the project (or container) the entry belongs to
+        :type project: string
+        :param key: Cache key, as returned by :meth:`make_key`
+        :type key: string
+        :param compute: Function called without arguments to compute the value if it is not cached or is stale
+        :type compute: function
+        :returns: The (possibly cached) value
+
+        Looks up an entry that depends only on the contents of
+        *project*. If the project has not been checked for *ttl*
+        seconds, its "modified" timestamp is fetched, and the cached
+        entries of the project are discarded if it has changed.
+        '''
+        now = time.time()
+        data = self._read(project)
+        if not 0 <= now - data.get('checked', 0) < self.ttl:
+            modified = self._get_modified(project)
+            if modified is None:
+                return compute()
+            if modified != data.get('modified'):
+                data = {'modified': modified, 'entries': {}}
+            data['checked'] = now
+            self._write(project, data)
+        entries = data.get('entries', {})
+        if key in entries:
+            return entries[key][1]
+        value = compute()
+        modified = data['modified']
+
+        def store(current):
+            if current.get('modified') != modified:
+                # The project was found to be modified in the meantime
+                return False
+            self._store(current, key, value, now)
+            return True
+        self._update(project, store)
+        return value
+
+    def invalidate(self, project=None):
+        '''
+        :param project: ID of a project, or None for the entries that do not belong to any project
+        :type project: string
+
+        Discards the cached entries of *project*.
+        '''
+        try:
+            os.remove(self._get_path(project or 'global'))
+        except OSError:
+            pass
+
+    def clear(self):
+        '''
+        Removes all entries from the cache.
+        '''
+        try:
+            filenames = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for filename in filenames:
+            if filename.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    pass
+
+    def _get_modified(self, project):
+        try:
+            return dxpy.DXHTTPRequest('/' + project + '/describe', {"fields": {"modified": True}})['modified']
+        except Exception:
+            return None
+
+    def _store(self, data, key, value, now):
+        entries = data.setdefault('entries', {})
+        entries[key] = [now, value]
+        if len(entries) > self.max_entries:
+            for old_key in sorted(entries, key=lambda k: entries[k][0])[:len(entries) - self.max_entries]:
+                del entries[old_key]
+
+    def _update(self, name, update):
+        # Applies *update* to the current contents of the file (which may
+        # have been written by another process since they were read)
+        data = self._read(name)
+        if update(data) is not False:
+            self._write(name, data)
+
+    def _get_path(self, name):
+        return os.path.join(self.cache_dir, name + '.json')
+
+    def _read(self, name):
+        try:
+            with open(self._get_path(name), 'rb') as fd:
+                data = json.loads(fd.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, name, data):
+        # Write to a temporary file first so that concurrent readers
+        # never see a partially written file
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir, 0o700)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        except (IOError, OSError):
+            return
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+            os.rename(temp_path, self._get_path(name))
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+_metadata_caches = {}
+
+def get_metadata_cache():
+    '''
+    :returns: The metadata cache of the current API server and user, or None if it is disabled
+    :rtype: :class:`MetadataCache` or None
+
+    The cache is stored under the user configuration directory, in a
+    subdirectory specific to the API server and authentication token in
+    use, so that metadata is never shared between users or servers. It
+    is disabled if the environment variable DX_METADATA_CACHE is set to
+    0, and its time to live can be set (in seconds) with
+    DX_METADATA_CACHE_TTL.
+    '''
+    if os.environ.get('DX_METADATA_CACHE') == '0':
+        return None
+    security_context = dxpy.SECURITY_CONTEXT or {}
+    identity = json.dumps([dxpy.APISERVER, security_context.get('auth_token')])
+    if identity not in _metadata_caches:
+        try:
+            ttl = float(os.environ.get('DX_METADATA_CACHE_TTL', DEFAULT_TTL))
+        except ValueError:
+            ttl = DEFAULT_TTL
+        cache_dir = os.path.join(get_user_conf_dir(), 'metadata_cache',
+                                 hashlib.sha1(identity.encode('utf-8')).hexdigest())
+        _metadata_caches[identity] = MetadataCache(cache_dir, ttl=ttl)
+    return _metadata_caches[identity]
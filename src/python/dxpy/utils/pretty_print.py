@@ -81,7 +81,14 @@ def format_tree(tree, root=None):
         print format_tree(collections.OrderedDict({'foo': 0, 'bar': {'xyz': 0}}))
 
     '''
-    formatted_tree = [root] if root is not None else []
+    return '\n'.join(iter_format_tree(tree, root=root))
+
+def iter_format_tree(tree, root=None):
+    ''' Like format_tree, but yields the lines of the formatted tree one at a time, so that they can be printed while
+    the rest of the tree is computed (e.g. by mappings that compute their contents when first accessed).
+    '''
+    if root is not None:
+        yield root
     def _format(tree, prefix=u'    '):
         nodes = list(tree.keys())
         for i in range(len(nodes)):
@@ -95,18 +102,19 @@ def format_tree(tree, root=None):
             n = 0
             for line in node.splitlines():
                 if n == 0:
-                    formatted_tree.append(my_prefix + line)
+                    yield my_prefix + line
                 else:
-                    formatted_tree.append(my_multiline_prefix + line)
+                    yield my_multiline_prefix + line
                 n += 1
 
             if isinstance(tree[node], collections.Mapping):
                 subprefix = prefix
                 if i < len(nodes)-1 and len(prefix) > 1 and prefix[-4:] == u'    ':
                     subprefix = prefix[:-4] + u'│   '
-                _format(tree[node], subprefix + u'    ')
-    _format(tree)
-    return '\n'.join(formatted_tree)
+                for line in _format(tree[node], subprefix + u'    '):
+                    yield line
+    for line in _format(tree):
+        yield line
 
 def format_table(table, column_names=None, column_specs=None, max_col_width=32,
                  report_dimensions=False):
@@ -18,7 +18,7 @@
 This submodule gives basic utilities for printing to the terminal.
 '''
 
-import textwrap, subprocess, os, sys
+import textwrap, subprocess, os, sys, json
 from .env import sys_encoding
 from ..compat import USING_PYTHON2
 from ..exceptions import DXCLIError
@@ -156,3 +156,41 @@ def refill_paragraphs(string, ignored_prefix='    '):
     paragraphs = string.split('\n\n')
     refilled_paragraphs = [fill(paragraph) if not paragraph.startswith(ignored_prefix) else paragraph for paragraph in paragraphs]
     return '\n\n'.join(refilled_paragraphs).strip('\n')
+
+# What json.dumps puts between the elements of an indented array (", " in
+# Python 2, "," in Python 3), before the newline
+_JSON_ITEM_SEPARATOR = json.dumps([0, 0], indent=4).split('\n')[1][len('    0'):]
+
+class JSONArrayPrinter(object):
+    """Prints the elements of a JSON array as soon as they are given to
+    :meth:`append`, so that long lists of results need not be held in
+    memory and the first ones show up immediately.
+
+    Once :meth:`close` is called, the output is the same as that of
+    ``print(json.dumps(elements, indent=4))``. If *json_lines* is True,
+    each element is instead printed on a line of its own (JSON Lines).
+
+    """
+    def __init__(self, json_lines=False, file=None):
+        self.json_lines = json_lines
+        self.file = file
+        self.num_elements = 0
+
+    def _write(self, text):
+        # Look up sys.stdout when writing, in case it has been replaced
+        file = self.file or sys.stdout
+        file.write(text)
+        file.flush()
+
+    def append(self, element):
+        if self.json_lines:
+            self._write(json.dumps(element) + '\n')
+        else:
+            # Strip the brackets and the final newline of the one-element array
+            text = json.dumps([element], indent=4)[1:-2]
+            self._write(('[' if self.num_elements == 0 else _JSON_ITEM_SEPARATOR) + text)
+        self.num_elements += 1
+
+    def close(self):
+        if not self.json_lines:
+            self._write('[]\n' if self.num_elements == 0 else '\n]\n')
@@ -0,0 +1,137 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+Random access to the flat sequence file of a ContigSet (the
+concatenation of the sequences of all its contigs, whose starting
+offsets are listed in the "offsets" field of the ContigSet details),
+without holding the whole sequence in memory.
+
+:class:`MappedSequence` reads a local copy of the file through a
+read-only memory map, which worker processes forked afterwards share
+with their parent. :class:`RangeFetchedSequence` downloads only the
+blocks of the remote file that are actually accessed.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import os, mmap, copy, threading, collections
+
+import dxpy
+from ..compat import USING_PYTHON2
+
+DEFAULT_BLOCK_SIZE = 1024*64 # bytes
+DEFAULT_MAX_BLOCKS = 256
+
+def _to_str(data):
+    return data if USING_PYTHON2 else data.decode('ascii')
+
+class MappedSequence(object):
+    '''
+    :param filename: Local path of the flat sequence file
+    :type filename: string
+
+    Sequence backed by a read-only memory map of *filename*. Indexing
+    (``sequence[offset]``) and slicing return strings, as they would
+    for the contents of the file read into a string, but only the pages
+    that are accessed are read from disk, and they can be evicted by the
+    operating system at any time.
+    '''
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as fd:
+            size = os.fstat(fd.fileno()).st_size
+            # Empty files cannot be mapped
+            self._map = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b''
+
+    def __len__(self):
+        return len(self._map)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _to_str(self._map[index])
+        if index < 0:
+            index += len(self._map)
+        if not 0 <= index < len(self._map):
+            raise IndexError("Sequence index out of range")
+        return _to_str(self._map[index:index+1])
+
+    def close(self):
+        '''
+        Unmaps the file.
+        '''
+        if not isinstance(self._map, bytes):
+            self._map.close()
+
+class RangeFetchedSequence(object):
+    '''
+    :param dxfile: Flat sequence file
+    :type dxfile: :class:`~dxpy.bindings.dxfile.DXFile`
+    :param block_size: Number of bytes downloaded at a time
+    :type block_size: int
+    :param max_blocks: Maximum number of blocks kept in memory
+    :type max_blocks: int
+
+    Sequence whose bases are downloaded on demand, one block of
+    *block_size* bytes at a time, with HTTP range requests. The
+    *max_blocks* most recently used blocks are kept in memory, so
+    access to increasing positions (e.g. to the positions of sorted
+    variants) costs one request per block.
+
+    Only single bases can be looked up (``sequence[offset]``).
+    Instances are safe to use from multiple threads.
+    '''
+
+    def __init__(self, dxfile, block_size=DEFAULT_BLOCK_SIZE, max_blocks=DEFAULT_MAX_BLOCKS):
+        self._dxfile = dxfile
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self._length = None
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        if self._length is None:
+            self._length = int(self._dxfile.describe()["size"])
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Sequence index out of range")
+        block_index, block_offset = divmod(index, self.block_size)
+        block = self._get_block(block_index)
+        return _to_str(block[block_offset:block_offset+1])
+
+    def _get_block(self, block_index):
+        with self._lock:
+            block = self._blocks.pop(block_index, None)
+            if block is not None:
+                self._blocks[block_index] = block
+                return block
+        start = block_index * self.block_size
+        end = min(start + self.block_size, len(self)) - 1
+        url, headers = self._dxfile.get_download_url()
+        headers = copy.copy(headers)
+        headers['Range'] = "bytes=" + str(start) + "-" + str(end)
+        block = dxpy.DXHTTPRequest(url, '', method='GET', headers=headers, auth=None, jsonify_data=False,
+                                   prepend_srv=False, always_retry=True, decode_response_body=False)
+        with self._lock:
+            self._blocks[block_index] = block
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        return block
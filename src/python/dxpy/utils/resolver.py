@@ -25,14 +25,15 @@ For more details, see external documentation [TODO: Put link here].
 
 from __future__ import (print_function, unicode_literals)
 
-import os, sys, json, re
+import os, sys, json, re, functools, threading
 
 import dxpy
 from .describe import get_ls_l_desc
 from ..exceptions import DXError
 from ..compat import str, input
 from ..utils.env import get_env_var
-from ..cli import INTERACTIVE_CLI
+from .metadata_cache import get_metadata_cache
+from ..cli import INTERACTIVE_CLI, run_concurrently
 
 def pick(choices, default=None, str_choices=None, prompt=None, allow_mult=False, more_choices=False):
     '''
@@ -136,6 +137,17 @@ cached_project_names = {}
 # Possible cache for the future of project ID->folderpath->object name->ID
 # cached_project_paths = {}
 
+# Set in the threads of resolve_existing_paths, which must not prompt
+# the user: choices are left to the thread consuming the results
+_resolving_concurrently = threading.local()
+
+class _ChoiceDeferred(Exception):
+    pass
+
+def _check_can_prompt():
+    if getattr(_resolving_concurrently, 'value', False):
+        raise _ChoiceDeferred()
+
 class ResolutionError(DXError):
     def __init__(self, msg):
         self.msg = msg
@@ -343,6 +355,14 @@ def resolve_container_id_or_name(raw_string, is_error=False, unescape=True, mult
     if string in cached_project_names:
         return ([cached_project_names[string]] if multi else cached_project_names[string])
 
+    metadata_cache = get_metadata_cache()
+    if metadata_cache is not None:
+        cache_key = metadata_cache.make_key("project_id", string)
+        cached_id = metadata_cache.lookup(cache_key)
+        if cached_id is not None:
+            cached_project_names[string] = cached_id
+            return ([cached_id] if multi else cached_id)
+
     try:
         results = list(dxpy.find_projects(name=string, describe=True, level='VIEW'))
     except Exception as details:
@@ -350,6 +370,10 @@ def resolve_container_id_or_name(raw_string, is_error=False, unescape=True, mult
 
     if len(results) == 1:
         cached_project_names[string] = results[0]['id']
+        # Only unambiguous names are cached, so that new projects with
+        # the same name are noticed
+        if metadata_cache is not None:
+            metadata_cache.put(cache_key, results[0]['id'])
         return ([results[0]['id']] if multi else results[0]['id'])
     elif len(results) == 0:
         if is_error:
@@ -357,6 +381,7 @@ def resolve_container_id_or_name(raw_string, is_error=False, unescape=True, mult
         return ([] if multi else None)
     elif not multi:
         if INTERACTIVE_CLI:
+            _check_can_prompt()
             print('Found multiple projects with name "' + string + '"')
             choice = pick(['{id} ({level})'.format(id=result['id'], level=result['level'])
                            for result in results])
@@ -581,6 +606,9 @@ def resolve_existing_path(path, expected=None, ask_to_resolve=True, expected_cla
         if not found_valid_class:
             return None, None, None
 
+        # Copy the describe input, which is modified below, so that
+        # concurrent calls (and the default argument) are not affected
+        describe = dict(describe)
         if 'project' not in describe:
             if project != dxpy.WORKSPACE_ID:
                 describe['project'] = project
@@ -648,6 +676,7 @@ def resolve_existing_path(path, expected=None, ask_to_resolve=True, expected_cla
             if allow_mult and (all_mult or is_glob_pattern(entity_name)):
                 return project, None, results
             if INTERACTIVE_CLI:
+                _check_can_prompt()
                 print('The given path "' + path + '" resolves to the following data objects:')
                 choice = pick([get_ls_l_desc(result['describe']) for result in results],
                               allow_mult=allow_mult)
@@ -660,6 +689,119 @@ def resolve_existing_path(path, expected=None, ask_to_resolve=True, expected_cla
         elif len(results) == 1:
             return project, None, ([results[0]] if allow_mult else results[0])
 
+def resolve_existing_paths(paths, ask_to_resolve=True, allow_mult=False, all_mult=False, **kwargs):
+    '''
+    :param paths: Paths to resolve
+    :type paths: list of strings
+    :returns: Iterator over (path, resolve) pairs, in the order of *paths*, where resolve() returns the result of :meth:`resolve_existing_path` for the path or raises the error it raised
+
+    Resolves several paths like :meth:`resolve_existing_path` (which
+    accepts the same arguments), several at a time. The interactive
+    picking of a choice (when a path resolves to several data objects,
+    or its project name to several projects) is only done when the
+    path is reached by the consumer of the results, one path at a time.
+    '''
+    def resolve(path):
+        # Never picks a choice, which is left to resolve_path_result
+        _resolving_concurrently.value = True
+        try:
+            return resolve_existing_path(path, ask_to_resolve=False, allow_mult=allow_mult, all_mult=all_mult, **kwargs)
+        finally:
+            _resolving_concurrently.value = False
+
+    def resolve_path_result(path, result, error):
+        if isinstance(error, _ChoiceDeferred):
+            return resolve_existing_path(path, ask_to_resolve=ask_to_resolve, allow_mult=allow_mult,
+                                         all_mult=all_mult, **kwargs)
+        if error is not None:
+            raise error
+        project, folderpath, entity_results = result
+        if not ask_to_resolve or entity_results is None:
+            return result
+        if len(entity_results) == 1:
+            return project, folderpath, (entity_results if allow_mult else entity_results[0])
+        if allow_mult and (all_mult or is_glob_pattern(path[get_last_pos_of_char('/', path) + 1:])):
+            return result
+        # Resolve it again, letting resolve_existing_path pick a choice
+        return resolve_existing_path(path, ask_to_resolve=True, allow_mult=allow_mult, all_mult=all_mult, **kwargs)
+
+    results = run_concurrently(functools.partial(resolve, path) for path in paths)
+    for path in paths:
+        result, error = next(results)
+        yield path, functools.partial(resolve_path_result, path, result, error)
+
+def resolve_glob_path(path, folder_tries, find_objects=True, describe={}, visibility="either"):
+    '''
+    :param path: Path whose folder names and object name may contain glob patterns
+    :type path: string
+    :param folder_tries: Folder tries of the projects (see :class:`~dxpy.utils.folder_trie.FolderTries`), shared by the paths resolved by a command
+    :type folder_tries: dict
+    :param find_objects: Whether to also find the data objects matching *path*
+    :type find_objects: boolean
+    :param describe: Input hash to describe call for the data objects
+    :type describe: dict
+    :param visibility: The visibility expected ("either", "hidden", or "visible")
+    :type visibility: string
+    :returns: *project*, the sorted paths of the folders matching *path*, and the list of data objects matching it (of the form {"project": project, "id": id, "describe": describe hash})
+    :raises: :exc:`ResolutionError` if the request path was invalid
+
+    Resolves all of the folders and data objects matching a glob path
+    (e.g. "project:/reads/sample*/*.fastq"). The folder names are
+    matched against the folder trie of the project, and the object
+    names by the API server, with a single search from the deepest
+    folder whose name is not a pattern.
+    '''
+    project = resolve_path(path)[0]
+    if project is None or is_job_id(project):
+        return project, [], []
+
+    # resolve_path unescapes the folder names, which must be matched as
+    # patterns, so build the absolute pattern from the path itself
+    colon_pos = get_first_pos_of_char(':', path)
+    if colon_pos >= 0:
+        pattern = '/' + path[colon_pos + 1:]
+    elif path.startswith('/'):
+        pattern = path
+    else:
+        pattern = escape_folder_str(get_env_var('DX_CLI_WD', u'/')) + '/' + path
+    names = []
+    for name in split_unescaped('/', pattern):
+        if name == '..':
+            if len(names) > 0:
+                names.pop()
+        elif name != '.':
+            names.append(name)
+
+    try:
+        folder_trie = folder_tries[project]
+    except Exception as details:
+        raise ResolutionError(str(details))
+    folders = folder_trie.glob('/' + '/'.join(names))
+
+    objects = []
+    if find_objects and len(names) > 0 and get_last_pos_of_char('/', pattern) != len(pattern) - 1:
+        parent_names, name_pattern = names[:-1], names[-1]
+        parent_folders = set(folder_trie.glob('/' + '/'.join(parent_names)))
+        num_literal_names = 0
+        while num_literal_names < len(parent_names) and not is_glob_pattern(parent_names[num_literal_names]):
+            num_literal_names += 1
+        recurse = num_literal_names < len(parent_names)
+        if recurse and 'fields' in describe:
+            describe = dict(describe, fields=dict(describe['fields'], folder=True))
+        if len(parent_folders) > 0:
+            try:
+                results = dxpy.find_data_objects(project=project,
+                                                 folder='/' + '/'.join(unescape_folder_str(name) for name in parent_names[:num_literal_names]),
+                                                 recurse=recurse,
+                                                 name=unescape_name_str(name_pattern),
+                                                 name_mode='glob',
+                                                 describe=describe,
+                                                 visibility=visibility)
+                objects = [result for result in results if not recurse or result['describe']['folder'] in parent_folders]
+            except Exception as details:
+                raise ResolutionError(str(details))
+    return project, folders, objects
+
 def get_app_from_path(path):
     '''
     :param path: A string to attempt to resolve to an app object
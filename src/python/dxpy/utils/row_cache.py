@@ -0,0 +1,191 @@
+# Copyright (C) 2013-2014 DNAnexus, Inc.
+#
+# This file is part of dx-toolkit (DNAnexus platform client libraries).
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may not
+#   use this file except in compliance with the License. You may obtain a copy
+#   of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""
+This module contains GTableRowCache, a bounded LRU cache of the pages of
+rows returned by the /gtable-xxxx/get API method.
+
+Closed GTables are immutable, so a page fetched once (identified by the
+table ID, the requested columns, the starting row, the limit and the
+query) can be served again to any DXGTable handler in the same process,
+and optionally from a directory on local disk, without another API call.
+"""
+
+from __future__ import (print_function, unicode_literals)
+
+import os, json, hashlib, collections, threading, tempfile
+
+DEFAULT_ROW_CACHE_SIZE = 1024*1024*256 # bytes
+
+class GTableRowCache(object):
+    '''
+    :param max_bytes: Maximum total size (in bytes of serialized JSON) of the pages held in memory
+    :type max_bytes: int
+    :param cache_dir: If given, directory in which pages are also persisted, so that they can be reused by other processes
+    :type cache_dir: string
+
+    Least-recently-used cache of GTable row pages. Entries are stored as
+    serialized JSON, and their sizes are accounted against *max_bytes*;
+    the least recently used pages are evicted from memory when the
+    limit is exceeded. Pages larger than *max_bytes* are not kept in
+    memory at all.
+
+    The on-disk cache (if any) is not pruned automatically; use
+    :meth:`clear` with ``disk=True`` to remove it.
+
+    Instances are safe to use from multiple threads.
+
+    Example::
+
+        dxpy.DXGTable.set_row_cache(GTableRowCache(max_bytes=1024*1024*512))
+
+    '''
+
+    def __init__(self, max_bytes=DEFAULT_ROW_CACHE_SIZE, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir is not None and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._closed_tables = set()
+        self._lock = threading.Lock()
+        self.hits, self.misses = 0, 0
+
+    @staticmethod
+    def make_key(dxid, columns=None, starting=None, limit=None, query=None):
+        '''
+        :returns: Cache key for a page of rows
+        :rtype: string
+
+        Returns a string that uniquely identifies the result of a
+        /gtable-xxxx/get call with the given parameters.
+        '''
+        return json.dumps([dxid, columns, starting, limit, query], sort_keys=True, separators=(',', ':'))
+
+    @property
+    def size(self):
+        '''
+        Total size, in bytes, of the pages currently held in memory.
+        '''
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def mark_closed(self, dxid):
+        '''
+        Records that the GTable *dxid* is closed (and hence that its
+        rows may be cached).
+        '''
+        with self._lock:
+            self._closed_tables.add(dxid)
+
+    def is_known_closed(self, dxid):
+        '''
+        :returns: Whether :meth:`mark_closed` has been called for *dxid*
+        :rtype: boolean
+        '''
+        return dxid in self._closed_tables
+
+    def get(self, key):
+        '''
+        :param key: Cache key, as returned by :meth:`make_key`
+        :type key: string
+        :returns: The cached response, or None if it is not in the cache
+        :rtype: dict or None
+        '''
+        with self._lock:
+            serialized = self._entries.pop(key, None)
+            if serialized is not None:
+                self._entries[key] = serialized
+        if serialized is None and self.cache_dir is not None:
+            serialized = self._read_from_disk(key)
+            if serialized is not None:
+                with self._lock:
+                    self._insert(key, serialized)
+        with self._lock:
+            if serialized is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(serialized)
+
+    def put(self, key, response):
+        '''
+        :param key: Cache key, as returned by :meth:`make_key`
+        :type key: string
+        :param response: Response of the /gtable-xxxx/get call
+        :type response: dict
+
+        Adds a page of rows to the cache, evicting the least recently
+        used pages as necessary.
+        '''
+        serialized = json.dumps(response, separators=(',', ':'))
+        with self._lock:
+            self._insert(key, serialized)
+        if self.cache_dir is not None:
+            self._write_to_disk(key, serialized)
+
+    def clear(self, disk=False):
+        '''
+        :param disk: If True, also removes the pages persisted in the cache directory
+        :type disk: boolean
+
+        Removes all entries from the cache.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if disk and self.cache_dir is not None:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, filename))
+
+    def _insert(self, key, serialized):
+        # Must be called with self._lock held
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        if len(serialized) > self.max_bytes:
+            return
+        self._entries[key] = serialized
+        self._size += len(serialized)
+        while self._size > self.max_bytes:
+            _evicted_key, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _get_disk_path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_from_disk(self, key):
+        try:
+            with open(self._get_disk_path(key), 'rb') as fd:
+                stored_key, serialized = fd.read().decode('utf-8').split('\n', 1)
+        except (IOError, OSError, ValueError):
+            return None
+        return serialized if stored_key == key else None
+
+    def _write_to_disk(self, key, serialized):
+        # Write to a temporary file first so that concurrent readers
+        # never see a partially written page
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write((key + '\n' + serialized).encode('utf-8'))
+            os.rename(temp_path, self._get_disk_path(key))
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
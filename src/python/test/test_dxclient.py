@@ -3947,6 +3947,15 @@ HWI-ST689:7:1101:1477:1962#0/1\tNGTAACTCCTCTTTGCAACACCACAGCCATCGCCCCCTACCTCCTTGC
         run('dx wait {g}'.format(g=table_id))
         self.assertEquals(run('dx export tsv -o - {g}'.format(g=table_id)), self.expected_tsv)
 
+    def test_fastq_to_reads_conversion_with_workers(self):
+        tempfile1 = os.path.join(self.tempdir, 'test1.fq')
+        with open(tempfile1, 'w') as f:
+            f.write(self.fastq)
+        output = json.loads(run('dx-fastq-to-reads --workers 2 {f}'.format(f=tempfile1)).strip().split('\n')[-1])
+        table_id = output['table_id']
+        run('dx wait {g}'.format(g=table_id))
+        self.assertEquals(run('dx export tsv -o - {g}'.format(g=table_id)), self.expected_tsv)
+
     def test_fastq_reads_roundtrip(self):
         round_tripped_fastq = """@HWI-ST689:7:1101:1246:1986#0/1
 NGGGGCCTAATTAAACTAAAGAGCTTCTGCACAGCAAAAGAAACTATGAACAGAGCAAACAGACAGAACAGGAGAAGATATTTGCAAATTATGCATCCAAC
@@ -26,6 +26,7 @@ import dxpy
 import dxpy_testutil as testutil
 from dxpy.exceptions import DXAPIError, DXFileError, DXError, DXJobFailureError, ServiceUnavailable
 from dxpy.utils import pretty_print, warn
+from dxpy.utils.row_cache import GTableRowCache
 
 def get_objects_from_listf(listf):
     objects = []
@@ -559,6 +560,26 @@ class TestDXGTable(unittest.TestCase):
         # TODO: test get_rows parameters, genomic range index when
         # implemented
 
+    def test_get_rows_with_row_cache(self):
+        self.dxgtable = dxpy.new_dxgtable(
+            [dxpy.DXGTable.make_column_desc("a", "string"),
+             dxpy.DXGTable.make_column_desc("b", "int32")])
+        self.dxgtable.add_rows(data=[["row"+str(i), i] for i in range(64)], part=1)
+        self.dxgtable.close(block=True)
+
+        row_cache = GTableRowCache()
+        dxpy.DXGTable.set_row_cache(row_cache)
+        try:
+            rows = self.dxgtable.get_rows(starting=4, limit=3)['data']
+            self.assertEqual(row_cache.misses, 1)
+            # A different handler for the same closed table hits the cache
+            other_handler = dxpy.DXGTable(self.dxgtable.get_id())
+            self.assertEqual(other_handler.get_rows(starting=4, limit=3)['data'], rows)
+            self.assertEqual(row_cache.hits, 1)
+            self.assertEqual(len(list(other_handler.iterate_rows(start=1, end=63))), 62)
+        finally:
+            dxpy.DXGTable.set_row_cache(None)
+
     def test_iter_table(self):
         self.dxgtable = dxpy.new_dxgtable(
             [dxpy.DXGTable.make_column_desc("a", "string"),
@@ -682,6 +703,17 @@ class TestDXGTable(unittest.TestCase):
             result_num += 1
         self.assertEqual(3, result_num)
 
+        # Testing region-bounded iteration; use a tiny read buffer so
+        # that the end of the region is found by bisection
+        self.dxgtable._read_row_buffer_size = 1
+        self.assertEqual(self.dxgtable.get_genomic_range_row_bounds('chr1', 7, 16), (1, 6))
+        self.assertIsNone(self.dxgtable.get_genomic_range_row_bounds('chr3', 0, 100))
+        self.assertEqual([row[0] for row in self.dxgtable.iterate_genomic_range_rows('chr1', 7, 16)], [1, 2, 3, 4, 5])
+        self.assertEqual(list(self.dxgtable.iterate_genomic_range_rows('chr1', 20, 100, columns=['quux'])),
+                         [['e'], ['f'], ['g'], ['h'], ['i']])
+        self.assertEqual([row['quux'] for row in self.dxgtable.iterate_genomic_range_rows('chr2', 0, 100, want_dict=True)],
+                         ['j'])
+
     def test_lexicographic(self):
         lex_index = dxpy.DXGTable.lexicographic_index([
                 dxpy.DXGTable.lexicographic_index_column("a", case_sensitive=False),
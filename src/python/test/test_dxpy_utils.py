@@ -19,11 +19,26 @@
 
 from __future__ import print_function, unicode_literals
 
-import unittest, time, json, re
-from dxpy import AppError, AppInternalError, DXFile, DXRecord
+import os, sys, collections, threading, unittest, time, json, re, tempfile, shutil, gzip, argparse, subprocess
+from distutils.spawn import find_executable
+from dxpy import AppError, AppInternalError, DXError, DXFile, DXRecord
+from dxpy.exceptions import DXGTableError
 from dxpy.utils import (describe, exec_utils, genomic_utils, response_iterator, get_futures_threadpool, DXJSONEncoder,
                         normalize_timedelta)
 from dxpy.utils.exec_utils import DXExecDependencyInstaller
+from dxpy.utils.row_cache import GTableRowCache
+from dxpy.utils.gtable_snapshot import write_snapshot, LocalGTable
+from dxpy.utils.gtable_export import (select_columns, split_row_range, chunk_row_range, export_shards, export_shard_files,
+                                      iterate_pages, OutputBuffer)
+from dxpy.utils.decompression import DecompressedInput, detect_compression
+from dxpy.utils.gtable_import import iterate_batches, import_batches, GTableRowWriter, ImportProgress
+from dxpy.utils.reference_sequence import MappedSequence
+from dxpy.utils.metadata_cache import MetadataCache
+from dxpy.utils.folder_trie import FolderTrie
+from dxpy.utils.printing import JSONArrayPrinter
+from dxpy.utils.pretty_print import format_tree, iter_format_tree
+from dxpy.cli.parsers import make_subparsers_lazy
+from dxpy.cli import split_into_batches, run_concurrently
 from dxpy.compat import USING_PYTHON2
 
 # TODO: unit tests for dxpy.utils.get_field_from_jbor, get_job_from_jbor, is_job_ref
@@ -46,6 +61,21 @@ class TestDescribe(unittest.TestCase):
         jobref = {"$dnanexus_link": "job-B55ZF5kZKQGz1Xxyb5FQ0003"}
         self.assertFalse(describe.is_job_ref(jobref))
 
+    def test_ls_desc_fields(self):
+        # The output of ls -l only depends on the fields it requests
+        desc = {"id": "file-B55ZF5kZKQGz1Xxyb5FQ0003", "class": "file", "name": "reads.fastq", "state": "closed",
+                "project": "project-B55ZF5kZKQGz1Xxyb5FQ0004", "folder": "/a", "modified": 1400000000000,
+                "size": 1024}
+        self.assertEqual(set(desc) - {"length"}, set(describe.LS_L_DESC_FIELDS) - {"length"})
+        full_desc = dict(desc, created=1300000000000, types=["Reads"], hidden=False, media="text/plain")
+        for kwargs in {}, {"include_folder": True, "include_project": True}:
+            self.assertEqual(describe.get_ls_l_desc(desc, **kwargs), describe.get_ls_l_desc(full_desc, **kwargs))
+        self.assertEqual(describe.get_ls_desc({field: desc[field] for field in describe.LS_DESC_FIELDS}),
+                         describe.get_ls_desc(full_desc))
+
+        with self.assertRaises(DXError):
+            DXRecord("record-B55ZF5kZKQGz1Xxyb5FQ0003").describe(incl_properties=True, fields={"name": True})
+
 class TestErrorSanitizing(unittest.TestCase):
     def test_error_sanitizing(self):
         # ASCII str
@@ -104,6 +134,1031 @@ class TestResponseIterator(unittest.TestCase):
         for i, res in enumerate(response_iterator(tasks2(), get_futures_threadpool(5), num_retries=2, retry_after=0.1)):
             self.assertEqual(i, res)
 
+class TestGTableRowCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        page = {"length": 2, "next": 2, "data": [[0, "a"], [1, "b"]]}
+        page_size = len(json.dumps(page, separators=(',', ':')))
+        cache = GTableRowCache(max_bytes=page_size * 2)
+        keys = [GTableRowCache.make_key("gtable-" + "x"*24, starting=i*2, limit=2) for i in range(3)]
+        cache.put(keys[0], page)
+        cache.put(keys[1], page)
+        self.assertEqual(cache.get(keys[0]), page)
+        # keys[1] is now the least recently used entry
+        cache.put(keys[2], page)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.size, page_size * 2)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[0]), page)
+        self.assertEqual(cache.get(keys[2]), page)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+        # Pages larger than the whole cache are never held in memory
+        cache.put(keys[1], {"length": 0, "next": None, "data": [["x"*page_size*2]]})
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(len(cache), 2)
+
+    def test_keys(self):
+        key = GTableRowCache.make_key("gtable-" + "x"*24, columns=["a", "b"], starting=0, limit=10,
+                                      query={"index": "gri", "parameters": {"mode": "overlap", "coords": ["chr1", 1, 2]}})
+        self.assertEqual(key, GTableRowCache.make_key("gtable-" + "x"*24, columns=["a", "b"], starting=0, limit=10,
+                                                      query={"parameters": {"coords": ["chr1", 1, 2], "mode": "overlap"},
+                                                             "index": "gri"}))
+        self.assertNotEqual(key, GTableRowCache.make_key("gtable-" + "x"*24, columns=["b", "a"], starting=0, limit=10))
+
+    def test_disk_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            page = {"length": 1, "next": None, "data": [[0, "cr\xe8me"]]}
+            key = GTableRowCache.make_key("gtable-" + "x"*24, starting=0, limit=1)
+            GTableRowCache(cache_dir=cache_dir).put(key, page)
+            cache = GTableRowCache(cache_dir=cache_dir)
+            self.assertEqual(cache.get(key), page)
+            cache.clear(disk=True)
+            self.assertIsNone(cache.get(key))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_open_table_describes(self):
+        import dxpy
+        calls = []
+        def gtable_get(dxid, params, **kwargs):
+            calls.append("get")
+            return {"length": 0, "next": None, "data": []}
+        def gtable_describe(dxid, params, **kwargs):
+            calls.append("describe")
+            return {"id": dxid, "state": state}
+        saved = dxpy.api.gtable_get, dxpy.DXGTable._row_cache
+        dxpy.api.gtable_get = gtable_get
+        try:
+            # Without a cache, the state of the table is not needed
+            dxpy.DXGTable.set_row_cache(None)
+            table, state = dxpy.DXGTable("gtable-" + "x"*24), "open"
+            table._describe = gtable_describe
+            table.get_rows(starting=0, limit=1)
+            self.assertEqual(calls, ["get"])
+
+            # An open table is described once, not for every request
+            dxpy.DXGTable.set_row_cache(GTableRowCache())
+            calls = []
+            for i in range(3):
+                table.get_rows(starting=i, limit=1)
+            self.assertEqual(calls, ["describe", "get", "get", "get"])
+
+            # Once described as closed, its rows are cached
+            state = "closed"
+            table.describe()
+            calls = []
+            for i in range(2):
+                table.get_rows(starting=0, limit=1)
+            self.assertEqual(calls, ["get"])
+        finally:
+            dxpy.api.gtable_get, dxpy.DXGTable._row_cache = saved
+
+class FakeClosedGTable(object):
+    def __init__(self, columns, rows, indices=None):
+        self.columns, self.rows, self.indices = columns, rows, indices
+
+    def describe(self, **kwargs):
+        return {"id": "gtable-" + "x"*24, "state": "closed", "columns": self.columns, "indices": self.indices,
+                "length": len(self.rows), "details": {"original_contigset": None}}
+
+    def iterate_rows(self, **kwargs):
+        for i, row in enumerate(self.rows):
+            yield [i] + row
+
+class TestGTableSnapshot(unittest.TestCase):
+    columns = [{"name": "chr", "type": "string"}, {"name": "lo", "type": "int32"}, {"name": "hi", "type": "int64"},
+               {"name": "name", "type": "string"}, {"name": "score", "type": "double"},
+               {"name": "flag", "type": "boolean"}, {"name": "qual", "type": "uint8"}]
+    indices = [{"name": "gri", "type": "genomic", "chr": "chr", "lo": "lo", "hi": "hi"}]
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def make_rows(self, chroms):
+        return [[chrom, i * 10, i * 10 + 15 + (i % 3) * 100, "r\xe9ad" + str(i), i / 4.0, i % 2 == 0, i % 256]
+                for chrom in chroms for i in range(50)]
+
+    def check_gri_queries(self, table, rows):
+        queries = [("chr1", 0, 1, "overlap"), ("chr1", 95, 300, "overlap"), ("chr2", 480, 10000, "overlap"),
+                   ("chr3", 0, 10, "overlap"), ("chr2", 100, 200, "enclose")]
+        for chrom, lo, hi, mode in queries:
+            if mode == "overlap":
+                expected = [row for row in rows if row[1] == chrom and row[2] < hi and row[3] > lo]
+            else:
+                expected = [row for row in rows if row[1] == chrom and row[2] >= lo and row[3] <= hi]
+            expected.sort(key=lambda row: (row[2], row[0]))
+            query = table.genomic_range_query(chrom, lo, hi, mode=mode)
+            self.assertEqual(list(table.iterate_query_rows(query)), expected)
+            self.assertEqual(table.get_rows(query, limit=2)["data"], expected[:2])
+
+    def test_snapshot_round_trip(self):
+        rows = self.make_rows(["chr1", "chr2"])
+        path = os.path.join(self.temp_dir, "table.snapshot")
+        write_snapshot(FakeClosedGTable(self.columns, rows, self.indices), path)
+        expected = [[i] + row for i, row in enumerate(rows)]
+        with LocalGTable(path) as table:
+            self.assertEqual(table.length, 100)
+            self.assertEqual(table.get_col_names(), [col["name"] for col in self.columns])
+            self.assertEqual(table.get_details(), {"original_contigset": None})
+            self.assertEqual(list(table.iterate_rows()), expected)
+            self.assertEqual(list(table.iterate_rows(start=3, end=5, columns=["name", "__id__"])),
+                             [["r\xe9ad3", 3], ["r\xe9ad4", 4]])
+            self.assertEqual(next(table.iterate_rows(want_dict=True))["score"], 0.0)
+            self.assertEqual(table.get_rows(starting=98, limit=5), {"length": 2, "next": None, "data": expected[98:]})
+            self.check_gri_queries(table, expected)
+
+    def test_snapshot_unsorted_gri(self):
+        rows = self.make_rows(["chr2", "chr1"])
+        rows.reverse()
+        path = os.path.join(self.temp_dir, "table.snapshot")
+        write_snapshot(FakeClosedGTable(self.columns, rows, self.indices), path)
+        with LocalGTable(path) as table:
+            self.check_gri_queries(table, [[i] + row for i, row in enumerate(rows)])
+
+def export_test_shard(context, shard, output_file):
+    for i in range(*shard):
+        output_file.write(context["template"].format(os.getpid() if context["pid"] else 0, i).encode("utf-8"))
+
+class TestGTableExport(unittest.TestCase):
+    def test_select_columns(self):
+        col_names = ["chr", "lo", "hi", "sam_field_XA", "name", "sam_optional_fields", "extra"]
+        self.assertEqual(select_columns(col_names, ["name", "lo", "missing", "chr"]), ["chr", "lo", "name"])
+        self.assertEqual(select_columns(col_names, ["hi", "sam_optional_fields"], prefixes=["sam_field_"],
+                                        include_row_id=True),
+                         ["__id__", "hi", "sam_field_XA", "sam_optional_fields"])
+        self.assertEqual(select_columns(col_names, ["name"], predicate=lambda name: "h" in name),
+                         ["chr", "hi", "name"])
+
+    def test_split_row_range(self):
+        self.assertEqual(split_row_range(0, 10, 3), [(0, 3), (3, 6), (6, 10)])
+        self.assertEqual(split_row_range(5, 7, 4), [(5, 6), (6, 7)])
+        self.assertEqual(split_row_range(5, 5, 4), [(5, 5)])
+
+    def test_chunk_row_range(self):
+        self.assertEqual(chunk_row_range(0, 10, 4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(chunk_row_range(5, 7, 4), [(5, 7)])
+        self.assertEqual(chunk_row_range(5, 5, 4), [(5, 5)])
+        with self.assertRaises(ValueError):
+            chunk_row_range(0, 10, 0)
+
+    def test_iterate_pages(self):
+        self.assertEqual(list(iterate_pages(iter(range(5)), page_size=2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(iterate_pages([])), [])
+
+    def test_output_buffer(self):
+        with tempfile.TemporaryFile() as output_file:
+            with OutputBuffer(output_file, buffer_size=10) as out:
+                out.write(b"abc")
+                out.writelines([b"de", b"f"])
+                output_file.seek(0, os.SEEK_END)
+                self.assertEqual(output_file.tell(), 0)
+                out.writelines([b"\xff" * 5, b"\n"])
+                output_file.seek(0, os.SEEK_END)
+                self.assertEqual(output_file.tell(), 12)
+                out.writelines([])
+                out.write(b"tail\n")
+            output_file.seek(0)
+            self.assertEqual(output_file.read(), b"abcdef" + b"\xff" * 5 + b"\ntail\n")
+
+    def test_export_shards(self):
+        shards = split_row_range(0, 1000, 16)
+        context = {"template": "row {1}\n", "pid": False}
+        with tempfile.TemporaryFile() as sequential, tempfile.TemporaryFile() as parallel:
+            export_shards(export_test_shard, shards, sequential, num_workers=1, context=context)
+            export_shards(export_test_shard, shards, parallel, num_workers=4, context=context)
+            sequential.seek(0)
+            parallel.seek(0)
+            self.assertEqual(parallel.read(), sequential.read())
+
+        # Shards are written by worker processes
+        context = {"template": "{0}\n", "pid": True}
+        with tempfile.TemporaryFile() as parallel:
+            export_shards(export_test_shard, [(0, 1), (1, 2)], parallel, num_workers=2, context=context)
+            parallel.seek(0)
+            self.assertNotIn(str(os.getpid()), parallel.read().decode("utf-8").split())
+
+    def test_export_shard_files(self):
+        shards = chunk_row_range(0, 100, 30)
+        context = {"template": "row {1}\n", "pid": False}
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for num_workers in 1, 3:
+                filenames = [os.path.join(temp_dir, "shard%d_%d" % (num_workers, i)) for i in range(len(shards))]
+                export_shard_files(export_test_shard, shards, filenames, num_workers=num_workers, context=context)
+                for (lo, hi), filename in zip(shards, filenames):
+                    with open(filename, "rb") as shard_file:
+                        self.assertEqual(shard_file.read().decode("utf-8"),
+                                         "".join("row %d\n" % i for i in range(lo, hi)))
+        finally:
+            shutil.rmtree(temp_dir)
+
+class TestDecompressedInput(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.lines = [("@read%d\nACGT\n+\nIIII\n" % i).encode("ascii") for i in range(1000)]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_gzip(self, data):
+        path = os.path.join(self.temp_dir, "reads.fastq.gz")
+        with gzip.open(path, "wb") as fd:
+            fd.write(data)
+        return path
+
+    def test_plain_and_gzip_input(self):
+        data = b"".join(self.lines)
+        plain_path = os.path.join(self.temp_dir, "reads.fastq")
+        with open(plain_path, "wb") as fd:
+            fd.write(data)
+        for path in plain_path, self.write_gzip(data):
+            with DecompressedInput(path) as fastq:
+                self.assertEqual(fastq.peek_lines(2), [b"@read0\n", b"ACGT\n"])
+                self.assertEqual(len(fastq.peek_lines(8)), 8)
+                self.assertEqual(fastq.readline(), b"@read0\n")
+                self.assertEqual(b"".join(fastq), data[len(b"@read0\n"):])
+                self.assertEqual(fastq.readline(), b"")
+        self.assertEqual(detect_compression(plain_path), None)
+        self.assertEqual(detect_compression(os.path.join(self.temp_dir, "reads.fastq.gz")), "gzip")
+
+    def test_iter_line_blocks(self):
+        data = b"".join(self.lines)
+        with DecompressedInput(self.write_gzip(data)) as fastq:
+            fastq.peek_lines(3)
+            blocks = list(fastq.iter_line_blocks(block_size=100))
+        self.assertEqual(blocks[0], [b"@read0", b"ACGT", b"+"])
+        self.assertEqual([line for block in blocks for line in block], data.split(b"\n")[:-1])
+
+    def test_rewind(self):
+        data = b"".join(self.lines)
+        with DecompressedInput(self.write_gzip(data), spool=True) as fastq:
+            self.assertEqual(b"".join(fastq), data)
+            with fastq.rewind() as spool:
+                self.assertEqual(spool.read(), data)
+        with DecompressedInput(self.write_gzip(data)) as fastq:
+            with self.assertRaises(ValueError):
+                fastq.rewind()
+
+    def test_corrupted_gzip_input(self):
+        path = self.write_gzip(b"".join(self.lines))
+        with open(path, "r+b") as fd:
+            # Overwrite the CRC in the gzip trailer
+            fd.seek(-8, os.SEEK_END)
+            fd.write(b"\x00\x00\x00\x00")
+        with DecompressedInput(path) as fastq:
+            self.assertEqual(fastq.peek_lines(1), [b"@read0\n"])
+            with self.assertRaisesRegexp(AppError, "integrity check"):
+                for line in fastq:
+                    pass
+
+    @unittest.skipUnless(os.path.isdir("/dev/fd"), "/dev/fd is not available")
+    def test_pipe_input(self):
+        # Like a process substitution (e.g. "<(zcat reads.fastq.gz)"), a
+        # pipe can only be read once, so no leading bytes may be lost to
+        # the detection of the compression format
+        data = b"".join(self.lines[:3])
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, data)
+        os.close(write_fd)
+        try:
+            with DecompressedInput("/dev/fd/%d" % read_fd) as fastq:
+                self.assertEqual(fastq.compression, None)
+                self.assertEqual(fastq.readline(), b"@read0\n")
+                self.assertEqual(b"".join(fastq), data[len(b"@read0\n"):])
+        finally:
+            os.close(read_fd)
+
+    def test_binary_input(self):
+        path = self.write_gzip(b"\x00\x01\x02\n")
+        with self.assertRaisesRegexp(AppError, "other than plain text"):
+            DecompressedInput(path)
+
+class FakeOpenGTable(object):
+    def __init__(self, dxid=None, next_part=1):
+        self.rows, self.num_calls, self.flushed = [], 0, False
+        self.dxid, self.next_part = dxid, next_part
+
+    def add_rows(self, rows, validate=True):
+        self.rows.extend(rows)
+        self.num_calls += 1
+
+    def flush(self):
+        self.flushed = True
+
+    def get_id(self):
+        return self.dxid
+
+    def get_unused_part_id(self):
+        self.next_part += 1
+        return self.next_part - 1
+
+class FakeWorkerGTable(object):
+    # Stands for dxpy.DXGTable in the import workers; the ID of the table
+    # is a directory, where each part is written to a file
+    def __init__(self, dxid):
+        self.dxid = dxid
+
+    def add_rows(self, rows, part=None, validate=True):
+        with open(os.path.join(self.dxid, str(part)), "w") as fd:
+            json.dump(rows, fd)
+
+def parse_test_batch(context, batch):
+    return [[context, int(record), os.getpid()] for record in batch if record != "skip"]
+
+class TestGTableImport(unittest.TestCase):
+    def test_iterate_batches(self):
+        self.assertEqual(list(iterate_batches(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(iterate_batches([], 3)), [])
+
+    def test_import_batches(self):
+        records = [str(i) for i in range(1000)] + ["skip"]
+        for num_workers, ordered in [(1, True), (4, True), (4, False)]:
+            table, progress = FakeOpenGTable(), ImportProgress()
+            num_rows = import_batches(table, iterate_batches(records, 64), parse_test_batch, context="x",
+                                      num_workers=num_workers, ordered=ordered, progress=progress)
+            self.assertEqual(num_rows, 1000)
+            self.assertEqual(progress.rows, 1000)
+            self.assertEqual(progress.batches, 16)
+            self.assertEqual(table.num_calls, 16)
+            self.assertEqual(set(row[0] for row in table.rows), set(["x"]))
+            numbers = [row[1] for row in table.rows]
+            if ordered:
+                self.assertEqual(numbers, list(range(1000)))
+            else:
+                self.assertEqual(sorted(numbers), list(range(1000)))
+            # Batches are parsed by worker processes
+            self.assertEqual(os.getpid() in [row[2] for row in table.rows], num_workers == 1)
+
+    def test_write_from_workers(self):
+        import dxpy
+        from dxpy.utils import gtable_import
+        records = [str(i) for i in range(1000)] + ["skip"]
+        tempdir = tempfile.mkdtemp()
+        saved_table_class = dxpy.DXGTable
+        dxpy.DXGTable = FakeWorkerGTable
+        try:
+            # Parts 1 and 2 are already used; the parts are allocated in
+            # input order, whichever worker finishes first
+            table = FakeOpenGTable(tempdir, next_part=3)
+            num_rows = import_batches(table, iterate_batches(records, 64), parse_test_batch, context="x",
+                                      num_workers=4, write_from_workers=True)
+            self.assertEqual(num_rows, 1000)
+            self.assertEqual(table.num_calls, 0)
+            self.assertEqual(sorted(int(part) for part in os.listdir(tempdir)), list(range(3, 19)))
+            rows = []
+            for part in range(3, 19):
+                with open(os.path.join(tempdir, str(part))) as fd:
+                    rows.extend(json.load(fd))
+            self.assertEqual([row[1] for row in rows], list(range(1000)))
+            self.assertNotIn(os.getpid(), [row[2] for row in rows])
+
+            # Running out of part IDs is an error
+            table = FakeOpenGTable(tempdir, next_part=gtable_import.MAX_PART_ID - 1)
+            with self.assertRaises(DXGTableError):
+                import_batches(table, iterate_batches(records, 64), parse_test_batch, context="x",
+                               num_workers=2, write_from_workers=True)
+        finally:
+            dxpy.DXGTable = saved_table_class
+            shutil.rmtree(tempdir)
+
+    def test_row_writer(self):
+        table, progress = FakeOpenGTable(), ImportProgress()
+        writer = GTableRowWriter(table, batch_size=10, progress=progress)
+        for i in range(25):
+            writer.append([i])
+        writer.extend([[25], [26]])
+        self.assertEqual(table.num_calls, 2)
+        self.assertEqual(len(writer), 7)
+        writer.flush()
+        self.assertEqual(table.rows, [[i] for i in range(27)])
+        self.assertTrue(table.flushed)
+        self.assertEqual((progress.rows, progress.batches), (27, 3))
+
+class TestFastqToReads(unittest.TestCase):
+    def setUp(self):
+        from dxpy.scripts import dx_fastq_to_reads
+        self.module = dx_fastq_to_reads
+        self.saved_args = dx_fastq_to_reads.args
+        dx_fastq_to_reads.args = {"discard_names": False, "discard_qualities": False}
+
+    def tearDown(self):
+        self.module.args = self.saved_args
+
+    def test_parse_phred64_batch(self):
+        # The input lines are read from files as bytes
+        lines = [b"@r1", b"ACGT", b"+", b"hhhh", b"@r2", b"ACGA", b"+", b"@Ah~", b"@r3", b"AC", b"+", b"Jh"]
+        names, seqs, quals = self.module.parse_fastq_batch(lines, False, "phred64")
+        self.assertEqual(names, [b"@r1", b"@r2", b"@r3"])
+        self.assertEqual(seqs, [b"ACGT", b"ACGA", b"AC"])
+        self.assertEqual(quals, [b"IIII", b"!\"I_", b"+I"])
+        names, seqs, quals = self.module.parse_fastq_batch(lines, False, "phred33")
+        self.assertEqual(quals, [b"hhhh", b"@Ah~", b"Jh"])
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+class TestBedToSpans(unittest.TestCase):
+    def setUp(self):
+        from dxpy.scripts import dx_bed_to_spans
+        self.module = dx_bed_to_spans
+        self.saved_numpy_available = dx_bed_to_spans.numpy_available
+
+    def tearDown(self):
+        self.module.numpy_available = self.saved_numpy_available
+
+    def with_and_without_numpy(self):
+        # Runs the coordinate conversion both in batches with NumPy (if it
+        # is installed) and line by line
+        for use_numpy in ([True, False] if numpy_available else [False]):
+            self.module.numpy_available = use_numpy
+            yield use_numpy
+
+    def test_split_on_track(self):
+        # The input lines are read from files as bytes
+        bed_input = [b"browser position chr1:1-100\r\n",
+                     b"track name=first\r\n",
+                     b"chr1\t1\t10\r\n",
+                     b"chr1\t5\t20\tname\n",
+                     b"track name=second type=bedDetail\n",
+                     b"chr2\t1\t5\tn1\tid1\tdesc one\n",
+                     b"track name=third\n",
+                     b"chr3 1 5 n1 0 + 1 5 0 2 1,1 0,3\n"]
+        tracks = list(self.module.split_on_track(bed_input))
+        self.assertEqual([track["head"] for track in tracks],
+                         [[b"track name=first\n", b"chr1\t1\t10\n", b"chr1\t5\t20\tname\n"],
+                          [b"track name=second type=bedDetail\n", b"chr2\t1\t5\tn1\tid1\tdesc one\n"],
+                          [b"track name=third\n", b"chr3 1 5 n1 0 + 1 5 0 2 1,1 0,3\n"]])
+        self.assertEqual([(track["type"], track["delimiter"], track["num_cols"]) for track in tracks],
+                         [("spans", "\t", 4), ("bedDetail", "\t", 6), ("genes", " ", 12)])
+        # The lines of each track are spooled, without the browser line
+        self.assertEqual([track["file"].read() for track in tracks],
+                         [b"".join(track["head"]) for track in tracks])
+
+        # A file without a track line is a single track
+        tracks = list(self.module.split_on_track([b"chr1 1 10\n", b"chr1 5 20\n"]))
+        self.assertEqual([(track["type"], track["delimiter"], track["num_cols"]) for track in tracks],
+                         [("spans", " ", 3)])
+
+    def test_parse_coordinates(self):
+        lines = [[b"chr1", b"1", b"10"], [b"chr1", b"5", b"2147483647"]]
+        for use_numpy in self.with_and_without_numpy():
+            self.assertEqual(self.module.parse_coordinates(lines), [[1, 10], [5, 2147483647]] if use_numpy else None)
+            # Batches with any invalid coordinate are left to be validated
+            # line by line
+            for invalid_line in ([b"chr1", b"-1", b"10"], [b"chr1", b"1", b"x"], [b"chr1", b"1", b"10.5"],
+                                 [b"chr1", b"1", b"2147483648"], [b"chr1", b"1"]):
+                self.assertIsNone(self.module.parse_coordinates(lines + [invalid_line]))
+            self.assertIsNone(self.module.parse_coordinates([]))
+
+    def test_parse_span_lines(self):
+        for use_numpy in self.with_and_without_numpy():
+            context = (3, ["", 0, 0], False, "\t")
+            self.assertEqual(self.module.parse_span_lines(context, [b"chr1\t1\t10\n", b"chr1\t5\t20\n"]),
+                             [[b"chr1", 1, 10], [b"chr1", 5, 20]])
+            for invalid_line in (b"chr1\t-1\t10\n", b"chr1\t1\t-10\n", b"chr1\tx\t10\n"):
+                with self.assertRaises(AppError):
+                    self.module.parse_span_lines(context, [b"chr1\t1\t10\n", invalid_line])
+
+            # Missing scores, strands and thick ends take their defaults
+            context = (8, ["", 0, 0, "", 0, ".", 0, 0], False, " ")
+            self.assertEqual(self.module.parse_span_lines(context, [b"chr1 1 10 n1 . + 2 -\n", b"chr1 5 20 n2 7.5\n"]),
+                             [[b"chr1", 1, 10, b"n1", 0.0, b"+", 2, 0], [b"chr1", 5, 20, b"n2", 7.5, ".", 0, 0]])
+
+            # The last two columns of a bedDetail file are kept as they are
+            context = (4, ["", 0, 0, "", "", ""], True, "\t")
+            self.assertEqual(self.module.parse_span_lines(context, [b"chr2\t1\t5\tn1\tid1\tdesc one\n"]),
+                             [[b"chr2", 1, 5, b"n1", b"id1", b"desc one"]])
+
+class TestTsvToGTable(unittest.TestCase):
+    def assert_parsed_like_rows(self, types, column_types, rows):
+        # parse_rows must produce the rows (or fail on the batches) that
+        # parse_item and the validation in DXGTable.add_rows would
+        import dxpy
+        from dxpy.scripts.dx_tsv_to_gtable import parse_item, parse_rows
+        table = dxpy.DXGTable()
+        table._columns = [dxpy.DXGTable.make_column_desc("col" + str(i), column_type)
+                          for i, column_type in enumerate(column_types)]
+        try:
+            expected = []
+            for row in rows:
+                expected.append([parse_item(row[i], types[i]) for i in range(len(types))])
+                table._check_row_is_valid(expected[-1])
+        except (ValueError, IndexError):
+            expected = None
+        if expected is None:
+            with self.assertRaises(ValueError):
+                parse_rows(types, rows)
+        else:
+            parsed = [list(row) for row in parse_rows(types, rows)]
+            self.assertEqual(parsed, expected)
+            self.assertEqual([[type(value) for value in row] for row in parsed],
+                             [[type(value) for value in row] for row in expected])
+        return expected
+
+    def test_parse_rows(self):
+        types = ["string", "int", "float", "boolean"]
+        column_types = ["string", "int64", "double", "boolean"]
+        rows = [["a", "1", "1.5", "true"],
+                ["b", "-2", "3", "False"],
+                ["c", " 0", "1e3", "0"],
+                ["d", "7", "-2.25", "f"]]
+        self.assertIsNotNone(self.assert_parsed_like_rows(types, column_types, rows))
+        # Boolean spellings
+        for value in ["1", "0", "t", "T", "true", "f", "F", "FALSE", "no", "yes", ""]:
+            self.assertIsNotNone(self.assert_parsed_like_rows(types, column_types, [["a", "1", "1", value]]))
+        # Extra columns are ignored
+        self.assertEqual(self.assert_parsed_like_rows(types, column_types, [["a", "1", "1", "0", "extra"]] + rows)[0],
+                         ["a", 1, 1.0, False])
+        self.assertEqual(self.assert_parsed_like_rows(types, column_types, []), [])
+
+        # Short rows and invalid values fail the whole batch
+        self.assertIsNone(self.assert_parsed_like_rows(types, column_types, rows + [["e", "1", "1"]]))
+        for int_value in ["1.5", "x", ""]:
+            self.assertIsNone(self.assert_parsed_like_rows(types, column_types, rows + [["e", int_value, "1", "0"]]))
+        self.assertIsNone(self.assert_parsed_like_rows(types, column_types, rows + [["e", "1", "x", "0"]]))
+
+        # Values too large for an int are longs in Python 2, which are
+        # rejected
+        result = self.assert_parsed_like_rows(types, column_types, rows + [["e", str(2**63), "1", "0"]])
+        self.assertEqual(result is None, USING_PYTHON2)
+        self.assertIsNotNone(self.assert_parsed_like_rows(types, column_types, rows + [["e", str(2**62), "1", "0"]]))
+
+class TestMappedSequence(unittest.TestCase):
+    def test_mapped_sequence(self):
+        with tempfile.NamedTemporaryFile() as fd:
+            fd.write(b"ACGTNacgt")
+            fd.flush()
+            sequence = MappedSequence(fd.name)
+            self.assertEqual(len(sequence), 9)
+            self.assertEqual(sequence[0], "A")
+            self.assertEqual(sequence[5], "a")
+            self.assertEqual(sequence[-1], "t")
+            self.assertEqual(sequence[2:5], "GTN")
+            with self.assertRaises(IndexError):
+                sequence[9]
+            sequence.close()
+
+        with tempfile.NamedTemporaryFile() as fd:
+            sequence = MappedSequence(fd.name)
+            self.assertEqual(len(sequence), 0)
+            with self.assertRaises(IndexError):
+                sequence[0]
+
+class TestDownloadURL(unittest.TestCase):
+    def file_download(self, dxid, args, **kwargs):
+        self.requests.append(args)
+        if args["preauthenticated"]:
+            return {"url": "https://dl/" + dxid + "/preauthenticated/" + args.get("filename", "")}
+        return {"url": "https://dl/" + dxid + "/" + args.get("filename", ""), "headers": {"Authorization": "x"}}
+
+    def setUp(self):
+        import dxpy.api
+        self.requests = []
+        self.saved_file_download = dxpy.api.file_download
+        dxpy.api.file_download = self.file_download
+
+    def tearDown(self):
+        import dxpy.api
+        dxpy.api.file_download = self.saved_file_download
+
+    def test_download_url_reuse(self):
+        dxfile = DXFile("file-B55ZF5kZKQGz1Xxyb5FQ0003")
+        self.assertEqual(dxfile.get_download_url(), ("https://dl/file-B55ZF5kZKQGz1Xxyb5FQ0003/", {"Authorization": "x"}))
+        self.assertEqual(dxfile.get_download_url()[0], "https://dl/file-B55ZF5kZKQGz1Xxyb5FQ0003/")
+        self.assertEqual(len(self.requests), 1)
+
+        # A URL is only reused for the same arguments
+        self.assertEqual(dxfile.get_download_url(preauthenticated=True, filename="a"),
+                         ("https://dl/file-B55ZF5kZKQGz1Xxyb5FQ0003/preauthenticated/a", {}))
+        self.assertEqual(dxfile.get_download_url(filename="b")[0], "https://dl/file-B55ZF5kZKQGz1Xxyb5FQ0003/b")
+        self.assertEqual(len(self.requests), 3)
+
+        # Or for the same file
+        dxfile.set_ids("file-B55ZF5kZKQGz1Xxyb5FQ0004")
+        self.assertEqual(dxfile.get_download_url(filename="b")[0], "https://dl/file-B55ZF5kZKQGz1Xxyb5FQ0004/b")
+        self.assertEqual(len(self.requests), 4)
+
+        # Expired URLs are not reused
+        dxfile.get_download_url(duration=30, filename="b")
+        dxfile.get_download_url(duration=30, filename="b")
+        self.assertEqual(len(self.requests), 6)
+
+class FakeMetadataCache(MetadataCache):
+    # Serves the "modified" timestamps of projects from a dict instead
+    # of the API server
+    def __init__(self, cache_dir, modified, **kwargs):
+        MetadataCache.__init__(self, cache_dir, **kwargs)
+        self.modified = modified
+        self.num_describes = 0
+
+    def _get_modified(self, project):
+        self.num_describes += 1
+        return self.modified.get(project)
+
+class TestMetadataCaching(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = os.path.join(tempfile.mkdtemp(), "cache")
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.cache_dir))
+
+    def test_global_entries(self):
+        cache = MetadataCache(self.cache_dir)
+        key = cache.make_key("project_id", "foo")
+        self.assertIsNone(cache.lookup(key))
+        cache.put(key, "project-0000000000000000000000pb")
+        # Entries are shared with other instances (and processes)
+        self.assertEqual(MetadataCache(self.cache_dir).lookup(key), "project-0000000000000000000000pb")
+        self.assertEqual(cache.get(key, lambda: self.fail("Should not be computed")),
+                         "project-0000000000000000000000pb")
+        # ... until they expire
+        self.assertIsNone(MetadataCache(self.cache_dir, ttl=0).lookup(key))
+        cache.invalidate()
+        self.assertIsNone(cache.lookup(key))
+
+    def test_project_entries(self):
+        modified = {"project-0000000000000000000000pb": 1}
+        cache = FakeMetadataCache(self.cache_dir, modified)
+        key = cache.make_key("folders", "/")
+        self.assertEqual(cache.get_in_project("project-0000000000000000000000pb", key, lambda: ["/a"]), ["/a"])
+        self.assertEqual(cache.get_in_project("project-0000000000000000000000pb", key, lambda: ["/b"]), ["/a"])
+        self.assertEqual(cache.num_describes, 1)
+
+        # Once the TTL has passed, entries are kept as long as the project is unmodified
+        cache.ttl = 0
+        self.assertEqual(cache.get_in_project("project-0000000000000000000000pb", key, lambda: ["/b"]), ["/a"])
+        self.assertEqual(cache.num_describes, 2)
+        modified["project-0000000000000000000000pb"] = 2
+        self.assertEqual(cache.get_in_project("project-0000000000000000000000pb", key, lambda: ["/b"]), ["/b"])
+
+        # Projects that cannot be described are not cached
+        self.assertEqual(cache.get_in_project("container-000000000000000000000000", key, lambda: [1]), [1])
+        self.assertEqual(cache.get_in_project("container-000000000000000000000000", key, lambda: [2]), [2])
+
+        cache.clear()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+class TestLazyImports(unittest.TestCase):
+    def test_cold_import(self):
+        # Importing dxpy must not import the bindings, which are loaded
+        # when first used
+        code = ("import sys, time, json\n"
+                "start = time.time()\n"
+                "import dxpy\n"
+                "import_time = time.time() - start\n"
+                "loaded = sorted(name for name in sys.modules if name.startswith('dxpy.') and sys.modules[name])\n"
+                "print(json.dumps([loaded, import_time]))\n")
+        loaded, import_time = json.loads(subprocess.check_output([sys.executable, "-c", code]).decode("utf-8"))
+        self.assertFalse([name for name in loaded if name.startswith(("dxpy.bindings", "dxpy.api", "dxpy.dxlog"))])
+        # A loose bound (the import takes well under 0.2s), which only
+        # catches gross regressions such as eagerly imported bindings
+        self.assertLess(import_time, 1.0)
+
+    def test_lazy_attributes(self):
+        import dxpy
+        from dxpy.bindings.dxfile import DXFile as _DXFile
+        from dxpy.bindings.search import find_data_objects as _find_data_objects
+        from dxpy.utils.exec_utils import entry_point as _entry_point
+        self.assertIs(dxpy.DXFile, _DXFile)
+        self.assertIs(dxpy.bindings.DXFile, _DXFile)
+        self.assertIs(dxpy.find_data_objects, _find_data_objects)
+        self.assertIs(dxpy.entry_point, _entry_point)
+        self.assertIs(dxpy.utils.entry_point, _entry_point)
+        self.assertIs(dxpy.search, dxpy.bindings.search)
+        self.assertIn("DXRecord", dir(dxpy))
+        self.assertFalse(hasattr(dxpy, "no_such_attribute"))
+        namespace = {}
+        exec("from dxpy import *", namespace)
+        self.assertIs(namespace["DXFile"], _DXFile)
+
+class TestLazySubparsers(unittest.TestCase):
+    def test_lazy_subparsers(self):
+        parser = argparse.ArgumentParser()
+        subparsers = parser.add_subparsers()
+        lazy_subparsers = make_subparsers_lazy(subparsers)
+        built = []
+
+        def add_builder(name):
+            def build():
+                built.append(name)
+                subparsers.add_parser(name).add_argument('--' + name)
+            lazy_subparsers.add_builder(name, build)
+        for name in "foo", "bar":
+            add_builder(name)
+
+        self.assertEqual(list(subparsers.choices), ["foo", "bar"])
+        self.assertIn("bar", subparsers.choices)
+        self.assertEqual(built, [])
+        self.assertEqual(parser.parse_args(["bar", "--bar", "1"]).bar, "1")
+        self.assertEqual(built, ["bar"])
+        self.assertEqual([name for name, _parser in lazy_subparsers.items()], ["bar"])
+        lazy_subparsers.build_all()
+        self.assertEqual(built, ["bar", "foo"])
+        with self.assertRaises(SystemExit):
+            parser.parse_args(["baz"])
+
+    def test_dx_startup(self):
+        # Importing the dx client must not build the parsers of its
+        # subcommands; running one builds only its own parser
+        code = ("import sys, json\n"
+                "from dxpy.scripts import dx\n"
+                "num_built = len(dx.parser_map)\n"
+                "dx.parser.parse_args(['ls', '-l'])\n"
+                "print(json.dumps([num_built, sorted(dx.parser_map)]))\n")
+        num_built, built = json.loads(subprocess.check_output([sys.executable, "-c", code]).decode("utf-8"))
+        self.assertEqual(num_built, 0)
+        self.assertEqual(built, ["ls"])
+
+class TestDXCommands(unittest.TestCase):
+    def test_rm_glob_matching_folders_and_objects(self):
+        # Without -r, the objects matching a glob are removed, and only the
+        # matching folders are refused (like rm in the shell)
+        code = ("import sys, json, argparse\n"
+                "from dxpy.scripts import dx\n"
+                "removed = []\n"
+                "dx.resolve_glob_path = lambda path, folder_tries, describe: "
+                "('project-B55ZF5kZKQGz1Xxyb5FQ0003', ['/a/sub'], [{'id': 'file-1'}, {'id': 'file-2'}])\n"
+                "dx.dxpy.api.project_remove_folder = lambda project, input: removed.append(['folder', input['folder']])\n"
+                "dx.dxpy.api.project_remove_objects = lambda project, input: removed.append(['objects', input['objects']])\n"
+                "results = []\n"
+                "for recursive in False, True:\n"
+                "    try:\n"
+                "        dx.rm(argparse.Namespace(paths=['/a/*'], recursive=recursive, all=False))\n"
+                "        exit_code = 0\n"
+                "    except SystemExit as e:\n"
+                "        exit_code = e.code\n"
+                "    results.append([exit_code, removed[:]])\n"
+                "    del removed[:]\n"
+                "print(json.dumps(results))\n")
+        output = subprocess.check_output([sys.executable, "-c", code]).decode("utf-8").splitlines()
+        self.assertIn("/a/sub", " ".join(output[:-1]))
+        results = [[exit_code, sorted(removed)] for exit_code, removed in json.loads(output[-1])]
+        self.assertEqual(results, [[1, [["objects", ["file-1", "file-2"]]]],
+                                   [0, [["folder", "/a/sub"], ["objects", ["file-1", "file-2"]]]]])
+
+    def test_project_changes_invalidate_project_names(self):
+        # Creating or renaming a project discards the cached name -> ID
+        # mappings, which may no longer be unambiguous
+        cache_dir = tempfile.mkdtemp()
+        try:
+            code = ("import sys, json, argparse\n"
+                    "from dxpy.scripts import dx\n"
+                    "from dxpy.utils.metadata_cache import MetadataCache\n"
+                    "cache = MetadataCache(sys.argv[1])\n"
+                    "key = MetadataCache.make_key('project_id', 'foo')\n"
+                    "dx.get_metadata_cache = lambda: cache\n"
+                    "dx.dxpy.api.project_new = lambda input: {'id': 'project-B55ZF5kZKQGz1Xxyb5FQ0004'}\n"
+                    "dx.dxpy.api.project_update = lambda project, input: {'id': project}\n"
+                    "dx.resolve_to_objects_or_project = lambda path, all: "
+                    "('project-B55ZF5kZKQGz1Xxyb5FQ0003', '/', None)\n"
+                    "results = []\n"
+                    "cache.put(key, 'project-B55ZF5kZKQGz1Xxyb5FQ0003')\n"
+                    "dx.new_project(argparse.Namespace(name='foo', brief=True, select=False))\n"
+                    "results.append(cache.lookup(key))\n"
+                    "cache.put(key, 'project-B55ZF5kZKQGz1Xxyb5FQ0003')\n"
+                    "dx.rename(argparse.Namespace(path='foo:', name='bar', all=False))\n"
+                    "results.append(cache.lookup(key))\n"
+                    "print(json.dumps(results))\n")
+            output = subprocess.check_output([sys.executable, "-c", code, cache_dir]).decode("utf-8").splitlines()
+            self.assertEqual(json.loads(output[-1]), [None, None])
+        finally:
+            shutil.rmtree(cache_dir)
+
+class TestFolderTrie(unittest.TestCase):
+    def setUp(self):
+        self.trie = FolderTrie(["/", "/a", "/a/b", "/a/b/c", "/ab", "/ab/c", "/ab/d", "/x*y", "/xzy", "/a b"])
+
+    def test_list_subfolders(self):
+        self.assertTrue("/a/b" in self.trie)
+        self.assertFalse("/a/c" in self.trie)
+        self.assertEqual(self.trie.list_subfolders("/"), ["/a", "/a b", "/ab", "/x*y", "/xzy"])
+        self.assertEqual(self.trie.list_subfolders("/a"), ["/a/b"])
+        self.assertEqual(self.trie.list_subfolders("/a/", recurse=True), ["/a/b", "/a/b/c"])
+        self.assertEqual(self.trie.list_subfolders("/ab", recurse=True), ["/ab/c", "/ab/d"])
+        self.assertEqual(self.trie.list_subfolders("/nonexistent"), [])
+
+    def test_glob(self):
+        self.assertEqual(self.trie.glob("/"), ["/"])
+        self.assertEqual(self.trie.glob("/a/b"), ["/a/b"])
+        self.assertEqual(self.trie.glob("/a/c"), [])
+        self.assertEqual(self.trie.glob("/a*"), ["/a", "/a b", "/ab"])
+        self.assertEqual(self.trie.glob("/a?"), ["/ab"])
+        # Wildcards do not match across folders
+        self.assertEqual(self.trie.glob("/a*/c"), ["/ab/c"])
+        self.assertEqual(self.trie.glob("/*/*"), ["/a/b", "/ab/c", "/ab/d"])
+        # Escaped characters are matched literally
+        self.assertEqual(self.trie.glob("/x*y"), ["/x*y", "/xzy"])
+        self.assertEqual(self.trie.glob("/x\\*y"), ["/x*y"])
+        self.assertEqual(self.trie.glob("/a\\ *"), ["/a b"])
+
+class TestConcurrentCalls(unittest.TestCase):
+    def test_split_into_batches(self):
+        self.assertEqual(split_into_batches([]), [])
+        self.assertEqual(split_into_batches(list(range(5)), 2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(split_into_batches(list(range(2500))), [list(range(1000)), list(range(1000, 2000)),
+                                                                 list(range(2000, 2500))])
+
+    def test_run_concurrently(self):
+        def call(i):
+            time.sleep(0.05)
+            if i % 4 == 0:
+                raise ValueError(str(i))
+            return i * 2
+        start = time.time()
+        results = list(run_concurrently([lambda i=i: call(i) for i in range(16)], max_workers=8))
+        # 8 calls at a time, rather than one
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual([result for result, error in results], [None if i % 4 == 0 else i * 2 for i in range(16)])
+        self.assertEqual([str(error) if error else None for result, error in results],
+                         [str(i) if i % 4 == 0 else None for i in range(16)])
+
+    def test_resolve_existing_paths_prompts(self):
+        import dxpy
+        from dxpy.utils import resolver
+        picks = []
+        def find_projects(name=None, **kwargs):
+            time.sleep(0.05)
+            return [{"id": "project-B55ZF5kZKQGz1Xxyb5FQ000" + str(i), "level": "VIEW"} for i in range(2)]
+        def pick(choices, **kwargs):
+            picks.append(threading.current_thread())
+            return 1
+        saved = dxpy.find_projects, resolver.pick, resolver.INTERACTIVE_CLI, os.environ.get("DX_METADATA_CACHE")
+        dxpy.find_projects, resolver.pick, resolver.INTERACTIVE_CLI = find_projects, pick, True
+        os.environ["DX_METADATA_CACHE"] = "0"
+        try:
+            # Ambiguous project names are only prompted for by the
+            # consumer of the results, one path at a time
+            results = [(path, resolve()) for path, resolve in
+                       resolver.resolve_existing_paths(["shared:/a/", "shared:/b/"], expected="folder")]
+        finally:
+            dxpy.find_projects, resolver.pick, resolver.INTERACTIVE_CLI, environ_value = saved
+            if environ_value is None:
+                del os.environ["DX_METADATA_CACHE"]
+            else:
+                os.environ["DX_METADATA_CACHE"] = environ_value
+        self.assertEqual(results, [("shared:/a/", ("project-B55ZF5kZKQGz1Xxyb5FQ0001", "/a", None)),
+                                   ("shared:/b/", ("project-B55ZF5kZKQGz1Xxyb5FQ0001", "/b", None))])
+        self.assertEqual(picks, [threading.current_thread()] * 2)
+
+class TestJSONArrayPrinter(unittest.TestCase):
+    def test_json_array(self):
+        # The streamed output is the same as that of json.dumps
+        for elements in [], [{}], [{"id": "job-B55ZF5kZKQGz1Xxyb5FQ0003", "input": {"a": [1, None]}}, [], "x", 2]:
+            for json_lines in False, True:
+                output = tempfile.TemporaryFile(mode="w+")
+                printer = JSONArrayPrinter(json_lines=json_lines, file=output)
+                for element in elements:
+                    printer.append(element)
+                printer.close()
+                output.seek(0)
+                if json_lines:
+                    self.assertEqual([json.loads(line) for line in output], elements)
+                else:
+                    self.assertEqual(output.read(), json.dumps(elements, indent=4) + "\n")
+                output.close()
+
+class TestFormatTree(unittest.TestCase):
+    def test_iter_format_tree(self):
+        tree = collections.OrderedDict([("a", collections.OrderedDict([("b", collections.OrderedDict([("c", None)])),
+                                                                       ("d\ne", None)])),
+                                        ("f", collections.OrderedDict()),
+                                        ("g", None)])
+        self.assertEqual(format_tree(tree, root="/"),
+                         "/\n├── a\n│   ├── b\n│   │   └── c\n│   └── d\n│       e\n├── f\n└── g")
+        self.assertEqual(list(iter_format_tree(tree, root="/")), format_tree(tree, root="/").split("\n"))
+
+        # Subtrees are only accessed once the lines before them are consumed
+        accessed = []
+        class LazyTree(collections.Mapping):
+            def __init__(self, name):
+                self.name = name
+            def _children(self):
+                accessed.append(self.name)
+                return collections.OrderedDict([(self.name + "1", None), (self.name + "2", None)])
+            def __getitem__(self, key):
+                return self._children()[key]
+            def __iter__(self):
+                return iter(self._children())
+            def __len__(self):
+                return 2
+        lines = iter_format_tree(collections.OrderedDict([("x", LazyTree("x")), ("y", LazyTree("y"))]))
+        self.assertEqual([next(lines), next(lines)], ["├── x", "│   ├── x1"])
+        self.assertNotIn("y", accessed)
+        self.assertEqual(list(lines), ["│   └── x2", "└── y", "    ├── y1", "    └── y2"])
+
+class TestSearchPaging(unittest.TestCase):
+    def find(self, query, **kwargs):
+        # Serves the integers 0..num_results-1 as search results
+        self.queries.append(query)
+        start = query.get("starting", 0)
+        end = min(start + query["limit"], self.num_results)
+        return {"results": [{"id": i} for i in range(start, end)], "next": end if end < self.num_results else None}
+
+    def setUp(self):
+        self.queries = []
+        self.num_results = 1000
+
+    def test_paging(self):
+        from dxpy.bindings import search
+        results = list(search._find(self.find, {}, None, False, 10))
+        self.assertEqual([result["id"] for result in results], list(range(1000)))
+        page_sizes = [query["limit"] for query in self.queries]
+        self.assertEqual(page_sizes[:3], [10, 20, 40])
+        self.assertTrue(all(size <= search.MAX_PAGE_SIZE for size in page_sizes))
+
+        # No more results than the limit are requested
+        self.queries = []
+        results = list(search._find(self.find, {}, 15, False, 10))
+        self.assertEqual(len(results), 15)
+        self.assertEqual([query["limit"] for query in self.queries], [10, 5])
+
+    def test_prefetching(self):
+        from dxpy.bindings import search
+        pages = search._SearchPages(self.find, {}, None, 10, 2, {})
+        next(pages)
+        # The two next pages are fetched in the background, then it stops
+        # until the caller consumes them
+        for _ in range(100):
+            if len(self.queries) == 3:
+                break
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(len(self.queries), 3)
+
+    def test_page_size(self):
+        from dxpy.bindings.search import _next_page_size, TARGET_PAGE_SECONDS, TARGET_PAGE_BYTES
+        self.assertEqual(_next_page_size(100, 100, 0.01, 1000), 200)
+        self.assertEqual(_next_page_size(800, 800, 0.01, 1000), 1000)
+        # Slow or big pages are made smaller
+        self.assertEqual(_next_page_size(100, 100, TARGET_PAGE_SECONDS * 4, 1000), 25)
+        self.assertEqual(_next_page_size(100, 100, 0.01, TARGET_PAGE_BYTES * 2), 50)
+
+@unittest.skipUnless(sys.platform.startswith('linux'), 'The dx server is only supported on Linux')
+@unittest.skipUnless(find_executable('dx-server') and find_executable('dx-client'),
+                     'dx-server and dx-client are not installed')
+class TestDXServer(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.env = dict(os.environ, DX_SERVER_SOCKET=os.path.join(self.tempdir, 'dx-server.sock'))
+        subprocess.check_call(['dx-server', 'start', '--idle-timeout', '60'], env=self.env)
+
+    def tearDown(self):
+        subprocess.call(['dx-server', 'stop'], env=self.env)
+        shutil.rmtree(self.tempdir)
+
+    def test_dx_client(self):
+        self.assertIn('0 commands run', subprocess.check_output(['dx-server', 'status'], env=self.env).decode())
+        expected_version = subprocess.check_output(['dx', '--version']).decode()
+        # The output of the command continues where the client is in the
+        # file, and the client continues after it
+        output_filename = os.path.join(self.tempdir, 'output')
+        with open(output_filename, 'w') as output:
+            output.write('before\n')
+            output.flush()
+            subprocess.check_call(['dx-client', '--version'], stdout=output, env=self.env)
+            output.write('after\n')
+        with open(output_filename) as output:
+            self.assertEqual(output.read(), 'before\n' + expected_version + 'after\n')
+        self.assertEqual(subprocess.call(['dx-client', 'no-such-command'], stderr=open(os.devnull, 'w'),
+                                         env=self.env),
+                         2)
+        self.assertIn('2 commands run', subprocess.check_output(['dx-server', 'status'], env=self.env).decode())
+
+class TestDXServerCommands(unittest.TestCase):
+    def test_resolver_cache_reset(self):
+        from dxpy import cli
+        from dxpy.cli import server
+        from dxpy.utils import resolver
+        seen = []
+        class FakeDX(object):
+            state = {}
+            upload_seen_paths = set()
+            def main(self):
+                seen.append(dict(resolver.cached_project_names))
+
+        # Project names resolved for a previous command (maybe of another
+        # client) are not reused
+        resolver.cached_project_names["my project"] = "project-B55ZF5kZKQGz1Xxyb5FQ0003"
+        saved_environ, saved_argv, saved_cwd = dict(os.environ), sys.argv, os.getcwd()
+        saved_interactive = cli.INTERACTIVE_CLI
+        try:
+            request = {"env": dict(os.environ), "cwd": saved_cwd, "argv": ["ls"], "ppid": os.getppid()}
+            self.assertEqual(server.DXServer(None)._run_dx(FakeDX(), request), 0)
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_environ)
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+            server.DXServer._set_interactive_cli(saved_interactive)
+        self.assertEqual(seen, [{}])
+
 class TestDXUtils(unittest.TestCase):
     def test_dxjsonencoder(self):
         f = DXFile("file-" + "x"*24, project="project-" + "y"*24)